@@ -1,22 +1,126 @@
-import os
+import importlib
+import threading
 from flask import Flask, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 
-# .env 파일에서 환경 변수 로드
-load_dotenv()
-
 # --- 로컬 모듈 및 확장 기능 import ---
 from backend.config import Config
 from backend.extensions import db, bcrypt, jwt
-from backend.routes.auth import auth_bp
-from backend.routes.assignments import assignments_bp
-from backend.routes.submissions import submissions_bp
-from backend.routes.grades import grades_bp
-from backend.routes.admin import admin_bp
-from backend.routes.qa_logs import qa_logs_bp
-from backend.routes.files import files_bp
-from backend.routes.courses import courses_bp
+from backend.compression import text_compression
+from backend.logs import log_pipeline
+from backend.profiling import request_profiler
+from backend.intake import assignment_cache, submission_intake
+from backend.reclaim import file_reclaimer
+from backend.storage import storage
+from backend.events import event_broker
+from backend.idempotency import idempotency_store
+from backend.ratelimit import rate_limiter
+from backend.user_cache import user_cache
+from backend.previews import preview_service
+from backend.similarity import similarity_engine
+from backend.versions import submission_versions
+from backend.jobs import job_runner
+from backend.archive import archive_store
+from backend.roster import roster_importer
+from backend.search import search_index
+from backend.mailer import outbound_mailer
+
+# 블루프린트 목록: (모듈 경로, 블루프린트 이름, URL prefix)
+# 라우트 모듈은 register_blueprints() 에서 import 되므로 LAZY_STARTUP 모드에서는 첫 요청까지 미뤄집니다.
+BLUEPRINTS = [
+    ('backend.routes.auth', 'auth_bp', '/api/auth'),
+    ('backend.routes.assignments', 'assignments_bp', '/api/assignments'),
+    ('backend.routes.submissions', 'submissions_bp', '/api/submissions'),
+    ('backend.routes.grades', 'grades_bp', '/api/grades'),
+    ('backend.routes.files', 'files_bp', '/api/files'),
+    ('backend.routes.admin', 'admin_bp', '/api/admin'),
+    ('backend.routes.qa_logs', 'qa_logs_bp', '/api/qa-logs'),
+    ('backend.routes.courses', 'courses_bp', '/api/courses'),
+    ('backend.routes.events', 'events_bp', '/api/events'),
+    ('backend.routes.dashboard', 'dashboard_bp', '/api/dashboard'),
+    ('backend.routes.similarity', 'similarity_bp', '/api/similarity'),
+    ('backend.routes.jobs', 'jobs_bp', '/api/jobs'),
+]
+
+# 구성 요소가 처음 쓸 때 import 하는 무거운 모듈 (backend/similarity.py 의 numpy 등)
+# LAZY_STARTUP 모드에서는 필요할 때까지 미루고, warm_app() 에서는 미리 불러 워커들이 공유하게 합니다.
+DEFERRED_IMPORTS = ('numpy',)
+
+_environment_loaded = False
+
+
+def load_environment():
+    """.env 파일에서 환경 변수를 로드합니다. (프로세스당 한 번)"""
+    global _environment_loaded
+    if not _environment_loaded:
+        load_dotenv()
+        _environment_loaded = True
+
+
+# Config 클래스가 환경 변수를 읽기 전에 로드되어야 합니다.
+load_environment()
+
+
+def register_blueprints(app):
+    """모든 API 엔드포인트를 등록합니다."""
+    for module_name, blueprint_name, url_prefix in BLUEPRINTS:
+        module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, blueprint_name), url_prefix=url_prefix)
+
+
+def import_deferred_modules():
+    for module_name in DEFERRED_IMPORTS:
+        importlib.import_module(module_name)
+
+
+class LazyBlueprintLoader:
+    """
+    첫 요청이 들어오는 시점에 라우트 모듈을 import 하고 블루프린트를 등록하는 WSGI 래퍼입니다.
+    워커 부팅 시간을 줄이기 위한 LAZY_STARTUP 모드에서 사용됩니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                register_blueprints(self.app)
+                self.loaded = True
+
+    def __call__(self, environ, start_response):
+        self.load()
+        return self.wsgi_app(environ, start_response)
+
+
+def warm_app(app):
+    """
+    지연 로딩된 구성 요소를 모두 불러옵니다.
+    gunicorn preload 모드에서 마스터 프로세스가 호출하면, fork 된 워커들이
+    import 된 모듈과 라우트 테이블을 copy-on-write 로 공유합니다.
+    """
+    loader = app.extensions.get('blueprint_loader')
+    if loader:
+        loader.load()
+    import_deferred_modules()
+    return app
+
+
+def start_workers(app):
+    """
+    영속 대기열(작업, 메일)을 처리하는 백그라운드 스레드를 띄웁니다.
+    스레드는 fork 를 넘어가지 않으므로 preload 마스터가 아니라 워커 프로세스마다 호출해야 합니다.
+    (gunicorn post_worker_init, ASGI lifespan)
+    """
+    for name in ('job_runner', 'outbound_mailer'):
+        app.extensions[name].start()
+
 
 def create_app(config_class=Config):
     """
@@ -28,36 +132,50 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
 
     # --- 2. 확장(Extensions) 초기화 ---
+    # 로깅은 다른 확장의 before_request 보다 먼저 상관 ID 를 정해야 하므로 가장 먼저 초기화합니다.
+    log_pipeline.init_app(app)
+    request_profiler.init_app(app)
     # CORS는 credentials를 지원하도록 명확하게 설정해야 합니다.
-    CORS(app, resources={r"/api/*": {"origins": "http://localhost:5173"}}, supports_credentials=True)
+    CORS(app, resources={r"/api/*": {"origins": app.config['CORS_ORIGINS']}}, supports_credentials=True,
+         expose_headers=['X-Total-Count', 'X-Request-ID', 'X-Profile-ID'])
     db.init_app(app)
+    text_compression.init_app(app)
     bcrypt.init_app(app)
     jwt.init_app(app) # JWT 초기화가 필수입니다.
+    assignment_cache.init_app(app)
+    user_cache.init_app(app)
+    submission_intake.init_app(app)
+    storage.init_app(app)
+    file_reclaimer.init_app(app)
+    event_broker.init_app(app)
+    idempotency_store.init_app(app)
+    rate_limiter.init_app(app)
+    preview_service.init_app(app)
+    similarity_engine.init_app(app)
+    submission_versions.init_app(app)
+    job_runner.init_app(app)
+    archive_store.init_app(app)
+    roster_importer.init_app(app)
+    search_index.init_app(app)
+    outbound_mailer.init_app(app)
 
     # --- 3. 블루프린트(Routes) 등록 ---
-    # 모든 API 엔드포인트를 등록합니다.
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(assignments_bp, url_prefix='/api/assignments')
-    app.register_blueprint(submissions_bp, url_prefix='/api/submissions')
-    app.register_blueprint(grades_bp, url_prefix='/api/grades')
-    app.register_blueprint(files_bp, url_prefix='/api/files')
-    app.register_blueprint(admin_bp, url_prefix='/api/admin')
-    app.register_blueprint(qa_logs_bp, url_prefix='/api/qa-logs')
-    app.register_blueprint(courses_bp, url_prefix='/api/courses')
-
-    # --- 4. 업로드 디렉토리 생성 ---
-    with app.app_context():
-        os.makedirs(app.config.get('ASSIGNMENT_UPLOAD_FOLDER', 'uploads/assignments'), exist_ok=True)
-        os.makedirs(app.config.get('SUBMISSION_UPLOAD_FOLDER', 'uploads/submissions'), exist_ok=True)
-
-    # --- 5. 전역 에러 핸들러 ---
+    if app.config.get('LAZY_STARTUP'):
+        loader = LazyBlueprintLoader(app)
+        app.wsgi_app = loader
+        app.extensions['blueprint_loader'] = loader
+    else:
+        register_blueprints(app)
+        import_deferred_modules()
+
+    # --- 4. 전역 에러 핸들러 ---
     @app.errorhandler(404)
     def page_not_found(e):
         return jsonify(error="The requested resource was not found."), 404
 
     @app.errorhandler(500)
     def internal_server_error(e):
-        app.logger.error(f"Internal Server Error: {e}")
+        app.logger.error("Internal Server Error: %s", e)
         return jsonify(error="An internal server error occurred."), 500
 
     return app
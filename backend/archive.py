@@ -0,0 +1,474 @@
+"""
+학기가 끝난 강의 보관 (archival)
+
+Submission / SubmissionFile / Grade / QALog 는 학기마다 계속 쌓이지만, 자주 조회되는 것은 현재 학기 강의뿐입니다.
+마지막 마감일이 ARCHIVE_AFTER_DAYS 일 이상 지난 강의를 강의 하나씩(한 트랜잭션씩) 다음과 같이 옮깁니다.
+
+1. 강의와 그 아래의 모든 행(수강 신청, 과제, 첨부, 제출물, 파일, 성적, 버전, 서명, Q&A)을
+   외래 키 순서대로 chunk_size 개씩 읽어 'archives/courses/<강의 ID>.jsonl.gz' 에 씁니다.
+2. ArchivedCourse 와 ArchiveIndex(과제/제출물/파일/학생 ID -> 강의) 행을 추가하고,
+   원래 행은 backend/deletion.py 와 같은 bulk DELETE 로 지웁니다. 지운 행 수가 보관한 행 수와 다르면
+   (보관 도중 제출/삭제가 있었으면) 롤백하고 보관 파일도 지웁니다.
+
+업로드 파일, 미리보기, 버전 blob, 마감 처리 결과물은 저장소에 그대로 남기며, 파일 정리(reclaim sweep,
+versions/previews prune)는 ArchiveIndex 를 보고 이 파일들을 건너뜁니다.
+
+보관된 데이터는 기존 GET 라우트가 DB 에서 찾지 못했을 때 archive_store 로 읽기 전용으로 보여 줍니다.
+보관 파일은 ARCHIVE_CACHE_SIZE 개까지 프로세스 메모리에 풀어 둡니다. (버전/서명은 읽지 않습니다)
+
+    python -m backend.archive list                          # 보관 대상 강의와 보관된 강의
+    python -m backend.archive run [--limit N] [--dry-run]   # 보관 대상 강의를 하나씩 보관
+    python -m backend.archive course <courseId>             # 특정 강의 보관
+    python -m backend.archive restore <courseId>            # 보관된 강의를 원래 테이블로 복원
+"""
+import argparse
+import base64
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import DateTime, Enum, LargeBinary, delete, func, insert, select
+
+from backend.deletion import CHUNK_SIZE, _Deletion, _chunks
+from backend.extensions import db
+from backend.intake import assignment_cache
+from backend.models import (
+    ArchivedCourse, ArchiveIndex, Assignment, Attachment, Course, Enrollment, Grade, QALog, Submission,
+    SubmissionFile, SubmissionSignature, SubmissionVersion, User,
+)
+from backend.reclaim import file_reclaimer
+from backend.search import search_index
+from backend.storage import storage
+
+ARCHIVE_PREFIX = 'archives/courses'
+FORMAT_VERSION = 1
+
+# 보관 파일에 쓰는 순서 (외래 키 순서). 복원할 때도 이 순서로 INSERT 합니다.
+TABLES = (Course, Enrollment, Assignment, Attachment, Submission, SubmissionFile, Grade,
+          SubmissionVersion, SubmissionSignature, QALog)
+MODELS = {model.__tablename__: model for model in TABLES}
+
+# 조회 대체 경로에서 읽지 않는 테이블 (복원할 때만 필요합니다)
+_RESTORE_ONLY = {SubmissionVersion.__tablename__, SubmissionSignature.__tablename__}
+
+
+class ArchiveMismatch(Exception):
+    """보관 도중 원래 테이블의 행이 바뀌었을 때 발생합니다."""
+
+
+def archive_key(course_id):
+    return f"{ARCHIVE_PREFIX}/{course_id}.jsonl.gz"
+
+
+def _discard(key):
+    # CLI 는 회수 스레드를 기다리지 않고 끝나므로 바로 지우고, 실패하면 회수기에 맡깁니다.
+    try:
+        storage.delete(key)
+    except Exception:
+        file_reclaimer.enqueue([key])
+
+
+# --- 행 <-> JSON ---
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if hasattr(value, 'value'):      # enum
+        return value.value
+    return value
+
+
+def _decoders(model):
+    decoders = {}
+    for column in model.__table__.columns:
+        if isinstance(column.type, DateTime):
+            decoders[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Enum) and column.type.enum_class is not None:
+            decoders[column.name] = column.type.enum_class
+        elif isinstance(column.type, LargeBinary):
+            decoders[column.name] = base64.b64decode
+    return decoders
+
+
+_DECODERS = {name: _decoders(model) for name, model in MODELS.items()}
+
+
+def _decode(table, row):
+    for name, decoder in _DECODERS[table].items():
+        if row.get(name) is not None:
+            row[name] = decoder(row[name])
+    return row
+
+
+def _read_lines(key, skip=()):
+    """보관 파일을 (테이블, 행) 으로 한 줄씩 읽습니다. 첫 줄은 헤더입니다."""
+    with storage.open(key) as raw, gzip.open(raw, 'rt', encoding='utf-8') as f:
+        header = json.loads(next(f))
+        if header.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported archive format: {header.get('format')}")
+        for line in f:
+            table, row = json.loads(line)
+            if table not in skip:
+                yield table, row
+
+
+# --- 보관 ---
+def eligible_courses(older_than_days):
+    """마지막 마감일(과제가 없으면 생성일)이 older_than_days 일 이상 지난 강의 ID 목록"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    last_due = (
+        select(func.max(Assignment.dueDate)).where(Assignment.courseId == Course.id).scalar_subquery()
+    )
+    return db.session.scalars(
+        select(Course.id)
+        .where(Course.createdAt < cutoff, func.coalesce(last_due, Course.createdAt) < cutoff)
+        .order_by(Course.createdAt)
+    ).all()
+
+
+class _Writer:
+    """강의 하나의 행을 보관 파일에 쓰면서 행 수와 색인 항목을 모읍니다."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.counts = {}
+        self.index = []          # (kind, refId, fileUrl)
+        self.user_ids = set()
+
+    def rows(self, model, column, parent_ids):
+        """부모 ID 에 속한 행을 chunk_size 개씩 읽어 쓰고, 쓴 행을 차례로 돌려줍니다."""
+        table = model.__tablename__
+        self.counts[table] = 0
+        for chunk in _chunks(list(parent_ids), self.chunk_size):
+            for row in db.session.execute(select(model.__table__).where(column.in_(chunk))).mappings():
+                self.f.write(json.dumps([table, {k: _encode(v) for k, v in row.items()}], ensure_ascii=False) + '\n')
+                self.counts[table] += 1
+                yield row
+
+    def users(self):
+        # 이름/이메일은 조회 화면에 보여 주기 위한 보관 시점의 사본이며, 복원하지 않습니다.
+        for chunk in _chunks(sorted(self.user_ids), self.chunk_size):
+            for row in db.session.execute(select(User.id, User.name, User.email).where(User.id.in_(chunk))).mappings():
+                self.f.write(json.dumps(['user', dict(row)], ensure_ascii=False) + '\n')
+
+
+def _write_archive(f, course_id, chunk_size):
+    writer = _Writer(f, chunk_size)
+    f.write(json.dumps({'format': FORMAT_VERSION, 'courseId': course_id,
+                        'archivedAt': datetime.utcnow().isoformat()}) + '\n')
+    (course,) = list(writer.rows(Course, Course.id, [course_id]))
+    writer.user_ids.add(course['teacherId'])
+    for row in writer.rows(Enrollment, Enrollment.courseId, [course_id]):
+        writer.user_ids.add(row['studentId'])
+        writer.index.append(('student', row['studentId'], None))
+
+    assignment_ids = [row['id'] for row in writer.rows(Assignment, Assignment.courseId, [course_id])]
+    writer.index.extend(('assignment', assignment_id, None) for assignment_id in assignment_ids)
+    for row in writer.rows(Attachment, Attachment.assignmentId, assignment_ids):
+        writer.index.append(('attachment', row['id'], row['fileUrl']))
+    submission_ids = []
+    for row in writer.rows(Submission, Submission.assignmentId, assignment_ids):
+        submission_ids.append(row['id'])
+        writer.user_ids.add(row['studentId'])
+        writer.index.append(('submission', row['id'], None))
+        writer.index.append(('student', row['studentId'], None))
+    for row in writer.rows(SubmissionFile, SubmissionFile.submissionId, submission_ids):
+        writer.index.append(('submissionfile', row['id'], row['fileUrl']))
+    for row in writer.rows(Grade, Grade.submissionId, submission_ids):
+        writer.user_ids.add(row['gradedBy'])
+    for row in writer.rows(SubmissionVersion, SubmissionVersion.submissionId, submission_ids):
+        writer.index.extend(('versionblob', entry['sha256'], None) for entry in json.loads(row['files'])
+                            if entry['sha256'])
+    for _ in writer.rows(SubmissionSignature, SubmissionSignature.submissionId, submission_ids):
+        pass
+    for row in writer.rows(QALog, QALog.assignmentId, assignment_ids):
+        writer.user_ids.add(row['studentId'])
+    writer.users()
+    return course, assignment_ids, writer
+
+
+def archive_course(course_id, chunk_size=None):
+    """강의 하나를 보관하고 테이블별 보관 행 수를 반환합니다."""
+    chunk_size = chunk_size or CHUNK_SIZE
+    if db.session.get(Course, course_id) is None:
+        raise KeyError(course_id)
+    key = archive_key(course_id)
+    fd, tmp_path = tempfile.mkstemp(suffix='.jsonl.gz')
+    saved = False
+    try:
+        with os.fdopen(fd, 'w+b') as tmp:
+            with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                course, assignment_ids, writer = _write_archive(f, course_id, chunk_size)
+            tmp.seek(0)
+            size = storage.save(key, tmp, 'application/gzip')
+            saved = True
+
+        db.session.add(ArchivedCourse(id=course_id, name=course['name'], teacherId=course['teacherId'],
+                                      archiveKey=key, rowCounts=json.dumps(writer.counts), size=size))
+        entries = {(kind, ref_id): file_url for kind, ref_id, file_url in writer.index}
+        rows = [{'kind': kind, 'refId': ref_id, 'courseId': course_id, 'fileUrl': file_url}
+                for (kind, ref_id), file_url in entries.items()]
+        for chunk in _chunks(rows, chunk_size):
+            db.session.execute(insert(ArchiveIndex), chunk)
+
+        deletion = _Deletion(chunk_size, keep_files=True)
+        deletion.assignments(assignment_ids)
+        deletion.delete(Enrollment, Enrollment.courseId, [course_id])
+        deletion.delete(Course, Course.id, [course_id])
+        changed = {table: (count, deletion.counts.get(table, 0)) for table, count in writer.counts.items()
+                   if deletion.counts.get(table, 0) != count}
+        if changed:
+            raise ArchiveMismatch(f"Rows changed while archiving course {course_id}: {changed}")
+        deletion.commit(assignment_ids)
+        return writer.counts
+    except Exception:
+        db.session.rollback()
+        if saved:
+            _discard(key)
+        raise
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def restore_course(course_id, chunk_size=None):
+    """보관된 강의를 원래 테이블로 되돌리고 테이블별 복원 행 수를 반환합니다."""
+    chunk_size = chunk_size or CHUNK_SIZE
+    archived = db.session.get(ArchivedCourse, course_id)
+    if archived is None:
+        raise KeyError(course_id)
+    counts, batch, batch_table = {}, [], None
+
+    def flush():
+        if batch:
+            db.session.execute(insert(MODELS[batch_table].__table__), batch)
+            counts[batch_table] = counts.get(batch_table, 0) + len(batch)
+            batch.clear()
+
+    try:
+        for table, row in _read_lines(archived.archiveKey, skip={'user'}):
+            if table != batch_table or len(batch) >= chunk_size:
+                flush()
+                batch_table = table
+            batch.append(_decode(table, row))
+        flush()
+        assignment_ids = db.session.scalars(
+            select(ArchiveIndex.refId).where(ArchiveIndex.courseId == course_id, ArchiveIndex.kind == 'assignment')
+        ).all()
+        db.session.execute(delete(ArchiveIndex).where(ArchiveIndex.courseId == course_id))
+        key = archived.archiveKey
+        db.session.delete(archived)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    _discard(key)
+    archive_store.forget(course_id)
+    search_index.mark_stale()
+    for assignment_id in assignment_ids:
+        assignment_cache.invalidate(assignment_id)
+    return counts
+
+
+# --- 조회 ---
+class CourseArchive:
+    """
+    보관된 강의 하나를 메모리에 푼 것. ORM 객체와 같은 속성 이름을 가진 읽기 전용 객체이므로
+    라우트의 *_to_dict 함수를 그대로 쓸 수 있습니다. 사용자(student/teacher/grader)는 보관 시점의 사본입니다.
+    """
+
+    def __init__(self, course_id, lines):
+        tables = defaultdict(list)
+        users = {}
+        for table, row in lines:
+            if table == 'user':
+                users[row['id']] = SimpleNamespace(**row)
+            else:
+                tables[table].append(SimpleNamespace(**_decode(table, row)))
+
+        self.course = tables['course'][0]
+        self.course.teacher = users.get(self.course.teacherId)
+        self.enrollments = tables['enrollment']
+        for enrollment in self.enrollments:
+            enrollment.student = users.get(enrollment.studentId)
+
+        self.assignments = {a.id: a for a in tables['assignment']}
+        for assignment in self.assignments.values():
+            assignment.teacher = users.get(assignment.teacherId)
+            assignment.course = self.course
+            assignment.attachments, assignment.submissions, assignment.qa_logs = [], [], []
+        self.attachments = {a.id: a for a in tables['attachment']}
+        for attachment in self.attachments.values():
+            attachment.assignment = self.assignments[attachment.assignmentId]
+            attachment.assignment.attachments.append(attachment)
+
+        self.submissions = {s.id: s for s in tables['submission']}
+        for submission in self.submissions.values():
+            submission.assignment = self.assignments[submission.assignmentId]
+            submission.assignment.submissions.append(submission)
+            submission.student = users.get(submission.studentId)
+            submission.files, submission.grade = [], None
+        self.files = {f.id: f for f in tables['submissionfile']}
+        for file in self.files.values():
+            file.submission = self.submissions[file.submissionId]
+            file.submission.files.append(file)
+        for grade in tables['grade']:
+            grade.submission = self.submissions[grade.submissionId]
+            grade.grader = users.get(grade.gradedBy)
+            grade.submission.grade = grade
+        for qa_log in tables['qalog']:
+            qa_log.assignment = self.assignments[qa_log.assignmentId]
+            qa_log.student = users.get(qa_log.studentId)
+            qa_log.assignment.qa_logs.append(qa_log)
+        for assignment in self.assignments.values():
+            assignment.submissions.sort(key=lambda s: s.submittedAt, reverse=True)
+            assignment.qa_logs.sort(key=lambda log: log.createdAt)
+
+    def submissions_of(self, student_id):
+        return [s for s in self.submissions.values() if s.studentId == student_id]
+
+
+class ArchiveStore:
+    """보관 파일의 프로세스 내 LRU 캐시와 ID -> 보관된 강의 조회"""
+
+    def __init__(self, cache_size=8):
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._archives = OrderedDict()
+
+    def init_app(self, app):
+        self.cache_size = app.config.get('ARCHIVE_CACHE_SIZE', self.cache_size)
+        app.extensions['archive_store'] = self
+        self.clear()
+
+    def course(self, course_id):
+        """보관된 강의의 CourseArchive. 보관되지 않았으면 None 을 반환합니다."""
+        with self._lock:
+            archive = self._archives.get(course_id)
+            if archive is not None:
+                self._archives.move_to_end(course_id)
+                return archive
+        archived = db.session.get(ArchivedCourse, course_id)
+        if archived is None:
+            return None
+        archive = CourseArchive(course_id, _read_lines(archived.archiveKey, skip=_RESTORE_ONLY))
+        with self._lock:
+            self._archives[course_id] = archive
+            while len(self._archives) > self.cache_size:
+                self._archives.popitem(last=False)
+        return archive
+
+    def course_ids(self, kind, ref_id):
+        return db.session.scalars(
+            select(ArchiveIndex.courseId).where(ArchiveIndex.kind == kind, ArchiveIndex.refId == ref_id)
+        ).all()
+
+    def find(self, kind, ref_id):
+        """
+        보관된 assignment / submission / submissionfile / attachment 를 찾습니다. 없으면 None 을 반환합니다.
+        """
+        for course_id in self.course_ids(kind, ref_id):
+            archive = self.course(course_id)
+            if archive is not None:
+                return getattr(archive, _COLLECTIONS[kind]).get(ref_id)
+        return None
+
+    def find_by_file_url(self, kind, file_url):
+        """보관된 submissionfile / attachment 를 fileUrl 로 찾습니다. 없으면 None 을 반환합니다."""
+        ref_id = db.session.scalar(
+            select(ArchiveIndex.refId).where(ArchiveIndex.kind == kind, ArchiveIndex.fileUrl == file_url).limit(1)
+        )
+        return self.find(kind, ref_id) if ref_id else None
+
+    def student_submissions(self, student_id):
+        """학생의 보관된 제출물 (보관된 강의를 수강하지 않았으면 빈 목록)"""
+        submissions = []
+        for course_id in self.course_ids('student', student_id):
+            archive = self.course(course_id)
+            if archive is not None:
+                submissions.extend(archive.submissions_of(student_id))
+        return submissions
+
+    def forget(self, course_id):
+        with self._lock:
+            self._archives.pop(course_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._archives.clear()
+
+
+_COLLECTIONS = {
+    'assignment': 'assignments',
+    'submission': 'submissions',
+    'submissionfile': 'files',
+    'attachment': 'attachments',
+}
+
+archive_store = ArchiveStore()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.archive')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    list_parser = subcommands.add_parser('list', help='보관 대상 강의와 보관된 강의를 보여 줍니다.')
+    list_parser.add_argument('--older-than', type=int, help='마지막 마감일 기준 일 수 (기본: ARCHIVE_AFTER_DAYS)')
+    run_parser = subcommands.add_parser('run', help='보관 대상 강의를 하나씩 보관합니다.')
+    run_parser.add_argument('--older-than', type=int, help='마지막 마감일 기준 일 수 (기본: ARCHIVE_AFTER_DAYS)')
+    run_parser.add_argument('--limit', type=int, help='이번에 보관할 최대 강의 수')
+    run_parser.add_argument('--dry-run', action='store_true', help='대상만 출력합니다.')
+    course_parser = subcommands.add_parser('course', help='특정 강의를 보관합니다.')
+    course_parser.add_argument('course_id')
+    restore_parser = subcommands.add_parser('restore', help='보관된 강의를 복원합니다.')
+    restore_parser.add_argument('course_id')
+    for sub in (run_parser, course_parser, restore_parser):
+        sub.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+    # `python -m` 으로 실행하면 이 파일은 __main__ 이므로, 앱이 초기화한 backend.archive 모듈을 사용합니다.
+    from backend import archive
+    app = create_app()
+    with app.app_context():
+        older_than = getattr(args, 'older_than', None)
+        if older_than is None:
+            older_than = app.config.get('ARCHIVE_AFTER_DAYS', 180)
+        if args.command == 'list':
+            for course_id in archive.eligible_courses(older_than):
+                print(f"eligible  {course_id}")
+            for archived in db.session.scalars(select(ArchivedCourse).order_by(ArchivedCourse.archivedAt)):
+                print(f"archived  {archived.id}  {archived.name}  {archived.size} bytes  {archived.archivedAt:%Y-%m-%d}")
+            return 0
+
+        if args.command == 'restore':
+            counts = archive.restore_course(args.course_id, args.chunk_size)
+            print(f"restored {args.course_id}: {counts}")
+            return 0
+
+        course_ids = [args.course_id] if args.command == 'course' else archive.eligible_courses(older_than)
+        if args.command == 'run' and args.limit:
+            course_ids = course_ids[:args.limit]
+        failed = 0
+        for course_id in course_ids:
+            if getattr(args, 'dry_run', False):
+                print(f"would archive {course_id}")
+                continue
+            try:
+                counts = archive.archive_course(course_id, args.chunk_size)
+                print(f"archived {course_id}: {counts}")
+            except Exception as e:
+                failed += 1
+                print(f"failed   {course_id}: {e}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+운영용 ASGI 진입점
+
+    uvicorn backend.asgi:app --host 0.0.0.0 --port 5000 --workers 4
+    # 또는
+    gunicorn -k uvicorn.workers.UvicornWorker -w 4 backend.asgi:app
+
+업로드 접수, 파일 다운로드, LLM Q&A 처럼 I/O 대기가 긴 엔드포인트(backend/async_routes.py)는
+이벤트 루프에서 비동기 파일 I/O 와 비동기 DB 드라이버로 처리하고,
+나머지 CRUD 라우트는 기존 Flask 앱을 스레드 풀에서 동기적으로 실행합니다.
+"""
+from contextlib import asynccontextmanager
+
+import httpx
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Mount, Route
+
+from backend.app import create_app, start_workers, warm_app
+from backend.async_db import async_db
+from backend.async_routes import ASYNC_ROUTES
+from backend.logs import RequestIdMiddleware
+
+flask_app = warm_app(create_app())
+async_db.init_app(flask_app)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # 워커 프로세스마다 작업/메일 실행 스레드를 띄웁니다. 비동기 라우트만 호출되어도 처리됩니다.
+    start_workers(flask_app)
+    # LLM 호출 등 외부 HTTP 요청은 하나의 클라이언트(커넥션 풀)를 공유합니다.
+    async with httpx.AsyncClient(timeout=flask_app.config['LLM_TIMEOUT']) as http_client:
+        app.state.http_client = http_client
+        yield
+    await async_db.dispose()
+
+
+# Flask 라우트의 CORS 는 flask_cors 가 처리하므로 비동기 라우트에만 미들웨어를 붙입니다.
+_cors = Middleware(
+    CORSMiddleware,
+    allow_origins=flask_app.config['CORS_ORIGINS'],
+    allow_credentials=True,
+    allow_methods=['*'],
+    allow_headers=['*'],
+)
+
+routes = [
+    Route(path, handler, methods=methods + ['OPTIONS'], middleware=[_cors])
+    for path, handler, methods in ASYNC_ROUTES
+]
+routes.append(Mount('/', app=WSGIMiddleware(flask_app, workers=flask_app.config['WSGI_THREADS'])))
+
+# 모든 요청(비동기 라우트와 Flask 라우트)이 같은 X-Request-ID 를 로그와 응답에 씁니다.
+app = Starlette(routes=routes, lifespan=lifespan, middleware=[Middleware(RequestIdMiddleware)])
+app.state.flask_app = flask_app
@@ -0,0 +1,53 @@
+"""
+비동기 DB 엔진 (ASGI 모드 전용)
+
+동기 라우트는 기존 Flask-SQLAlchemy 세션을 그대로 사용하고,
+backend/async_routes.py 의 I/O 위주 엔드포인트만 이 엔진을 사용합니다.
+"""
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# 동기 드라이버 → 비동기 드라이버 매핑
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+mysqlconnector': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+}
+
+
+def async_database_url(config):
+    """ASYNC_DATABASE_URL 이 없으면 SQLALCHEMY_DATABASE_URI 의 드라이버만 비동기용으로 바꿉니다."""
+    if config.get('ASYNC_DATABASE_URL'):
+        return config['ASYNC_DATABASE_URL']
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    drivername = ASYNC_DRIVERS.get(url.drivername)
+    if not drivername:
+        raise ValueError(f"no async driver configured for '{url.drivername}', set ASYNC_DATABASE_URL")
+    return url.set(drivername=drivername)
+
+
+class AsyncDatabase:
+    def __init__(self):
+        self.engine = None
+        self.sessionmaker = None
+
+    def init_app(self, app):
+        self.engine = create_async_engine(
+            async_database_url(app.config),
+            pool_pre_ping=True,
+            **app.config.get('ASYNC_ENGINE_OPTIONS', {}),
+        )
+        self.sessionmaker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    def session(self):
+        return self.sessionmaker()
+
+    async def dispose(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+
+
+async_db = AsyncDatabase()
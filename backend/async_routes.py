@@ -0,0 +1,463 @@
+"""
+ASGI 모드의 비동기 엔드포인트
+
+느린 업로드/다운로드와 LLM 호출처럼 대기 시간이 긴 요청만 이곳에서 처리합니다.
+워커 스레드를 붙잡지 않으므로 한 프로세스가 수천 개의 느린 연결을 동시에 유지할 수 있습니다.
+경로와 응답 형식은 같은 경로의 Flask 라우트와 동일합니다.
+"""
+import asyncio
+import uuid
+from datetime import datetime
+from functools import wraps
+
+import anyio
+import jwt
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload, undefer
+from starlette.datastructures import UploadFile
+from starlette.responses import FileResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+
+from backend.archive import archive_store
+from backend.async_db import async_db
+from backend.events import event_broker, format_sse
+from backend import idempotency
+from backend.idempotency import idempotency_store
+from backend.ratelimit import LIMITED_MESSAGE, client_identity, rate_limit_headers, rate_limiter
+from backend.intake import submission_intake, IntakeRejected, IntakeTimeout
+from backend.models import UserStatus, Assignment, Attachment, Grade, QALog, QALogSource, Submission, SubmissionFile
+from backend.previews import preview_service
+from backend.reclaim import file_reclaimer
+from backend.similarity import similarity_engine
+from backend.user_cache import user_cache
+from backend.storage import CHUNK_SIZE, HashingStream, content_disposition, storage, key_for, new_file_url
+from backend.versions import submission_versions
+from backend.routes.assignments import attachment_to_dict
+from backend.routes.auth import decode_access_token
+from backend.routes.qa_logs import publish_qa_log_event
+from backend.routes.submissions import publish_submission_event, submission_to_dict
+
+
+def _error(message, status_code, **extra):
+    return JSONResponse({'error': message, **extra}, status_code=status_code)
+
+
+def authorize(allowed_roles=None):
+    """Flask 의 authenticate/authorize 와 같은 규칙으로 토큰을 검사하고 request.state 에 사용자 정보를 기록합니다."""
+    def wrapper(handler):
+        @wraps(handler)
+        async def decorated(request):
+            auth_header = request.headers.get('Authorization')
+            if not auth_header or not auth_header.startswith('Bearer '):
+                return _error('인증 토큰이 제공되지 않았습니다.', 401)
+            try:
+                decoded = decode_access_token(auth_header.split(' ')[1])
+            except jwt.ExpiredSignatureError:
+                return _error('토큰이 만료되었습니다.', 401, code='TOKEN_EXPIRED')
+            except jwt.InvalidTokenError:
+                return _error('유효하지 않은 토큰입니다.', 401)
+
+            user = user_cache.peek(decoded['userId']) or await anyio.to_thread.run_sync(
+                _load_user, request.app.state.flask_app, decoded['userId'])
+            if not user:
+                return _error('사용자를 찾을 수 없습니다.', 401)
+            if user.status != UserStatus.APPROVED:
+                return _error('아직 승인되지 않은 계정이거나 거부된 계정입니다.', 403)
+            if allowed_roles and user.role.value not in allowed_roles:
+                return _error('이 작업을 수행할 권한이 없습니다.', 403,
+                              requiredRoles=allowed_roles, currentRole=user.role.value)
+            request.state.user_id = user.id
+            request.state.user_role = user.role.value
+            return await handler(request)
+        return decorated
+    return wrapper
+
+
+def _load_user(flask_app, user_id):
+    with flask_app.app_context():
+        return user_cache.get(user_id)
+
+
+def _find_archived(flask_app, kind, ref_id):
+    with flask_app.app_context():
+        return archive_store.find(kind, ref_id)
+
+
+def rate_limited(endpoint):
+    """
+    backend/ratelimit.py 의 규칙을 적용합니다. endpoint 는 같은 경로의 Flask 엔드포인트 이름이며,
+    두 모드가 같은 버킷을 사용합니다.
+    """
+    def wrapper(handler):
+        @wraps(handler)
+        async def decorated(request):
+            if not rate_limiter.enabled:
+                return await handler(request)
+            identity = client_identity(request.headers.get('Authorization'), request.client.host if request.client else None)
+            result = await anyio.to_thread.run_sync(rate_limiter.hit, endpoint, identity)
+            if result is None:
+                return await handler(request)
+            response = _error(LIMITED_MESSAGE, 429) if not result.allowed else await handler(request)
+            response.headers.update(rate_limit_headers(result))
+            return response
+        return decorated
+    return wrapper
+
+
+def idempotent(handler):
+    """
+    backend/idempotency.py 의 idempotent 와 같은 규칙으로 Idempotency-Key 를 처리합니다.
+    저장소 호출(대기 포함)은 스레드에서 실행하며, 폼은 starlette 가 캐시하므로 핸들러가 다시 읽지 않습니다.
+    """
+    @wraps(handler)
+    async def decorated(request):
+        idempotency_key = request.headers.get(idempotency.HEADER)
+        if not idempotency_key:
+            return await handler(request)
+        if len(idempotency_key) > idempotency.MAX_KEY_LENGTH:
+            return _error(idempotency.TOO_LONG_MESSAGE, 400)
+
+        key = idempotency.scope_key(request.state.user_id, request.method, request.url.path, idempotency_key)
+        form = await request.form()
+        request_hash = idempotency.fingerprint(
+            request.method, request.url.path, request.url.query,
+            fields=[(name, value) for name, value in form.multi_items() if not isinstance(value, UploadFile)],
+            files=[(name, value.filename, value.content_type or 'application/octet-stream', value.size)
+                   for name, value in form.multi_items() if isinstance(value, UploadFile)],
+        )
+        state, saved = await anyio.to_thread.run_sync(idempotency_store.begin, key, request_hash)
+        if state == 'replay':
+            response = Response(saved['body'], status_code=saved['status'], headers=saved['headers'])
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        if state == 'mismatch':
+            return _error(idempotency.MISMATCH_MESSAGE, 422)
+        if state == 'busy':
+            response = _error(idempotency.BUSY_MESSAGE, 409)
+            response.headers['Retry-After'] = '1'
+            return response
+
+        try:
+            response = await handler(request)
+        except BaseException:
+            await anyio.to_thread.run_sync(idempotency_store.release, key)
+            raise
+        if response.status_code >= 500 or not hasattr(response, 'body'):
+            await anyio.to_thread.run_sync(idempotency_store.release, key)
+        else:
+            await anyio.to_thread.run_sync(idempotency_store.complete, key, request_hash, idempotency.response_to_dict(
+                response.status_code, response.body.decode('utf-8'), response.headers))
+        return response
+    return decorated
+
+
+async def _save_upload(model, owner_id, upload, saved_keys):
+    """
+    업로드 파일을 저장소에 저장하고 (원래 이름, fileUrl, 크기, sha256)를 반환합니다.
+    starlette 가 이미 임시 파일로 받아 둔 내용을 스레드에서 청크 단위로 옮기므로 이벤트 루프를 막지 않습니다.
+    저장 중 실패해도 정리할 수 있도록 저장 전에 키를 saved_keys 에 추가합니다.
+    """
+    filename, file_url = new_file_url(owner_id, upload.filename)
+    key = key_for(model, file_url)
+    saved_keys.append(key)
+    await upload.seek(0)
+    stream = HashingStream(upload.file)
+    size = await anyio.to_thread.run_sync(storage.save, key, stream, upload.content_type)
+    return filename, file_url, size, stream.hexdigest()
+
+
+def _schedule_previews(model, rows):
+    # schedule() 은 파일 앞부분을 저장소에서 읽으므로 스레드에서 실행합니다.
+    for row in rows:
+        preview_service.schedule(model, row['id'], row['fileUrl'], row['fileName'], row['mimeType'], row['fileSize'])
+
+
+def _record_version(flask_app, submission_id, file_hashes):
+    with flask_app.app_context():
+        submission_versions.record(submission_id, file_hashes)
+
+
+def _uploads(form, field):
+    return [f for f in form.getlist(field) if isinstance(f, UploadFile) and f.filename]
+
+
+@rate_limited('submissions.submit_assignment_with_files')
+@authorize(allowed_roles=['STUDENT'])
+@idempotent
+async def submit_assignment_with_files(request):
+    admitted_at = datetime.utcnow()
+    assignment_id = request.path_params['assignmentId']
+    user_id = request.state.user_id
+
+    async with request.form() as form:
+        content = form.get('content') or None
+        files = _uploads(form, 'files[]')
+
+        if not content and not files:
+            return _error('제출 내용 또는 파일을 업로드해주세요.', 400)
+
+        async with async_db.session() as session:
+            assignment = await session.get(Assignment, assignment_id)
+        if not assignment:
+            return _error("유효한 과제 ID가 아닙니다.", 400)
+        if assignment.dueDate < admitted_at:
+            return _error("제출 마감일이 지났습니다.", 400)
+
+        try:
+            # 제출 행 기록은 동기 접수 큐(backend/intake.py)를 공유하므로 스레드에서 기다립니다.
+            result = await anyio.to_thread.run_sync(
+                submission_intake.submit, assignment_id, user_id, content, admitted_at)
+        except IntakeRejected as e:
+            response = _error("제출 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", 503)
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        except IntakeTimeout as e:
+            response = _error("제출 처리가 지연되고 있습니다. 잠시 후 다시 시도해주세요.", 503)
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+
+        submission_id = result.submission_id
+        rows = []
+        file_hashes = {}
+        saved_keys = []
+        try:
+            for upload in files:
+                filename, file_url, size, sha = await _save_upload(SubmissionFile, submission_id, upload, saved_keys)
+                rows.append({
+                    'id': str(uuid.uuid4()),
+                    'submissionId': submission_id,
+                    'fileName': filename,
+                    'fileUrl': file_url,
+                    'fileSize': size,
+                    'mimeType': upload.content_type or 'application/octet-stream',
+                    'uploadedAt': datetime.utcnow(),
+                })
+                file_hashes[rows[-1]['id']] = sha
+
+            if rows:
+                async with async_db.session() as session:
+                    await session.execute(insert(SubmissionFile), rows)
+                    await session.commit()
+        except Exception as e:
+            # Flask 라우트와 같이 이미 저장한 파일은 삭제를 예약합니다.
+            file_reclaimer.enqueue(saved_keys)
+            request.app.state.flask_app.logger.error("Error submitting assignment with files: %s", e)
+            return _error("Internal server error", 500)
+
+    await anyio.to_thread.run_sync(_schedule_previews, SubmissionFile, rows)
+    async with async_db.session() as session:
+        await anyio.to_thread.run_sync(_record_version, request.app.state.flask_app, submission_id, file_hashes)
+        publish_submission_event(assignment, submission_id, user_id, result.created)
+        similarity_engine.schedule(submission_id)
+        submission = await session.get(Submission, submission_id, options=[
+            selectinload(Submission.assignment),
+            selectinload(Submission.student),
+            selectinload(Submission.files),
+            selectinload(Submission.grade).undefer(Grade.feedback),
+            undefer(Submission.content),
+        ])
+        return JSONResponse(submission_to_dict(submission), status_code=200)
+
+
+@rate_limited('assignments.upload_attachment')
+@authorize(allowed_roles=['PROFESSOR', 'ADMIN'])
+async def upload_attachment(request):
+    assignment_id = request.path_params['id']
+
+    async with request.form() as form:
+        upload = form.get('file')
+        if not isinstance(upload, UploadFile):
+            return _error('No file part', 400)
+        if not upload.filename:
+            return _error('No selected file', 400)
+
+        async with async_db.session() as session:
+            assignment = await session.get(Assignment, assignment_id)
+        if not assignment:
+            return _error('Assignment not found', 404)
+        if request.state.user_role == 'PROFESSOR' and assignment.teacherId != request.state.user_id:
+            return _error("You don't have permission to upload files to this assignment", 403)
+
+        saved_keys = []
+        try:
+            # 파일을 쓰는 동안에는 DB 커넥션을 잡고 있지 않습니다.
+            filename, file_url, size, _ = await _save_upload(Attachment, assignment_id, upload, saved_keys)
+        except Exception as e:
+            file_reclaimer.enqueue(saved_keys)
+            request.app.state.flask_app.logger.error("Error uploading attachment: %s", e)
+            return _error("Internal server error", 500)
+
+    try:
+        async with async_db.session() as session:
+            attachment = Attachment(
+                assignmentId=assignment_id,
+                fileName=filename,
+                fileUrl=file_url,
+                fileSize=size,
+                mimeType=upload.content_type or 'application/octet-stream',
+            )
+            session.add(attachment)
+            await session.commit()
+    except Exception as e:
+        file_reclaimer.enqueue(saved_keys)
+        request.app.state.flask_app.logger.error("Error uploading attachment: %s", e)
+        return _error("Internal server error", 500)
+
+    await anyio.to_thread.run_sync(_schedule_previews, Attachment, [{
+        'id': attachment.id, 'fileUrl': file_url, 'fileName': filename, 'mimeType': attachment.mimeType, 'fileSize': size,
+    }])
+    return JSONResponse(attachment_to_dict(attachment), status_code=201)
+
+
+@rate_limited('submissions.download_file')
+@authorize()
+async def download_submission_file(request):
+    async with async_db.session() as session:
+        submission_file = await session.get(
+            SubmissionFile, request.path_params['fileId'], options=[selectinload(SubmissionFile.submission)])
+    if not submission_file:
+        # 보관된 강의의 파일 (backend/archive.py)
+        submission_file = await anyio.to_thread.run_sync(
+            _find_archived, request.app.state.flask_app, 'submissionfile', request.path_params['fileId'])
+    if not submission_file:
+        return _error("File not found", 404)
+
+    is_teacher_or_admin = request.state.user_role in ['PROFESSOR', 'ADMIN']
+    is_owner = submission_file.submission.studentId == request.state.user_id
+    if not (is_teacher_or_admin or is_owner):
+        return _error("You don't have permission to download this file.", 403)
+
+    key = key_for(SubmissionFile, submission_file.fileUrl)
+    url = await anyio.to_thread.run_sync(storage.presigned_url, key, submission_file.fileName)
+    if url and storage.presigned_downloads:
+        # 파일 내용은 클라이언트가 스토리지에서 직접 받습니다.
+        return RedirectResponse(url, status_code=302)
+    if storage.name == 'local':
+        if not await anyio.Path(storage.path(key)).is_file():
+            return _error("File not found on server", 404)
+        # FileResponse 는 파일을 청크 단위로 비동기 전송합니다.
+        return FileResponse(storage.path(key), filename=submission_file.fileName,
+                            content_disposition_type='attachment')
+
+    try:
+        body = await anyio.to_thread.run_sync(storage.open, key)
+    except KeyError:
+        return _error("File not found on server", 404)
+
+    async def chunks():
+        try:
+            while chunk := await anyio.to_thread.run_sync(body.read, CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    return StreamingResponse(chunks(), media_type=submission_file.mimeType or 'application/octet-stream',
+                             headers={'Content-Disposition': content_disposition(submission_file.fileName)})
+
+
+@rate_limited('qa_logs.ask_question')
+@authorize(allowed_roles=['STUDENT'])
+async def ask_question(request):
+    """과제에 대한 질문을 로컬 LLM(Ollama 호환 /api/generate)에 보내고 Q&A 로그로 저장합니다."""
+    flask_app = request.app.state.flask_app
+    http_client = request.app.state.http_client
+    if not flask_app.config.get('LLM_API_URL'):
+        return _error("LLM service is not configured", 503)
+
+    data = await request.json()
+    assignment_id = data.get('assignmentId')
+    question = data.get('question')
+    if not all([assignment_id, question]):
+        return _error("Missing required fields", 400)
+
+    async with async_db.session() as session:
+        # 세션을 닫은 뒤 프롬프트에 쓰므로 지연 로딩 컬럼도 함께 읽습니다.
+        assignment = await session.get(Assignment, assignment_id, options=[undefer(Assignment.description)])
+    if not assignment:
+        return _error("Assignment not found", 404)
+
+    # LLM 응답을 기다리는 동안에는 DB 커넥션을 잡고 있지 않습니다.
+    prompt = (
+        f"다음 과제에 대한 학생의 질문에 답하세요.\n"
+        f"과제 제목: {assignment.title}\n과제 설명: {assignment.description}\n\n질문: {question}"
+    )
+    try:
+        response = await http_client.post(
+            f"{flask_app.config['LLM_API_URL'].rstrip('/')}/api/generate",
+            json={'model': flask_app.config['LLM_MODEL'], 'prompt': prompt, 'stream': False},
+        )
+        response.raise_for_status()
+        answer = response.json()['response']
+    except Exception as e:
+        flask_app.logger.error("Error calling LLM service: %s", e)
+        return _error("LLM service unavailable", 502)
+
+    async with async_db.session() as session:
+        qa_log = QALog(
+            assignmentId=assignment_id,
+            studentId=request.state.user_id,
+            question=question,
+            answer=answer,
+            source=QALogSource.LLM,
+        )
+        session.add(qa_log)
+        await session.commit()
+    publish_qa_log_event(assignment, qa_log)
+    return JSONResponse({
+        'id': qa_log.id,
+        'assignmentId': qa_log.assignmentId,
+        'studentId': qa_log.studentId,
+        'question': qa_log.question,
+        'answer': qa_log.answer,
+        'source': qa_log.source.value,
+        'createdAt': qa_log.createdAt.isoformat(),
+    }, status_code=201)
+
+
+async def stream_events(request):
+    """Flask 의 /api/events/stream 과 같은 SSE 스트림입니다. 연결마다 스레드를 점유하지 않습니다."""
+    auth_header = request.headers.get('Authorization')
+    token = auth_header.split(' ')[1] if auth_header and auth_header.startswith('Bearer ') \
+        else request.query_params.get('token')
+    if not token:
+        return _error('인증 토큰이 제공되지 않았습니다.', 401)
+    try:
+        decoded = decode_access_token(token)
+    except jwt.ExpiredSignatureError:
+        return _error('토큰이 만료되었습니다.', 401, code='TOKEN_EXPIRED')
+    except jwt.InvalidTokenError:
+        return _error('유효하지 않은 토큰입니다.', 401)
+
+    # authorize() 와 같이 승인이 취소되었거나 삭제된 사용자는 구독하지 못하게 합니다.
+    user = user_cache.peek(decoded['userId']) or await anyio.to_thread.run_sync(
+        _load_user, request.app.state.flask_app, decoded['userId'])
+    if not user:
+        return _error('사용자를 찾을 수 없습니다.', 401)
+    if user.status != UserStatus.APPROVED:
+        return _error('아직 승인되지 않은 계정이거나 거부된 계정입니다.', 403)
+
+    heartbeat = request.app.state.flask_app.config.get('EVENT_HEARTBEAT_INTERVAL', 15)
+    subscription = event_broker.subscribe(user.id, loop=asyncio.get_running_loop())
+
+    async def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = await subscription.get_async(timeout=heartbeat)
+                yield format_sse(event) if event else ": ping\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(generate(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+# (경로, 핸들러, 메서드)
+ASYNC_ROUTES = [
+    ('/api/submissions/assignments/{assignmentId}/submit-with-files', submit_assignment_with_files, ['POST']),
+    ('/api/assignments/{id}/upload', upload_attachment, ['POST']),
+    ('/api/submissions/files/{fileId}/download', download_submission_file, ['GET']),
+    ('/api/qa-logs/ask', ask_question, ['POST']),
+    ('/api/events/stream', stream_events, ['GET']),
+]
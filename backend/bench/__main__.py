@@ -0,0 +1,142 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy.engine import make_url
+from backend.bench import scenarios as bench_scenarios
+from backend.bench.report import QueryCounter, Recorder, compare, format_table, write_json
+
+
+def build_app(database_url, storage_root=None):
+    """
+    벤치마크용 앱을 만듭니다.
+    업로드는 storage_root (없으면 새 임시 디렉토리) 에 저장하고, 측정을 흐리는 백그라운드 작업은 끕니다.
+    """
+    # 토큰 서명 키는 auth 라우트가 환경 변수에서 직접 읽습니다.
+    os.environ.setdefault('SECRET_KEY', 'bench-secret-key')
+    os.environ['DATABASE_URL'] = database_url
+
+    from backend.app import create_app
+    from backend.config import Config
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        # 부하 측정이 목적이므로 빈도 제한으로 요청이 거절되지 않게 합니다.
+        RATE_LIMIT_ENABLED = False
+        # 실제 업로드 디렉토리를 건드리지 않도록 임시 디렉토리를 씁니다. (절대 경로는 root_path 와 합쳐지지 않습니다)
+        STORAGE_BACKEND = 'local'
+        STORAGE_ROOT = storage_root or tempfile.mkdtemp(prefix='assignment-bench-')
+        # 마감 작업, 메일, 미리보기 추출, 유사도 계산은 요청과 별도로 CPU/DB 를 쓰므로 끕니다.
+        JOBS_ENABLED = False
+        MAIL_ENABLED = False
+        MAIL_WORKER_ENABLED = False
+        PREVIEW_WORKERS = 0
+        SIMILARITY_ENABLED = False
+
+    return create_app(BenchConfig)
+
+
+def sqlite_path(database_url):
+    """파일 SQLite DB 의 경로. 다른 DB 나 메모리 DB 면 None"""
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        return None
+    return url.database
+
+
+def prepare_database(app, database_url, reseed, scale):
+    """
+    시나리오가 데이터를 바꾸므로 (제출, 채점) 실행마다 같은 데이터에서 시작하게 합니다.
+    - 파일 SQLite : 시드 직후의 DB 를 <path>.seed 로 복사해 두고, 실행할 때마다 되돌립니다.
+    - 그 외 DB    : 스냅숏을 만들 수 없으므로 매번 다시 시드합니다. (같은 seed 값이면 같은 데이터)
+    제출 파일의 자리표시 파일은 어느 경우든 이번 실행의 임시 저장소에 다시 씁니다.
+    """
+    from backend.extensions import db
+    from backend.bench.seed import seed_database, write_placeholder_files
+
+    path = sqlite_path(database_url)
+    snapshot = f"{path}.seed" if path else None
+    with app.app_context():
+        if snapshot and not reseed and os.path.exists(snapshot):
+            db.engine.dispose()
+            shutil.copyfile(snapshot, path)
+            print(f"restored {path} from {snapshot}")
+        else:
+            started = time.perf_counter()
+            seed_database(scale=scale)
+            print(f"seeded in {time.perf_counter() - started:.1f}s")
+            if snapshot:
+                db.engine.dispose()
+                shutil.copyfile(path, snapshot)
+        write_placeholder_files()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.bench', description='백엔드 벤치마크')
+    parser.add_argument('--db', default='sqlite:////tmp/assignment_bench.db', help='SQLAlchemy DB URL')
+    parser.add_argument('--seed', action='store_true',
+                        help='테이블을 다시 만들고 데이터를 생성합니다. (SQLite 는 스냅숏도 새로 만듭니다)')
+    parser.add_argument('--scale', type=float, default=1.0, help='데이터 규모 배율 (1.0 = 제출물 10만 건)')
+    parser.add_argument('--scenario', action='append', choices=sorted(bench_scenarios.SCENARIOS),
+                        help='실행할 시나리오 (여러 번 지정 가능, 기본: 전체)')
+    parser.add_argument('--requests', type=int, default=300, help='제출/로그인 시나리오의 요청 수')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--json', dest='json_path', help='결과를 JSON 파일로 저장합니다.')
+    parser.add_argument('--baseline', help='비교할 기준 결과 JSON 파일')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='p95 지연 시간 허용 증가 비율')
+    args = parser.parse_args(argv)
+
+    storage_root = tempfile.mkdtemp(prefix='assignment-bench-')
+    try:
+        return run(args, build_app(args.db, storage_root))
+    finally:
+        shutil.rmtree(storage_root, ignore_errors=True)
+
+
+def run(args, app):
+    from backend.extensions import db
+
+    prepare_database(app, args.db, args.seed, args.scale)
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+
+    recorder = Recorder()
+
+    def make_client():
+        return bench_scenarios.BenchClient(app, recorder, counter)
+
+    for name in args.scenario or sorted(bench_scenarios.SCENARIOS):
+        scenario = bench_scenarios.SCENARIOS[name]
+        kwargs = {}
+        if name in ('deadline-rush', 'login-storm', 'dashboard'):
+            kwargs = {'requests': args.requests, 'concurrency': args.concurrency}
+        started = time.perf_counter()
+        scenario(app, make_client, **kwargs)
+        print(f"[{name}] {time.perf_counter() - started:.1f}s")
+
+    summary = recorder.summary()
+    print(format_table(summary))
+    print('\n* q/req 는 요청 스레드의 쿼리만 셉니다. 제출 접수(backend/intake.py)의 쓰기 스레드가 '
+          '일괄로 실행하는 INSERT/UPDATE 는 포함되지 않습니다.')
+
+    if args.json_path:
+        meta = {'db': app.config['SQLALCHEMY_DATABASE_URI'].split('@')[-1], 'scale': args.scale,
+                'runAt': datetime.utcnow().isoformat()}
+        write_json(args.json_path, summary, meta)
+
+    if args.baseline:
+        regressions = compare(summary, args.baseline, args.tolerance)
+        if regressions:
+            print('\nREGRESSIONS:')
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print('\nno regressions against baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
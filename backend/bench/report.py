@@ -0,0 +1,105 @@
+"""
+라우트별 지연 시간 / 쿼리 수 집계 및 회귀 비교
+"""
+import json
+import threading
+from collections import defaultdict
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """
+    엔진에서 실행되는 SQL 문장 수를 스레드별로 셉니다.
+    요청을 처리한 스레드의 쿼리만 세므로, 제출 접수 쓰기 스레드(backend/intake.py)가 여러 요청을 모아
+    실행하는 쿼리는 어느 요청에도 잡히지 않습니다. 제출 라우트의 q/req 는 실제보다 적게 나옵니다.
+    """
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+
+def percentile(values, pct):
+    """정렬된 리스트에서 nearest-rank 방식으로 백분위 값을 구합니다."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, int(round(pct / 100.0 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+class Recorder:
+    """요청 단위 측정값을 엔드포인트별로 모읍니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)   # endpoint -> [(latency_ms, queries, status)]
+
+    def add(self, endpoint, latency_ms, queries, status):
+        with self._lock:
+            self.samples[endpoint].append((latency_ms, queries, status))
+
+    def summary(self):
+        result = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            latencies = sorted(s[0] for s in samples)
+            queries = [s[1] for s in samples]
+            result[endpoint] = {
+                'count': len(samples),
+                'errors': sum(1 for s in samples if s[2] >= 500),
+                'rejected': sum(1 for s in samples if 400 <= s[2] < 500),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'queries_avg': round(sum(queries) / len(queries), 2),
+                'queries_max': max(queries),
+            }
+        return result
+
+
+def format_table(summary):
+    header = f"{'endpoint':<48} {'n':>6} {'err':>4} {'4xx':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'q/req':>7} {'q max':>6}"
+    lines = [header, '-' * len(header)]
+    for endpoint, s in summary.items():
+        lines.append(
+            f"{endpoint:<48} {s['count']:>6} {s['errors']:>4} {s['rejected']:>4} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} "
+            f"{s['p99_ms']:>9.2f} {s['queries_avg']:>7.2f} {s['queries_max']:>6}"
+        )
+    return '\n'.join(lines)
+
+
+def write_json(path, summary, meta):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'routes': summary}, f, ensure_ascii=False, indent=2)
+
+
+def compare(summary, baseline_path, latency_tolerance=0.25):
+    """
+    기준 결과와 비교하여 회귀 목록을 반환합니다.
+    - 요청당 평균 쿼리 수 증가는 허용 오차 없이 회귀로 봅니다. (결정적인 지표)
+    - p95 지연 시간은 latency_tolerance 비율 이상 느려졌을 때 회귀로 봅니다.
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['routes']
+
+    regressions = []
+    for endpoint, current in summary.items():
+        base = baseline.get(endpoint)
+        if not base:
+            continue
+        if current['queries_avg'] > base['queries_avg'] + 0.01:
+            regressions.append(f"{endpoint}: queries/request {base['queries_avg']} -> {current['queries_avg']}")
+        if base['p95_ms'] > 0 and current['p95_ms'] > base['p95_ms'] * (1 + latency_tolerance):
+            regressions.append(f"{endpoint}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['errors'] > base['errors']:
+            regressions.append(f"{endpoint}: 5xx errors {base['errors']} -> {current['errors']}")
+    return regressions
@@ -0,0 +1,172 @@
+"""
+벤치마크 시나리오
+
+모든 요청은 Flask test client(로컬 WSGI 클라이언트)를 통해 실제 라우트를 그대로 통과합니다.
+"""
+import io
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from werkzeug.exceptions import HTTPException
+from backend.extensions import db
+from backend.models import User, Role, UserStatus, Assignment
+from backend.routes.auth import generate_tokens
+from backend.bench.seed import BENCH_PASSWORD
+
+
+class BenchClient:
+    """요청마다 지연 시간과 실행된 쿼리 수를 Recorder 에 기록하는 클라이언트"""
+
+    def __init__(self, app, recorder, counter):
+        self.app = app
+        self.client = app.test_client()
+        self.recorder = recorder
+        self.counter = counter
+        self._adapter = app.url_map.bind('localhost')
+
+    def _endpoint(self, method, path):
+        try:
+            endpoint, _ = self._adapter.match(path.split('?')[0], method=method)
+            return endpoint
+        except HTTPException:
+            return f"{method} {path}"
+
+    def request(self, method, path, token=None, **kwargs):
+        headers = kwargs.pop('headers', {})
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        self.counter.reset()
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, headers=headers, **kwargs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.recorder.add(self._endpoint(method, path), elapsed_ms, self.counter.count, response.status_code)
+        return response
+
+
+def _token_for(user):
+    access_token, _ = generate_tokens(user.id, user.role, user.email)
+    return access_token
+
+
+def _run_parallel(app, concurrency, jobs, worker):
+    """jobs 를 concurrency 개의 스레드에 나눠 실행합니다. 각 스레드는 자신의 클라이언트를 사용합니다."""
+    def run(chunk):
+        with app.app_context():
+            for job in chunk:
+                worker(job)
+            db.session.remove()
+
+    chunks = [jobs[i::concurrency] for i in range(concurrency)]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run, chunks))
+
+
+def deadline_rush(app, make_client, requests=500, concurrency=4, file_ratio=0.5, seed=1):
+    """마감 직전: 수강생들이 열린 과제에 동시에 제출/재제출합니다."""
+    rng = random.Random(seed)
+    with app.app_context():
+        open_assignments = Assignment.query.filter(Assignment.dueDate > datetime.utcnow()).all()
+        if not open_assignments:
+            raise RuntimeError("마감되지 않은 과제가 없습니다. --seed 로 데이터를 다시 생성하세요.")
+        targets = []
+        for assignment in rng.sample(open_assignments, min(5, len(open_assignments))):
+            students = User.query.join(User.enrollments).filter_by(courseId=assignment.courseId).limit(200).all()
+            targets.extend((assignment.id, _token_for(s)) for s in students)
+
+    jobs = [(rng.choice(targets), rng.random() < file_ratio, i) for i in range(requests)]
+    touched = set()
+
+    def worker(job):
+        (assignment_id, token), with_files, i = job
+        client = make_client()
+        if with_files:
+            data = {
+                'content': f"재제출 {i}",
+                'files[]': (io.BytesIO(b'%PDF-1.4 bench ' * 64), f"bench{i}.pdf"),
+            }
+            response = client.request('POST', f"/api/submissions/assignments/{assignment_id}/submit-with-files",
+                                      token=token, data=data, content_type='multipart/form-data')
+            if response.status_code < 300:
+                touched.add(response.get_json()['id'])
+        else:
+            client.request('POST', f"/api/submissions/assignments/{assignment_id}/submit",
+                           token=token, json={'content': f"제출 내용 {i}"})
+
+    _run_parallel(app, concurrency, jobs, worker)
+    _cleanup_uploads(app, touched)
+
+
+def grading_session(app, make_client, professors=5, grades_per_professor=40, seed=2):
+    """교수 채점 세션: 과제 목록 → 제출물 목록 → 연속 채점 → 성적 목록 확인"""
+    rng = random.Random(seed)
+    with app.app_context():
+        profs = User.query.filter_by(role=Role.PROFESSOR).limit(professors).all()
+        tokens = [_token_for(p) for p in profs]
+
+    client = make_client()
+    for token in tokens:
+        response = client.request('GET', '/api/assignments/', token=token)
+        assignments = response.get_json() or []
+        if not assignments:
+            continue
+        assignment = rng.choice(assignments)
+        submissions = client.request(
+            'GET', f"/api/submissions/assignments/{assignment['id']}/submissions", token=token).get_json() or []
+        for submission in submissions[:grades_per_professor]:
+            grade = submission.get('grade')
+            payload = {'score': rng.randint(0, assignment['max_points']), 'feedback': '벤치마크 피드백'}
+            if grade:
+                client.request('PUT', f"/api/grades/{grade['id']}", token=token, json=payload)
+            else:
+                client.request('POST', f"/api/grades/submissions/{submission['id']}/grade", token=token, json=payload)
+        client.request('GET', f"/api/grades/assignments/{assignment['id']}/grades", token=token)
+
+
+def login_storm(app, make_client, requests=100, concurrency=4, seed=3):
+    """로그인 폭주: 학생들이 동시에 로그인 후 /auth/me 와 과제 목록을 조회합니다."""
+    rng = random.Random(seed)
+    with app.app_context():
+        emails = [u.email for u in User.query.filter_by(role=Role.STUDENT, status=UserStatus.APPROVED).limit(1000).all()]
+
+    def worker(email):
+        client = make_client()
+        response = client.request('POST', '/api/auth/login', json={'email': email, 'password': BENCH_PASSWORD})
+        if response.status_code != 200:
+            return
+        token = response.get_json()['token']
+        client.request('GET', '/api/auth/me', token=token)
+        client.request('GET', '/api/assignments/', token=token)
+        client.request('GET', '/api/submissions/my-submissions', token=token)
+        client.request('GET', '/api/grades/my-grades', token=token)
+
+    _run_parallel(app, concurrency, [rng.choice(emails) for _ in range(requests)], worker)
+
+
+def dashboard_load(app, make_client, requests=200, concurrency=4, seed=4):
+    """첫 화면: 학생/교수/관리자가 /api/dashboard 한 번으로 첫 화면을 구성합니다."""
+    rng = random.Random(seed)
+    with app.app_context():
+        users = [_token_for(u) for u in User.query.filter_by(status=UserStatus.APPROVED).limit(1000).all()]
+
+    def worker(token):
+        make_client().request('GET', '/api/dashboard', token=token)
+
+    _run_parallel(app, concurrency, [rng.choice(users) for _ in range(requests)], worker)
+
+
+def _cleanup_uploads(app, submission_ids):
+    """제출 폭주 시나리오가 저장소에 남긴 업로드 파일을 정리합니다."""
+    from backend.models import SubmissionFile
+    from backend.storage import storage, key_for, owner_dir
+    for submission_id in submission_ids:
+        for key, _, _ in list(storage.iter_keys(key_for(SubmissionFile, owner_dir(submission_id)))):
+            storage.delete(key)
+
+
+SCENARIOS = {
+    'deadline-rush': deadline_rush,
+    'grading': grading_session,
+    'login-storm': login_storm,
+    'dashboard': dashboard_load,
+}
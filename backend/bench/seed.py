@@ -0,0 +1,167 @@
+"""
+벤치마크용 데이터 시더
+
+기본 규모(scale=1.0):
+- 학생 3,000명, 교수 60명, 관리자 2명
+- 강의 200개 (강의당 과제 2개 → 과제 400개, 강의당 수강생 250명)
+- 제출물 100,000건 (제출물당 파일 1개, 마감이 지난 과제의 제출물은 채점 완료)
+
+제출 파일은 DB 행만 시드하고, 파일 내용은 write_placeholder_files 가 실행마다 만드는 임시 저장소에
+작은 자리표시 파일로 씁니다. (다운로드/버전 기록이 오류 경로가 아닌 실제 경로를 타도록)
+
+모든 행은 backend/models.py 의 모델 테이블을 통해 executemany 로 일괄 삽입합니다.
+같은 seed 값이면 항상 같은 데이터가 생성됩니다.
+"""
+import io
+import random
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from backend.extensions import bcrypt, db
+from backend.models import (
+    User, Course, Enrollment, Assignment, Submission, SubmissionFile, Grade,
+    Role, UserStatus, SubmissionStatus,
+)
+from backend.storage import key_for, owner_dir, storage
+
+BENCH_PASSWORD = 'Bench1234'
+EMAIL_DOMAIN = '@office.kopo.ac.kr'
+CHUNK_SIZE = 5000
+# 시드한 제출 파일의 내용 (fileSize 는 이 크기로 기록합니다)
+PLACEHOLDER_BLOB = b'%PDF-1.4 bench placeholder\n'
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _bulk_insert(model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def student_email(index):
+    return f"student{index:05d}{EMAIL_DOMAIN}"
+
+
+def professor_email(index):
+    return f"prof{index:03d}{EMAIL_DOMAIN}"
+
+
+def seed_database(scale=1.0, seed=42, open_assignments=0.25, log=print):
+    """
+    현재 앱 컨텍스트의 DB에 벤치마크 데이터를 생성합니다.
+    기존 테이블은 모두 삭제 후 다시 만듭니다.
+
+    open_assignments: 마감이 아직 지나지 않은(제출 폭주 대상) 과제 비율
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    num_students = max(10, int(3000 * scale))
+    num_professors = max(2, int(60 * scale))
+    num_courses = max(2, int(200 * scale))
+    assignments_per_course = 2
+    students_per_course = min(num_students, max(5, int(250 * scale)))
+
+    db.drop_all()
+    db.create_all()
+
+    # 해시는 한 번만 계산하여 모든 계정에 재사용합니다. (로그인은 실제 bcrypt 비용을 그대로 치릅니다)
+    password_hash = bcrypt.generate_password_hash(BENCH_PASSWORD).decode('utf-8')
+
+    def user_row(email, name, role):
+        return {
+            'id': _uuid(rng), 'email': email, 'password': password_hash, 'name': name,
+            'role': role, 'status': UserStatus.APPROVED, 'createdAt': now, 'updatedAt': now,
+        }
+
+    students = [user_row(student_email(i), f"학생{i}", Role.STUDENT) for i in range(num_students)]
+    professors = [user_row(professor_email(i), f"교수{i}", Role.PROFESSOR) for i in range(num_professors)]
+    admins = [user_row(f"admin{i}{EMAIL_DOMAIN}", f"관리자{i}", Role.ADMIN) for i in range(2)]
+    # 승인 대기 계정도 일부 만들어 관리자 화면의 부하를 재현합니다.
+    pending = [dict(user_row(f"pending{i:04d}{EMAIL_DOMAIN}", f"대기{i}", Role.STUDENT), status=UserStatus.PENDING)
+               for i in range(max(5, int(200 * scale)))]
+    _bulk_insert(User, students + professors + admins + pending)
+    log(f"users: {len(students) + len(professors) + len(admins) + len(pending)}")
+
+    courses, enrollments, assignments = [], [], []
+    course_students = {}
+    for c in range(num_courses):
+        professor = professors[c % num_professors]
+        course = {'id': _uuid(rng), 'name': f"강의{c:03d}", 'teacherId': professor['id'], 'createdAt': now}
+        courses.append(course)
+
+        members = rng.sample(students, students_per_course)
+        course_students[course['id']] = members
+        enrollments.extend({
+            'id': _uuid(rng), 'studentId': s['id'], 'courseId': course['id'], 'enrolledAt': now,
+        } for s in members)
+
+        for a in range(assignments_per_course):
+            is_open = rng.random() < open_assignments
+            due = now + timedelta(hours=rng.randint(1, 72)) if is_open else now - timedelta(days=rng.randint(1, 90))
+            assignments.append({
+                'id': _uuid(rng), 'title': f"과제{c:03d}-{a}", 'description': '벤치마크 과제 설명 ' * 20,
+                'dueDate': due, 'maxScore': 100, 'teacherId': professor['id'], 'courseId': course['id'],
+                'createdAt': now, 'updatedAt': now,
+            })
+
+    _bulk_insert(Course, courses)
+    _bulk_insert(Enrollment, enrollments)
+    _bulk_insert(Assignment, assignments)
+    log(f"courses: {len(courses)}, enrollments: {len(enrollments)}, assignments: {len(assignments)}")
+
+    submission_count = 0
+    submissions, files, grades = [], [], []
+
+    def flush():
+        _bulk_insert(Submission, submissions)
+        _bulk_insert(SubmissionFile, files)
+        _bulk_insert(Grade, grades)
+        submissions.clear()
+        files.clear()
+        grades.clear()
+
+    for assignment in assignments:
+        is_closed = assignment['dueDate'] < now
+        for student in course_students[assignment['courseId']]:
+            submission_id = _uuid(rng)
+            graded = is_closed and rng.random() < 0.8
+            submitted_at = min(assignment['dueDate'], now) - timedelta(minutes=rng.randint(0, 600))
+            submissions.append({
+                'id': submission_id, 'assignmentId': assignment['id'], 'studentId': student['id'],
+                'content': '제출 내용 ' * rng.randint(5, 200), 'submittedAt': submitted_at,
+                'status': SubmissionStatus.GRADED if graded else SubmissionStatus.PENDING,
+            })
+            file_name = f"report{rng.randint(1, 9)}.{rng.choice(['pdf', 'hwp'])}"
+            files.append({
+                'id': _uuid(rng), 'submissionId': submission_id, 'fileName': file_name,
+                'fileUrl': f"{owner_dir(submission_id)}/{_uuid(rng)}_{file_name}", 'fileSize': len(PLACEHOLDER_BLOB),
+                'mimeType': 'application/pdf' if file_name.endswith('pdf') else 'application/x-hwp',
+                'uploadedAt': submitted_at,
+            })
+            if graded:
+                grades.append({
+                    'id': _uuid(rng), 'submissionId': submission_id, 'score': rng.randint(0, 100),
+                    'feedback': '피드백 ' * rng.randint(1, 30), 'gradedBy': assignment['teacherId'],
+                    'gradedAt': now,
+                })
+            submission_count += 1
+            if len(submissions) >= CHUNK_SIZE:
+                flush()
+    flush()
+    db.session.commit()
+    log(f"submissions: {submission_count}")
+
+
+def write_placeholder_files(log=print):
+    """
+    DB 의 제출 파일 행마다 저장소에 자리표시 파일을 씁니다.
+    저장소는 실행마다 새 임시 디렉토리이므로 시드 직후뿐 아니라 스냅숏으로 되돌린 뒤에도 호출합니다.
+    """
+    count = 0
+    for file_url in db.session.scalars(select(SubmissionFile.fileUrl).execution_options(yield_per=CHUNK_SIZE)):
+        storage.save(key_for(SubmissionFile, file_url), io.BytesIO(PLACEHOLDER_BLOB))
+        count += 1
+    log(f"placeholder files: {count}")
@@ -0,0 +1,299 @@
+"""
+과제 마감 처리 (마감 시각에 미리 계산)
+
+마감 직후에는 모든 교수가 한꺼번에 제출물 목록을 열고 파일을 내려받고 채점을 시작합니다.
+과제를 만들거나 마감일을 바꾸면 마감 시각에 실행되는 'assignment.close' 작업(backend/jobs.py)을 예약하고,
+작업은 다음 결과물을 'closing/<과제 ID>/' 에 저장해 둡니다.
+
+- snapshot.json    : 마감 시점의 제출물 목록 (제출 시각, 버전 번호, 본문 해시, 파일 목록)
+- submissions.json : 교수용 제출물 목록 응답 (GET /api/submissions/assignments/<id>/submissions)
+- summary.json     : 제출/채점 현황 요약 (GET /api/assignments/<id>/summary)
+- submissions.zip  : 모든 제출 파일을 학생별 폴더로 묶은 ZIP (GET /api/assignments/<id>/submissions.zip)
+
+저장된 결과물은 만들 때의 지문(제출물/파일/성적의 개수와 최종 변경 시각)과 함께 보관하며,
+읽을 때 지문 쿼리 한 번으로 그대로 써도 되는지 확인합니다. 채점 등으로 바뀌었으면 다시 계산합니다.
+마감 전에는 내용이 계속 바뀌므로 계산만 하고 저장하지 않습니다.
+"""
+import io
+import json
+import os
+import tempfile
+import zipfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import joinedload, undefer
+
+from backend.extensions import db
+from backend.intake import assignment_cache
+from backend.jobs import job_runner
+from backend.models import (
+    Assignment, Enrollment, Grade, Job, Submission, SubmissionFile, SubmissionVersion, User,
+)
+from backend.storage import key_for, storage
+
+ARTIFACT_PREFIX = 'closing'
+ARTIFACTS = ('snapshot.json', 'submissions.json', 'summary.json', 'submissions.zip', 'submissions.zip.json')
+JOB_KIND = 'assignment.close'
+
+# 이미 압축된 형식은 다시 압축하지 않습니다.
+_STORED_TYPES = ('application/pdf', 'application/zip', 'image/', 'video/', 'audio/')
+
+
+def artifact_key(assignment_id, name):
+    return f"{ARTIFACT_PREFIX}/{assignment_id}/{name}"
+
+
+def artifact_keys(assignment_id):
+    return [artifact_key(assignment_id, name) for name in ARTIFACTS]
+
+
+def job_key(assignment_id):
+    return f"{JOB_KIND}:{assignment_id}"
+
+
+def schedule_close(assignment):
+    """과제 마감 시각에 마감 처리 작업을 예약합니다. 마감일이 바뀌면 다시 호출해 실행 시각을 옮깁니다."""
+    return job_runner.submit(JOB_KIND, {'assignmentId': assignment.id}, run_at=assignment.dueDate,
+                             key=job_key(assignment.id))
+
+
+def is_closed(assignment_id):
+    meta = assignment_cache.get(assignment_id)
+    return meta is not None and meta.dueDate <= datetime.utcnow()
+
+
+def fingerprint(assignment_id):
+    """결과물이 최신인지 판단하는 지문. 제출물/파일/성적의 개수와 최종 변경 시각을 한 쿼리로 가져옵니다."""
+    submissions = select(Submission.id).where(Submission.assignmentId == assignment_id).scalar_subquery()
+    row = db.session.execute(select(
+        select(func.count(Submission.id)).where(Submission.assignmentId == assignment_id).scalar_subquery(),
+        select(func.max(Submission.submittedAt)).where(Submission.assignmentId == assignment_id).scalar_subquery(),
+        select(func.count(SubmissionFile.id)).where(SubmissionFile.submissionId.in_(submissions)).scalar_subquery(),
+        select(func.max(SubmissionFile.uploadedAt)).where(SubmissionFile.submissionId.in_(submissions)).scalar_subquery(),
+        select(func.count(Grade.id)).where(Grade.submissionId.in_(submissions)).scalar_subquery(),
+        select(func.max(Grade.gradedAt)).where(Grade.submissionId.in_(submissions)).scalar_subquery(),
+    )).one()
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in row]
+    return {'submissions': values[0:2], 'files': values[2:4], 'grades': values[4:6]}
+
+
+def _read_json(key):
+    try:
+        return json.loads(storage.read(key))
+    except KeyError:
+        return None
+
+
+def _write_json(key, data):
+    storage.save(key, io.BytesIO(json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')),
+                 'application/json')
+
+
+def cached(assignment_id, name, build, parts=('submissions', 'files', 'grades'), current=None):
+    """
+    저장된 결과물이 지문과 맞으면 그대로, 아니면 build(assignment_id) 로 다시 계산해 반환합니다.
+    parts 는 결과물이 의존하는 지문 항목입니다. (예: ZIP 은 성적이 바뀌어도 그대로 씁니다)
+    """
+    current = current or fingerprint(assignment_id)
+    expected = {part: current[part] for part in parts}
+    key = artifact_key(assignment_id, name)
+    entry = _read_json(key)
+    if entry is not None and entry.get('fingerprint') == expected:
+        return entry['payload']
+    payload = build(assignment_id)
+    if is_closed(assignment_id):
+        _write_json(key, {'fingerprint': expected, 'generatedAt': datetime.utcnow(), 'payload': payload})
+    return payload
+
+
+# --- 결과물 계산 ---
+def build_snapshot(assignment_id):
+    latest = (
+        select(SubmissionVersion.submissionId, func.max(SubmissionVersion.version).label('version'))
+        .group_by(SubmissionVersion.submissionId)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(Submission, SubmissionVersion.version, SubmissionVersion.contentHash)
+        .outerjoin(latest, latest.c.submissionId == Submission.id)
+        .outerjoin(SubmissionVersion, (SubmissionVersion.submissionId == latest.c.submissionId)
+                   & (SubmissionVersion.version == latest.c.version))
+        .options(joinedload(Submission.files))
+        .where(Submission.assignmentId == assignment_id)
+        .order_by(Submission.submittedAt)
+    ).unique().all()
+    return [{
+        'submissionId': submission.id,
+        'studentId': submission.studentId,
+        'submittedAt': submission.submittedAt.isoformat(),
+        'version': version,
+        'contentHash': content_hash,
+        'files': [{'id': f.id, 'filename': f.fileName, 'file_size': f.fileSize} for f in submission.files],
+    } for submission, version, content_hash in rows]
+
+
+def build_submissions(assignment_id):
+    # 라우트 모듈을 import 하면 순환 참조가 생기므로 여기서 가져옵니다.
+    from backend.routes.submissions import submission_to_dict
+    submissions = Submission.query.filter_by(assignmentId=assignment_id).options(
+        joinedload(Submission.student),
+        joinedload(Submission.files),
+        joinedload(Submission.grade).undefer(Grade.feedback),
+        undefer(Submission.content)
+    ).order_by(Submission.submittedAt.desc()).all()
+    return [submission_to_dict(s) for s in submissions]
+
+
+def build_summary(assignment_id):
+    assignment = db.session.get(Assignment, assignment_id)
+    enrolled = db.session.scalar(select(func.count(Enrollment.id)).where(Enrollment.courseId == assignment.courseId))
+    submitted, late = db.session.execute(
+        select(func.count(Submission.id), func.count(Submission.id).filter(Submission.submittedAt > assignment.dueDate))
+        .where(Submission.assignmentId == assignment_id)
+    ).one()
+    file_count, file_bytes = db.session.execute(
+        select(func.count(SubmissionFile.id), func.coalesce(func.sum(SubmissionFile.fileSize), 0))
+        .join(Submission, Submission.id == SubmissionFile.submissionId)
+        .where(Submission.assignmentId == assignment_id)
+    ).one()
+    scores = db.session.scalars(
+        select(Grade.score).join(Submission, Submission.id == Grade.submissionId)
+        .where(Submission.assignmentId == assignment_id)
+    ).all()
+
+    # 만점 대비 10% 단위 분포 (만점은 마지막 구간에 넣습니다)
+    distribution = [0] * 10
+    for score in scores:
+        distribution[min(int(score * 10 / assignment.maxScore), 9) if assignment.maxScore else 9] += 1
+    missing = db.session.execute(
+        select(User.id, User.name, User.email)
+        .join(Enrollment, Enrollment.studentId == User.id)
+        .where(Enrollment.courseId == assignment.courseId,
+               ~select(Submission.id).where(Submission.assignmentId == assignment_id,
+                                            Submission.studentId == User.id).exists())
+        .order_by(User.name)
+    ).all()
+    return {
+        'assignment_id': assignment.id,
+        'title': assignment.title,
+        'due_date': assignment.dueDate.isoformat(),
+        'max_points': assignment.maxScore,
+        'enrolled': enrolled,
+        'submitted': submitted,
+        'late': late,
+        'missing': [{'id': row.id, 'full_name': row.name, 'email': row.email} for row in missing],
+        'files': {'count': file_count, 'bytes': int(file_bytes)},
+        'graded': len(scores),
+        'average_points': round(sum(scores) / len(scores), 2) if scores else None,
+        'highest_points': max(scores) if scores else None,
+        'lowest_points': min(scores) if scores else None,
+        'distribution': distribution,
+    }
+
+
+def build_zip(assignment_id):
+    """
+    제출 파일을 '<이름>_<이메일 아이디>/<파일 이름>' 구조의 ZIP 으로 묶어 저장하고 (키, 크기)를 반환합니다.
+    저장소에 없는 파일은 건너뛰고 ZIP 맨 끝의 MISSING.txt 에 경로를 적습니다.
+    """
+    rows = db.session.execute(
+        select(SubmissionFile.fileName, SubmissionFile.fileUrl, SubmissionFile.mimeType, User.name, User.email)
+        .join(Submission, Submission.id == SubmissionFile.submissionId)
+        .join(User, User.id == Submission.studentId)
+        .where(Submission.assignmentId == assignment_id)
+        .order_by(User.name, SubmissionFile.uploadedAt)
+    ).all()
+    key = artifact_key(assignment_id, 'submissions.zip')
+    fd, tmp_path = tempfile.mkstemp(suffix='.zip')
+    try:
+        with os.fdopen(fd, 'w+b') as tmp:
+            with zipfile.ZipFile(tmp, 'w', allowZip64=True) as archive:
+                used, missing = set(), []
+                for file_name, file_url, mime_type, student_name, email in rows:
+                    name = f"{student_name}_{email.split('@')[0]}/{file_name}"
+                    stem, extension = os.path.splitext(name)
+                    counter = 1
+                    while name in used:
+                        counter += 1
+                        name = f"{stem} ({counter}){extension}"
+                    used.add(name)
+                    compression = zipfile.ZIP_STORED if (mime_type or '').startswith(_STORED_TYPES) else zipfile.ZIP_DEFLATED
+                    info = zipfile.ZipInfo(name, date_time=datetime.utcnow().timetuple()[:6])
+                    info.compress_type = compression
+                    try:
+                        source = storage.open(key_for(SubmissionFile, file_url))
+                    except KeyError:
+                        missing.append(name)
+                        continue
+                    with source, archive.open(info, 'w', force_zip64=True) as target:
+                        while chunk := source.read(1024 * 1024):
+                            target.write(chunk)
+                if missing:
+                    archive.writestr('MISSING.txt', '저장소에서 찾을 수 없어 포함하지 못한 파일:\n'
+                                     + ''.join(f"{name}\n" for name in missing))
+            tmp.seek(0)
+            size = storage.save(key, tmp, 'application/zip')
+    finally:
+        os.unlink(tmp_path)
+    return key, size
+
+
+def submissions_zip(assignment_id):
+    """최신 ZIP 의 저장소 키를 반환합니다. 제출물/파일이 바뀌었으면 다시 만듭니다."""
+    return cached(assignment_id, 'submissions.zip.json', lambda aid: build_zip(aid)[0], parts=('submissions', 'files'))
+
+
+# --- 작업 처리 함수 ---
+def close_assignment(payload):
+    """'assignment.close' 작업: 마감 시점 스냅샷과 결과물을 만들고 읽기 캐시를 데웁니다."""
+    assignment_id = payload['assignmentId']
+    assignment_cache.invalidate(assignment_id)
+    assignment = db.session.get(Assignment, assignment_id)
+    if assignment is None:
+        return {'skipped': 'assignment deleted'}
+    if assignment.dueDate > datetime.utcnow():
+        # 작업이 예약된 뒤 마감일이 연장되었습니다.
+        schedule_close(assignment)
+        return {'skipped': 'deadline extended', 'dueDate': assignment.dueDate.isoformat()}
+
+    current = fingerprint(assignment_id)
+    snapshot = build_snapshot(assignment_id)
+    _write_json(artifact_key(assignment_id, 'snapshot.json'),
+                {'closedAt': assignment.dueDate, 'generatedAt': datetime.utcnow(), 'submissions': snapshot})
+    cached(assignment_id, 'submissions.json', build_submissions, current=current)
+    summary = cached(assignment_id, 'summary.json', build_summary, current=current)
+    zip_key = submissions_zip(assignment_id)
+
+    # 이 워커의 과제/유사도 캐시를 데우고, 아직 추출되지 않은 문서 미리보기를 예약합니다. (lookup 이 예약합니다)
+    from backend.previews import preview_service
+    from backend.similarity import similarity_engine
+    assignment_cache.get(assignment_id)
+    similarity_engine.report(assignment_id)
+    previews = 0
+    for file in SubmissionFile.query.join(Submission).filter(Submission.assignmentId == assignment_id):
+        status, _ = preview_service.lookup(SubmissionFile, file)
+        previews += status == 'pending'
+
+    return {
+        'submissions': len(snapshot),
+        'graded': summary['graded'],
+        'files': summary['files']['count'],
+        'zipKey': zip_key,
+        'previewsScheduled': previews,
+    }
+
+
+def reconcile(lookback=timedelta(days=1)):
+    """
+    마감 작업이 없는 과제(시드 데이터, 예약 실패 등)에 작업을 예약합니다.
+    앞으로 마감되거나 lookback 안에 마감된 과제만 확인합니다.
+    """
+    missing = db.session.scalars(
+        select(Assignment)
+        .where(Assignment.dueDate > datetime.utcnow() - lookback,
+               ~select(Job.id).where(Job.key == literal(f"{JOB_KIND}:") + Assignment.id).exists())
+    ).all()
+    for assignment in missing:
+        schedule_close(assignment)
+    return len(missing)
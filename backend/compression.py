@@ -0,0 +1,222 @@
+"""
+큰 Text 컬럼의 투명 압축
+
+과제 설명, 제출 본문, 피드백, Q&A 처럼 길어질 수 있는 Text 컬럼을 CompressedText 타입으로 선언하면
+TEXT_COMPRESSION_THRESHOLD 바이트 이상인 값만 압축해 BLOB 으로 저장하고, 읽을 때 다시 str 로 돌려줍니다.
+모델에서는 deferred 로 선언되어 있어, 그 컬럼을 쓰지 않는 조회(권한 확인, 목록 집계 ...)는 값을 읽지도 않습니다.
+응답에 본문이 필요한 조회는 undefer 옵션으로 같은 쿼리에서 함께 읽습니다.
+
+- 저장 형식 : 임계값 미만이거나 압축 이득이 없으면 UTF-8 바이트 그대로, 압축하면 0xFF + 코덱(b'z' zlib / b's' zstd) + 압축 데이터.
+              0xFF 는 UTF-8 에 나올 수 없는 바이트이므로 예전 TEXT 값(그대로의 UTF-8)과 구분됩니다.
+- 코덱 : TEXT_COMPRESSION=zlib(기본, 표준 라이브러리) / zstd(zstandard 패키지 필요) / none
+         코덱을 바꿔도 이미 저장된 값은 그대로 읽을 수 있습니다.
+
+기존 DB 적용 (MySQL 의 TEXT 컬럼에는 압축된 바이트를 쓸 수 없으므로 컬럼 타입을 먼저 바꿉니다)
+
+    python -m backend.compression alter-columns     # TEXT -> MEDIUMBLOB (새 코드로 재시작하기 직전에 실행)
+    python -m backend.compression migrate [--batch-size 500] [--pause 0.1] [--dry-run]
+                                                    # 기존 행을 배치마다 압축 (서비스 중 실행 가능, 중단 후 재실행 가능)
+"""
+import argparse
+import sys
+import time
+import zlib
+
+from sqlalchemy import LargeBinary, TypeDecorator
+
+MARKER = b'\xff'
+ZLIB, ZSTD = b'z', b's'
+MAX_LENGTH = 16777215      # MySQL MEDIUMBLOB
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("TEXT_COMPRESSION=zstd requires the 'zstandard' package") from None
+    return zstandard
+
+
+class TextCompression:
+    def __init__(self):
+        self.codec = 'zlib'
+        self.threshold = 1024
+        self.level = None
+
+    def init_app(self, app):
+        self.codec = app.config.get('TEXT_COMPRESSION') or self.codec
+        self.threshold = app.config.get('TEXT_COMPRESSION_THRESHOLD', self.threshold)
+        self.level = app.config.get('TEXT_COMPRESSION_LEVEL') or None
+        if self.codec not in ('zlib', 'zstd', 'none'):
+            raise ValueError(f"unknown TEXT_COMPRESSION '{self.codec}'")
+        if self.codec == 'zstd':
+            _zstd()
+        app.extensions['text_compression'] = self
+
+    def encode(self, text):
+        data = text.encode('utf-8')
+        if self.codec == 'none' or len(data) < self.threshold:
+            return data
+        if self.codec == 'zstd':
+            packed = ZSTD + _zstd().ZstdCompressor(level=self.level or 3).compress(data)
+        else:
+            packed = ZLIB + zlib.compress(data, self.level or 6)
+        return MARKER + packed if len(packed) + 1 < len(data) else data
+
+    @staticmethod
+    def decode(value):
+        if isinstance(value, str):
+            # 컬럼 타입을 바꾸기 전(TEXT)의 값은 드라이버가 str 로 돌려줍니다.
+            return value
+        value = bytes(value)
+        if not value.startswith(MARKER):
+            return value.decode('utf-8')
+        codec, payload = value[1:2], value[2:]
+        if codec == ZLIB:
+            return zlib.decompress(payload).decode('utf-8')
+        if codec == ZSTD:
+            return _zstd().ZstdDecompressor().decompress(payload).decode('utf-8')
+        raise ValueError(f"unknown compressed text codec {codec!r}")
+
+    @staticmethod
+    def is_compressed(value):
+        return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:1]) == MARKER
+
+
+class CompressedText(TypeDecorator):
+    """str 을 주고받는 BLOB 컬럼. 큰 값은 text_compression 설정에 따라 압축해 저장합니다."""
+
+    impl = LargeBinary(MAX_LENGTH)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else text_compression.encode(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else text_compression.decode(value)
+
+
+text_compression = TextCompression()
+
+
+def compressed_columns():
+    """CompressedText 로 선언된 (모델, 컬럼) 목록"""
+    from backend.extensions import db
+    return sorted(((mapper.class_, column)
+                   for mapper in db.Model.registry.mappers
+                   for column in mapper.local_table.columns
+                   if isinstance(column.type, CompressedText)),
+                  key=lambda pair: (pair[0].__tablename__, pair[1].name))
+
+
+# --- 기존 DB 적용 ---
+def alter_columns(log=print):
+    """MySQL 에서 CompressedText 컬럼이 아직 TEXT 이면 MEDIUMBLOB 으로 바꿉니다. 다른 DB 는 바꿀 필요가 없습니다."""
+    from sqlalchemy import inspect, text
+    from backend.extensions import db
+
+    if db.engine.dialect.name != 'mysql':
+        log(f"{db.engine.dialect.name}: column types do not need to change")
+        return 0
+    inspector = inspect(db.engine)
+    altered = 0
+    for model, column in compressed_columns():
+        table = model.__table__.name
+        current = next(c for c in inspector.get_columns(table) if c['name'] == column.name)
+        if isinstance(current['type'], LargeBinary):
+            continue
+        null = 'NULL' if column.nullable else 'NOT NULL'
+        # TEXT -> BLOB 변환은 utf8mb4 바이트를 그대로 옮기므로 기존 값은 압축되지 않은 UTF-8 로 남습니다.
+        db.session.execute(text(f"ALTER TABLE `{table}` MODIFY `{column.name}` MEDIUMBLOB {null}"))
+        log(f"{table}.{column.name}: {current['type']} -> MEDIUMBLOB")
+        altered += 1
+    db.session.commit()
+    return altered
+
+
+def migrate(batch_size=500, pause=0.0, dry_run=False, log=print):
+    """
+    기존 행 중 임계값 이상인 값을 압축합니다. 배치마다 행을 잠그고(SELECT ... FOR UPDATE) 다시 쓴 뒤 커밋하므로
+    서비스 중에 실행해도 그 사이의 수정을 덮어쓰지 않고, 중단한 뒤 다시 실행하면 남은 행만 처리합니다.
+    """
+    from sqlalchemy import bindparam, select, type_coerce, update
+    from sqlalchemy.types import NullType
+    from backend.extensions import db
+
+    stats = {}
+    for model, column in compressed_columns():
+        table = model.__table__
+        name = f"{table.name}.{column.name}"
+        stats[name] = counts = {'scanned': 0, 'compressed': 0, 'bytesBefore': 0, 'bytesAfter': 0}
+        # 저장된 그대로(예전 TEXT 는 str, BLOB 은 bytes) 읽습니다.
+        raw = type_coerce(column, NullType())
+        # 저장 형식만 바꾸는 것이므로 updatedAt 같은 onupdate 컬럼은 현재 값을 그대로 다시 씁니다.
+        kept = [c for c in table.columns if c.onupdate is not None]
+        last_id = ''
+        while True:
+            rows = db.session.execute(
+                select(table.c.id, raw, *kept)
+                .where(table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(batch_size)
+                .with_for_update()
+            ).all()
+            if not rows:
+                db.session.rollback()
+                break
+            last_id = rows[-1][0]
+            counts['scanned'] += len(rows)
+
+            updates = []
+            for row_id, value, *kept_values in rows:
+                if value is None or text_compression.is_compressed(value):
+                    continue
+                plain = value if isinstance(value, str) else bytes(value).decode('utf-8')
+                encoded = text_compression.encode(plain)
+                if encoded.startswith(MARKER):
+                    updates.append({'_id': row_id, '_value': plain,
+                                    **{f"_{c.name}": v for c, v in zip(kept, kept_values)}})
+                    counts['bytesBefore'] += len(plain.encode('utf-8'))
+                    counts['bytesAfter'] += len(encoded)
+            if updates and not dry_run:
+                # 값은 컬럼 타입(CompressedText)을 거쳐 압축됩니다.
+                db.session.execute(
+                    update(table).where(table.c.id == bindparam('_id')).values(
+                        {column.name: bindparam('_value'), **{c.name: bindparam(f"_{c.name}") for c in kept}}),
+                    updates,
+                )
+            db.session.commit()
+            counts['compressed'] += len(updates)
+            log(f"{name}: {counts['scanned']} scanned, {counts['compressed']} compressed")
+            if pause:
+                time.sleep(pause)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.compression')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('alter-columns', help='MySQL 의 TEXT 컬럼을 MEDIUMBLOB 으로 바꿉니다.')
+    migrate_parser = subcommands.add_parser('migrate', help='기존 행의 큰 값을 압축합니다.')
+    migrate_parser.add_argument('--batch-size', type=int, default=500, help='한 트랜잭션에서 처리할 행 수')
+    migrate_parser.add_argument('--pause', type=float, default=0.0, help='배치 사이에 쉴 시간(초), 서비스 부하 조절용')
+    migrate_parser.add_argument('--dry-run', action='store_true', help='압축될 행 수와 크기만 확인합니다.')
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+    # `python -m` 으로 실행하면 이 파일은 __main__ 이므로, 앱이 초기화한 backend.compression 모듈을 사용합니다.
+    from backend import compression
+    app = create_app()
+    with app.app_context():
+        if args.command == 'alter-columns':
+            compression.alter_columns()
+            return 0
+        stats = compression.migrate(args.batch_size, args.pause, args.dry_run)
+    for name, counts in stats.items():
+        print(f"{name:24} {counts['compressed']:>8} of {counts['scanned']:>8} rows compressed, "
+              f"{counts['bytesBefore']} -> {counts['bytesAfter']} bytes{' [dry-run]' if args.dry_run else ''}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+DB 방언(dialect)별 SQL 헬퍼
+
+MySQL 은 INSERT ... ON DUPLICATE KEY UPDATE / INSERT IGNORE 를,
+SQLite(로컬 개발/벤치마크)는 INSERT ... ON CONFLICT 구문을 사용합니다.
+"""
+from sqlalchemy import insert
+from backend.extensions import db
+
+
+def _dialect_name():
+    return db.engine.dialect.name
+
+
+def upsert_statement(model, conflict_columns, update_columns):
+    """
+    원자적 upsert 문장을 만듭니다. 실행 시 행 리스트를 넘기면 executemany 로 처리됩니다.
+
+    conflict_columns: 유니크 제약을 이루는 컬럼 이름 (SQLite 의 ON CONFLICT 대상)
+    update_columns  : 충돌 시 새 값으로 덮어쓸 컬럼 이름
+    """
+    dialect = _dialect_name()
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(model)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(model)
+        return stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={c: stmt.excluded[c] for c in update_columns},
+        )
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        stmt = pg_insert(model)
+        return stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={c: stmt.excluded[c] for c in update_columns},
+        )
+    raise NotImplementedError(f"upsert is not supported for dialect '{dialect}'")
+
+
+def insert_ignore_statement(model):
+    """중복 키 행은 조용히 건너뛰는 INSERT 문장을 만듭니다."""
+    dialect = _dialect_name()
+    if dialect == 'mysql':
+        return insert(model).prefix_with('IGNORE')
+    if dialect == 'sqlite':
+        return insert(model).prefix_with('OR IGNORE')
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(model).on_conflict_do_nothing()
+    raise NotImplementedError(f"insert-ignore is not supported for dialect '{dialect}'")
@@ -0,0 +1,138 @@
+"""
+집합 단위 연쇄 삭제
+
+과제/강의를 ORM cascade 로 지우면 하위 행(제출물, 파일, 성적, 버전, Q&A ...)을 모두 세션에 불러와
+한 행씩 DELETE 하므로, 큰 강의에서는 수 분 동안 메모리와 잠금을 잡고 있습니다.
+이 모듈은 외래 키 순서대로 테이블마다 'DELETE ... WHERE 부모 IN (...)' 을 chunk_size 개씩 실행합니다.
+
+- 모든 문장은 한 트랜잭션 안에서 실행되며, 중간에 실패하면 아무것도 지워지지 않습니다.
+- 업로드 파일, 미리보기 ref, 마감 처리 결과물(backend/closing.py)은 커밋이 끝난 뒤 파일 회수기(backend/reclaim.py)가 지웁니다.
+  버전/미리보기 blob 은 다른 행과 공유될 수 있으므로 각 모듈의 prune 명령이 정리합니다.
+- 강의를 지웠다면 자동완성 색인(backend/search.py)이 다음 검색 때 DB 와 다시 맞춥니다.
+- 반환값은 테이블별 삭제 행 수입니다.
+"""
+from sqlalchemy import delete, func, select
+
+from backend.extensions import db
+from backend.closing import artifact_keys, job_key
+from backend.intake import assignment_cache
+from backend.models import (
+    Assignment, Attachment, Course, Enrollment, Grade, Job, QALog, Submission, SubmissionFile,
+    SubmissionSignature, SubmissionVersion,
+)
+from backend.previews import ref_key
+from backend.reclaim import defer_delete
+from backend.search import search_index
+from backend.similarity import similarity_engine
+from backend.storage import key_for
+
+CHUNK_SIZE = 500
+
+
+def _chunks(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+class _Deletion:
+    """한 트랜잭션 동안의 삭제 문장 실행과 행 수 집계"""
+
+    def __init__(self, chunk_size, keep_files=False):
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.keep_files = keep_files
+        self.counts = {}
+        self.file_keys = []
+
+    def ids(self, column, parent_column, parent_ids):
+        found = []
+        for chunk in _chunks(parent_ids, self.chunk_size):
+            found.extend(db.session.scalars(select(column).where(parent_column.in_(chunk))))
+        return found
+
+    def delete(self, model, column, ids):
+        for chunk in _chunks(ids, self.chunk_size):
+            result = db.session.execute(
+                delete(model).where(column.in_(chunk)).execution_options(synchronize_session=False)
+            )
+            self.counts[model.__tablename__] = self.counts.get(model.__tablename__, 0) + result.rowcount
+
+    def delete_files(self, model, parent_column, parent_ids):
+        """업로드 파일 행을 지우고, 커밋 후 지울 저장소 키를 모아 둡니다. (keep_files 이면 파일은 남깁니다)"""
+        for chunk in _chunks(parent_ids, self.chunk_size) if not self.keep_files else ():
+            for file_id, file_url in db.session.execute(
+                    select(model.id, model.fileUrl).where(parent_column.in_(chunk))):
+                self.file_keys.append(key_for(model, file_url))
+                self.file_keys.append(ref_key(model, file_id))
+        self.delete(model, parent_column, parent_ids)
+
+    def assignments(self, assignment_ids):
+        submission_ids = self.ids(Submission.id, Submission.assignmentId, assignment_ids)
+        self.delete_files(SubmissionFile, SubmissionFile.submissionId, submission_ids)
+        self.delete(Grade, Grade.submissionId, submission_ids)
+        self.delete(SubmissionVersion, SubmissionVersion.submissionId, submission_ids)
+        self.delete(SubmissionSignature, SubmissionSignature.submissionId, submission_ids)
+        self.delete(Submission, Submission.id, submission_ids)
+        self.delete_files(Attachment, Attachment.assignmentId, assignment_ids)
+        self.delete(QALog, QALog.assignmentId, assignment_ids)
+        self.delete(Assignment, Assignment.id, assignment_ids)
+        self.delete(Job, Job.key, [job_key(assignment_id) for assignment_id in assignment_ids])
+        if not self.keep_files:
+            for assignment_id in assignment_ids:
+                self.file_keys.extend(artifact_keys(assignment_id))
+
+    def commit(self, assignment_ids):
+        # 업로드 파일은 커밋된 뒤에만 지워지고, 롤백되면 예약도 취소됩니다.
+        defer_delete(db.session, self.file_keys)
+        db.session.commit()
+        for assignment_id in assignment_ids:
+            assignment_cache.invalidate(assignment_id)
+            similarity_engine.forget(assignment_id)
+        if self.counts.get(Course.__tablename__):
+            search_index.mark_stale()
+        return self.counts
+
+
+def delete_assignments(assignment_ids, chunk_size=None):
+    """과제와 그 아래의 모든 행을 삭제하고 테이블별 삭제 행 수를 반환합니다."""
+    assignment_ids = list(assignment_ids)
+    deletion = _Deletion(chunk_size)
+    try:
+        deletion.assignments(assignment_ids)
+        return deletion.commit(assignment_ids)
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def delete_course(course_id, chunk_size=None):
+    """강의와 수강 신청, 강의의 모든 과제(및 그 아래 행)를 삭제하고 테이블별 삭제 행 수를 반환합니다."""
+    deletion = _Deletion(chunk_size)
+    try:
+        assignment_ids = deletion.ids(Assignment.id, Assignment.courseId, [course_id])
+        deletion.assignments(assignment_ids)
+        deletion.delete(Enrollment, Enrollment.courseId, [course_id])
+        deletion.delete(Course, Course.id, [course_id])
+        return deletion.commit(assignment_ids)
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def run_delete_assignments(payload):
+    """백그라운드 작업 'delete_assignment' 의 처리 함수"""
+    return delete_assignments(payload['assignmentIds'])
+
+
+def run_delete_course(payload):
+    """백그라운드 작업 'delete_course' 의 처리 함수"""
+    return delete_course(payload['courseId'])
+
+
+def submission_count(assignment_ids=None, course_id=None):
+    """삭제 대상의 제출물 수. 라우트가 백그라운드 작업으로 넘길지 판단할 때 사용합니다."""
+    query = select(func.count(Submission.id))
+    if course_id is not None:
+        query = query.join(Assignment, Assignment.id == Submission.assignmentId).where(Assignment.courseId == course_id)
+    else:
+        query = query.where(Submission.assignmentId.in_(list(assignment_ids)))
+    return db.session.scalar(query)
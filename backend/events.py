@@ -0,0 +1,161 @@
+"""
+사용자별 실시간 이벤트 pub/sub
+
+라우트는 커밋이 끝난 뒤 event_broker.publish() 로 이벤트를 발행하고,
+/api/events/stream (Server-Sent Events) 이 구독자에게 전달합니다.
+클라이언트는 이벤트를 받은 뒤 바뀐 데이터만 다시 가져옵니다.
+
+- EVENT_BROKER_URL 미설정 : 프로세스 내부에서만 전달합니다. (단일 워커)
+- EVENT_BROKER_URL=redis://... : Redis pub/sub 으로 모든 워커에 전달합니다. (멀티 워커)
+"""
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+
+CHANNEL_PREFIX = 'events:'
+
+
+class Subscription:
+    """한 연결(SSE 스트림)의 이벤트 대기열"""
+
+    def __init__(self, broker, user_id, maxsize=100, loop=None):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = loop
+        if loop is None:
+            self._queue = queue.Queue(maxsize=maxsize)
+        else:
+            import asyncio
+            self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except Exception:  # queue.Full / asyncio.QueueFull
+            # 너무 느린 구독자는 이벤트를 놓칩니다. 클라이언트는 재연결 시 전체를 다시 가져옵니다.
+            pass
+
+    def deliver(self, event):
+        if self.loop is None:
+            self._put(event)
+        else:
+            self.loop.call_soon_threadsafe(self._put, event)
+
+    def get(self, timeout):
+        """다음 이벤트를 기다립니다. timeout 안에 없으면 None 을 반환합니다."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def get_async(self, timeout):
+        import asyncio
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    def __init__(self):
+        self.app = None
+        self._subscribers = {}   # userId -> set[Subscription]
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._redis = None
+        self._listener_pid = None
+        self._origin = None
+
+    def init_app(self, app):
+        self.app = app
+        url = app.config.get('EVENT_BROKER_URL')
+        if url:
+            import redis
+            self._redis = redis.Redis.from_url(url)
+        app.extensions['event_broker'] = self
+
+    # --- 발행 ---
+    def publish(self, user_ids, event_type, data):
+        """user_ids 의 모든 연결에 이벤트를 보냅니다. 발행 실패가 요청을 실패시키지는 않습니다."""
+        if isinstance(user_ids, str):
+            user_ids = [user_ids]
+        event = {'type': event_type, 'data': data, 'ts': time.time()}
+        try:
+            if self._redis is not None:
+                payload = json.dumps({'origin': self._origin_id(), 'event': event}, default=str)
+                for user_id in set(filter(None, user_ids)):
+                    self._redis.publish(f"{CHANNEL_PREFIX}{user_id}", payload)
+            for user_id in set(filter(None, user_ids)):
+                self._deliver_local(user_id, event)
+        except Exception as e:
+            self.app.logger.error("Error publishing event %s: %s", event_type, e)
+
+    def _deliver_local(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        if not subscribers:
+            return
+        event = dict(event, id=next(self._ids))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    # --- 구독 ---
+    def subscribe(self, user_id, loop=None):
+        self._ensure_listener()
+        subscription = Subscription(self, user_id, loop=loop)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    # --- 공유 브로커 수신 ---
+    def _origin_id(self):
+        # 자신이 발행한 메시지는 이미 로컬로 전달했으므로 Redis 에서 다시 받지 않습니다.
+        pid = os.getpid()
+        if self._origin is None or self._origin[0] != pid:
+            self._origin = (pid, f"{os.uname().nodename}:{pid}:{id(self)}")
+        return self._origin[1]
+
+    def _ensure_listener(self):
+        if self._redis is None or self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid != os.getpid():
+                threading.Thread(target=self._listen, name='event-listener', daemon=True).start()
+                self._listener_pid = os.getpid()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                for message in pubsub.listen():
+                    payload = json.loads(message['data'])
+                    if payload['origin'] == self._origin_id():
+                        continue
+                    channel = message['channel'].decode() if isinstance(message['channel'], bytes) else message['channel']
+                    self._deliver_local(channel[len(CHANNEL_PREFIX):], payload['event'])
+            except Exception as e:
+                self.app.logger.error("Event listener disconnected, reconnecting: %s", e)
+                time.sleep(1)
+
+
+def format_sse(event):
+    """이벤트를 text/event-stream 형식으로 직렬화합니다."""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+event_broker = EventBroker()
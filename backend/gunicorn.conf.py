@@ -0,0 +1,48 @@
+"""
+gunicorn 설정
+
+    gunicorn -c backend/gunicorn.conf.py backend.wsgi:app
+
+GUNICORN_PRELOAD=1 (기본값) 이면 마스터 프로세스가 앱을 한 번 만들고 워커를 fork 합니다.
+워커는 import 된 모듈과 라우트 테이블을 copy-on-write 로 공유하므로 부팅이 거의 즉시 끝납니다.
+GUNICORN_PRELOAD=0 이면 워커마다 앱을 만들며, LAZY_STARTUP=1 과 함께 쓰면 라우트 모듈 import 가
+첫 요청까지 미뤄집니다.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS") or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.environ.get("GUNICORN_THREADS") or 4)
+timeout = int(os.environ.get("GUNICORN_TIMEOUT") or 120)
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+if preload_app:
+    # 앱 로딩 중 생기는 객체에 GC 가 refcount/헤더를 건드리지 않도록 마스터에서는 GC 를 멈춥니다.
+    gc.disable()
+
+
+def when_ready(server):
+    if preload_app:
+        # 지금까지 만들어진 객체를 영구 세대로 옮겨 워커의 GC 가 공유 페이지를 더럽히지 않게 합니다.
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        gc.enable()
+        # 마스터에서 만들어진 커넥션 풀은 워커 사이에서 공유되면 안 됩니다.
+        from backend.extensions import db
+        from backend.wsgi import app
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # 요청이 들어오기 전에도 재시작 전에 저장된 작업/메일을 처리하도록 워커마다 실행 스레드를 띄웁니다.
+    # (preload 가 아니면 이 시점에 워커가 앱을 이미 만들었습니다)
+    from backend.app import start_workers
+    from backend.wsgi import app
+    start_workers(app)
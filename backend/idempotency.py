@@ -0,0 +1,227 @@
+"""
+쓰기 요청의 Idempotency-Key 처리
+
+클라이언트가 'Idempotency-Key: <임의의 고유 값>' 헤더를 보내면, 같은 사용자·같은 엔드포인트의
+같은 키로 다시 들어온 요청은 라우트를 다시 실행하지 않고 처음 응답을 그대로 돌려줍니다.
+(제출 버튼 두 번 클릭, 모바일 네트워크의 자동 재시도 등)
+
+- 처음 요청이 처리 중이면 재시도는 끝날 때까지 기다렸다가 같은 응답을 받습니다.
+  (IDEMPOTENCY_WAIT 초가 지나면 409 + Retry-After)
+- 같은 키로 내용이 다른 요청이 오면 422 로 거절합니다. (요청 지문 비교)
+- 5xx 응답은 저장하지 않으므로 재시도하면 다시 처리합니다.
+- 재생된 응답에는 'Idempotent-Replayed: true' 헤더가 붙습니다.
+
+- IDEMPOTENCY_STORE_URL 미설정 : 프로세스 메모리에 저장합니다. (단일 워커)
+- IDEMPOTENCY_STORE_URL=redis://... : 모든 워커가 Redis 를 공유합니다. (멀티 워커)
+"""
+import hashlib
+import json
+import threading
+import time
+from functools import wraps
+
+from flask import g, jsonify, make_response, request
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADERS = ('Content-Type', 'Location', 'Retry-After')
+
+TOO_LONG_MESSAGE = f"{HEADER} 는 {MAX_KEY_LENGTH}자 이하여야 합니다."
+MISMATCH_MESSAGE = f"이 {HEADER} 는 다른 요청에 이미 사용되었습니다."
+BUSY_MESSAGE = f"같은 {HEADER} 의 요청을 아직 처리 중입니다. 잠시 후 다시 시도해주세요."
+
+
+class _MemoryBackend:
+    def __init__(self):
+        self._entries = {}   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def add(self, key, value, ttl):
+        """키가 없을 때만 저장하고 성공 여부를 반환합니다."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_purge > 60:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                self._last_purge = now
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return False
+            self._entries[key] = (now + ttl, value)
+            return True
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class _RedisBackend:
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def add(self, key, value, ttl):
+        return bool(self._redis.set(key, value, nx=True, ex=ttl))
+
+    def get(self, key):
+        value = self._redis.get(key)
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value, ttl):
+        self._redis.set(key, value, ex=ttl)
+
+    def delete(self, key):
+        self._redis.delete(key)
+
+
+class IdempotencyStore:
+    def __init__(self):
+        self.app = None
+        self.ttl = 86400
+        self.lock_ttl = 120
+        self.wait = 10
+        self._backend = _MemoryBackend()
+
+    def init_app(self, app):
+        self.app = app
+        self.ttl = app.config.get('IDEMPOTENCY_TTL', self.ttl)
+        self.lock_ttl = app.config.get('IDEMPOTENCY_LOCK_TTL', self.lock_ttl)
+        self.wait = app.config.get('IDEMPOTENCY_WAIT', self.wait)
+        url = app.config.get('IDEMPOTENCY_STORE_URL')
+        self._backend = _RedisBackend(url) if url else _MemoryBackend()
+        app.extensions['idempotency_store'] = self
+
+    def begin(self, key, fingerprint):
+        """
+        요청 처리를 시작합니다. 반환값:
+        ('proceed', None)    : 처음 보는 키, 라우트를 실행합니다.
+        ('replay', response) : 이미 끝난 요청, 저장된 응답을 돌려줍니다.
+        ('mismatch', None)   : 같은 키로 다른 내용의 요청
+        ('busy', None)       : 처음 요청이 아직 처리 중
+        """
+        deadline = time.monotonic() + self.wait
+        while True:
+            # 처리 중 표시의 TTL 은 짧게 두어, 워커가 죽어도 키가 영원히 잠기지 않게 합니다.
+            if self._backend.add(key, json.dumps({'fingerprint': fingerprint}), self.lock_ttl):
+                return 'proceed', None
+            raw = self._backend.get(key)
+            if raw is None:
+                continue
+            entry = json.loads(raw)
+            if entry['fingerprint'] != fingerprint:
+                return 'mismatch', None
+            if 'response' in entry:
+                return 'replay', entry['response']
+            if time.monotonic() >= deadline:
+                return 'busy', None
+            time.sleep(0.1)
+
+    def complete(self, key, fingerprint, response):
+        self._backend.set(key, json.dumps({'fingerprint': fingerprint, 'response': response}), self.ttl)
+
+    def release(self, key):
+        self._backend.delete(key)
+
+
+idempotency_store = IdempotencyStore()
+
+
+def scope_key(user_id, method, path, idempotency_key):
+    # 경로는 Flask/ASGI 모드에서 같으므로, 두 모드가 함께 떠 있어도 같은 키로 취급됩니다.
+    return f"idempotency:{user_id}:{method}:{path}:{idempotency_key}"
+
+
+def fingerprint(method, path, query, body=b'', fields=(), files=()):
+    """
+    요청 내용의 지문. 파일 업로드는 내용을 다시 읽지 않도록 폼 필드와 (필드, 파일 이름, 형식, 크기)로 계산합니다.
+    multipart 경계 문자열은 재시도마다 달라지므로 본문 전체나 Content-Length 는 쓰지 않습니다.
+    """
+    digest = hashlib.sha256(f"{method} {path}?{query}".encode('utf-8'))
+    digest.update(body)
+    for name, value in sorted(fields):
+        digest.update(f"\0{name}={value}".encode('utf-8'))
+    for name, filename, mimetype, size in sorted(files):
+        digest.update(f"\0{name}:{filename}:{mimetype}:{size}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _file_size(file):
+    # 업로드 파일은 파싱 단계에서 이미 메모리/임시 파일에 받아 두었으므로 끝으로 이동해 크기만 잽니다.
+    position = file.stream.tell()
+    size = file.stream.seek(0, 2)
+    file.stream.seek(position)
+    return size
+
+
+def request_fingerprint():
+    query = request.query_string.decode()
+    if request.mimetype == 'multipart/form-data':
+        return fingerprint(
+            request.method, request.path, query,
+            fields=list(request.form.items(multi=True)),
+            files=[(name, file.filename, file.mimetype, _file_size(file))
+                   for name, file in request.files.items(multi=True)],
+        )
+    return fingerprint(request.method, request.path, query, body=request.get_data())
+
+
+def response_to_dict(status, body, headers):
+    return {
+        'status': status,
+        'body': body,
+        'headers': {name: headers[name] for name in REPLAYED_HEADERS if name in headers},
+    }
+
+
+def idempotent(f):
+    """
+    Idempotency-Key 헤더를 처리하는 데코레이터. 사용자별로 키를 구분하므로 @authorize 아래에 둡니다.
+    헤더가 없으면 아무 일도 하지 않습니다.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        idempotency_key = request.headers.get(HEADER)
+        if not idempotency_key:
+            return f(*args, **kwargs)
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return jsonify(error=TOO_LONG_MESSAGE), 400
+
+        key = scope_key(g.user_id, request.method, request.path, idempotency_key)
+        request_hash = request_fingerprint()
+        state, saved = idempotency_store.begin(key, request_hash)
+        if state == 'replay':
+            response = make_response(saved['body'], saved['status'])
+            response.headers.update(saved['headers'])
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        if state == 'mismatch':
+            return jsonify(error=MISMATCH_MESSAGE), 422
+        if state == 'busy':
+            response = jsonify(error=BUSY_MESSAGE)
+            response.status_code = 409
+            response.headers['Retry-After'] = '1'
+            return response
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except BaseException:
+            idempotency_store.release(key)
+            raise
+        if response.status_code >= 500 or response.is_streamed:
+            idempotency_store.release(key)
+        else:
+            idempotency_store.complete(key, request_hash, response_to_dict(
+                response.status_code, response.get_data(as_text=True), response.headers))
+        return response
+    return decorated
@@ -0,0 +1,94 @@
+"""
+워커 시작 시간(import 시간) 프로파일러
+
+새 인터프리터에서 `python -X importtime` 으로 앱을 만들고, 모듈별 import 시간을 집계합니다.
+
+    python -m backend.importprofile              # 기본 모드
+    python -m backend.importprofile --lazy       # LAZY_STARTUP 모드
+    python -m backend.importprofile --top 40 --first-request
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+_CHILD_CODE = '''
+import json, time
+started = time.perf_counter()
+from backend.app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+result = {"import_ms": (imported - started) * 1000, "create_app_ms": (created - imported) * 1000}
+if {first_request}:
+    app.test_client().get("/api/__importprofile__")
+    result["first_request_ms"] = (time.perf_counter() - created) * 1000
+print("__RESULT__" + json.dumps(result))
+'''
+
+
+def parse_importtime(stderr):
+    """`-X importtime` 출력을 (모듈, self_us, cumulative_us, depth) 목록으로 변환합니다."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        raw_name = parts[2].rstrip()
+        depth = (len(raw_name) - len(raw_name.lstrip(' '))) // 2
+        rows.append((raw_name.strip(), int(parts[0]), int(parts[1]), depth))
+    return rows
+
+
+def profile(lazy=False, first_request=False):
+    env = dict(os.environ)
+    env['LAZY_STARTUP'] = '1' if lazy else '0'
+    env.setdefault('SECRET_KEY', 'importprofile')
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CHILD_CODE.replace('{first_request}', str(first_request))],
+        capture_output=True, text=True, env=env,
+    )
+    result = None
+    for line in completed.stdout.splitlines():
+        if line.startswith('__RESULT__'):
+            result = json.loads(line[len('__RESULT__'):])
+    if result is None:
+        raise RuntimeError(f"app startup failed:\n{completed.stderr[-2000:]}")
+    return result, parse_importtime(completed.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.importprofile')
+    parser.add_argument('--lazy', action='store_true', help='LAZY_STARTUP=1 로 측정합니다.')
+    parser.add_argument('--first-request', action='store_true', help='첫 요청 처리 시간까지 측정합니다.')
+    parser.add_argument('--top', type=int, default=25)
+    args = parser.parse_args(argv)
+
+    result, rows = profile(lazy=args.lazy, first_request=args.first_request)
+
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split('.')[0]] += self_us
+
+    print(f"mode: {'lazy' if args.lazy else 'eager'}")
+    for key, value in result.items():
+        print(f"{key:>18}: {value:8.1f} ms")
+    print(f"{'modules imported':>18}: {len(rows)}")
+
+    print(f"\ntop {args.top} packages by self time")
+    for package, total in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {total / 1000:8.1f} ms  {package}")
+
+    print(f"\ntop {args.top} imports by cumulative time (top-level only)")
+    top_level = [row for row in rows if row[3] == 0]
+    for name, _, cumulative_us, _ in sorted(top_level, key=lambda row: -row[2])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
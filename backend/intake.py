@@ -0,0 +1,235 @@
+"""
+마감 직전 제출 폭주를 위한 제출 접수(intake) 경로
+
+- AssignmentCache  : 과제 마감일/메타데이터를 프로세스 내에 캐시합니다. (짧은 TTL + 명시적 무효화)
+- SubmissionIntake : 제출 요청을 제한된 크기의 큐에 접수하고, 전용 writer 스레드가
+                     여러 요청을 한 번의 원자적 upsert(INSERT ... ON DUPLICATE KEY UPDATE)로 기록합니다.
+
+접수 규칙:
+- 제출 시각은 큐에 들어가는 순간(접수 시점)에 서버에서 기록합니다.
+  큐 대기 시간 때문에 제출이 지각 처리되는 일은 없습니다.
+- 같은 학생의 같은 과제 제출이 대기 중이면 최신 내용으로 합쳐지고(coalescing),
+  두 요청 모두 같은 결과를 받습니다.
+- 학생별 대기열을 라운드 로빈으로 꺼내므로 한 학생이 여러 과제를 연달아 제출해도
+  다른 학생의 제출이 밀리지 않습니다.
+- 큐가 가득 차면 즉시 IntakeRejected 를 발생시켜(503 + Retry-After) 부하를 되돌려 보냅니다.
+- 제한 시간 안에 기록되지 않으면 IntakeTimeout (503 + Retry-After) 입니다. 이후 기록이 실패할 수도 있으므로
+  접수되었다고 응답하지 않습니다. 다시 제출해도 같은 제출 행에 합쳐지므로 안전합니다.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from sqlalchemy import select, tuple_
+from backend.dbutil import upsert_statement
+from backend.extensions import db
+from backend.models import Assignment, Submission, SubmissionStatus
+
+AssignmentMeta = namedtuple('AssignmentMeta', ['id', 'dueDate', 'maxScore', 'teacherId', 'courseId'])
+IntakeResult = namedtuple('IntakeResult', ['submission_id', 'created'])
+
+
+class IntakeRejected(Exception):
+    """접수 큐가 가득 차서 요청을 받을 수 없을 때 발생합니다."""
+
+    def __init__(self, retry_after=1):
+        super().__init__('submission queue is full')
+        self.retry_after = retry_after
+
+
+class IntakeTimeout(Exception):
+    """접수는 되었지만 제한 시간 안에 기록이 끝나지 않았을 때 발생합니다. (기록 여부는 보장되지 않습니다)"""
+
+    def __init__(self, retry_after=1):
+        super().__init__('submission write timed out')
+        self.retry_after = retry_after
+
+
+class AssignmentCache:
+    """과제 메타데이터(마감일, 최대 점수 등)의 프로세스 내 캐시"""
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def init_app(self, app):
+        self.ttl = app.config.get('ASSIGNMENT_CACHE_TTL', self.ttl)
+        self.clear()
+
+    def get(self, assignment_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(assignment_id)
+            if entry and entry[1] > now:
+                return entry[0]
+
+        row = db.session.execute(
+            select(Assignment.id, Assignment.dueDate, Assignment.maxScore, Assignment.teacherId, Assignment.courseId)
+            .where(Assignment.id == assignment_id)
+        ).first()
+        if not row:
+            return None
+
+        meta = AssignmentMeta(*row)
+        with self._lock:
+            self._entries[assignment_id] = (meta, now + self.ttl)
+        return meta
+
+    def invalidate(self, assignment_id):
+        with self._lock:
+            self._entries.pop(assignment_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _PendingSubmission:
+    __slots__ = ('assignment_id', 'student_id', 'content', 'submitted_at', 'future')
+
+    def __init__(self, assignment_id, student_id, content, submitted_at):
+        self.assignment_id = assignment_id
+        self.student_id = student_id
+        self.content = content
+        self.submitted_at = submitted_at
+        self.future = Future()
+
+
+class SubmissionIntake:
+    """제한된 크기의 공정(학생별 라운드 로빈) 큐 + 일괄 upsert writer"""
+
+    def __init__(self):
+        self.app = None
+        self.max_pending = 1000
+        self.batch_size = 50
+        self.wait_timeout = 10
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()   # studentId -> deque[_PendingSubmission]
+        self._pending = {}             # (assignmentId, studentId) -> _PendingSubmission
+        self._writer = None
+        self._writer_pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.max_pending = app.config.get('SUBMISSION_QUEUE_SIZE', self.max_pending)
+        self.batch_size = app.config.get('SUBMISSION_BATCH_SIZE', self.batch_size)
+        self.wait_timeout = app.config.get('SUBMISSION_WRITE_TIMEOUT', self.wait_timeout)
+        app.extensions['submission_intake'] = self
+
+    def submit(self, assignment_id, student_id, content, submitted_at):
+        """
+        제출을 접수하고 DB 에 기록될 때까지 기다립니다.
+        submitted_at 은 호출자가 접수 시점에 기록한 서버 시각입니다.
+        """
+        key = (assignment_id, student_id)
+        with self._cond:
+            entry = self._pending.get(key)
+            if entry:
+                # 아직 기록되지 않은 같은 제출이 있으면 최신 내용으로 합칩니다.
+                entry.content = content
+                entry.submitted_at = submitted_at
+            else:
+                if len(self._pending) >= self.max_pending:
+                    raise IntakeRejected()
+                entry = _PendingSubmission(assignment_id, student_id, content, submitted_at)
+                self._pending[key] = entry
+                self._queues.setdefault(student_id, deque()).append(entry)
+                self._cond.notify()
+        self._ensure_writer()
+
+        try:
+            return entry.future.result(timeout=self.wait_timeout)
+        except FutureTimeoutError:
+            raise IntakeTimeout()
+
+    def _ensure_writer(self):
+        # fork 된 워커에서는 부모의 스레드가 없으므로 프로세스마다 writer 를 새로 띄웁니다.
+        pid = os.getpid()
+        if self._writer_pid == pid and self._writer.is_alive():
+            return
+        with self._cond:
+            if self._writer_pid == pid and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(target=self._run, name='submission-intake', daemon=True)
+            self._writer_pid = pid
+            self._writer.start()
+
+    def _take_batch(self):
+        """학생별 대기열에서 라운드 로빈으로 최대 batch_size 개를 꺼냅니다."""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            batch = []
+            while self._queues and len(batch) < self.batch_size:
+                student_id, queue = next(iter(self._queues.items()))
+                entry = queue.popleft()
+                del self._pending[(entry.assignment_id, entry.student_id)]
+                batch.append(entry)
+                # 이번 차례를 마친 학생은 맨 뒤로 보냅니다.
+                del self._queues[student_id]
+                if queue:
+                    self._queues[student_id] = queue
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            with self.app.app_context():
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error("Batched submission upsert failed, retrying one by one: %s", e)
+                    for entry in batch:
+                        # 일괄 기록이 커밋된 뒤 결과를 알리다 실패했으면 이미 결과를 받은 항목이 있습니다.
+                        # 다시 set_result 하면 InvalidStateError 로 writer 스레드가 죽습니다.
+                        if entry.future.done():
+                            continue
+                        try:
+                            self._write([entry])
+                        except Exception as row_error:
+                            db.session.rollback()
+                            if not entry.future.done():
+                                entry.future.set_exception(row_error)
+                finally:
+                    db.session.remove()
+
+    def _write(self, batch):
+        new_ids = {}
+        rows = []
+        for entry in batch:
+            new_id = str(uuid.uuid4())
+            new_ids[(entry.assignment_id, entry.student_id)] = new_id
+            rows.append({
+                'id': new_id,
+                'assignmentId': entry.assignment_id,
+                'studentId': entry.student_id,
+                'content': entry.content,
+                'submittedAt': entry.submitted_at,
+                'status': SubmissionStatus.PENDING,
+            })
+
+        stmt = upsert_statement(Submission, ['assignmentId', 'studentId'], ['content', 'submittedAt'])
+        db.session.execute(stmt, rows)
+
+        keys = list(new_ids)
+        saved = db.session.execute(
+            select(Submission.assignmentId, Submission.studentId, Submission.id)
+            .where(tuple_(Submission.assignmentId, Submission.studentId).in_(keys))
+        ).all()
+        db.session.commit()
+
+        saved_ids = {(a, s): i for a, s, i in saved}
+        for entry in batch:
+            if entry.future.done():
+                continue
+            key = (entry.assignment_id, entry.student_id)
+            submission_id = saved_ids[key]
+            entry.future.set_result(IntakeResult(submission_id, submission_id == new_ids[key]))
+
+
+assignment_cache = AssignmentCache()
+submission_intake = SubmissionIntake()
@@ -0,0 +1,211 @@
+"""
+백그라운드 작업 실행기
+
+요청 안에서 끝내기에는 오래 걸리는 작업(큰 강의 삭제)이나 정해진 시각에 실행할 작업(과제 마감 처리)을
+Job 테이블에 기록하고, 워커 프로세스마다 하나씩 도는 스레드가 실행 시각이 된 작업을 가져가 실행합니다.
+
+- 작업은 DB 에 있으므로 서버를 다시 시작해도 사라지지 않고, 어느 워커에서든 GET /api/jobs/<id> 로 조회됩니다.
+- 여러 워커가 같은 작업을 가져가지 않도록 'UPDATE ... WHERE status = queued' 의 영향 행 수로 선점합니다.
+- 실패한 작업은 JOB_MAX_ATTEMPTS 번까지 점점 늦춰 다시 시도합니다.
+- 실행 중에 워커가 죽은 작업은 JOB_LOCK_TIMEOUT 초가 지나면 다시 대기열로 돌아갑니다.
+
+작업 종류와 처리 함수는 HANDLERS 에 '모듈:함수' 로 등록하며, 처리 함수는 payload(dict)를 받아
+JSON 으로 직렬화할 수 있는 결과를 반환합니다.
+"""
+import importlib
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from backend.extensions import db
+from backend.logs import log_context
+from backend.models import Job
+
+# 작업 종류 -> 처리 함수. 실행할 때 import 하므로 라우트 모듈이 아직 로드되지 않았어도 됩니다.
+HANDLERS = {
+    'delete_assignment': 'backend.deletion:run_delete_assignments',
+    'delete_course': 'backend.deletion:run_delete_course',
+    'assignment.close': 'backend.closing:close_assignment',
+}
+
+# 주기적으로 실행할 함수와 간격(설정 이름). 모든 워커에서 실행되므로 여러 번 실행되어도 안전해야 합니다.
+PERIODIC = [
+    ('backend.closing:reconcile', 'ASSIGNMENT_CLOSE_RECONCILE_INTERVAL'),
+]
+
+
+def _resolve(path):
+    module, _, name = path.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def job_to_dict(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'runAt': job.runAt.isoformat(),
+        'createdBy': job.createdBy,
+        'createdAt': job.createdAt.isoformat(),
+        'startedAt': job.startedAt.isoformat() if job.startedAt else None,
+        'finishedAt': job.finishedAt.isoformat() if job.finishedAt else None,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+    }
+
+
+class JobRunner:
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.poll_interval = 5
+        self.lock_timeout = 3600
+        self.max_attempts = 3
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+        self._worker_id = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('JOBS_ENABLED', self.enabled)
+        self.poll_interval = app.config.get('JOB_POLL_INTERVAL', self.poll_interval)
+        self.lock_timeout = app.config.get('JOB_LOCK_TIMEOUT', self.lock_timeout)
+        self.max_attempts = app.config.get('JOB_MAX_ATTEMPTS', self.max_attempts)
+        app.extensions['job_runner'] = self
+        if self.enabled:
+            # 운영 서버는 워커 프로세스가 뜰 때 start() 를 호출합니다. (backend/app.py start_workers)
+            # 개발 서버처럼 그 훅이 없는 실행 방식을 위해 요청 때도 확인합니다.
+            app.before_request(self._ensure_worker)
+
+    def start(self):
+        """이 프로세스의 실행 스레드를 띄웁니다. 재시작 뒤 요청이 없어도 저장된 작업이 실행됩니다."""
+        if self.enabled:
+            self._ensure_worker()
+
+    # --- 예약 ---
+    def submit(self, kind, payload, run_at=None, key=None, created_by=None):
+        """
+        작업을 예약하고 작업 ID 를 반환합니다. (현재 세션을 커밋합니다)
+        key 가 같은 작업이 이미 있으면 새로 만들지 않고 payload / 실행 시각을 바꿔 다시 대기시킵니다.
+        실행 중인 작업은 건드리지 않습니다.
+        """
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        values = {'payload': json.dumps(payload, default=str), 'runAt': run_at or datetime.utcnow()}
+        for _ in range(2):
+            existing = db.session.scalars(select(Job).where(Job.key == key)).first() if key else None
+            if existing is not None:
+                if existing.status != 'running':
+                    for name, value in dict(values, status='queued', attempts=0, result=None, error=None,
+                                            startedAt=None, finishedAt=None).items():
+                        setattr(existing, name, value)
+                    db.session.commit()
+                job_id = existing.id
+                break
+            job = Job(kind=kind, key=key, createdBy=created_by, **values)
+            db.session.add(job)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # 다른 요청이 같은 key 로 먼저 예약했습니다. 그 작업을 갱신합니다.
+                db.session.rollback()
+                continue
+            job_id = job.id
+            break
+        if values['runAt'] <= datetime.utcnow():
+            self._wake.set()
+        return job_id
+
+    def get(self, job_id):
+        return db.session.get(Job, job_id)
+
+    # --- 실행 ---
+    def _ensure_worker(self):
+        # fork 된 워커에서는 부모의 스레드가 없으므로 프로세스마다 새로 띄웁니다.
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return
+        with self._lock:
+            if self._worker_pid != pid:
+                self._worker_id = f"{socket.gethostname()}:{pid}"
+                threading.Thread(target=self._run, name='job-runner', daemon=True).start()
+                self._worker_pid = pid
+
+    def _run(self):
+        last_periodic = {}
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self.app.app_context():
+                try:
+                    self._requeue_stale()
+                    while (job_id := self._claim()) is not None:
+                        self._execute(job_id)
+                    now = time.monotonic()
+                    for path, setting in PERIODIC:
+                        interval = self.app.config.get(setting)
+                        if interval and now - last_periodic.get(path, 0) >= interval:
+                            last_periodic[path] = now
+                            _resolve(path)()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error("Job runner error: %s", e)
+                finally:
+                    db.session.remove()
+
+    def _requeue_stale(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lock_timeout)
+        db.session.execute(
+            update(Job).where(Job.status == 'running', Job.lockedAt < cutoff)
+            .values(status='queued', lockedBy=None, lockedAt=None)
+        )
+        db.session.commit()
+
+    def _claim(self):
+        """실행 시각이 된 작업 하나를 선점하고 ID 를 반환합니다. 없으면 None 을 반환합니다."""
+        now = datetime.utcnow()
+        candidates = db.session.scalars(
+            select(Job.id).where(Job.status == 'queued', Job.runAt <= now).order_by(Job.runAt).limit(5)
+        ).all()
+        for job_id in candidates:
+            claimed = db.session.execute(
+                update(Job).where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', lockedBy=self._worker_id, lockedAt=now, startedAt=now,
+                        attempts=Job.attempts + 1)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return job_id
+        return None
+
+    def _execute(self, job_id):
+        job = db.session.get(Job, job_id)
+        kind, payload, attempts = job.kind, json.loads(job.payload), job.attempts
+        # 처리 함수가 남기는 로그에도 작업 ID 를 붙입니다. (backend/logs.py)
+        with log_context(jobId=job_id, jobKind=kind):
+            try:
+                result = _resolve(HANDLERS[kind])(payload)
+                values = {'status': 'succeeded', 'result': json.dumps(result, default=str), 'error': None}
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error("Job %s %s failed (attempt %s): %s", kind, job_id, attempts, e)
+                values = {'status': 'failed', 'error': str(e)}
+                if attempts < self.max_attempts:
+                    values.update(status='queued', runAt=datetime.utcnow() + timedelta(seconds=60 * 2 ** (attempts - 1)))
+        # 처리 함수가 커밋/롤백했을 수 있으므로 ORM 객체 대신 UPDATE 로 상태를 기록합니다.
+        db.session.execute(
+            update(Job).where(Job.id == job_id)
+            .values(lockedBy=None, lockedAt=None, finishedAt=datetime.utcnow(), **values)
+        )
+        db.session.commit()
+
+
+job_runner = JobRunner()
@@ -0,0 +1,276 @@
+"""
+비동기 구조화(JSON) 로깅
+
+app.logger 의 핸들러를 QueueHandler 하나로 바꾸고, 실제 포맷팅과 출력(stderr/파일)은
+프로세스마다 하나인 QueueListener 스레드가 처리합니다. 요청 스레드는 레코드를 큐에 넣기만 합니다.
+
+- 지연 포맷팅 : 메시지는 '%s' 인자와 함께 그대로 큐에 들어가고, 문자열/JSON 변환은 리스너 스레드에서 합니다.
+               그래서 로그 호출은 f-string 대신 logger.error("... %s", value) 형식으로 쓰고,
+               인자로는 ORM 객체가 아닌 문자열/숫자/예외를 넘깁니다. (리스너 스레드에는 세션이 없습니다)
+- 상관 ID : 요청마다 X-Request-ID(없으면 새로 생성)를 모든 레코드의 requestId 로 붙이고 응답 헤더로 돌려줍니다.
+- 샘플링 : 같은 메시지(템플릿)는 LOG_SAMPLE_WINDOW 초마다 LOG_SAMPLE_BURST 개까지 그대로 기록하고,
+           그 뒤로는 LOG_SAMPLE_RATE 개 중 하나만 기록합니다. 생략된 수는 다음 레코드의 suppressed 에 남깁니다.
+           CRITICAL 은 샘플링하지 않습니다.
+- 큐가 가득 차면 기다리지 않고 버리며, 버린 수는 다음 레코드의 dropped 에 남깁니다.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+# 현재 요청(또는 작업)의 로그 필드. 스레드와 asyncio 태스크마다 따로 유지됩니다.
+_context = ContextVar('log_context', default=None)
+
+# LogRecord 가 기본으로 가진 속성. 나머지는 extra= 로 넘어온 필드이므로 JSON 에 그대로 싣습니다.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+def new_request_id(incoming=None):
+    """들어온 X-Request-ID 가 안전한 형식이면 그대로 쓰고, 아니면 새로 만듭니다."""
+    if incoming and _REQUEST_ID.match(incoming):
+        return incoming
+    return uuid.uuid4().hex
+
+
+@contextmanager
+def log_context(**fields):
+    """블록 안에서 기록되는 로그에 fields 를 붙입니다. (백그라운드 작업의 상관 ID 등)"""
+    token = _context.set({**(_context.get() or {}), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """요청 스레드에서 상관 ID 와 사용자 ID 를 레코드에 붙입니다."""
+
+    def filter(self, record):
+        for key, value in (_context.get() or {}).items():
+            setattr(record, key, value)
+        if has_request_context() and g.get('user_id'):
+            record.userId = g.user_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """같은 (로거, 레벨, 메시지 템플릿) 의 레코드 수를 창(window)마다 제한합니다."""
+
+    def __init__(self, window=60, burst=20, rate=100):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._counts = {}           # key -> [이번 창에서 본 수, 마지막 기록 뒤 생략한 수]
+
+    def filter(self, record):
+        if not self.burst or record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                # 생략 수가 남은 키만 넘기므로 메시지 종류가 많아도 창마다 정리됩니다.
+                self._counts = {k: [0, suppressed] for k, (_, suppressed) in self._counts.items() if suppressed}
+                self._window_start = now
+            counter = self._counts.setdefault(key, [0, 0])
+            counter[0] += 1
+            seen = counter[0]
+            if seen > self.burst and (not self.rate or (seen - self.burst) % self.rate):
+                counter[1] += 1
+                return False
+            if counter[1]:
+                record.suppressed, counter[1] = counter[1], 0
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    큐가 가득 차도 기다리지 않는 QueueHandler.
+    기본 QueueHandler.prepare() 는 호출한 스레드에서 메시지를 포맷하므로, 여기서는 레코드를 복사만 합니다.
+    """
+
+    def __init__(self, pipeline):
+        super().__init__(None)
+        self.pipeline = pipeline
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        if self.dropped:
+            record.dropped, self.dropped = self.dropped, 0
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.pipeline.queue().put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """레코드를 한 줄짜리 JSON 으로 바꿉니다. (리스너 스레드에서 실행)"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        entry.update((key, value) for key, value in record.__dict__.items() if key not in _RECORD_ATTRS)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """개발용 사람이 읽는 형식. 상관 ID 와 extra 필드를 뒤에 붙입니다."""
+
+    def __init__(self):
+        super().__init__('[%(asctime)s] %(levelname)s in %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        extra = ' '.join(f"{key}={value}" for key, value in record.__dict__.items() if key not in _RECORD_ATTRS)
+        return f"{line} ({extra})" if extra else line
+
+
+class LogPipeline:
+    def __init__(self):
+        self.app = None
+        self.handler = None
+        self.queue_size = 10000
+        self._targets = []
+        self._queue = None
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.queue_size = app.config.get('LOG_QUEUE_SIZE', self.queue_size)
+
+        formatter = TextFormatter() if app.config.get('LOG_FORMAT') == 'text' else JsonFormatter()
+        log_file = app.config.get('LOG_FILE')
+        target = logging.handlers.WatchedFileHandler(log_file, encoding='utf-8') if log_file \
+            else logging.StreamHandler(sys.stderr)
+        target.setFormatter(formatter)
+        self.stop()
+        self._targets = [target]
+
+        self.handler = NonBlockingQueueHandler(self)
+        self.handler.addFilter(ContextFilter())
+        self.handler.addFilter(SamplingFilter(
+            window=app.config.get('LOG_SAMPLE_WINDOW', 60),
+            burst=app.config.get('LOG_SAMPLE_BURST', 20),
+            rate=app.config.get('LOG_SAMPLE_RATE', 100),
+        ))
+        app.logger.removeHandler(default_handler)
+        for handler in [h for h in app.logger.handlers if isinstance(h, NonBlockingQueueHandler)]:
+            app.logger.removeHandler(handler)
+        app.logger.addHandler(self.handler)
+        app.logger.setLevel(app.config.get('LOG_LEVEL') or 'INFO')
+        app.logger.propagate = False
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions['log_pipeline'] = self
+
+    def queue(self):
+        # fork 된 워커에서는 부모의 리스너 스레드가 없고 큐 잠금 상태도 알 수 없으므로 프로세스마다 새로 만듭니다.
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._queue = queue.Queue(maxsize=self.queue_size)
+                    self._listener = logging.handlers.QueueListener(
+                        self._queue, *self._targets, respect_handler_level=True)
+                    self._listener.start()
+                    self._pid = pid
+        return self._queue
+
+    def stop(self):
+        """남은 레코드를 모두 출력하고 리스너를 멈춥니다. (프로세스 종료 시 자동 호출)"""
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                try:
+                    self._listener.stop()
+                except queue.Full:
+                    pass
+            self._listener, self._pid = None, None
+
+    # --- 요청별 상관 ID ---
+    def _before_request(self):
+        request_id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+        g.request_id = request_id
+        g.log_context_token = _context.set({'requestId': request_id, 'method': request.method, 'path': request.path})
+
+    def _after_request(self, response):
+        if 'request_id' in g:
+            response.headers[REQUEST_ID_HEADER] = g.request_id
+        return response
+
+    def _teardown_request(self, exc):
+        token = g.pop('log_context_token', None)
+        if token is not None:
+            _context.reset(token)
+
+
+class RequestIdMiddleware:
+    """
+    ASGI 진입점(backend/asgi.py)의 상관 ID 미들웨어. 비동기 라우트의 로그에 requestId 를 붙이고,
+    정한 ID 를 요청 헤더에 넣어 마운트된 Flask 앱도 같은 ID 를 쓰게 합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        header = REQUEST_ID_HEADER.lower().encode()
+        headers = [(name, value) for name, value in scope['headers'] if name != header]
+        incoming = dict(scope['headers']).get(header)
+        request_id = new_request_id(incoming.decode('latin-1') if incoming else None)
+        scope = {**scope, 'headers': headers + [(header, request_id.encode())]}
+
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start':
+                response_headers = list(message.get('headers', []))
+                if not any(name.lower() == header for name, _ in response_headers):
+                    response_headers.append((header, request_id.encode()))
+                message['headers'] = response_headers
+            await send(message)
+
+        with log_context(requestId=request_id, method=scope['method'], path=scope['path']):
+            await self.app(scope, receive, send_with_id)
+
+
+log_pipeline = LogPipeline()
+atexit.register(log_pipeline.stop)
@@ -0,0 +1,539 @@
+"""
+보낼 메일 대기열과 발송 워커
+
+요청 안에서 SMTP 서버에 접속하면 서버가 느리거나 멈췄을 때 요청 워커가 함께 묶이므로,
+라우트는 OutboundEmail 행을 대기열에 넣기만 하고(같은 트랜잭션으로 커밋) 실제 발송은 워커 스레드가 합니다.
+
+- 대기열 : OutboundEmail 테이블. 서버를 다시 시작해도 남아 있고, 롤백된 요청의 메일은 나가지 않습니다.
+- 묶음 발송 : digestKey 가 같은 대기 메일(예: grades:<학생 ID>)은 첫 메일의 sendAfter(= 대기열에 들어온 뒤
+              MAIL_DIGEST_WINDOW 초)가 되면 한 통으로 합쳐 보냅니다. refId 가 같은 메일은 새 것이 이전 것을 대신합니다.
+- 연결 재사용 : 프로세스마다 MAIL_SMTP_POOL_SIZE 개까지 SMTP 연결을 열어 두고, 한 배치(MAIL_BATCH_SIZE 통)를
+                연결마다 나눠 보냅니다. MAIL_SMTP_IDLE_TIMEOUT 초 넘게 쉰 연결은 닫고,
+                한 연결로 MAIL_SMTP_MAX_MESSAGES 통을 보내면 새로 연결합니다.
+- 재시도 : 연결 오류나 4xx 응답은 MAIL_RETRY_BASE 초부터 두 배씩 늘려 MAIL_MAX_ATTEMPTS 번까지 다시 보냅니다.
+           받는 주소 거부 같은 5xx 응답은 바로 failed 로 둡니다.
+- 여러 워커가 같은 메일을 보내지 않도록 'UPDATE ... WHERE status = queued' 로 선점합니다. (backend/jobs.py 와 같은 방식)
+  발송 중에 워커가 죽은 메일은 MAIL_LOCK_TIMEOUT 초 뒤 다시 대기열로 돌아가므로, 드물게 두 번 나갈 수 있습니다.
+
+개발 환경에서는 기본 설정(localhost:1025)대로 MailHog / Mailpit 같은 로컬 SMTP 서버를 띄우거나,
+MAIL_BACKEND=file 로 보내는 대신 MAIL_FILE_DIR 에 .eml 파일로 저장합니다.
+
+    python -m backend.mailer worker            # 웹 워커 대신 따로 발송할 때 (MAIL_WORKER_ENABLED=0)
+    python -m backend.mailer test <주소>       # 설정 확인용 메일 한 통을 대기열에 넣고 바로 보냅니다.
+"""
+import argparse
+import os
+import random
+import smtplib
+import socket
+import ssl
+import sys
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid, parseaddr
+
+from sqlalchemy import delete, event, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from backend.extensions import db
+from backend.logs import log_context
+from backend.models import OutboundEmail
+
+Mail = namedtuple('Mail', ['kind', 'to', 'subject', 'body', 'userId', 'digestKey', 'refId'],
+                  defaults=(None, None, None))
+
+# 여러 통을 한 통으로 묶을 때의 제목 (종류별). 본문은 각 메일의 제목과 본문을 이어 붙입니다.
+DIGEST_SUBJECTS = {
+    'assignment_created': '[과제관리시스템] 새 과제 {count}건이 등록되었습니다',
+    'grade_released': '[과제관리시스템] 새 성적 {count}건이 등록되었습니다',
+}
+DEFAULT_DIGEST_SUBJECT = '[과제관리시스템] 새 알림 {count}건'
+
+_SESSION_KEY = 'mail_queued'
+MAX_RETRY_DELAY = 6 * 3600      # 재시도 간격 상한 (in seconds)
+NOOP_AFTER = 5                  # 이보다 오래 쉰 연결은 쓰기 전에 NOOP 으로 살아 있는지 확인합니다. (in seconds)
+PRUNE_INTERVAL = 3600           # 보관 기간이 지난 sent / failed 행을 지우는 간격 (in seconds)
+
+
+def _permanent(error):
+    """다시 보내도 성공할 수 없는 오류인지 (받는 주소 거부, 본문 거부 5xx)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(500 <= code < 600 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPDataError) and 500 <= error.smtp_code < 600
+
+
+class _PooledConnection:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """프로세스 안에서 SMTP 연결을 재사용합니다. 동시에 빌려 갈 수 있는 연결은 size 개입니다."""
+
+    def __init__(self, host, port, security='none', username=None, password=None, timeout=30,
+                 size=2, idle_timeout=30, max_messages=100):
+        self.host = host
+        self.port = port
+        self.security = security
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.security == 'ssl':
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.security == 'starttls':
+                smtp.starttls(context=ssl.create_default_context())
+        if self.username:
+            smtp.login(self.username, self.password or '')
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.smtp.close()
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            idle = time.monotonic() - conn.last_used
+            if idle >= self.idle_timeout:
+                self._close(conn)
+                continue
+            if idle >= NOOP_AFTER:
+                try:
+                    if conn.smtp.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected('noop failed')
+                except (smtplib.SMTPException, OSError):
+                    conn.smtp.close()
+                    continue
+            return conn
+
+    @contextmanager
+    def connection(self):
+        """연결 하나를 빌려 줍니다. 블록에서 예외가 나면 그 연결은 버립니다."""
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn
+            except BaseException:
+                conn.smtp.close()
+                raise
+            conn.last_used = time.monotonic()
+            if conn.sent >= self.max_messages:
+                self._close(conn)
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+
+    def close_idle(self, all_connections=False):
+        """idle_timeout 이 지난 (all_connections 이면 모든) 쉬는 연결을 닫습니다."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [conn for conn in self._idle if all_connections or now - conn.last_used >= self.idle_timeout]
+            self._idle = [conn for conn in self._idle if conn not in expired]
+        for conn in expired:
+            self._close(conn)
+
+    def send(self, messages):
+        """
+        메시지를 차례로 보내고 메시지마다 오류(성공이면 None)를 반환합니다.
+        연결이 끊기면 새 연결로 한 번 더 시도하고, 그래도 안 되면 남은 메시지를 모두 그 오류로 돌려줍니다.
+        """
+        results = [None] * len(messages)
+        index, retried = 0, False
+        while index < len(messages):
+            try:
+                with self.connection() as conn:
+                    while index < len(messages) and conn.sent < self.max_messages:
+                        try:
+                            conn.smtp.send_message(messages[index])
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                            # 메시지 하나의 거부이므로 연결은 계속 씁니다. (smtplib 가 RSET 을 보냅니다)
+                            results[index] = e
+                        conn.sent += 1
+                        index += 1
+                        retried = False
+            except (smtplib.SMTPException, OSError) as e:
+                # 풀에 있던 연결이 서버 쪽에서 먼저 끊겼을 수 있으므로 새 연결로 한 번 더 시도합니다.
+                if retried:
+                    results[index:] = [e] * (len(messages) - index)
+                    break
+                retried = True
+        return results
+
+
+class FileBackend:
+    """SMTP 서버 없이 개발할 때 메일을 .eml 파일로 저장합니다."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.size = 1
+
+    def send(self, messages):
+        os.makedirs(self.directory, exist_ok=True)
+        results = []
+        for message in messages:
+            try:
+                name = f"{datetime.utcnow():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}.eml"
+                with open(os.path.join(self.directory, name), 'wb') as f:
+                    f.write(message.as_bytes())
+                results.append(None)
+            except OSError as e:
+                results.append(e)
+        return results
+
+    def close_idle(self, all_connections=False):
+        pass
+
+
+class OutboundMailer:
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.worker_enabled = True
+        self.backend = None
+        self.sender = None
+        self.batch_size = 100
+        self.poll_interval = 10
+        self.digest_window = 3600
+        self.max_attempts = 6
+        self.retry_base = 60
+        self.lock_timeout = 600
+        self.keep_days = 30
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+        self._worker_id = None
+        self._executor = None
+
+    def init_app(self, app):
+        self.app = app
+        config = app.config
+        self.enabled = config.get('MAIL_ENABLED', self.enabled)
+        self.worker_enabled = config.get('MAIL_WORKER_ENABLED', self.worker_enabled)
+        self.sender = config.get('MAIL_FROM')
+        self.batch_size = config.get('MAIL_BATCH_SIZE', self.batch_size)
+        self.poll_interval = config.get('MAIL_POLL_INTERVAL', self.poll_interval)
+        self.digest_window = config.get('MAIL_DIGEST_WINDOW', self.digest_window)
+        self.max_attempts = config.get('MAIL_MAX_ATTEMPTS', self.max_attempts)
+        self.retry_base = config.get('MAIL_RETRY_BASE', self.retry_base)
+        self.lock_timeout = config.get('MAIL_LOCK_TIMEOUT', self.lock_timeout)
+        self.keep_days = config.get('MAIL_KEEP_DAYS', self.keep_days)
+
+        backend = config.get('MAIL_BACKEND') or 'smtp'
+        if backend == 'file':
+            self.backend = FileBackend(os.path.join(app.root_path, config.get('MAIL_FILE_DIR') or 'mail'))
+        elif backend == 'smtp':
+            security = config.get('MAIL_SMTP_SECURITY') or 'none'
+            if security not in ('none', 'starttls', 'ssl'):
+                raise ValueError(f"unknown MAIL_SMTP_SECURITY '{security}'")
+            self.backend = SMTPPool(
+                config.get('MAIL_SMTP_HOST') or 'localhost', config.get('MAIL_SMTP_PORT', 1025), security,
+                config.get('MAIL_SMTP_USERNAME'), config.get('MAIL_SMTP_PASSWORD'),
+                timeout=config.get('MAIL_SMTP_TIMEOUT', 30),
+                size=max(1, config.get('MAIL_SMTP_POOL_SIZE', 2)),
+                idle_timeout=config.get('MAIL_SMTP_IDLE_TIMEOUT', 30),
+                max_messages=max(1, config.get('MAIL_SMTP_MAX_MESSAGES', 100)),
+            )
+        else:
+            raise ValueError(f"unknown MAIL_BACKEND '{backend}'")
+
+        app.extensions['outbound_mailer'] = self
+        if not event.contains(Session, 'after_commit', _wake_after_commit):
+            event.listen(Session, 'after_commit', _wake_after_commit)
+            event.listen(Session, 'after_soft_rollback', _discard_after_rollback)
+        if self.enabled and self.worker_enabled:
+            # 운영 서버는 워커 프로세스가 뜰 때 start() 를 호출합니다. (backend/app.py start_workers)
+            app.before_request(self._ensure_worker)
+
+    def start(self):
+        """이 프로세스의 발송 스레드를 띄웁니다. 재시작 전에 쌓인 메일도 요청을 기다리지 않고 나갑니다."""
+        if self.enabled and self.worker_enabled:
+            self._ensure_worker()
+
+    # --- 대기열 ---
+    def enqueue(self, mail):
+        return self.enqueue_many([mail])
+
+    def enqueue_many(self, mails):
+        """
+        Mail 목록을 대기열에 넣고 넣은 수를 반환합니다. 커밋하지 않으므로 호출한 쪽의 트랜잭션과 함께 커밋됩니다.
+        digestKey 가 있는 메일은 같은 키로 대기 중인 메일과 같은 시각에 나가도록 sendAfter 를 맞춥니다.
+        """
+        if not self.enabled or not mails:
+            return 0
+        now = datetime.utcnow()
+        digest_keys = {mail.digestKey for mail in mails if mail.digestKey}
+        windows = {}
+        if digest_keys:
+            windows = dict(db.session.execute(
+                select(OutboundEmail.digestKey, func.min(OutboundEmail.sendAfter))
+                .where(OutboundEmail.digestKey.in_(digest_keys), OutboundEmail.status == 'queued')
+                .group_by(OutboundEmail.digestKey)
+            ).all())
+            replaced = {(mail.digestKey, mail.refId) for mail in mails if mail.digestKey and mail.refId}
+            if replaced:
+                db.session.execute(
+                    delete(OutboundEmail)
+                    .where(tuple_(OutboundEmail.digestKey, OutboundEmail.refId).in_(replaced),
+                           OutboundEmail.status == 'queued')
+                    .execution_options(synchronize_session=False)
+                )
+        first_send = now + timedelta(seconds=self.digest_window)
+        db.session.execute(insert(OutboundEmail), [{
+            'id': str(uuid.uuid4()),
+            'kind': mail.kind,
+            'toAddress': mail.to,
+            'userId': mail.userId,
+            'subject': mail.subject[:255],
+            'body': mail.body,
+            'digestKey': mail.digestKey,
+            'refId': mail.refId,
+            'status': 'queued',
+            'sendAfter': (windows.get(mail.digestKey) or first_send) if mail.digestKey else now,
+            'attempts': 0,
+            'createdAt': now,
+        } for mail in mails])
+        # 커밋된 뒤에 워커를 깨웁니다. (_wake_after_commit)
+        db.session.info[_SESSION_KEY] = True
+        return len(mails)
+
+    def wake(self):
+        self._wake.set()
+
+    def stats(self, failures=20):
+        """상태별 메일 수, 가장 오래 기다린 메일의 시각, 최근 실패 목록"""
+        counts = dict(db.session.execute(
+            select(OutboundEmail.status, func.count(OutboundEmail.id)).group_by(OutboundEmail.status)).all())
+        oldest = db.session.scalar(select(func.min(OutboundEmail.createdAt)).where(OutboundEmail.status == 'queued'))
+        failed = db.session.scalars(
+            select(OutboundEmail).where(OutboundEmail.status == 'failed')
+            .order_by(OutboundEmail.createdAt.desc()).limit(failures)).all()
+        return {
+            'counts': counts,
+            'oldestQueuedAt': oldest.isoformat() if oldest else None,
+            'recentFailures': [{
+                'id': mail.id,
+                'kind': mail.kind,
+                'to': mail.toAddress,
+                'subject': mail.subject,
+                'attempts': mail.attempts,
+                'error': mail.lastError,
+                'createdAt': mail.createdAt.isoformat(),
+            } for mail in failed],
+        }
+
+    # --- 워커 ---
+    def _ensure_worker(self):
+        # fork 된 워커에서는 부모의 스레드가 없으므로 프로세스마다 새로 띄웁니다.
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return
+        with self._lock:
+            if self._worker_pid != pid:
+                self._start(pid)
+                threading.Thread(target=self.run, name='mailer', daemon=True).start()
+
+    def _start(self, pid):
+        self._worker_id = f"{socket.gethostname()}:{pid}"
+        self._executor = ThreadPoolExecutor(max_workers=self.backend.size, thread_name_prefix='mailer-send') \
+            if self.backend.size > 1 else None
+        self._worker_pid = pid
+
+    def run(self):
+        """대기열을 계속 처리합니다. (워커 스레드 또는 python -m backend.mailer worker)"""
+        if self._worker_pid != os.getpid():
+            self._start(os.getpid())
+        last_prune = 0
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self.app.app_context():
+                try:
+                    self.process()
+                    if time.monotonic() - last_prune >= PRUNE_INTERVAL:
+                        last_prune = time.monotonic()
+                        self._prune()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error("Mailer error: %s", e)
+                finally:
+                    db.session.remove()
+                    self.backend.close_idle()
+
+    def process(self):
+        """보낼 시각이 된 메일을 모두 보내고 보낸 통 수를 반환합니다."""
+        self._requeue_stale()
+        delivered = 0
+        while rows := self._claim():
+            delivered += self._deliver(rows)
+        return delivered
+
+    def _requeue_stale(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lock_timeout)
+        db.session.execute(
+            update(OutboundEmail).where(OutboundEmail.status == 'sending', OutboundEmail.lockedAt < cutoff)
+            .values(status='queued', lockedBy=None, lockedAt=None)
+        )
+        db.session.commit()
+
+    def _claim(self):
+        """
+        보낼 시각이 된 메일을 최대 batch_size 개 선점해 반환합니다. 묶음 메일은 같은 digestKey 의
+        대기 메일을 모두 함께 가져갑니다. (아직 sendAfter 전인 것도 첫 메일의 시각에 맞춰져 있습니다)
+        """
+        now = datetime.utcnow()
+        due = db.session.execute(
+            select(OutboundEmail.id, OutboundEmail.digestKey)
+            .where(OutboundEmail.status == 'queued', OutboundEmail.sendAfter <= now)
+            .order_by(OutboundEmail.sendAfter).limit(self.batch_size)
+        ).all()
+        if not due:
+            db.session.rollback()
+            return []
+        # 배치마다 다른 값으로 선점해 이번에 가져간 행만 다시 읽습니다.
+        claim = f"{self._worker_id}:{uuid.uuid4().hex[:12]}"
+        values = dict(status='sending', lockedBy=claim, lockedAt=now, attempts=OutboundEmail.attempts + 1)
+        single_ids = [mail_id for mail_id, digest_key in due if not digest_key]
+        digest_keys = {digest_key for _, digest_key in due if digest_key}
+        if single_ids:
+            db.session.execute(update(OutboundEmail).values(**values).where(
+                OutboundEmail.id.in_(single_ids), OutboundEmail.status == 'queued'))
+        if digest_keys:
+            db.session.execute(update(OutboundEmail).values(**values).where(
+                OutboundEmail.digestKey.in_(digest_keys), OutboundEmail.status == 'queued'))
+        db.session.commit()
+        rows = db.session.scalars(
+            select(OutboundEmail).where(OutboundEmail.lockedBy == claim).order_by(OutboundEmail.createdAt)).all()
+        db.session.commit()
+        return rows
+
+    def _compose(self, rows):
+        first = rows[0]
+        if len(rows) == 1:
+            subject, body = first.subject, first.body
+        else:
+            subject = DIGEST_SUBJECTS.get(first.kind, DEFAULT_DIGEST_SUBJECT).format(count=len(rows))
+            body = '\n\n'.join(f"■ {row.subject}\n{row.body}" for row in rows)
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = first.toAddress
+        message['Subject'] = subject
+        message['Date'] = formatdate(localtime=True)
+        # make_msgid() 의 기본 도메인은 getfqdn() 이라 느릴 수 있으므로 보내는 주소의 도메인을 씁니다.
+        message['Message-ID'] = make_msgid(domain=parseaddr(self.sender)[1].rpartition('@')[2] or 'localhost')
+        message.set_content(body)
+        return message
+
+    def _send(self, messages):
+        chunks = self.backend.size if self._executor else 1
+        if chunks == 1 or len(messages) < 2:
+            return self.backend.send(messages)
+        # 연결마다 한 덩어리씩 나눠 동시에 보냅니다.
+        parts = [messages[i::chunks] for i in range(chunks)]
+        results = [None] * len(messages)
+        for i, part_results in enumerate(self._executor.map(self.backend.send, parts)):
+            results[i::chunks] = part_results
+        return results
+
+    def _deliver(self, rows):
+        groups = {}
+        for row in rows:
+            groups.setdefault(row.digestKey or row.id, []).append(row)
+        groups = list(groups.values())
+        messages = [self._compose(group) for group in groups]
+        results = self._send(messages)
+
+        now = datetime.utcnow()
+        sent_ids, delivered = [], 0
+        for group, error in zip(groups, results):
+            ids = [row.id for row in group]
+            if error is None:
+                sent_ids.extend(ids)
+                delivered += 1
+                continue
+            attempts = max(row.attempts for row in group)
+            with log_context(mailKind=group[0].kind, mailIds=ids):
+                self.app.logger.warning("Mail to %s failed (attempt %s): %s", group[0].toAddress, attempts, error)
+            values = {'status': 'failed', 'lastError': str(error)[:1000]}
+            if attempts < self.max_attempts and not _permanent(error):
+                delay = min(self.retry_base * 2 ** (attempts - 1), MAX_RETRY_DELAY) * random.uniform(0.8, 1.2)
+                values.update(status='queued', sendAfter=now + timedelta(seconds=delay))
+            db.session.execute(update(OutboundEmail).where(OutboundEmail.id.in_(ids))
+                               .values(lockedBy=None, lockedAt=None, **values))
+        if sent_ids:
+            db.session.execute(update(OutboundEmail).where(OutboundEmail.id.in_(sent_ids))
+                               .values(status='sent', sentAt=now, lockedBy=None, lockedAt=None, lastError=None))
+        db.session.commit()
+        return delivered
+
+    def _prune(self):
+        cutoff = datetime.utcnow() - timedelta(days=self.keep_days)
+        db.session.execute(delete(OutboundEmail).where(
+            OutboundEmail.status.in_(('sent', 'failed')), OutboundEmail.createdAt < cutoff))
+        db.session.commit()
+
+
+def _wake_after_commit(session):
+    if session.info.pop(_SESSION_KEY, None):
+        outbound_mailer.wake()
+
+
+def _discard_after_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop(_SESSION_KEY, None)
+
+
+outbound_mailer = OutboundMailer()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.mailer')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('worker', help='대기열의 메일을 계속 보냅니다.')
+    test_parser = subcommands.add_parser('test', help='설정 확인용 메일을 한 통 보냅니다.')
+    test_parser.add_argument('address')
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+    # `python -m` 으로 실행하면 이 파일은 __main__ 이므로, 앱이 초기화한 backend.mailer 모듈을 사용합니다.
+    from backend import mailer
+    app = create_app()
+    if args.command == 'worker':
+        mailer.outbound_mailer.run()
+        return 0
+    with app.app_context():
+        mailer.outbound_mailer.enqueue(mailer.Mail(
+            'test', args.address, '[과제관리시스템] 메일 설정 확인', '이 메일이 보이면 메일 설정이 올바릅니다.'))
+        db.session.commit()
+        mailer.outbound_mailer._start(os.getpid())
+        delivered = mailer.outbound_mailer.process()
+        mailer.outbound_mailer.backend.close_idle(all_connections=True)
+    print(f"{delivered} sent")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,8 @@ import uuid
 from datetime import datetime
 import enum
 from sqlalchemy import Enum as SqlEnum
+from sqlalchemy.orm import deferred
+from backend.compression import CompressedText
 from backend.extensions import db
 
 # Using standard Python enums
@@ -82,7 +84,7 @@ class Assignment(db.Model):
 
     id = db.Column(db.String(191), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = db.Column(db.String(191), nullable=False)
-    description = db.Column(db.Text, nullable=False)
+    description = deferred(db.Column(CompressedText, nullable=False))    # backend/compression.py
     dueDate = db.Column(db.DateTime(3), nullable=False)
     maxScore = db.Column(db.Integer, nullable=False)
     teacherId = db.Column(db.String(191), db.ForeignKey('user.id'), nullable=False)
@@ -107,7 +109,7 @@ class Submission(db.Model):
     id = db.Column(db.String(191), primary_key=True, default=lambda: str(uuid.uuid4()))
     assignmentId = db.Column(db.String(191), db.ForeignKey('assignment.id'), nullable=False)
     studentId = db.Column(db.String(191), db.ForeignKey('user.id'), nullable=False)
-    content = db.Column(db.Text, nullable=True)
+    content = deferred(db.Column(CompressedText, nullable=True))
     submittedAt = db.Column(db.DateTime(3), default=datetime.utcnow, nullable=False)
     status = db.Column(db.Enum(SubmissionStatus), default=SubmissionStatus.PENDING, nullable=False)
 
@@ -118,6 +120,43 @@ class Submission(db.Model):
     assignment = db.relationship("Assignment", back_populates="submissions", foreign_keys=[assignmentId])
     files = db.relationship("SubmissionFile", back_populates="submission", cascade="all, delete-orphan")
     grade = db.relationship("Grade", back_populates="submission", uselist=False, cascade="all, delete-orphan")
+    signature = db.relationship("SubmissionSignature", back_populates="submission", uselist=False, cascade="all, delete-orphan")
+    versions = db.relationship("SubmissionVersion", back_populates="submission", cascade="all, delete-orphan",
+                               order_by="SubmissionVersion.version")
+
+# =========================
+# SubmissionSignature (표절 검사용 MinHash 서명)
+# =========================
+class SubmissionSignature(db.Model):
+    __tablename__ = 'submissionsignature'
+
+    submissionId = db.Column(db.String(191), db.ForeignKey('submission.id'), primary_key=True)
+    assignmentId = db.Column(db.String(191), db.ForeignKey('assignment.id'), nullable=False, index=True)
+    signature = db.Column(db.LargeBinary, nullable=False)   # uint32 x SIMILARITY_NUM_PERM
+    shingleCount = db.Column(db.Integer, nullable=False)
+    textHash = db.Column(db.String(64), nullable=False)     # 내용이 같으면 다시 계산하지 않습니다.
+    updatedAt = db.Column(db.DateTime(3), default=datetime.utcnow, nullable=False, index=True)
+
+    # Relationships
+    submission = db.relationship("Submission", back_populates="signature", foreign_keys=[submissionId])
+
+class SubmissionVersion(db.Model):
+    __tablename__ = 'submissionversion'
+    __table_args__ = (db.UniqueConstraint('submissionId', 'version'),)
+
+    id = db.Column(db.String(191), primary_key=True, default=lambda: str(uuid.uuid4()))
+    submissionId = db.Column(db.String(191), db.ForeignKey('submission.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    submittedAt = db.Column(db.DateTime(3), nullable=False)
+    encoding = db.Column(db.String(8), nullable=False)              # 'full' 또는 'delta' (다음 버전 기준 역방향 델타)
+    content = db.Column(db.LargeBinary(16777215), nullable=False)   # zlib 압축
+    contentLength = db.Column(db.Integer, nullable=False)
+    contentHash = db.Column(db.String(64), nullable=False)
+    files = db.Column(db.Text, nullable=False)                      # 파일 목록 JSON (sha256 으로 blob 을 공유합니다)
+    createdAt = db.Column(db.DateTime(3), default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    submission = db.relationship("Submission", back_populates="versions", foreign_keys=[submissionId])
 
 # =========================
 # Grade
@@ -128,7 +167,7 @@ class Grade(db.Model):
     id = db.Column(db.String(191), primary_key=True, default=lambda: str(uuid.uuid4()))
     submissionId = db.Column(db.String(191), db.ForeignKey('submission.id'), unique=True, nullable=False)
     score = db.Column(db.Integer, nullable=False)
-    feedback = db.Column(db.Text, nullable=True)
+    feedback = deferred(db.Column(CompressedText, nullable=True))
     gradedBy = db.Column(db.String(191), db.ForeignKey('user.id'), nullable=False)
     gradedAt = db.Column(db.DateTime(3), default=datetime.utcnow, nullable=False)
 
@@ -184,11 +223,84 @@ class QALog(db.Model):
     id = db.Column(db.String(191), primary_key=True, default=lambda: str(uuid.uuid4()))
     assignmentId = db.Column(db.String(191), db.ForeignKey('assignment.id'), nullable=False)
     studentId = db.Column(db.String(191), db.ForeignKey('user.id'), nullable=False)
-    question = db.Column(db.Text, nullable=False)
-    answer = db.Column(db.Text, nullable=False)
+    question = deferred(db.Column(CompressedText, nullable=False), group='qa_text')
+    answer = deferred(db.Column(CompressedText, nullable=False), group='qa_text')
     source = db.Column(db.Enum(QALogSource), nullable=False)
     createdAt = db.Column(db.DateTime(3), default=datetime.utcnow, nullable=False)
 
     # Relationships
     student = db.relationship("User", back_populates="qa_logs", foreign_keys=[studentId])
-    assignment = db.relationship("Assignment", back_populates="qa_logs", foreign_keys=[assignmentId])
\ No newline at end of file
+    assignment = db.relationship("Assignment", back_populates="qa_logs", foreign_keys=[assignmentId])
+# =========================
+# Job (백그라운드 작업, backend/jobs.py)
+# =========================
+class Job(db.Model):
+    __tablename__ = 'job'
+    __table_args__ = (db.Index('ix_job_status_runAt', 'status', 'runAt'),)
+
+    id = db.Column(db.String(191), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = db.Column(db.String(64), nullable=False)
+    key = db.Column(db.String(191), unique=True, nullable=True)     # 같은 작업의 중복 예약 방지 (예: assignment.close:<id>)
+    payload = db.Column(db.Text, nullable=False)                    # JSON
+    status = db.Column(db.String(16), default='queued', nullable=False)  # queued / running / succeeded / failed
+    runAt = db.Column(db.DateTime(3), default=datetime.utcnow, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    lockedBy = db.Column(db.String(191), nullable=True)
+    lockedAt = db.Column(db.DateTime(3), nullable=True)
+    result = db.Column(db.Text, nullable=True)                      # JSON
+    error = db.Column(db.Text, nullable=True)
+    createdBy = db.Column(db.String(191), nullable=True)
+    createdAt = db.Column(db.DateTime(3), default=datetime.utcnow, nullable=False)
+    startedAt = db.Column(db.DateTime(3), nullable=True)
+    finishedAt = db.Column(db.DateTime(3), nullable=True)
+
+# =========================
+# OutboundEmail (보낼 메일 대기열, backend/mailer.py)
+# =========================
+class OutboundEmail(db.Model):
+    __tablename__ = 'outboundemail'
+    __table_args__ = (
+        db.Index('ix_outboundemail_status_sendAfter', 'status', 'sendAfter'),
+        db.Index('ix_outboundemail_digestKey_status', 'digestKey', 'status'),
+    )
+
+    id = db.Column(db.String(191), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = db.Column(db.String(64), nullable=False)                 # password_reset / account_approved / assignment_created / grade_released
+    toAddress = db.Column(db.String(191), nullable=False)
+    userId = db.Column(db.String(191), nullable=True)                # 사용자가 삭제되어도 기록은 남기므로 FK 를 두지 않습니다.
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    digestKey = db.Column(db.String(191), nullable=True)             # 같은 키의 대기 중인 메일은 한 통으로 묶어 보냅니다. (예: grades:<userId>)
+    refId = db.Column(db.String(191), nullable=True)                 # 묶음 안에서 같은 대상(예: 제출물)의 이전 알림을 대신합니다.
+    status = db.Column(db.String(16), default='queued', nullable=False)  # queued / sending / sent / failed
+    sendAfter = db.Column(db.DateTime(3), default=datetime.utcnow, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    lockedBy = db.Column(db.String(191), nullable=True)
+    lockedAt = db.Column(db.DateTime(3), nullable=True)
+    lastError = db.Column(db.Text, nullable=True)
+    createdAt = db.Column(db.DateTime(3), default=datetime.utcnow, nullable=False)
+    sentAt = db.Column(db.DateTime(3), nullable=True)
+
+# =========================
+# 보관된 강의 (backend/archive.py)
+# =========================
+class ArchivedCourse(db.Model):
+    __tablename__ = 'archivedcourse'
+
+    id = db.Column(db.String(36), primary_key=True)                 # 원래 Course.id
+    name = db.Column(db.String(255), nullable=False)
+    teacherId = db.Column(db.String(36), nullable=False, index=True)
+    archiveKey = db.Column(db.String(191), nullable=False)          # 저장소 키 (gzip JSON Lines)
+    rowCounts = db.Column(db.Text, nullable=False)                  # JSON {테이블: 행 수}
+    size = db.Column(db.BigInteger, nullable=False)
+    archivedAt = db.Column(db.DateTime(3), default=datetime.utcnow, nullable=False)
+
+class ArchiveIndex(db.Model):
+    """보관된 행의 ID -> 강의. 조회 대체 경로와 파일 정리(sweep/prune)가 사용합니다."""
+    __tablename__ = 'archiveindex'
+    __table_args__ = (db.Index('ix_archiveindex_kind_fileUrl', 'kind', 'fileUrl'),)   # /api/files 의 fileUrl 조회
+
+    kind = db.Column(db.String(16), primary_key=True)               # assignment / submission / submissionfile / attachment / student / versionblob
+    refId = db.Column(db.String(191), primary_key=True)
+    courseId = db.Column(db.String(36), primary_key=True, index=True)
+    fileUrl = db.Column(db.String(191), nullable=True)              # 업로드 파일이면 저장 경로
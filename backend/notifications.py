@@ -0,0 +1,69 @@
+"""
+알림 메일 내용
+
+각 함수는 보낼 메일을 outbound_mailer 대기열(backend/mailer.py)에 넣기만 하고 커밋하지 않습니다.
+호출한 라우트가 승인/채점 같은 변경과 같은 트랜잭션으로 커밋하므로, 롤백되면 메일도 나가지 않습니다.
+
+- 비밀번호 재설정, 가입 승인 : 바로 보냅니다.
+- 새 과제, 성적 등록 : 학생마다 MAIL_DIGEST_WINDOW 동안 모아 한 통으로 보냅니다.
+                      같은 과제/제출물의 알림이 다시 들어오면 이전 것을 대신합니다. (재채점 등)
+"""
+from flask import current_app
+from sqlalchemy import select
+
+from backend.extensions import db
+from backend.mailer import Mail, outbound_mailer
+from backend.models import Course, Enrollment, Role, User, UserStatus
+
+
+def _link(path):
+    return f"{current_app.config.get('APP_BASE_URL', '').rstrip('/')}{path}"
+
+
+def send_password_reset(user, token):
+    minutes = current_app.config.get('PASSWORD_RESET_EXPIRES', 3600) // 60
+    body = (f"{user.name}님, 비밀번호 재설정을 요청하셨습니다.\n"
+            f"아래 링크에서 {minutes}분 안에 새 비밀번호를 설정해 주세요.\n\n"
+            f"{_link('/reset-password')}?token={token}\n\n"
+            "요청하지 않으셨다면 이 메일을 무시하셔도 됩니다. 비밀번호는 바뀌지 않습니다.")
+    outbound_mailer.enqueue(Mail('password_reset', user.email, '[과제관리시스템] 비밀번호 재설정 안내', body,
+                                 userId=user.id))
+
+
+def notify_account_approved(users):
+    """users: (id, email, name) 목록"""
+    outbound_mailer.enqueue_many([
+        Mail('account_approved', email, '[과제관리시스템] 가입이 승인되었습니다',
+             f"{name}님, 가입 요청이 승인되었습니다. 이제 로그인할 수 있습니다.\n\n{_link('/login')}",
+             userId=user_id)
+        for user_id, email, name in users
+    ])
+
+
+def notify_assignment_created(assignment):
+    """과제가 속한 강의의 승인된 수강생에게 새 과제 알림을 예약합니다."""
+    course_name = db.session.scalar(select(Course.name).where(Course.id == assignment.courseId))
+    students = db.session.execute(
+        select(User.id, User.email)
+        .join(Enrollment, Enrollment.studentId == User.id)
+        .where(Enrollment.courseId == assignment.courseId,
+               User.role == Role.STUDENT, User.status == UserStatus.APPROVED)
+    ).all()
+    body = (f"강의: {course_name}\n"
+            f"마감: {assignment.dueDate:%Y-%m-%d %H:%M} (UTC)\n"
+            f"{_link(f'/assignments/{assignment.id}')}")
+    outbound_mailer.enqueue_many([
+        Mail('assignment_created', email, f"새 과제: {assignment.title}", body, userId=user_id,
+             digestKey=f"assignments:{user_id}", refId=assignment.id)
+        for user_id, email in students
+    ])
+
+
+def notify_grade_released(submission, grade, student_email):
+    """채점된 제출물의 학생에게 성적 알림을 예약합니다. (submission.assignment 가 로드되어 있어야 합니다)"""
+    assignment = submission.assignment
+    body = (f"점수: {grade.score} / {assignment.maxScore}\n"
+            f"{_link('/grades')}")
+    outbound_mailer.enqueue(Mail('grade_released', student_email, f"성적 등록: {assignment.title}", body,
+                                 userId=submission.studentId, digestKey=f"grades:{submission.studentId}",
+                                 refId=submission.id))
@@ -0,0 +1,551 @@
+"""
+PDF / HWP 문서 미리보기 (본문 텍스트 + 첫 페이지 썸네일)
+
+업로드가 커밋되면 라우트가 preview_service.schedule() 을 호출하고,
+추출은 별도 프로세스 풀에서 이루어지므로 요청 워커가 CPU 를 쓰지 않습니다.
+결과는 파일 내용의 sha256 으로 업로드 저장소(backend.storage)에 캐시되어 같은 파일은 한 번만 추출합니다.
+
+    previews/
+        blobs/ab/<sha256>.json   메타데이터 (종류, 페이지 수, 썸네일 형식 ...)
+        blobs/ab/<sha256>.txt    추출된 텍스트
+        blobs/ab/<sha256>.img    첫 페이지 썸네일
+        refs/<table>/<fileId>    파일 행 → sha256 (또는 실패 사유)
+
+사용하는 도구 (모두 로컬):
+- PDF  : pypdf (텍스트), pymupdf 또는 poppler 의 pdftoppm (썸네일), pdftotext (pypdf 가 없을 때)
+- HWP  : olefile (BodyText 레코드, PrvText / PrvImage 스트림)
+- HWPX : 표준 라이브러리 zipfile (section*.xml, Preview/PrvImage.png)
+
+    python -m backend.previews extract   # 기존 업로드 파일 일괄 추출
+    python -m backend.previews prune     # 삭제된 파일의 캐시 정리
+"""
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+from flask import jsonify
+
+from backend.storage import PREVIEW_PREFIX, create_driver, key_for, storage
+
+# 이 모듈은 spawn 된 추출 프로세스에서도 import 되므로, 모델/DB 관련 import 는 함수 안에서 합니다.
+
+PDF_MAGIC = b'%PDF'
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+ZIP_MAGIC = b'PK\x03\x04'
+
+IMAGE_TYPES = {
+    b'\x89PNG': 'image/png',
+    b'GIF8': 'image/gif',
+    b'BM': 'image/bmp',
+    b'\xff\xd8': 'image/jpeg',
+}
+
+
+class UnsupportedDocument(Exception):
+    pass
+
+
+def detect_kind(head, filename='', mime_type=None):
+    """
+    파일 앞부분(8바이트)으로 문서 종류를 판별합니다. ('pdf' / 'hwp' / 'hwpx' / 'ole' / None)
+    secure_filename 이 한글 파일명을 지우면 확장자가 사라지므로 확장자보다 시그니처를 우선합니다.
+    'ole' 은 HWP 인지 스트림을 열어 봐야 알 수 있는 OLE 컨테이너로, 추출 프로세스에서 확인합니다.
+    """
+    name = (filename or '').lower()
+    if head.startswith(PDF_MAGIC):
+        return 'pdf'
+    if head == OLE_MAGIC:
+        # OLE 컨테이너는 doc/xls 와 같으므로 확장자나 MIME 이 HWP 가 아니면 스트림으로 확인합니다.
+        if name.endswith('hwp') or 'hwp' in (mime_type or ''):
+            return 'hwp'
+        return 'ole'
+    if head.startswith(ZIP_MAGIC) and (name.endswith('hwpx') or 'hwp' in (mime_type or '')):
+        return 'hwpx'
+    return None
+
+
+def _is_hwp_ole(path):
+    try:
+        import olefile
+        with olefile.OleFileIO(path) as ole:
+            return ole.exists('FileHeader') and ole.openstream('FileHeader').read(17) == b'HWP Document File'
+    except Exception:
+        return False
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- 프로세스 풀에서 실행되는 추출 함수 (앱 컨텍스트 없이 동작해야 합니다) ---
+
+def blob_key(sha, extension):
+    return f"{PREVIEW_PREFIX}/blobs/{sha[:2]}/{sha}.{extension}"
+
+
+def ref_key(model, file_id):
+    return f"{PREVIEW_PREFIX}/refs/{model.__tablename__}/{file_id}"
+
+
+def extract_document(storage_config, key, kind, max_pages=50, max_chars=200_000, thumbnail_width=320):
+    """저장소의 파일을 추출해 캐시에 기록하고 sha256 을 반환합니다. 이미 캐시되어 있으면 추출하지 않습니다."""
+    driver = create_driver(storage_config)
+    with driver.local_path(key) as path:
+        return _extract_to_cache(driver, path, kind, max_pages, max_chars, thumbnail_width)
+
+
+def _extract_to_cache(driver, path, kind, max_pages, max_chars, thumbnail_width):
+    sha = file_sha256(path)
+    if driver.exists(blob_key(sha, 'json')):
+        return sha
+
+    if kind == 'ole':
+        if not _is_hwp_ole(path):
+            raise UnsupportedDocument('not a HWP document')
+        kind = 'hwp'
+    if kind == 'pdf':
+        text, pages, image = _extract_pdf(path, max_pages, thumbnail_width)
+    elif kind == 'hwp':
+        text, pages, image = _extract_hwp(path)
+    elif kind == 'hwpx':
+        text, pages, image = _extract_hwpx(path)
+    else:
+        raise ValueError(f"unsupported document kind: {kind}")
+
+    text = (text or '').strip()
+    truncated = len(text) > max_chars
+    text = text[:max_chars]
+    image, image_type = _normalize_thumbnail(image, thumbnail_width)
+
+    driver.save(blob_key(sha, 'txt'), io.BytesIO(text.encode('utf-8')), 'text/plain; charset=utf-8')
+    if image:
+        driver.save(blob_key(sha, 'img'), io.BytesIO(image), image_type)
+    meta = {
+        'sha256': sha,
+        'kind': kind,
+        'pages': pages,
+        'textLength': len(text),
+        'truncated': truncated,
+        'thumbnailType': image_type,
+    }
+    # 메타데이터를 마지막에 써서, 메타데이터가 있으면 나머지 파일도 모두 있다는 것을 보장합니다.
+    driver.save(blob_key(sha, 'json'), io.BytesIO(json.dumps(meta).encode('utf-8')), 'application/json')
+    return sha
+
+
+def _extract_pdf(path, max_pages, thumbnail_width):
+    text, pages, image = None, None, None
+    try:
+        import pymupdf
+        with pymupdf.open(path) as document:
+            pages = document.page_count
+            text = '\n'.join(document[i].get_text() for i in range(min(pages, max_pages)))
+            if pages:
+                page = document[0]
+                zoom = thumbnail_width / max(page.rect.width, 1)
+                image = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom)).tobytes('png')
+        return text, pages, image
+    except ImportError:
+        pass
+
+    try:
+        from pypdf import PdfReader
+        reader = PdfReader(path)
+        pages = len(reader.pages)
+        text = '\n'.join((reader.pages[i].extract_text() or '') for i in range(min(pages, max_pages)))
+    except ImportError:
+        if shutil.which('pdftotext'):
+            completed = subprocess.run(['pdftotext', '-l', str(max_pages), '-enc', 'UTF-8', path, '-'],
+                                       capture_output=True, timeout=120, check=True)
+            text = completed.stdout.decode('utf-8', errors='replace')
+
+    if shutil.which('pdftoppm'):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            prefix = os.path.join(tmp_dir, 'thumb')
+            subprocess.run(['pdftoppm', '-png', '-f', '1', '-l', '1', '-singlefile',
+                            '-scale-to', str(thumbnail_width), path, prefix],
+                           capture_output=True, timeout=120, check=True)
+            with open(f"{prefix}.png", 'rb') as f:
+                image = f.read()
+    if text is None and image is None:
+        raise RuntimeError('no PDF tool available (install pypdf, pymupdf or poppler-utils)')
+    return text, pages, image
+
+
+# HWP 5.0 레코드 상수 (한글 문서 파일 형식 5.0 공개 문서 기준)
+HWPTAG_PARA_TEXT = 0x10 + 51
+# 8 WCHAR 를 차지하는 인라인/확장 컨트롤 문자
+_HWP_WIDE_CONTROLS = {1, 2, 3, 4, 5, 6, 7, 8, 9, 11, 12, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23}
+# 압축 폭탄 방지: 모든 본문 섹션을 합쳐 이 크기까지만 압축을 풉니다. (넘는 부분은 미리보기에서 잘립니다)
+HWP_MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+def _extract_hwp(path):
+    import olefile
+    with olefile.OleFileIO(path) as ole:
+        header = ole.openstream('FileHeader').read()
+        properties = struct.unpack_from('<I', header, 36)[0]
+        compressed = bool(properties & 0x1)
+        # 암호/배포용 문서는 본문이 암호화되어 있으므로 미리보기 텍스트만 사용합니다.
+        readable = not (properties & 0x2 or properties & 0x4)
+
+        sections = sorted(
+            ('/'.join(entry) for entry in ole.listdir() if entry[0] == 'BodyText'),
+            key=lambda name: int(name.rsplit('Section', 1)[-1] or 0),
+        )
+        text = None
+        if readable and sections:
+            paragraphs = []
+            remaining = HWP_MAX_BODY_SIZE
+            for name in sections:
+                if remaining <= 0:
+                    break
+                data = ole.openstream(name).read()
+                if compressed:
+                    data = zlib.decompressobj(-15).decompress(data, remaining)
+                else:
+                    data = data[:remaining]
+                remaining -= len(data)
+                paragraphs.extend(_hwp_paragraphs(data))
+            text = '\n'.join(paragraphs)
+        if not text and ole.exists('PrvText'):
+            text = ole.openstream('PrvText').read().decode('utf-16-le', errors='replace')
+        image = ole.openstream('PrvImage').read() if ole.exists('PrvImage') else None
+    # HWP 는 레이아웃 없이는 페이지 수를 알 수 없습니다.
+    return text, None, image
+
+
+def _hwp_paragraphs(data):
+    offset = 0
+    while offset + 4 <= len(data):
+        header = struct.unpack_from('<I', data, offset)[0]
+        offset += 4
+        tag, size = header & 0x3FF, (header >> 20) & 0xFFF
+        if size == 0xFFF:
+            if offset + 4 > len(data):
+                break   # 상한에서 잘린 마지막 레코드
+            size = struct.unpack_from('<I', data, offset)[0]
+            offset += 4
+        if tag == HWPTAG_PARA_TEXT:
+            yield _hwp_para_text(data[offset:offset + size])
+        offset += size
+
+
+def _hwp_para_text(payload):
+    chars = []
+    codes = struct.unpack(f'<{len(payload) // 2}H', payload[:len(payload) // 2 * 2])
+    i = 0
+    while i < len(codes):
+        code = codes[i]
+        if code in _HWP_WIDE_CONTROLS:
+            if code == 9:
+                chars.append('\t')
+            i += 8
+            continue
+        if code >= 32:
+            chars.append(chr(code))
+        elif code in (10, 13):
+            chars.append('\n')
+        i += 1
+    return ''.join(chars).rstrip('\n')
+
+
+def _extract_hwpx(path):
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        sections = sorted(n for n in names if n.startswith('Contents/section') and n.endswith('.xml'))
+        paragraphs = []
+        for name in sections:
+            with archive.open(name) as f:
+                parts = []
+                for _, element in ElementTree.iterparse(f):
+                    tag = element.tag.rsplit('}', 1)[-1]
+                    if tag == 't' and element.text:
+                        parts.append(element.text)
+                    elif tag == 'p':
+                        paragraphs.append(''.join(parts))
+                        parts = []
+                        element.clear()
+        text = '\n'.join(paragraphs)
+        if not text.strip() and 'Preview/PrvText.txt' in names:
+            text = archive.read('Preview/PrvText.txt').decode('utf-8', errors='replace')
+        image = archive.read('Preview/PrvImage.png') if 'Preview/PrvImage.png' in names else None
+    return text, None, image
+
+
+def _normalize_thumbnail(image, width):
+    """Pillow 가 있으면 PNG 로 축소하고, 없으면 원본 형식 그대로 저장합니다."""
+    if not image:
+        return None, None
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(image)) as picture:
+            if picture.width > width:
+                picture = picture.resize((width, max(1, picture.height * width // picture.width)))
+            out = io.BytesIO()
+            picture.save(out, format='PNG')
+            return out.getvalue(), 'image/png'
+    except ImportError:
+        pass
+    for magic, image_type in IMAGE_TYPES.items():
+        if image.startswith(magic):
+            return image, image_type
+    return None, None
+
+
+# --- 앱 쪽 서비스 ---
+
+class PreviewService:
+    def __init__(self):
+        self.app = None
+        self.workers = 2
+        self.options = {}
+        self._executor = None
+        self._executor_pid = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('PREVIEW_WORKERS', self.workers)
+        self.max_file_size = app.config.get('PREVIEW_MAX_FILE_SIZE', 100 * 1024 * 1024)
+        self.options = {
+            'max_pages': app.config.get('PREVIEW_MAX_PAGES', 50),
+            'max_chars': app.config.get('PREVIEW_MAX_CHARS', 200_000),
+            'thumbnail_width': app.config.get('PREVIEW_THUMBNAIL_WIDTH', 320),
+        }
+        app.extensions['preview_service'] = self
+
+    def _get_executor(self):
+        # fork 된 워커는 부모의 풀을 쓸 수 없으므로 프로세스마다 새로 만듭니다.
+        # 스레드가 있는 프로세스에서 fork 하지 않도록 spawn 으로 자식 프로세스를 띄웁니다.
+        pid = os.getpid()
+        if self._executor_pid != pid:
+            with self._lock:
+                if self._executor_pid != pid:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        max_tasks_per_child=200,
+                    )
+                    self._inflight = {}
+                    self._executor_pid = pid
+        return self._executor
+
+    def _reset_executor(self, executor):
+        """
+        자식 프로세스가 비정상 종료(메모리 부족 등)하면 풀 전체가 BrokenProcessPool 상태가 되어
+        이후 submit 이 모두 실패하므로, 다음 요청에서 새 풀을 만들게 합니다.
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return      # 이미 다른 스레드가 새로 만들었습니다.
+            self._executor_pid = None
+        self.app.logger.warning("Preview worker pool is broken; recreating it")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def schedule(self, model, file_id, file_url, filename=None, mime_type=None, size=None):
+        """
+        파일 행의 미리보기 추출을 예약하고 문서 종류를 반환합니다. (미지원 형식이면 None)
+        커밋 이후에 호출해야 합니다. 실패해도 업로드 요청에는 영향을 주지 않습니다.
+        """
+        if not self.workers:
+            return None
+        key = key_for(model, file_url)
+        try:
+            if size is not None and size > self.max_file_size:
+                return None
+            with storage.open(key) as f:
+                kind = detect_kind(f.read(8), filename or file_url, mime_type)
+            if kind is None:
+                return None
+            inflight_key = (model.__tablename__, file_id)
+            with self._lock:
+                if inflight_key in self._inflight:
+                    return kind
+            # 자식 프로세스에는 앱이 없으므로 저장소 설정을 넘겨 직접 열게 합니다.
+            executor = self._get_executor()
+            try:
+                future = executor.submit(extract_document, storage.config(), key, kind, **self.options)
+            except BrokenProcessPool:
+                self._reset_executor(executor)
+                executor = self._get_executor()
+                future = executor.submit(extract_document, storage.config(), key, kind, **self.options)
+            with self._lock:
+                self._inflight[inflight_key] = future
+            future.add_done_callback(lambda f: self._finish(model, file_id, f, executor))
+            return kind
+        except Exception as e:
+            self.app.logger.error("Error scheduling preview for %s: %s", key, e)
+            return None
+
+    def _finish(self, model, file_id, future, executor):
+        with self._lock:
+            self._inflight.pop((model.__tablename__, file_id), None)
+        try:
+            ref = {'sha256': future.result()}
+        except UnsupportedDocument:
+            ref = {'unsupported': True}
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._reset_executor(executor)
+            self.app.logger.error("Preview extraction failed for %s %s: %s", model.__tablename__, file_id, e)
+            ref = {'error': str(e) or type(e).__name__}
+        try:
+            storage.save(ref_key(model, file_id), io.BytesIO(json.dumps(ref).encode('utf-8')), 'application/json')
+        except Exception as e:
+            self.app.logger.error("Error saving preview ref for %s %s: %s", model.__tablename__, file_id, e)
+
+    def lookup(self, model, file_row):
+        """
+        (status, meta) 를 반환합니다.
+        status: 'ready' / 'pending' / 'failed' / 'unsupported'
+        이 기능 이전에 올라온 파일은 처음 조회될 때 추출을 예약합니다.
+        """
+        try:
+            ref = json.loads(storage.read(ref_key(model, file_row.id)))
+        except KeyError:
+            with self._lock:
+                if (model.__tablename__, file_row.id) in self._inflight:
+                    return 'pending', None
+            if self.schedule(model, file_row.id, file_row.fileUrl, file_row.fileName, file_row.mimeType,
+                             file_row.fileSize):
+                return 'pending', None
+            return 'unsupported', None
+
+        if ref.get('unsupported'):
+            return 'unsupported', None
+        if 'error' in ref:
+            return 'failed', {'error': ref['error']}
+        try:
+            return 'ready', json.loads(storage.read(blob_key(ref['sha256'], 'json')))
+        except KeyError:
+            # 캐시가 지워졌으면 다시 추출합니다.
+            storage.delete(ref_key(model, file_row.id))
+            return self.lookup(model, file_row)
+
+    def text_for(self, meta):
+        return storage.read(blob_key(meta['sha256'], 'txt')).decode('utf-8')
+
+    def thumbnail_key(self, meta):
+        return blob_key(meta['sha256'], 'img') if meta.get('thumbnailType') else None
+
+
+def preview_response(model, file_row, thumbnail_url):
+    """미리보기 엔드포인트의 공통 응답 (라우트에서 권한 확인 후 호출합니다)"""
+    status, meta = preview_service.lookup(model, file_row)
+    if status == 'pending':
+        response = jsonify(status=status)
+        response.status_code = 202
+        response.headers['Retry-After'] = '2'
+        return response
+    if status != 'ready':
+        return jsonify(status=status, **(meta or {})), 200
+    return jsonify(
+        status=status,
+        kind=meta['kind'],
+        pages=meta['pages'],
+        text=preview_service.text_for(meta),
+        truncated=meta['truncated'],
+        thumbnailUrl=thumbnail_url if meta.get('thumbnailType') else None,
+    ), 200
+
+
+def thumbnail_response(model, file_row):
+    status, meta = preview_service.lookup(model, file_row)
+    if status == 'pending':
+        return jsonify(status=status), 202
+    thumbnail_key = preview_service.thumbnail_key(meta) if status == 'ready' else None
+    if not thumbnail_key:
+        return jsonify(error="Thumbnail not available"), 404
+    # 캐시 키가 내용 해시이므로 같은 URL 의 이미지는 바뀌지 않습니다.
+    response = storage.download_response(thumbnail_key, f"{meta['sha256']}.img", mimetype=meta['thumbnailType'],
+                                         max_age=86400, etag=meta['sha256'])
+    if getattr(response, 'status_code', None) == 200:
+        response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+preview_service = PreviewService()
+
+
+def prune(app):
+    """삭제된 파일 행의 ref 와 더 이상 참조되지 않는 캐시 blob 을 지웁니다."""
+    from sqlalchemy import select
+    from backend.extensions import db
+    from backend.models import ArchiveIndex
+    from backend.reclaim import UPLOAD_MODELS
+
+    removed_refs, removed_blobs, referenced = 0, 0, set()
+    for model in UPLOAD_MODELS:
+        existing = set(db.session.scalars(select(model.id)))
+        # 보관된 강의(backend/archive.py)의 파일은 미리보기를 남겨 둡니다.
+        existing.update(db.session.scalars(select(ArchiveIndex.refId).where(ArchiveIndex.kind == model.__tablename__)))
+        for key, _, _ in list(storage.iter_keys(f"{PREVIEW_PREFIX}/refs/{model.__tablename__}")):
+            if key.rsplit('/', 1)[-1] not in existing:
+                storage.delete(key)
+                removed_refs += 1
+                continue
+            referenced.add(json.loads(storage.read(key)).get('sha256'))
+
+    for key, _, _ in list(storage.iter_keys(f"{PREVIEW_PREFIX}/blobs")):
+        if key.rsplit('/', 1)[-1].split('.')[0] not in referenced:
+            storage.delete(key)
+            removed_blobs += 1
+    return removed_refs, removed_blobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.previews')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('extract', help='기존 업로드 파일의 미리보기를 모두 추출합니다.')
+    subcommands.add_parser('prune', help='삭제된 파일의 미리보기 캐시를 정리합니다.')
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+    from backend.extensions import db
+    from backend.reclaim import UPLOAD_MODELS
+    # `python -m` 으로 실행하면 이 파일은 __main__ 이므로, 앱이 초기화한 backend.previews 모듈을 사용합니다.
+    from backend import previews
+    service = previews.preview_service
+    app = create_app()
+    with app.app_context():
+        if args.command == 'prune':
+            removed_refs, removed_blobs = previews.prune(app)
+            print(f"removed refs  : {removed_refs}")
+            print(f"removed blobs : {removed_blobs}")
+            return 0
+
+        scheduled = 0
+        for model in UPLOAD_MODELS:
+            for row in db.session.scalars(db.select(model).execution_options(yield_per=1000)):
+                if storage.exists(previews.ref_key(model, row.id)):
+                    continue
+                if service.schedule(model, row.id, row.fileUrl, row.fileName, row.mimeType, row.fileSize):
+                    scheduled += 1
+        print(f"scheduled {scheduled} files, waiting for extraction...")
+        service._get_executor().shutdown(wait=True)
+        print("done")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
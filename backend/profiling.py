@@ -0,0 +1,286 @@
+"""
+관리자용 요청 단위 프로파일러
+
+"채점이 느리다" 같은 재현하기 어려운 제보를 위해, 관리자가 같은 요청을 다시 보낼 때
+X-Profile: 1 헤더(또는 ?_profile=1)를 붙이면 그 요청 하나만 프로파일링합니다.
+
+- 프로파일 : 요청 스레드에만 sys.setprofile 을 걸어 모든 함수 호출의 self 시간을 호출 스택별로 더합니다.
+             결과는 flamegraph.pl / speedscope / inferno 가 읽는 collapsed stack 형식('a;b;c <마이크로초>')입니다.
+- SQL : 같은 요청 스레드에서 실행된 SQL 문, 파라미터(요약), 소요 시간, 호출한 backend 코드 위치를 함께 기록합니다.
+- 저장 : 저장소의 profiles/<id>.folded 와 profiles/<id>.json 에 저장하고, 응답의 X-Profile-ID 헤더로 id 를 알려 줍니다.
+         /api/admin/profiles 에서 목록/상세/flamegraph 파일을 받을 수 있으며, 최근 PROFILE_KEEP 개만 남깁니다.
+- 헤더가 없는 요청은 헤더 확인 한 번 외에는 아무것도 하지 않고, SQL 이벤트도 프로파일 중에만 등록합니다.
+  PROFILING_ENABLED=0 이면 훅 자체를 등록하지 않습니다.
+- 토큰의 사용자가 승인된 ADMIN 일 때만 동작하며, 그 외에는 헤더를 무시합니다.
+"""
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.storage import storage
+
+PROFILE_PREFIX = 'profiles'
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-ID'
+PROFILE_ID = re.compile(r'^[0-9a-f]{32}$')
+MAX_SQL_STATEMENTS = 2000
+MAX_PARAMS_LENGTH = 300
+TOP_FUNCTIONS = 30
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def profile_key(profile_id, ext):
+    return f"{PROFILE_PREFIX}/{profile_id}.{ext}"
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_DIR):
+        filename = 'backend' + filename[len(_BACKEND_DIR):]
+    else:
+        filename = os.path.basename(filename)
+    # collapsed stack 형식에서 ';' 는 프레임 구분자이므로 이름에서 뺍니다. (값은 마지막 공백 뒤에 옵니다)
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(';', ',')
+
+
+def _c_label(func):
+    module = getattr(func, '__module__', None) or type(getattr(func, '__self__', None)).__name__
+    return f"{module}.{getattr(func, '__qualname__', repr(func))}".replace(';', ',')
+
+
+class _Tracer:
+    """sys.setprofile 콜백. 호출 스택별 self 시간(초)을 모읍니다."""
+
+    def __init__(self, root):
+        self.root = root
+        self.stack = []         # [label, 시작 시각, 자식 시간, token]
+        self.totals = defaultdict(float)
+
+    def _close(self, now):
+        label, start, child, _ = self.stack[-1]
+        elapsed = now - start
+        self.totals[';'.join([self.root] + [entry[0] for entry in self.stack])] += elapsed - child
+        self.stack.pop()
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def __call__(self, frame, event_name, arg):
+        now = time.perf_counter()
+        if event_name == 'call':
+            self.stack.append([_frame_label(frame.f_code), now, 0.0, frame])
+        elif event_name == 'c_call':
+            self.stack.append([_c_label(arg), now, 0.0, arg])
+        elif self.stack:
+            # 프로파일을 켜기 전에 시작된 프레임의 return 은 스택에 없으므로 무시합니다.
+            token = frame if event_name == 'return' else arg
+            if self.stack[-1][3] is token:
+                self._close(now)
+
+    def finish(self):
+        now = time.perf_counter()
+        while self.stack:
+            self._close(now)
+        return self.totals
+
+
+def _caller():
+    """SQL 을 실행한 backend 코드의 위치 (SQLAlchemy 와 이 모듈은 건너뜁니다)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_BACKEND_DIR) and filename != __file__:
+            return f"backend{filename[len(_BACKEND_DIR):]}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class _Profile:
+    def __init__(self, user_id):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.created_at = datetime.utcnow()
+        self.tracer = _Tracer(f"{request.method} {request.path}".replace(';', ','))
+        self.sql = []
+        self.sql_dropped = 0
+        self.started = time.perf_counter()
+
+
+class RequestProfiler:
+    def __init__(self):
+        self.app = None
+        self.keep = 100
+        self._active = {}           # 스레드 ID -> _Profile
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.keep = app.config.get('PROFILE_KEEP', self.keep)
+        app.extensions['request_profiler'] = self
+        if app.config.get('PROFILING_ENABLED', True):
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+            app.teardown_request(self._teardown_request)
+
+    # --- 요청 훅 ---
+    def _requested(self):
+        return request.headers.get(PROFILE_HEADER) == '1' or request.args.get('_profile') == '1'
+
+    def _admin_id(self):
+        """헤더를 붙인 요청의 토큰이 승인된 관리자의 것이면 사용자 ID 를 반환합니다."""
+        # 라우트 모듈은 LAZY_STARTUP 에서 첫 요청까지 import 되지 않도록 여기서 가져옵니다.
+        from backend.routes.auth import decode_access_token
+        from backend.models import Role, UserStatus
+        from backend.user_cache import user_cache
+        auth_header = request.headers.get('Authorization') or ''
+        if not auth_header.startswith('Bearer '):
+            return None
+        try:
+            user = user_cache.get(decode_access_token(auth_header.split(' ')[1])['userId'])
+        except Exception:
+            return None
+        if user and user.role == Role.ADMIN and user.status == UserStatus.APPROVED:
+            return user.id
+        return None
+
+    def _before_request(self):
+        if not self._requested():
+            return
+        user_id = self._admin_id()
+        if user_id is None:
+            return
+        profile = _Profile(user_id)
+        g.profile = profile
+        with self._lock:
+            if not self._active:
+                event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._active[threading.get_ident()] = profile
+        sys.setprofile(profile.tracer)
+
+    def _stop(self):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return None
+        sys.setprofile(None)
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+            if not self._active:
+                event.remove(Engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.remove(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        return profile
+
+    def _after_request(self, response):
+        profile = self._stop()
+        if profile is None:
+            return response
+        try:
+            self._save(profile, response.status_code)
+            response.headers[PROFILE_ID_HEADER] = profile.id
+        except Exception as e:
+            self.app.logger.error("Error saving profile %s: %s", profile.id, e)
+        return response
+
+    def _teardown_request(self, exc):
+        # 처리되지 않은 예외로 after_request 가 불리지 않았을 때 프로파일러를 확실히 끕니다.
+        self._stop()
+
+    # --- SQL 기록 ---
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = self._active.get(threading.get_ident())
+        if profile is not None:
+            conn.info.setdefault('profile_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = self._active.get(threading.get_ident())
+        started = conn.info.get('profile_started')
+        if profile is None or not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if len(profile.sql) >= MAX_SQL_STATEMENTS:
+            profile.sql_dropped += 1
+            return
+        params = repr(parameters)
+        profile.sql.append({
+            'statement': statement,
+            'parameters': params if len(params) <= MAX_PARAMS_LENGTH else params[:MAX_PARAMS_LENGTH] + '...',
+            'executemany': executemany,
+            'rowcount': cursor.rowcount,
+            'ms': round(elapsed * 1000, 3),
+            'caller': _caller(),
+        })
+
+    # --- 저장/조회 ---
+    def _save(self, profile, status_code):
+        totals = profile.tracer.finish()
+        duration = time.perf_counter() - profile.started
+        folded = ''.join(f"{stack} {max(1, round(seconds * 1e6))}\n" for stack, seconds in sorted(totals.items()))
+
+        functions = defaultdict(float)
+        for stack, seconds in totals.items():
+            functions[stack.rsplit(';', 1)[-1]] += seconds
+        top = sorted(functions.items(), key=lambda item: item[1], reverse=True)[:TOP_FUNCTIONS]
+
+        meta = {
+            'id': profile.id,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': status_code,
+            'userId': profile.user_id,
+            'createdAt': profile.created_at.isoformat() + 'Z',
+            'durationMs': round(duration * 1000, 3),
+            'sqlCount': len(profile.sql) + profile.sql_dropped,
+            'sqlMs': round(sum(statement['ms'] for statement in profile.sql), 3),
+            'sqlDropped': profile.sql_dropped,
+            'topFunctions': [{'function': name, 'selfMs': round(seconds * 1000, 3)} for name, seconds in top],
+            'sql': profile.sql,
+        }
+        storage.save(profile_key(profile.id, 'folded'), io.BytesIO(folded.encode('utf-8')), 'text/plain')
+        storage.save(profile_key(profile.id, 'json'), io.BytesIO(json.dumps(meta, ensure_ascii=False).encode('utf-8')),
+                     'application/json')
+        self.prune()
+
+    def prune(self):
+        """최근 keep 개의 프로파일만 남깁니다."""
+        profiles = defaultdict(list)
+        for key, _, modified in storage.iter_keys(PROFILE_PREFIX):
+            profiles[key.rsplit('/', 1)[-1].split('.', 1)[0]].append((modified, key))
+        ordered = sorted(profiles.values(), key=lambda keys: max(keys)[0], reverse=True)
+        for keys in ordered[self.keep:]:
+            for _, key in keys:
+                storage.delete(key)
+
+    def load(self, profile_id):
+        """저장된 프로파일의 메타데이터(SQL 포함). 없으면 None 을 반환합니다."""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        try:
+            return json.loads(storage.read(profile_key(profile_id, 'json')))
+        except KeyError:
+            return None
+
+    def recent(self):
+        """저장된 프로파일 요약 목록 (최신순)"""
+        summaries = []
+        for key, _, _ in storage.iter_keys(PROFILE_PREFIX):
+            if key.endswith('.json'):
+                meta = self.load(key.rsplit('/', 1)[-1][:-len('.json')])
+                if meta:
+                    meta.pop('sql', None)
+                    meta.pop('topFunctions', None)
+                    summaries.append(meta)
+        return sorted(summaries, key=lambda meta: meta['createdAt'], reverse=True)
+
+
+request_profiler = RequestProfiler()
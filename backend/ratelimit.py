@@ -0,0 +1,206 @@
+"""
+요청 빈도 제한 (token bucket)
+
+로그인(bcrypt)이나 파일 제출(디스크)처럼 비싼 엔드포인트를 한 클라이언트가 독점하지 못하게 합니다.
+버킷은 로그인한 사용자면 사용자 ID, 아니면 클라이언트 IP 별로 따로 둡니다.
+
+규칙은 RATE_LIMITS 에 '<엔드포인트 또는 블루프린트>=<횟수>/<기간>' 을 쉼표로 나열합니다.
+
+    RATE_LIMITS="auth.login=10/minute,submissions=120/minute"
+
+- 'auth.login' 처럼 엔드포인트 이름을 쓰면 그 엔드포인트에만, 'submissions' 처럼 블루프린트 이름을 쓰면
+  블루프린트 전체가 한 버킷을 공유합니다. 엔드포인트 규칙이 블루프린트 규칙보다 우선합니다.
+- 규칙이 없는 엔드포인트는 RATE_LIMIT_DEFAULT 를 공유합니다. (비우면 제한하지 않습니다)
+- 버킷에는 최대 <횟수> 만큼 토큰이 쌓이고, <기간> 동안 <횟수> 만큼 다시 채워집니다.
+
+모든 응답에 RateLimit-Limit / RateLimit-Remaining / RateLimit-Reset 헤더를 붙이고,
+제한을 넘으면 429 와 Retry-After 를 반환합니다.
+
+- RATE_LIMIT_STORE_URL 미설정 : 프로세스 메모리에 버킷을 둡니다. (단일 워커)
+- RATE_LIMIT_STORE_URL=redis://... : 모든 워커가 Redis 의 버킷을 공유합니다. (멀티 워커)
+"""
+import math
+import threading
+import time
+from collections import namedtuple
+
+from flask import g, jsonify, request
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+Limit = namedtuple('Limit', 'name count period')
+Result = namedtuple('Result', 'limit allowed remaining reset retry_after')
+
+LIMITED_MESSAGE = '요청이 너무 많습니다. 잠시 후 다시 시도해주세요.'
+
+
+def parse_limits(spec):
+    """'auth.login=10/minute,submissions=120/minute' 형식을 {이름: Limit} 으로 바꿉니다."""
+    limits = {}
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, rate = item.partition('=')
+        limits[name.strip()] = parse_limit(name.strip(), rate)
+    return limits
+
+
+def parse_limit(name, rate):
+    count, _, period = rate.strip().partition('/')
+    period = period.strip().rstrip('s')
+    if period not in PERIODS:
+        raise ValueError(f"Unknown rate limit period in {name}={rate!r}")
+    return Limit(name, int(count), PERIODS[period])
+
+
+class _MemoryBackend:
+    def __init__(self):
+        self._buckets = {}   # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def take(self, key, capacity, rate):
+        """토큰 하나를 꺼내 보고 (허용 여부, 남은 토큰)을 반환합니다."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_purge > 60:
+                # 다시 가득 찬 버킷은 없는 버킷과 같으므로 지웁니다.
+                self._buckets = {k: v for k, v in self._buckets.items() if v[1] + capacity / rate > now}
+                self._last_purge = now
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+        return allowed, tokens
+
+
+# 버킷 갱신을 원자적으로 처리합니다. 시각은 워커 시계 대신 Redis 서버 시계를 사용합니다.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class _RedisBackend:
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._take = self._redis.register_script(_TAKE_SCRIPT)
+
+    def take(self, key, capacity, rate):
+        allowed, tokens = self._take(keys=[key], args=[capacity, rate])
+        return bool(allowed), float(tokens)
+
+
+class RateLimiter:
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.limits = {}
+        self.default = None
+        self.trust_forwarded = False
+        self._backend = _MemoryBackend()
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', self.enabled)
+        self.limits = parse_limits(app.config.get('RATE_LIMITS'))
+        default = app.config.get('RATE_LIMIT_DEFAULT')
+        self.default = parse_limit('default', default) if default else None
+        self.trust_forwarded = app.config.get('RATE_LIMIT_TRUST_FORWARDED', self.trust_forwarded)
+        url = app.config.get('RATE_LIMIT_STORE_URL')
+        self._backend = _RedisBackend(url) if url else _MemoryBackend()
+        app.extensions['rate_limiter'] = self
+        if self.enabled:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+
+    def limit_for(self, endpoint):
+        """엔드포인트('blueprint.function')에 적용할 규칙. 엔드포인트 → 블루프린트 → 기본값 순으로 찾습니다."""
+        if endpoint in self.limits:
+            return self.limits[endpoint]
+        blueprint = endpoint.rpartition('.')[0]
+        if blueprint in self.limits:
+            return self.limits[blueprint]
+        return self.default
+
+    def hit(self, endpoint, identity):
+        """요청 하나를 기록하고 Result 를 반환합니다. 적용할 규칙이 없으면 None 을 반환합니다."""
+        limit = self.limit_for(endpoint)
+        if limit is None:
+            return None
+        rate = limit.count / limit.period
+        try:
+            allowed, tokens = self._backend.take(f"ratelimit:{limit.name}:{identity}", limit.count, rate)
+        except Exception as e:
+            # 저장소 장애로 서비스 전체를 막지 않도록 제한 없이 통과시킵니다.
+            self.app.logger.error("Rate limit store error: %s", e)
+            return None
+        return Result(
+            limit=limit,
+            allowed=allowed,
+            remaining=int(tokens),
+            reset=math.ceil((limit.count - tokens) / rate),
+            retry_after=0 if allowed else math.ceil((1 - tokens) / rate),
+        )
+
+    def _before_request(self):
+        if request.method == 'OPTIONS' or request.endpoint is None:
+            return None
+        remote_addr = request.access_route[0] if self.trust_forwarded and request.access_route else request.remote_addr
+        result = self.hit(request.endpoint, client_identity(request.headers.get('Authorization'), remote_addr))
+        if result is None:
+            return None
+        g.rate_limit = result
+        if not result.allowed:
+            return jsonify(error=LIMITED_MESSAGE), 429
+        return None
+
+    def _after_request(self, response):
+        result = g.pop('rate_limit', None)
+        if result is not None:
+            response.headers.update(rate_limit_headers(result))
+        return response
+
+
+rate_limiter = RateLimiter()
+
+
+def client_identity(auth_header, remote_addr):
+    """유효한 액세스 토큰이 있으면 사용자 ID, 없으면 IP 로 버킷을 구분합니다."""
+    if auth_header and auth_header.startswith('Bearer '):
+        from backend.routes.auth import decode_access_token
+        try:
+            return f"user:{decode_access_token(auth_header.split(' ')[1])['userId']}"
+        except Exception:
+            pass
+    return f"ip:{remote_addr}"
+
+
+def rate_limit_headers(result):
+    headers = {
+        'RateLimit-Limit': str(result.limit.count),
+        'RateLimit-Remaining': str(result.remaining),
+        'RateLimit-Reset': str(result.reset),
+        'RateLimit-Policy': f"{result.limit.count};w={result.limit.period}",
+    }
+    if not result.allowed:
+        headers['Retry-After'] = str(result.retry_after)
+    return headers
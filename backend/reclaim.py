@@ -0,0 +1,210 @@
+"""
+업로드 파일 회수(reclamation) 및 무결성 검사
+
+- FileReclaimer : 커밋된 트랜잭션에서 삭제된 Attachment / SubmissionFile 행의 파일을
+                  요청 경로 밖의 백그라운드 스레드에서 지웁니다.
+                  ORM cascade 로 함께 삭제된 행도 세션 이벤트로 잡아내므로 저장소에 파일이 남지 않습니다.
+- sweep()       : 저장소(backend.storage)를 스트리밍 방식으로 훑으며 DB 와 비교해
+                  고아 파일(저장소에만 있음)과 유실 파일(DB 에만 있음)을 보고합니다.
+
+    python -m backend.reclaim sweep             # dry-run 보고서
+    python -m backend.reclaim sweep --delete    # 고아 파일 삭제
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from backend.extensions import db
+from backend.models import ArchiveIndex, Attachment, SubmissionFile
+from backend.storage import storage, key_for
+
+# 업로드 파일을 가진 모델
+UPLOAD_MODELS = (Attachment, SubmissionFile)
+
+_SESSION_KEY = 'reclaim_keys'
+
+
+class FileReclaimer:
+    def __init__(self):
+        self.app = None
+        self.retries = 3
+        self.sweep_interval = 0
+        self.sweep_min_age = 3600
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+        self._sweeper_pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.sweep_interval = app.config.get('UPLOAD_SWEEP_INTERVAL', self.sweep_interval)
+        self.sweep_min_age = app.config.get('UPLOAD_SWEEP_MIN_AGE', self.sweep_min_age)
+        app.extensions['file_reclaimer'] = self
+        if self.sweep_interval:
+            app.before_request(self._ensure_threads)
+        if not event.contains(Session, 'after_flush', _collect_deleted_files):
+            event.listen(Session, 'after_flush', _collect_deleted_files)
+            event.listen(Session, 'after_commit', _enqueue_after_commit)
+            event.listen(Session, 'after_soft_rollback', _discard_after_rollback)
+
+    def enqueue(self, keys):
+        """저장소 키의 삭제를 예약합니다. 실제 삭제는 백그라운드 스레드에서 이루어집니다."""
+        keys = list(keys)
+        if not keys:
+            return
+        self._ensure_threads()
+        for key in keys:
+            self._queue.put((key, 0))
+
+    def _ensure_threads(self):
+        # fork 된 워커에서는 부모의 스레드가 없으므로 프로세스마다 새로 띄웁니다.
+        pid = os.getpid()
+        if self._worker_pid == pid and (not self.sweep_interval or self._sweeper_pid == pid):
+            return
+        with self._lock:
+            if self._worker_pid != pid:
+                threading.Thread(target=self._run, name='file-reclaimer', daemon=True).start()
+                self._worker_pid = pid
+            if self.sweep_interval and self._sweeper_pid != pid:
+                threading.Thread(target=self._run_sweeper, name='upload-sweeper', daemon=True).start()
+                self._sweeper_pid = pid
+
+    def _run(self):
+        while True:
+            key, attempt = self._queue.get()
+            try:
+                storage.delete(key)
+            except Exception as e:
+                if attempt + 1 < self.retries:
+                    time.sleep(0.5 * (attempt + 1))
+                    self._queue.put((key, attempt + 1))
+                else:
+                    self.app.logger.error("Failed to remove upload file %s: %s", key, e)
+
+    def _run_sweeper(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                with self.app.app_context():
+                    report = sweep(self.app, min_age=self.sweep_min_age, dry_run=True)
+                    db.session.remove()
+                if report['orphans'] or report['missing']:
+                    self.app.logger.warning(
+                        "Upload sweep: %s orphan files (%s bytes), %s missing files",
+                        len(report['orphans']), report['orphanBytes'], len(report['missing'])
+                    )
+            except Exception as e:
+                self.app.logger.error("Upload sweep failed: %s", e)
+
+
+def _collect_deleted_files(session, flush_context):
+    if file_reclaimer.app is None:
+        return
+    keys = session.info.setdefault(_SESSION_KEY, [])
+    for obj in session.deleted:
+        model = type(obj)
+        if model in UPLOAD_MODELS and obj.fileUrl:
+            keys.append(key_for(model, obj.fileUrl))
+
+
+def defer_delete(session, keys):
+    """
+    세션이 커밋되면 지울 저장소 키를 추가합니다. (롤백되면 취소됩니다)
+    ORM 을 거치지 않는 bulk DELETE 는 세션 이벤트에 잡히지 않으므로 이 함수로 직접 예약합니다.
+    """
+    session.info.setdefault(_SESSION_KEY, []).extend(keys)
+
+
+def _enqueue_after_commit(session):
+    keys = session.info.pop(_SESSION_KEY, None)
+    if keys:
+        file_reclaimer.enqueue(keys)
+
+
+def _discard_after_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop(_SESSION_KEY, None)
+
+
+def sweep(app, min_age=3600, dry_run=True):
+    """
+    저장소와 Attachment / SubmissionFile 테이블을 비교합니다.
+    업로드 도중인 파일을 지우지 않도록 min_age 초보다 최근에 수정된 파일은 고아로 보지 않습니다.
+    """
+    now = time.time()
+    report = {'orphans': [], 'missing': [], 'orphanBytes': 0, 'scanned': 0, 'dryRun': dry_run}
+
+    for model in UPLOAD_MODELS:
+        # DB 쪽 키 집합만 메모리에 두고, 저장소 쪽은 한 파일씩 비교합니다.
+        known = {}
+        for file_id, file_url in db.session.execute(
+                select(model.id, model.fileUrl).execution_options(yield_per=5000)):
+            known[key_for(model, os.path.normpath(file_url).replace(os.sep, '/'))] = (file_id, file_url)
+        # 보관된 강의(backend/archive.py)의 파일은 행이 없어도 고아가 아닙니다.
+        archived = set()
+        for file_url in db.session.scalars(
+                select(ArchiveIndex.fileUrl).where(ArchiveIndex.kind == model.__tablename__)):
+            archived.add(key_for(model, os.path.normpath(file_url).replace(os.sep, '/')))
+
+        prefix = key_for(model, '')
+        for key, size, mtime in storage.iter_keys(prefix):
+            report['scanned'] += 1
+            if known.pop(key, None) is not None or key in archived:
+                continue
+            if now - mtime < min_age:
+                continue
+            report['orphans'].append({'path': key, 'size': size})
+            report['orphanBytes'] += size
+
+        report['missing'].extend(
+            {'table': model.__tablename__, 'id': file_id, 'fileUrl': file_url}
+            for file_id, file_url in known.values()
+        )
+
+    if not dry_run:
+        for orphan in report['orphans']:
+            storage.delete(orphan['path'])
+    return report
+
+
+file_reclaimer = FileReclaimer()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.reclaim')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    sweep_parser = subcommands.add_parser('sweep', help='업로드 저장소와 DB 를 비교합니다.')
+    sweep_parser.add_argument('--delete', action='store_true', help='고아 파일을 실제로 삭제합니다. (기본: dry-run)')
+    sweep_parser.add_argument('--min-age', type=int, default=3600, help='이 시간(초)보다 최근 파일은 건너뜁니다.')
+    sweep_parser.add_argument('--json', dest='json_path', help='보고서를 JSON 파일로 저장합니다.')
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+    # `python -m` 으로 실행하면 이 파일은 __main__ 이므로, 앱이 초기화한 backend.reclaim 모듈을 사용합니다.
+    from backend import reclaim
+    app = create_app()
+    with app.app_context():
+        report = reclaim.sweep(app, min_age=args.min_age, dry_run=not args.delete)
+
+    print(f"scanned files : {report['scanned']}")
+    print(f"orphan files  : {len(report['orphans'])} ({report['orphanBytes']} bytes)"
+          f"{' [dry-run]' if report['dryRun'] else ' [deleted]'}")
+    for orphan in report['orphans'][:50]:
+        print(f"  - {orphan['path']} ({orphan['size']} bytes)")
+    print(f"missing files : {len(report['missing'])}")
+    for missing in report['missing'][:50]:
+        print(f"  - {missing['table']} {missing['id']}: {missing['fileUrl']}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
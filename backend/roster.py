@@ -0,0 +1,193 @@
+"""
+수강생 명단(CSV) 일괄 가져오기
+
+학사팀이 주는 CSV(email, name[, password])를 한 줄씩 읽어 학생 계정을 만들고 강의에 등록합니다.
+회원가입(auth.register)과 수강 등록(courses.enroll_student)을 한 명씩 호출하면 bcrypt 와 커밋이
+행마다 일어나므로, 이 모듈은 ROSTER_BATCH_SIZE 행씩 묶어 처리합니다.
+
+- 검증 : 이름/이메일/비밀번호는 회원가입과 같은 규칙(backend/routes/auth.py)을 사용하고,
+         잘못된 행은 건너뛰고 행 번호와 함께 오류로 보고합니다.
+- 해시 : password 열이 있는 행의 비밀번호는 프로세스 풀에서 병렬로 bcrypt 합니다.
+         password 가 없는 행은 아무도 모르는 임의 비밀번호의 해시 하나를 공유하므로, 비밀번호 재설정 후 로그인할 수 있습니다.
+- 저장 : 사용자와 수강 등록을 배치마다 executemany 한 번씩 INSERT IGNORE 하고 커밋합니다.
+         이미 있는 계정(같은 이메일)은 건드리지 않고 수강 등록만 합니다.
+"""
+import csv
+import multiprocessing
+import os
+import secrets
+import threading
+import uuid
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+import flask_bcrypt
+from sqlalchemy import select
+
+from backend.dbutil import insert_ignore_statement
+from backend.extensions import bcrypt, db
+from backend.models import Enrollment, Role, User, UserStatus
+from backend.search import search_index
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+RosterRow = namedtuple('RosterRow', ['line', 'email', 'name', 'password'])
+
+
+def _hash_password(password, rounds):
+    # 프로세스 풀에서 실행되므로 앱 컨텍스트 없이 해시합니다.
+    return flask_bcrypt.generate_password_hash(password, rounds).decode('utf-8')
+
+
+class RosterImporter:
+    def __init__(self):
+        self.app = None
+        self.batch_size = BATCH_SIZE
+        self.workers = None
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('ROSTER_BATCH_SIZE', self.batch_size)
+        self.workers = app.config.get('ROSTER_HASH_WORKERS') or None
+        app.extensions['roster_importer'] = self
+
+    def _executor(self):
+        # fork 된 워커에서는 부모의 풀을 쓸 수 없으므로 프로세스마다 만듭니다.
+        # 스레드가 있는 프로세스에서 fork 하지 않도록 spawn 으로 자식 프로세스를 띄웁니다. (backend/previews.py 와 같음)
+        pid = os.getpid()
+        if self._pool_pid != pid:
+            with self._lock:
+                if self._pool_pid != pid:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                    self._pool_pid = pid
+        return self._pool
+
+    def _hash_all(self, passwords):
+        rounds = bcrypt._log_rounds
+        if len(passwords) < 4:
+            return [_hash_password(password, rounds) for password in passwords]
+        return list(self._executor().map(_hash_password, passwords, [rounds] * len(passwords), chunksize=8))
+
+    # --- 읽기/검증 ---
+    @staticmethod
+    def parse(text_stream):
+        """CSV 를 한 줄씩 읽어 (RosterRow, 오류) 를 돌려줍니다. 헤더 이름은 대소문자/공백을 무시합니다."""
+        # 라우트 모듈은 LAZY_STARTUP 에서 첫 요청까지 import 되지 않도록 여기서 가져옵니다.
+        from backend.routes.auth import validate_email, validate_name, validate_password
+        reader = csv.reader(text_stream)
+        header = [column.strip().lower() for column in next(reader, [])]
+        aliases = {'email': 'email', 'name': 'name', 'fullname': 'name', 'full_name': 'name', 'password': 'password'}
+        columns = {aliases[name]: index for index, name in enumerate(header) if name in aliases}
+        if 'email' not in columns or 'name' not in columns:
+            raise ValueError("CSV header must include 'email' and 'name' columns")
+
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            line = reader.line_num
+
+            def column(name):
+                index = columns.get(name)
+                return values[index].strip() if index is not None and index < len(values) else ''
+
+            row = RosterRow(line, column('email').lower(), column('name'), column('password') or None)
+            if not row.email or not row.name:
+                yield row, '이메일과 이름은 필수입니다.'
+                continue
+            error = validate_name(row.name) or validate_email(row.email)
+            if not error and row.password:
+                error = validate_password(row.password)
+            yield row, error
+
+    # --- 가져오기 ---
+    def run(self, course_id, text_stream):
+        report = {'processed': 0, 'created': 0, 'existing': 0, 'enrolled': 0, 'alreadyEnrolled': 0,
+                  'errorCount': 0, 'errors': []}
+
+        def error(row, message):
+            report['errorCount'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append({'line': row.line, 'email': row.email, 'error': message})
+
+        # 비밀번호가 없는 행이 공유하는 해시 (아무도 모르는 비밀번호이므로 재설정 전에는 로그인할 수 없습니다)
+        placeholder_hash = None
+        seen = set()
+        rows = self.parse(text_stream)
+        while batch := list(islice(rows, self.batch_size)):
+            valid = []
+            for row, message in batch:
+                report['processed'] += 1
+                if message:
+                    error(row, message)
+                elif row.email in seen:
+                    error(row, '파일 안에서 이메일이 중복되었습니다.')
+                else:
+                    seen.add(row.email)
+                    valid.append(row)
+            if not valid:
+                continue
+
+            existing = {email: (user_id, role) for user_id, email, role in db.session.execute(
+                select(User.id, User.email, User.role).where(User.email.in_([row.email for row in valid])))}
+            new_rows = [row for row in valid if row.email not in existing]
+            if any(row.password is None for row in new_rows) and placeholder_hash is None:
+                placeholder_hash = self._hash_all([secrets.token_urlsafe(32)])[0]
+            supplied = [row for row in new_rows if row.password]
+            hashes = dict(zip((row.email for row in supplied), self._hash_all([row.password for row in supplied])))
+
+            now = datetime.utcnow()
+            if new_rows:
+                db.session.execute(insert_ignore_statement(User), [{
+                    'id': str(uuid.uuid4()),
+                    'email': row.email,
+                    'password': hashes.get(row.email, placeholder_hash),
+                    'name': row.name,
+                    'role': Role.STUDENT,
+                    'status': UserStatus.APPROVED,
+                    'createdAt': now,
+                    'updatedAt': now,
+                } for row in new_rows])
+                # 동시에 같은 이메일로 가입했다면 INSERT 가 무시되었으므로 다시 조회합니다.
+                created = {email: (user_id, role) for user_id, email, role in db.session.execute(
+                    select(User.id, User.email, User.role).where(User.email.in_([row.email for row in new_rows])))}
+            else:
+                created = {}
+
+            student_ids = {}
+            for row in valid:
+                if row.email in existing:
+                    user_id, role = existing[row.email]
+                    report['existing'] += 1
+                else:
+                    user_id, role = created[row.email]
+                    report['created'] += 1
+                if role != Role.STUDENT:
+                    error(row, '학생 계정이 아닙니다.')
+                    continue
+                student_ids[user_id] = row
+
+            # Enrollment 에는 (courseId, studentId) 유니크 키가 없으므로 이미 등록된 학생을 먼저 걸러 냅니다.
+            enrolled = set(db.session.scalars(
+                select(Enrollment.studentId)
+                .where(Enrollment.courseId == course_id, Enrollment.studentId.in_(list(student_ids)))))
+            report['alreadyEnrolled'] += len(enrolled)
+            new_enrollments = [{'id': str(uuid.uuid4()), 'studentId': user_id, 'courseId': course_id, 'enrolledAt': now}
+                               for user_id in student_ids if user_id not in enrolled]
+            if new_enrollments:
+                db.session.execute(insert_ignore_statement(Enrollment), new_enrollments)
+                report['enrolled'] += len(new_enrollments)
+            db.session.commit()
+            if new_rows:
+                # ORM 을 거치지 않은 INSERT 이므로 자동완성 색인에 알립니다.
+                search_index.mark_stale()
+        return report
+
+
+roster_importer = RosterImporter()
@@ -1,24 +1,81 @@
-from flask import Blueprint, jsonify, g
+from datetime import datetime, timezone
+from flask import Blueprint, request, jsonify, g
+from sqlalchemy import func, select, update
 from backend.extensions import db
-from backend.models import User, UserStatus
+from backend.mailer import outbound_mailer
+from backend.models import User, UserStatus, Role
+from backend.notifications import notify_account_approved
+from backend.profiling import profile_key, request_profiler
 from backend.routes.auth import authorize
+from backend.storage import storage
+from backend.user_cache import user_cache
 
 # admin ID: admin@office.kopo.ac.kr
 # admin PW: Polytech24
 
 admin_bp = Blueprint('admin', __name__)
 
+MAX_PAGE_SIZE = 500
+MAX_BULK_IDS = 5000
+
+def _user_conditions(criteria, default_status=UserStatus.PENDING):
+    """
+    사용자 필터를 SQL 조건 목록으로 바꿉니다. (조건 목록, 오류 메시지) 를 반환합니다.
+    - status        : PENDING / APPROVED / REJECTED (기본값 PENDING)
+    - role          : STUDENT / PROFESSOR / ADMIN
+    - email         : '*' 를 와일드카드로 쓰는 이메일 패턴 (예: '*@office.kopo.ac.kr')
+    - createdBefore : ISO 8601 시각, 이 시각 이전에 가입 요청한 사용자 (오프셋이 없으면 UTC)
+    """
+    conditions = []
+    try:
+        status = criteria.get('status')
+        conditions.append(User.status == (UserStatus[status] if status else default_status))
+        if criteria.get('role'):
+            conditions.append(User.role == Role[criteria['role']])
+    except KeyError as e:
+        return None, f"알 수 없는 값입니다: {e.args[0]}"
+
+    if criteria.get('email'):
+        pattern = criteria['email'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('*', '%')
+        conditions.append(User.email.like(pattern, escape='\\'))
+
+    if criteria.get('createdBefore'):
+        try:
+            created_before = datetime.fromisoformat(criteria['createdBefore'].replace('Z', '+00:00'))
+        except ValueError:
+            return None, "createdBefore 는 ISO 8601 형식이어야 합니다."
+        if created_before.tzinfo:
+            # createdAt 은 UTC naive 로 저장되므로 오프셋이 있는 시각은 UTC 로 바꿉니다. (오프셋이 없으면 UTC 로 봅니다)
+            created_before = created_before.astimezone(timezone.utc).replace(tzinfo=None)
+        conditions.append(User.createdAt < created_before)
+    return conditions, None
+
 @admin_bp.route('/pending-users', methods=['GET'])
 @authorize(allowed_roles=['ADMIN'])
 def get_pending_users():
-    pending_users = User.query.filter_by(status=UserStatus.PENDING).all()
-    return jsonify([{
+    """
+    가입 요청 목록. role / email / createdBefore 로 거를 수 있고 limit / offset 으로 나눠 가져옵니다.
+    전체 개수는 X-Total-Count 헤더로 반환합니다.
+    """
+    conditions, error = _user_conditions(request.args)
+    if error:
+        return jsonify(error=error), 400
+    limit = min(request.args.get('limit', 100, type=int), MAX_PAGE_SIZE)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    total = db.session.scalar(select(func.count(User.id)).where(*conditions))
+    pending_users = db.session.scalars(
+        select(User).where(*conditions).order_by(User.createdAt, User.id).limit(limit).offset(offset)
+    ).all()
+    response = jsonify([{
         'id': user.id,
         'email': user.email,
         'fullName': user.name,
         'role': user.role.value,
         'createdAt': user.createdAt
     } for user in pending_users])
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 @admin_bp.route('/users/<user_id>/approve', methods=['POST'])
 @authorize(allowed_roles=['ADMIN'])
@@ -26,8 +83,12 @@ def approve_user(user_id):
     user = User.query.get(user_id)
     if not user:
         return jsonify(error="User not found"), 404
+    if user.status != UserStatus.APPROVED:
+        # 승인 안내 메일을 같은 트랜잭션으로 대기열에 넣습니다. (backend/notifications.py)
+        notify_account_approved([(user.id, user.email, user.name)])
     user.status = UserStatus.APPROVED
     db.session.commit()
+    user_cache.invalidate(user.id)
     return jsonify(message="User approved successfully"), 200
 
 @admin_bp.route('/users/<user_id>/reject', methods=['POST'])
@@ -38,4 +99,87 @@ def reject_user(user_id):
         return jsonify(error="User not found"), 404
     user.status = UserStatus.REJECTED
     db.session.commit()
-    return jsonify(message="User rejected successfully"), 200
\ No newline at end of file
+    user_cache.invalidate(user.id)
+    return jsonify(message="User rejected successfully"), 200
+
+def _bulk_set_status(status):
+    """
+    ID 목록(ids) 또는 필터(filter)에 해당하는 사용자의 상태를 UPDATE 한 번으로 바꿉니다.
+    filter 의 status 를 생략하면 PENDING 사용자만 대상이 됩니다. dryRun 이면 대상 수만 반환합니다.
+    """
+    data = request.json or {}
+    ids = data.get('ids')
+    criteria = data.get('filter') or {}
+    if not ids and not criteria:
+        return jsonify(error="ids 또는 filter 가 필요합니다."), 400
+    if ids is not None and (not isinstance(ids, list) or len(ids) > MAX_BULK_IDS):
+        return jsonify(error=f"ids 는 최대 {MAX_BULK_IDS}개의 ID 목록이어야 합니다."), 400
+
+    conditions, error = _user_conditions(criteria)
+    if error:
+        return jsonify(error=error), 400
+    if ids:
+        conditions.append(User.id.in_(ids))
+    # 관리자가 실수로 자기 계정을 거부하지 않도록 제외합니다.
+    conditions.append(User.id != g.user_id)
+
+    if data.get('dryRun'):
+        matched = db.session.scalar(select(func.count(User.id)).where(*conditions))
+        return jsonify(matched=matched, updated=0, dryRun=True), 200
+
+    if status == UserStatus.APPROVED:
+        # 이번에 승인되는 사용자에게만 안내 메일을 보냅니다.
+        notify_account_approved(db.session.execute(
+            select(User.id, User.email, User.name).where(*conditions, User.status != UserStatus.APPROVED)).all())
+    result = db.session.execute(
+        update(User).where(*conditions).values(status=status, updatedAt=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if ids:
+        for user_id in ids:
+            user_cache.invalidate(user_id)
+    else:
+        user_cache.clear()
+    return jsonify(updated=result.rowcount), 200
+
+@admin_bp.route('/users/bulk-approve', methods=['POST'])
+@authorize(allowed_roles=['ADMIN'])
+def bulk_approve_users():
+    return _bulk_set_status(UserStatus.APPROVED)
+
+@admin_bp.route('/users/bulk-reject', methods=['POST'])
+@authorize(allowed_roles=['ADMIN'])
+def bulk_reject_users():
+    return _bulk_set_status(UserStatus.REJECTED)
+
+# --- 메일 대기열 (backend/mailer.py) ---
+@admin_bp.route('/mail', methods=['GET'])
+@authorize(allowed_roles=['ADMIN'])
+def get_mail_queue():
+    """상태별 메일 수, 가장 오래 기다린 메일의 시각, 최근 발송 실패 목록"""
+    return jsonify(outbound_mailer.stats()), 200
+
+# --- 요청 프로파일 (backend/profiling.py) ---
+# 관리자가 X-Profile: 1 헤더를 붙여 보낸 요청의 프로파일. 응답의 X-Profile-ID 가 id 입니다.
+@admin_bp.route('/profiles', methods=['GET'])
+@authorize(allowed_roles=['ADMIN'])
+def list_profiles():
+    return jsonify(request_profiler.recent()), 200
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+@authorize(allowed_roles=['ADMIN'])
+def get_profile(profile_id):
+    """요청 정보, self 시간이 긴 함수, 실행된 SQL 목록"""
+    profile = request_profiler.load(profile_id)
+    if profile is None:
+        return jsonify(error="Profile not found"), 404
+    return jsonify(profile), 200
+
+@admin_bp.route('/profiles/<profile_id>/flamegraph', methods=['GET'])
+@authorize(allowed_roles=['ADMIN'])
+def download_profile_flamegraph(profile_id):
+    """collapsed stack 파일 (flamegraph.pl, speedscope, inferno 로 열 수 있습니다)"""
+    if request_profiler.load(profile_id) is None:
+        return jsonify(error="Profile not found"), 404
+    return storage.download_response(profile_key(profile_id, 'folded'), f"profile-{profile_id}.folded", 'text/plain')
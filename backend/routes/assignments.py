@@ -1,17 +1,21 @@
-import os
-import uuid
 from datetime import datetime
 from flask import Blueprint, request, jsonify, g, current_app
-from werkzeug.utils import secure_filename
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, undefer
 from backend.extensions import db
+from backend.intake import assignment_cache
+from backend.archive import archive_store
+from backend.closing import build_summary, cached, schedule_close, submissions_zip
+from backend.deletion import delete_assignments, submission_count
+from backend.jobs import job_runner
+from backend.reclaim import file_reclaimer
+from backend.previews import preview_service, preview_response, thumbnail_response
+from backend.storage import storage, key_for, new_file_url
 from backend.models import User, Assignment, Attachment, Submission, Grade, Enrollment, Course
+from backend.notifications import notify_assignment_created
 from backend.routes.auth import authenticate, authorize
 
 assignments_bp = Blueprint('assignments', __name__)
 
-UPLOAD_FOLDER = 'uploads/assignments'
-
 def assignment_to_dict(assignment):
     """Assignment 객체를 JSON 응답을 위한 딕셔너리로 변환합니다."""
     return {
@@ -53,7 +57,7 @@ def get_all_assignments():
     try:
         user_role = g.user_role
         user_id = g.user_id
-        query = Assignment.query.options(joinedload(Assignment.teacher))
+        query = Assignment.query.options(joinedload(Assignment.teacher), undefer(Assignment.description))
 
         if user_role == 'PROFESSOR':
             # 교수는 자신이 가르치는 강의의 과제만 조회
@@ -66,12 +70,14 @@ def get_all_assignments():
         assignments = query.order_by(Assignment.dueDate).all()
         return jsonify([assignment_to_dict(a) for a in assignments])
     except Exception as e:
-        current_app.logger.error(f"Error fetching assignments: {e}")
+        current_app.logger.error("Error fetching assignments: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @assignments_bp.route('/', methods=['POST'])
 @authorize(allowed_roles=['PROFESSOR', 'ADMIN'])
 def create_assignment():
+    saved_keys = []
+    new_attachments = []
     try:
         data = request.form
         files = request.files.getlist('files')
@@ -100,30 +106,43 @@ def create_assignment():
         if files:
             for file in files:
                 if file:
-                    filename = secure_filename(file.filename)
-                    unique_filename = f"{uuid.uuid4()}_{filename}"
-                    directory_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, new_assignment.id)
-                    os.makedirs(directory_path, exist_ok=True)
-                    file_path = os.path.join(directory_path, unique_filename)
-                    file.save(file_path)
+                    filename, file_url = new_file_url(new_assignment.id, file.filename)
+                    key = key_for(Attachment, file_url)
+                    saved_keys.append(key)
+                    size = storage.save(key, file.stream, file.mimetype)
 
                     new_attachment = Attachment(
                         assignmentId=new_assignment.id,
                         fileName=filename,
-                        fileUrl=os.path.join(new_assignment.id, unique_filename),
-                        fileSize=os.path.getsize(file_path),
+                        fileUrl=file_url,
+                        fileSize=size,
                         mimeType=file.mimetype,
                     )
                     db.session.add(new_attachment)
+                    new_attachments.append(new_attachment)
 
-            db.session.commit()
-
-        return jsonify(assignment_to_dict(new_assignment)), 201
+        # 첨부 파일 행과 수강생에게 보낼 새 과제 알림(학생마다 묶어서 발송, backend/notifications.py)을 한 번에 커밋합니다.
+        notify_assignment_created(new_assignment)
+        db.session.commit()
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error creating assignment: {e}")
+        file_reclaimer.enqueue(saved_keys)
+        current_app.logger.error("Error creating assignment: %s", e)
         return jsonify(error="Internal server error"), 500
 
+    # 여기부터는 과제와 첨부 파일이 이미 커밋된 뒤의 후속 작업이므로, 실패해도 파일을 지우거나 500 을 반환하지 않습니다.
+    # 마감 시각에 제출물 스냅샷/ZIP/요약을 미리 만들어 둡니다. (backend/closing.py)
+    try:
+        schedule_close(new_assignment)
+    except Exception as e:
+        # 예약이 빠진 과제는 closing.reconcile 이 주기적으로 다시 예약합니다.
+        db.session.rollback()
+        current_app.logger.error("Error scheduling close for assignment %s: %s", new_assignment.id, e)
+    for attachment in new_attachments:
+        preview_service.schedule(Attachment, attachment.id, attachment.fileUrl, attachment.fileName,
+                                 attachment.mimeType, attachment.fileSize)
+    return jsonify(assignment_to_dict(new_assignment)), 201
+
 @assignments_bp.route('/<id>', methods=['GET'])
 @authenticate
 def get_assignment(id):
@@ -132,16 +151,20 @@ def get_assignment(id):
     - PROFESSOR는 자신이 생성한 과제만 조회할 수 있습니다.
     """
     try:
-        assignment = Assignment.query.options(joinedload(Assignment.teacher)).filter_by(id=id).first()
+        assignment = Assignment.query.options(joinedload(Assignment.teacher), undefer(Assignment.description)).filter_by(id=id).first()
+        archived = assignment is None
+        if archived:
+            # 보관된 강의의 과제는 읽기 전용으로 보여 줍니다. (backend/archive.py)
+            assignment = archive_store.find('assignment', id)
         if not assignment:
             return jsonify(error="Assignment not found"), 404
 
         if g.user_role == 'PROFESSOR' and assignment.teacherId != g.user_id:
             return jsonify(error="Forbidden"), 403
 
-        return jsonify(assignment_to_dict(assignment))
+        return jsonify(dict(assignment_to_dict(assignment), archived=True) if archived else assignment_to_dict(assignment))
     except Exception as e:
-        current_app.logger.error(f"Error fetching assignment: {e}")
+        current_app.logger.error("Error fetching assignment: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @assignments_bp.route('/<assignment_id>/files', methods=['GET'])
@@ -149,16 +172,53 @@ def get_assignment(id):
 def get_assignment_files(assignment_id):
     try:
         assignment = Assignment.query.filter_by(id=assignment_id).first()
+        if not assignment:
+            assignment = archive_store.find('assignment', assignment_id)
         if not assignment:
             return jsonify(error="Assignment not found"), 404
 
         if g.user_role == 'PROFESSOR' and assignment.teacherId != g.user_id:
             return jsonify(error="Forbidden"), 403
 
-        files = Attachment.query.filter_by(assignmentId=assignment_id).all()
+        files = assignment.attachments
         return jsonify([attachment_to_dict(f) for f in files])
     except Exception as e:
-        current_app.logger.error(f"Error fetching assignment files: {e}")
+        current_app.logger.error("Error fetching assignment files: %s", e)
+        return jsonify(error="Internal server error"), 500
+
+def _owned_assignment(id):
+    """(과제, 오류 응답) 를 반환합니다. PROFESSOR 는 자신의 과제만 접근할 수 있습니다."""
+    assignment = Assignment.query.filter_by(id=id).first()
+    if not assignment:
+        return None, (jsonify(error="Assignment not found"), 404)
+    if g.user_role == 'PROFESSOR' and assignment.teacherId != g.user_id:
+        return None, (jsonify(error="Forbidden"), 403)
+    return assignment, None
+
+@assignments_bp.route('/<id>/summary', methods=['GET'])
+@authorize(allowed_roles=['PROFESSOR', 'ADMIN'])
+def get_assignment_summary(id):
+    """제출/채점 현황 요약. 마감된 과제는 마감 처리 때 만든 결과를 재사용합니다."""
+    try:
+        assignment, error = _owned_assignment(id)
+        if error:
+            return error
+        return jsonify(cached(id, 'summary.json', build_summary))
+    except Exception as e:
+        current_app.logger.error("Error fetching assignment summary: %s", e)
+        return jsonify(error="Internal server error"), 500
+
+@assignments_bp.route('/<id>/submissions.zip', methods=['GET'])
+@authorize(allowed_roles=['PROFESSOR', 'ADMIN'])
+def download_submissions_zip(id):
+    """모든 제출 파일을 학생별 폴더로 묶은 ZIP 을 내려받습니다."""
+    try:
+        assignment, error = _owned_assignment(id)
+        if error:
+            return error
+        return storage.download_response(submissions_zip(id), f"{assignment.title}.zip", mimetype='application/zip')
+    except Exception as e:
+        current_app.logger.error("Error building submissions zip: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @assignments_bp.route('/<id>', methods=['PUT'])
@@ -195,12 +255,20 @@ def update_assignment(id):
         assignment.updatedAt = datetime.utcnow()
 
         db.session.commit()
-        return jsonify(assignment_to_dict(assignment))
+        assignment_cache.invalidate(id)
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error updating assignment: {e}")
+        current_app.logger.error("Error updating assignment: %s", e)
         return jsonify(error="Internal server error"), 500
 
+    # 수정은 이미 커밋되었으므로 마감 작업 예약이 실패해도 실패로 응답하지 않습니다. (closing.reconcile 이 다시 예약합니다)
+    try:
+        schedule_close(assignment)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error("Error scheduling close for assignment %s: %s", id, e)
+    return jsonify(assignment_to_dict(assignment))
+
 @assignments_bp.route('/<id>', methods=['DELETE'])
 @authorize(allowed_roles=['PROFESSOR', 'ADMIN'])
 def delete_assignment(id):
@@ -221,18 +289,17 @@ def delete_assignment(id):
         if graded_submission_exists:
             return jsonify(error="Cannot delete an assignment that has already been graded."), 403
 
-        for attachment in assignment.attachments:
-            file_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, attachment.fileUrl)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            db.session.delete(attachment)
+        # 제출물이 많으면 백그라운드 작업으로 삭제하고 작업 ID 를 반환합니다. (GET /api/jobs/<jobId>)
+        if submission_count(assignment_ids=[id]) > current_app.config.get('DELETION_BACKGROUND_THRESHOLD', 2000):
+            job_id = job_runner.submit('delete_assignment', {'assignmentIds': [id]}, created_by=g.user_id)
+            return jsonify(message="Assignment deletion started", jobId=job_id), 202
 
-        db.session.delete(assignment)
-        db.session.commit()
-        return jsonify(message="Assignment deleted successfully"), 200
+        # 하위 행은 테이블별 bulk DELETE 로, 업로드 파일은 커밋 후 백그라운드에서 삭제됩니다. (backend/deletion.py)
+        deleted = delete_assignments([id])
+        return jsonify(message="Assignment deleted successfully", deleted=deleted), 200
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error deleting assignment: {e}")
+        current_app.logger.error("Error deleting assignment: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @assignments_bp.route('/<id>/upload', methods=['POST'])
@@ -253,28 +320,47 @@ def upload_attachment(id):
         return jsonify(error="You don't have permission to upload files to this assignment"), 403
 
     if file:
+        saved_keys = []
         try:
-            filename = secure_filename(file.filename)
-            unique_filename = f"{uuid.uuid4()}_{filename}"
-            directory_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, id)
-            os.makedirs(directory_path, exist_ok=True)
-            file_path = os.path.join(directory_path, unique_filename)
-            file.save(file_path)
+            filename, file_url = new_file_url(id, file.filename)
+            key = key_for(Attachment, file_url)
+            saved_keys.append(key)
+            size = storage.save(key, file.stream, file.mimetype)
 
             new_attachment = Attachment(
                 assignmentId=id,
                 fileName=filename,
-                fileUrl=os.path.join(id, unique_filename),
-                fileSize=os.path.getsize(file_path),
+                fileUrl=file_url,
+                fileSize=size,
                 mimeType=file.mimetype,
             )
             db.session.add(new_attachment)
             db.session.commit()
 
+            preview_service.schedule(Attachment, new_attachment.id, file_url, filename, new_attachment.mimeType, size)
             return jsonify(attachment_to_dict(new_attachment)), 201
         except Exception as e:
             db.session.rollback()
-            current_app.logger.error(f"Error uploading file: {e}")
+            file_reclaimer.enqueue(saved_keys)
+            current_app.logger.error("Error uploading file: %s", e)
             return jsonify(error="File upload failed"), 500
     else:
-        return jsonify(error="File not provided"), 400
\ No newline at end of file
+        return jsonify(error="File not provided"), 400
+
+@assignments_bp.route('/attachments/<attachment_id>/preview', methods=['GET'])
+@authenticate
+def preview_attachment(attachment_id):
+    """PDF/HWP 첨부 파일의 추출된 텍스트를 반환합니다. 추출 중이면 202 를 반환합니다."""
+    attachment = Attachment.query.get(attachment_id)
+    if not attachment:
+        return jsonify(error="File not found"), 404
+    return preview_response(Attachment, attachment,
+                            thumbnail_url=f"/api/assignments/attachments/{attachment_id}/thumbnail")
+
+@assignments_bp.route('/attachments/<attachment_id>/thumbnail', methods=['GET'])
+@authenticate
+def attachment_thumbnail(attachment_id):
+    attachment = Attachment.query.get(attachment_id)
+    if not attachment:
+        return jsonify(error="File not found"), 404
+    return thumbnail_response(Attachment, attachment)
@@ -1,9 +1,12 @@
 import jwt
+import hashlib
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from backend.extensions import db, bcrypt
 from backend.models import User, UserStatus, Role
+from backend.notifications import send_password_reset
+from backend.user_cache import user_cache
 import os
 import re
 
@@ -30,6 +33,26 @@ def generate_tokens(user_id, role, email):
 
     return access_token, refresh_token
 
+def decode_access_token(token):
+    """액세스 토큰을 검증하고 payload 를 반환합니다. (jwt.ExpiredSignatureError / jwt.InvalidTokenError 발생)"""
+    return jwt.decode(token, os.environ.get("SECRET_KEY"), algorithms=['HS256'])
+
+# 비밀번호 재설정 토큰은 다른 키로 서명해 액세스 토큰으로 쓸 수 없게 하고,
+# 발급 당시 비밀번호 해시의 지문을 넣어 비밀번호가 바뀌면(한 번 사용하면) 무효가 되게 합니다.
+def _password_reset_secret():
+    return f"{os.environ.get('SECRET_KEY')}:password-reset"
+
+def _password_fingerprint(password_hash):
+    return hashlib.sha256(password_hash.encode('utf-8')).hexdigest()[:16]
+
+def generate_password_reset_token(user):
+    payload = {
+        'userId': user.id,
+        'pwd': _password_fingerprint(user.password),
+        'exp': datetime.utcnow() + timedelta(seconds=current_app.config.get('PASSWORD_RESET_EXPIRES', 3600))
+    }
+    return jwt.encode(payload, _password_reset_secret(), algorithm='HS256')
+
 def authenticate(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -39,15 +62,22 @@ def authenticate(f):
 
         token = auth_header.split(' ')[1]
         try:
-            decoded = jwt.decode(token, os.environ.get("SECRET_KEY"), algorithms=['HS256'])
-            g.user_id = decoded['userId']
-            g.user_role = decoded['role']
-            g.user_email = decoded['email']
+            decoded = decode_access_token(token)
         except jwt.ExpiredSignatureError:
             return jsonify(error='토큰이 만료되었습니다.', code='TOKEN_EXPIRED'), 401
         except jwt.InvalidTokenError:
             return jsonify(error='유효하지 않은 토큰입니다.'), 401
 
+        # 토큰이 유효해도 삭제되었거나 승인이 취소된 사용자는 차단합니다. (캐시된 프로필로 확인)
+        user = user_cache.get(decoded['userId'])
+        if not user:
+            return jsonify(error='사용자를 찾을 수 없습니다.'), 401
+        if user.status != UserStatus.APPROVED:
+            return jsonify(error='아직 승인되지 않은 계정이거나 거부된 계정입니다.'), 403
+        g.user_id = user.id
+        g.user_role = user.role.value
+        g.user_email = user.email
+
         return f(*args, **kwargs)
     return decorated
 
@@ -62,34 +92,45 @@ def authorize(allowed_roles):
         return decorated
     return wrapper
 
-@auth_bp.route('/register', methods=['POST'])
-def register():
-    data = request.json
-    email = data.get('email')
-    password = data.get('password')
-    full_name = data.get('fullName')
-    role_str = data.get('role') # 'role' 대신 'role_str'로 변경하여 혼동 방지
-
-    # 필드 입력 확인
-    if not all([email, password, full_name, role_str]):
-        return jsonify(error='모든 필드를 입력해주세요.'), 400
-
+# 회원가입/명단 가져오기(backend/roster.py)가 같은 규칙을 사용합니다. 오류 메시지를 반환하고, 올바르면 None 을 반환합니다.
+def validate_name(full_name):
     # 이름 유효성 검사 (한글, 영문 대소문자만 허용)
     if not re.match(r'^[가-힣a-zA-Z]+$', full_name):
-        return jsonify(error='이름은 한글 또는 영문으로만 구성되어야 합니다.'), 400
+        return '이름은 한글 또는 영문으로만 구성되어야 합니다.'
+    return None
 
+def validate_password(password):
     # 비밀번호 유효성 검사 (8~20자, 영문 대문자, 소문자, 숫자 각 1개 이상 필수)
     if not re.match(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)[A-Za-z\d]{8,20}$', password):
-        return jsonify(error='비밀번호는 8~20자 길이의 영문 대소문자, 숫자를 모두 포함해야 합니다.'), 400
+        return '비밀번호는 8~20자 길이의 영문 대소문자, 숫자를 모두 포함해야 합니다.'
+    return None
 
+def validate_email(email):
     # 이메일 도메인 검사
     if not email.endswith('@office.kopo.ac.kr'):
-        return jsonify(error='이메일은 @office.kopo.ac.kr 도메인만 사용할 수 있습니다.'), 400
+        return '이메일은 @office.kopo.ac.kr 도메인만 사용할 수 있습니다.'
 
     # 이메일 ID(@ 앞부분) 형식 검사
     local_part = email.split('@')[0]
     if not re.match(r'^[A-Za-z0-9]([-_.]?[A-Za-z0-9])*$', local_part):
-        return jsonify(error='이메일 주소의 ID 형식이 올바르지 않습니다.'), 400
+        return '이메일 주소의 ID 형식이 올바르지 않습니다.'
+    return None
+
+@auth_bp.route('/register', methods=['POST'])
+def register():
+    data = request.json
+    email = data.get('email')
+    password = data.get('password')
+    full_name = data.get('fullName')
+    role_str = data.get('role') # 'role' 대신 'role_str'로 변경하여 혼동 방지
+
+    # 필드 입력 확인
+    if not all([email, password, full_name, role_str]):
+        return jsonify(error='모든 필드를 입력해주세요.'), 400
+
+    error = validate_name(full_name) or validate_password(password) or validate_email(email)
+    if error:
+        return jsonify(error=error), 400
 
     # 이메일 중복 확인
     existing_user = User.query.filter_by(email=email).first()
@@ -150,7 +191,7 @@ def login():
 @auth_bp.route('/me', methods=['GET'])
 @authenticate
 def get_current_user():
-    user = User.query.filter_by(id=g.user_id).first()
+    user = user_cache.get(g.user_id)
     if not user:
         return jsonify(error='사용자를 찾을 수 없습니다.'), 404
 
@@ -186,6 +227,7 @@ def update_profile():
         user.email = email
 
     db.session.commit()
+    user_cache.invalidate(user.id)
 
     return jsonify({
         'message': '프로필이 업데이트되었습니다.',
@@ -217,6 +259,7 @@ def change_password():
 
     user.password = bcrypt.generate_password_hash(new_password).decode('utf-8')
     db.session.commit()
+    user_cache.invalidate(user.id)
 
     return jsonify(message='비밀번호가 변경되었습니다.'), 200
 
@@ -230,6 +273,8 @@ def refresh_token():
 
     try:
         decoded = jwt.decode(refresh_token, os.environ.get("SECRET_KEY"), algorithms=['HS256'])
+        if not user_cache.is_approved(decoded['userId']):
+            return jsonify(error='아직 승인되지 않은 계정이거나 거부된 계정입니다.'), 403
         new_access_token, new_refresh_token = generate_tokens(decoded['userId'], Role[decoded['role']], decoded['email'])
         return jsonify(token=new_access_token, refreshToken=new_refresh_token), 200
     except jwt.ExpiredSignatureError:
@@ -245,10 +290,46 @@ def logout():
 
 @auth_bp.route('/forgot-password', methods=['POST'])
 def forgot_password():
-    # TODO: Implement email sending for password reset
+    data = request.json or {}
+    email = data.get('email')
+    if not email:
+        return jsonify(error='이메일을 입력해주세요.'), 400
+
+    # 메일은 대기열에 넣기만 하고 발송은 backend/mailer.py 의 워커가 합니다.
+    user = User.query.filter_by(email=email).first()
+    if user and user.status == UserStatus.APPROVED:
+        send_password_reset(user, generate_password_reset_token(user))
+        db.session.commit()
+
+    # 가입 여부를 알 수 없도록 사용자가 없어도 같은 응답을 반환합니다.
     return jsonify(message='이메일로 비밀번호 재설정 링크가 발송됩니다.'), 200
 
 @auth_bp.route('/reset-password', methods=['POST'])
 def reset_password():
-    # TODO: Implement password reset logic
+    data = request.json or {}
+    token = data.get('token')
+    new_password = data.get('newPassword')
+
+    if not all([token, new_password]):
+        return jsonify(error='유효하지 않은 입력값입니다.'), 400
+
+    error = validate_password(new_password)
+    if error:
+        return jsonify(error=error), 400
+
+    try:
+        decoded = jwt.decode(token, _password_reset_secret(), algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        return jsonify(error='비밀번호 재설정 링크가 만료되었습니다.'), 400
+    except jwt.InvalidTokenError:
+        return jsonify(error='유효하지 않은 비밀번호 재설정 링크입니다.'), 400
+
+    user = User.query.filter_by(id=decoded.get('userId')).first()
+    if not user or decoded.get('pwd') != _password_fingerprint(user.password):
+        return jsonify(error='이미 사용되었거나 유효하지 않은 비밀번호 재설정 링크입니다.'), 400
+
+    user.password = bcrypt.generate_password_hash(new_password).decode('utf-8')
+    db.session.commit()
+    user_cache.invalidate(user.id)
+
     return jsonify(message='비밀번호가 재설정되었습니다.'), 200
\ No newline at end of file
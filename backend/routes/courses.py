@@ -1,23 +1,48 @@
 # backend/routes/courses.py
 
-from flask import Blueprint, request, jsonify
-from backend.models import Course, User, Enrollment, Role
+import io
+from flask import Blueprint, request, jsonify, current_app, abort
+from backend.models import ArchivedCourse, Course, User, Enrollment, Role
 from backend.extensions import db
+from backend.archive import archive_store
+from backend.deletion import delete_course as delete_course_rows, submission_count
+from backend.jobs import job_runner
+from backend.roster import roster_importer
+from backend.search import search_index
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 # 'courses_bp' 라는 이름으로 블루프린트 객체를 생성합니다.
 courses_bp = Blueprint('courses', __name__)
 
 # [GET] 모든 강의 목록 조회
+# ?q= 가 있으면 강의 이름 접두어 검색(자동완성) 결과를 최대 limit 개 반환합니다. (backend/search.py)
 @courses_bp.route('/api/courses', methods=['GET'])
 @jwt_required()
 def get_courses():
+    query = request.args.get('q')
+    if query is not None:
+        limit = request.args.get('limit', default=10, type=int)
+        return jsonify([{
+            'id': hit.id,
+            'name': hit.name,
+            'teacherId': hit.teacherId
+        } for hit in search_index.search(query, 'course', limit)]), 200
+
     courses = Course.query.all()
-    return jsonify([{
+    result = [{
         'id': course.id,
         'name': course.name,
         'teacherId': course.teacherId
-    } for course in courses]), 200
+    } for course in courses]
+    # ?includeArchived=1 이면 보관된 강의도 함께 반환합니다. (backend/archive.py)
+    if request.args.get('includeArchived') == '1':
+        result.extend({
+            'id': course.id,
+            'name': course.name,
+            'teacherId': course.teacherId,
+            'archived': True
+        } for course in ArchivedCourse.query.all())
+    return jsonify(result), 200
 
 # [POST] 새 강의 생성
 @courses_bp.route('/api/courses', methods=['POST'])
@@ -39,7 +64,23 @@ def create_course():
 @courses_bp.route('/api/courses/<course_id>', methods=['GET'])
 @jwt_required()
 def get_course_details(course_id):
-    course = Course.query.get_or_404(course_id)
+    course = db.session.get(Course, course_id)
+    if course is None:
+        # 보관된 강의는 보관 파일에서 읽기 전용으로 보여 줍니다.
+        archived = archive_store.course(course_id)
+        if archived is None:
+            abort(404)
+        return jsonify({
+            'id': archived.course.id,
+            'name': archived.course.name,
+            'teacherId': archived.course.teacherId,
+            'students': [{
+                'id': enrollment.studentId,
+                'name': enrollment.student.name,
+                'email': enrollment.student.email
+            } for enrollment in archived.enrollments if enrollment.student],
+            'archived': True
+        }), 200
     enrollments = Enrollment.query.filter_by(courseId=course_id).all()
 
     students = []
@@ -85,11 +126,13 @@ def delete_course(course_id):
     if course.teacherId != current_user_id:
         return jsonify({'message': 'Unauthorized'}), 403
 
-    Enrollment.query.filter_by(courseId=course_id).delete()
-    db.session.delete(course)
-    db.session.commit()
+    # 큰 강의는 백그라운드 작업으로 삭제하고 작업 ID 를 반환합니다. (GET /api/jobs/<jobId>)
+    if submission_count(course_id=course_id) > current_app.config.get('DELETION_BACKGROUND_THRESHOLD', 2000):
+        job_id = job_runner.submit('delete_course', {'courseId': course_id}, created_by=current_user_id)
+        return jsonify({'message': 'Course deletion started', 'jobId': job_id}), 202
 
-    return jsonify({'message': 'Course deleted successfully'}), 200
+    deleted = delete_course_rows(course_id)
+    return jsonify({'message': 'Course deleted successfully', 'deleted': deleted}), 200
 
 # [POST] 강의에 학생 등록
 @courses_bp.route('/api/courses/<course_id>/enroll', methods=['POST'])
@@ -111,6 +154,38 @@ def enroll_student(course_id):
 
     return jsonify({'message': 'Student enrolled successfully'}), 201
 
+# [POST] CSV 명단으로 학생 계정 생성 및 일괄 등록
+@courses_bp.route('/api/courses/<course_id>/roster', methods=['POST'])
+@jwt_required()
+def import_roster(course_id):
+    """
+    multipart 'file' 또는 text/csv 본문을 한 줄씩 읽어 처리합니다. (backend/roster.py)
+    잘못된 행은 건너뛰고 errors 에 행 번호와 함께 보고합니다.
+    """
+    course = Course.query.get_or_404(course_id)
+
+    current_user_id = get_jwt_identity()
+    if course.teacherId != current_user_id:
+        return jsonify({'message': 'Unauthorized'}), 403
+
+    if 'file' in request.files:
+        raw = request.files['file'].stream
+    elif request.mimetype == 'text/csv':
+        raw = io.BufferedReader(request.stream)
+    else:
+        return jsonify({'message': 'CSV file is required'}), 400
+
+    try:
+        report = roster_importer.run(course_id, io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+    except (ValueError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({'message': f'Invalid CSV: {e}'}), 400
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error("Error importing roster for course %s: %s", course_id, e)
+        return jsonify({'message': 'Internal server error'}), 500
+    return jsonify(report), 200
+
 # [DELETE] 강의에서 학생 삭제
 @courses_bp.route('/api/courses/<course_id>/unenroll', methods=['DELETE'])
 @jwt_required()
@@ -130,9 +205,19 @@ def unenroll_student(course_id):
     return jsonify({'message': 'Enrollment record not found'}), 404
 
 # [GET] 모든 학생 목록 조회 (교수/관리자용)
+# ?q= 가 있으면 이름/이메일(한글 초성 포함) 접두어 검색 결과를 최대 limit 개 반환합니다. (backend/search.py)
 @courses_bp.route('/api/users/students', methods=['GET'])
 @jwt_required()
 def get_all_students():
+    query = request.args.get('q')
+    if query is not None:
+        limit = request.args.get('limit', default=10, type=int)
+        return jsonify([{
+            'id': hit.id,
+            'name': hit.name,
+            'email': hit.email
+        } for hit in search_index.search(query, 'user', limit, role=Role.STUDENT.value)]), 200
+
     students = User.query.filter_by(role=Role.STUDENT).all()
     return jsonify([{
         'id': student.id,
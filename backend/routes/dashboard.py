@@ -0,0 +1,140 @@
+# backend/routes/dashboard.py
+
+from flask import Blueprint, jsonify, g, current_app
+from sqlalchemy import select, func
+from sqlalchemy.orm import undefer
+from backend.extensions import db
+from backend.models import User, UserStatus, Assignment, Attachment, Course, Enrollment, Submission, Grade
+from backend.routes.auth import authenticate
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+def _visible_assignments(user_id, user_role):
+    """
+    역할별로 보이는 과제 목록을 한 번의 쿼리로 가져옵니다. (get_all_assignments 와 같은 규칙)
+    첨부 파일 수는 과제마다 따로 조회하지 않고 서브쿼리로 함께 집계합니다.
+    """
+    attachment_count = (
+        select(func.count(Attachment.id))
+        .where(Attachment.assignmentId == Assignment.id)
+        .correlate(Assignment)
+        .scalar_subquery()
+    )
+    query = (
+        select(Assignment, User.name, attachment_count)
+        .outerjoin(User, User.id == Assignment.teacherId)
+        .options(undefer(Assignment.description))
+        .order_by(Assignment.dueDate)
+    )
+    if user_role == 'PROFESSOR':
+        query = query.join(Course, Course.id == Assignment.courseId).where(Course.teacherId == user_id)
+    elif user_role == 'STUDENT':
+        query = query.where(Assignment.courseId.in_(
+            select(Enrollment.courseId).where(Enrollment.studentId == user_id)
+        ))
+    return db.session.execute(query).all()
+
+def _dashboard_assignment_to_dict(assignment, teacher_name, attachment_count):
+    """assignment_to_dict 와 같은 형식입니다. (관계를 지연 로딩하지 않습니다)"""
+    return {
+        'id': assignment.id,
+        'title': assignment.title,
+        'description': assignment.description,
+        'due_date': assignment.dueDate.isoformat(),
+        'max_points': assignment.maxScore,
+        'professor_id': assignment.teacherId,
+        'created_at': assignment.createdAt.isoformat(),
+        'updated_at': assignment.updatedAt.isoformat(),
+        'professor': {
+            'full_name': teacher_name
+        } if teacher_name else None,
+        'attachment_count': attachment_count,
+    }
+
+def _student_submission_status(user_id):
+    """학생의 모든 제출물과 성적을 과제 ID 별로 묶습니다."""
+    rows = db.session.execute(
+        select(Submission.id, Submission.assignmentId, Submission.submittedAt, Submission.status,
+               Grade.id, Grade.score, Grade.gradedAt)
+        .outerjoin(Grade, Grade.submissionId == Submission.id)
+        .where(Submission.studentId == user_id)
+    ).all()
+    return {
+        assignment_id: {
+            'id': submission_id,
+            'submitted_at': submitted_at.isoformat(),
+            'status': status.value,
+            'grade': {
+                'id': grade_id,
+                'points': score,
+                'graded_at': graded_at.isoformat(),
+            } if grade_id else None,
+        }
+        for submission_id, assignment_id, submitted_at, status, grade_id, score, graded_at in rows
+    }
+
+def _submission_counts(assignment_ids):
+    """과제별 제출 수와 미채점 제출 수를 GROUP BY 한 번으로 집계합니다."""
+    if not assignment_ids:
+        return {}
+    rows = db.session.execute(
+        select(Submission.assignmentId, func.count(Submission.id), func.count(Grade.id))
+        .outerjoin(Grade, Grade.submissionId == Submission.id)
+        .where(Submission.assignmentId.in_(assignment_ids))
+        .group_by(Submission.assignmentId)
+    ).all()
+    return {
+        assignment_id: {'submission_count': total, 'ungraded_count': total - graded}
+        for assignment_id, total, graded in rows
+    }
+
+@dashboard_bp.route('', methods=['GET'])
+@authenticate
+def get_dashboard():
+    """
+    로그인 직후 화면에 필요한 데이터를 한 번에 반환합니다.
+    (/auth/me, /assignments/, /submissions/my-submissions, /grades/my-grades 를 순서대로 호출하던 것을 대체)
+    - 공통     : user, assignments (마감일 순)
+    - STUDENT  : 과제별 submission (제출 여부, 상태, 성적)
+    - PROFESSOR/ADMIN : 과제별 submission_count, ungraded_count 와 ungraded_total
+    - ADMIN    : pending_user_count
+    """
+    try:
+        user = db.session.get(User, g.user_id)
+        if not user:
+            return jsonify(error='사용자를 찾을 수 없습니다.'), 404
+
+        rows = _visible_assignments(g.user_id, g.user_role)
+        assignments = [_dashboard_assignment_to_dict(*row) for row in rows]
+        result = {
+            'user': {
+                'id': user.id,
+                'email': user.email,
+                'fullName': user.name,
+                'role': user.role.value,
+                'createdAt': user.createdAt,
+                'updatedAt': user.updatedAt,
+            },
+            'assignments': assignments,
+        }
+
+        if g.user_role == 'STUDENT':
+            submissions = _student_submission_status(g.user_id)
+            for assignment in assignments:
+                assignment['submission'] = submissions.get(assignment['id'])
+        else:
+            counts = _submission_counts([assignment['id'] for assignment in assignments])
+            empty = {'submission_count': 0, 'ungraded_count': 0}
+            for assignment in assignments:
+                assignment.update(counts.get(assignment['id'], empty))
+            result['ungraded_total'] = sum(assignment['ungraded_count'] for assignment in assignments)
+
+        if g.user_role == 'ADMIN':
+            result['pending_user_count'] = db.session.scalar(
+                select(func.count(User.id)).where(User.status == UserStatus.PENDING)
+            )
+
+        return jsonify(result), 200
+    except Exception as e:
+        current_app.logger.error("Error fetching dashboard: %s", e)
+        return jsonify(error="Internal server error"), 500
@@ -0,0 +1,93 @@
+# backend/routes/events.py
+
+import threading
+
+import jwt
+from flask import Blueprint, Response, request, jsonify, current_app
+from backend.events import event_broker, format_sse
+from backend.models import UserStatus
+from backend.routes.auth import decode_access_token
+from backend.user_cache import user_cache
+
+events_bp = Blueprint('events', __name__)
+
+HEARTBEAT_INTERVAL = 15  # in seconds
+
+# WSGI 워커에서 스트림은 연결이 끊길 때까지 스레드를 하나씩 점유하므로 워커당 개수를 제한합니다.
+_active_streams = 0
+_active_streams_lock = threading.Lock()
+
+
+def _acquire_stream_slot(limit):
+    global _active_streams
+    with _active_streams_lock:
+        if _active_streams >= limit:
+            return False
+        _active_streams += 1
+        return True
+
+
+def _release_stream_slot():
+    global _active_streams
+    with _active_streams_lock:
+        _active_streams -= 1
+
+def _token_from_request():
+    # 브라우저 EventSource 는 헤더를 설정할 수 없으므로 쿼리 파라미터의 토큰도 허용합니다.
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        return auth_header.split(' ')[1]
+    return request.args.get('token')
+
+@events_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """
+    현재 사용자에게 발행되는 이벤트를 Server-Sent Events 로 전달합니다.
+    - grade.created / grade.updated : 학생에게 (성적 등록/수정)
+    - submission.updated            : 담당 교수에게 (제출/재제출)
+    - qa_log.created                : 담당 교수에게 (새 질문)
+
+    ASGI 모드(backend/asgi.py)에서는 async_routes.stream_events 가 대신 처리합니다.
+    WSGI 로 배포할 때는 EVENTS_WSGI_ENABLED=1 일 때만 스트림을 열고, 꺼져 있으면 204 를 반환해
+    브라우저가 재연결하지 않게 합니다. (클라이언트는 화면을 열 때 전체를 다시 가져옵니다.)
+    """
+    if not current_app.config.get('EVENTS_WSGI_ENABLED'):
+        return '', 204
+    token = _token_from_request()
+    if not token:
+        return jsonify(error='인증 토큰이 제공되지 않았습니다.'), 401
+    try:
+        decoded = decode_access_token(token)
+    except jwt.ExpiredSignatureError:
+        return jsonify(error='토큰이 만료되었습니다.', code='TOKEN_EXPIRED'), 401
+    except jwt.InvalidTokenError:
+        return jsonify(error='유효하지 않은 토큰입니다.'), 401
+
+    # 승인이 취소되었거나 삭제된 사용자는 구독하지 못하게 합니다. (authenticate 와 같은 규칙)
+    user = user_cache.get(decoded['userId'])
+    if not user:
+        return jsonify(error='사용자를 찾을 수 없습니다.'), 401
+    if user.status != UserStatus.APPROVED:
+        return jsonify(error='아직 승인되지 않은 계정이거나 거부된 계정입니다.'), 403
+
+    if not _acquire_stream_slot(current_app.config.get('EVENTS_WSGI_MAX_STREAMS', 4)):
+        return jsonify(error='실시간 알림 연결이 너무 많습니다. 잠시 후 다시 시도해 주세요.'), 503, {'Retry-After': '30'}
+
+    subscription = event_broker.subscribe(user.id)
+    heartbeat = current_app.config.get('EVENT_HEARTBEAT_INTERVAL', HEARTBEAT_INTERVAL)
+
+    def generate():
+        yield "retry: 3000\n\n"
+        while True:
+            event = subscription.get(timeout=heartbeat)
+            # 주기적인 주석 줄로 프록시가 연결을 끊지 않게 하고, 끊긴 클라이언트를 감지합니다.
+            yield format_sse(event) if event else ": ping\n\n"
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    # 제너레이터가 시작되기 전에 연결이 끊겨도 서버가 응답을 닫을 때 정리됩니다.
+    response.call_on_close(subscription.close)
+    response.call_on_close(_release_stream_slot)
+    return response
@@ -1,50 +1,67 @@
-import os
-from flask import Blueprint, request, jsonify, current_app, send_from_directory, g
+from flask import Blueprint, request, jsonify, current_app, g
+from backend.archive import archive_store
 from backend.routes.auth import authenticate
+from backend.storage import storage, key_for
 
 files_bp = Blueprint('files', __name__)
 
-UPLOAD_FOLDER_ASSIGNMENTS = 'uploads/assignments'
-UPLOAD_FOLDER_SUBMISSIONS = 'uploads/submissions'
-
-@files_bp.route('/download', methods=['GET'])
-@authenticate
-def download_file():
+def _find_file():
+    """(모델, 파일 행, 오류 응답) 을 반환합니다. 쿼리 파라미터 type / filePath 로 파일을 찾습니다."""
     from backend.models import Attachment, SubmissionFile
     file_path = request.args.get('filePath')
     file_type = request.args.get('type')
-    filename_original = request.args.get('filename')
 
     if not file_path or not file_type:
-        return jsonify(error="filePath and type are required query parameters."), 400
+        return None, None, (jsonify(error="filePath and type are required query parameters."), 400)
 
-    attachment = None
-    base_folder = ''
     if file_type == 'assignment-files':
-        base_folder = UPLOAD_FOLDER_ASSIGNMENTS
-        attachment = Attachment.query.filter_by(fileUrl=file_path).first()
+        model = Attachment
     elif file_type == 'submission-files':
-        base_folder = UPLOAD_FOLDER_SUBMISSIONS
-        attachment = SubmissionAttachment.query.filter_by(fileUrl=file_path).first()
+        model = SubmissionFile
     else:
-        return jsonify(error="Invalid file type"), 400
+        return None, None, (jsonify(error="Invalid file type"), 400)
 
+    attachment = model.query.filter_by(fileUrl=file_path).first()
     if not attachment:
-        return jsonify(error="File not found in database"), 404
+        # 보관된 강의의 파일은 저장소에 그대로 남아 있습니다. (backend/archive.py)
+        attachment = archive_store.find_by_file_url(model.__tablename__, file_path)
+    if not attachment:
+        return None, None, (jsonify(error="File not found in database"), 404)
+
+    # 제출 파일은 /api/submissions/files/<id>/download 와 같은 권한 규칙을 따릅니다.
+    if model is SubmissionFile and g.user_role not in ['PROFESSOR', 'ADMIN'] \
+            and attachment.submission.studentId != g.user_id:
+        return None, None, (jsonify(error="You don't have permission to download this file."), 403)
+    return model, attachment, None
+
+@files_bp.route('/download', methods=['GET'])
+@authenticate
+def download_file():
+    model, attachment, error = _find_file()
+    if error:
+        return error
 
-    # fileUrl에서 디렉토리(ex: 과제ID)와 실제 파일명(ex: UUID_파일명) 분리
-    directory, filename = os.path.split(file_path)
+    try:
+        return storage.download_response(key_for(model, attachment.fileUrl), attachment.fileName, attachment.mimeType)
+    except Exception as e:
+        current_app.logger.error("Error downloading file: %s", e)
+        return jsonify(error="Internal server error"), 500
+
+@files_bp.route('/download-url', methods=['GET'])
+@authenticate
+def download_url():
+    """
+    저장소에서 직접 내려받을 수 있는 presigned URL 을 반환합니다.
+    로컬 저장소처럼 presigned URL 을 만들 수 없으면 url 은 null 이며, 이때는 /download 를 사용합니다.
+    """
+    model, attachment, error = _find_file()
+    if error:
+        return error
 
     try:
-        return send_from_directory(
-            directory=os.path.join(current_app.root_path, base_folder, directory),
-            path=filename,
-            as_attachment=True,
-            download_name=attachment.fileName
-        )
-    except FileNotFoundError:
-        current_app.logger.error(f"File not found on disk: {file_path}")
-        return jsonify(error="File not found on server"), 404
+        expires = current_app.config.get('STORAGE_PRESIGN_EXPIRES', 300)
+        url = storage.presigned_url(key_for(model, attachment.fileUrl), attachment.fileName, expires)
+        return jsonify(url=url, expiresIn=expires if url else None, fileName=attachment.fileName), 200
     except Exception as e:
-        current_app.logger.error(f"Error downloading file: {e}")
-        return jsonify(error="Internal server error"), 500
\ No newline at end of file
+        current_app.logger.error("Error creating download URL: %s", e)
+        return jsonify(error="Internal server error"), 500
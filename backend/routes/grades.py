@@ -1,10 +1,15 @@
 from datetime import datetime
 from flask import Blueprint, request, jsonify, g, current_app
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, undefer
 # backend.app 대신 backend.extensions에서 db를 가져옵니다.
 from backend.extensions import db
+from backend.archive import archive_store
+from backend.events import event_broker
+from backend.idempotency import idempotent
 from backend.models import Grade, Submission, Assignment, SubmissionStatus, User
+from backend.notifications import notify_grade_released
 from backend.routes.auth import authenticate, authorize
+from backend.user_cache import user_cache
 
 grades_bp = Blueprint('grades', __name__)
 
@@ -22,6 +27,20 @@ def grade_to_dict(grade):
         } if grade.grader else None
     }
 
+def _publish_grade_event(event_type, submission, grade):
+    """학생의 성적 목록이 다시 조회해야 할 제출물만 알 수 있도록 최소한의 정보만 보냅니다."""
+    event_broker.publish(submission.studentId, event_type, {
+        'submissionId': submission.id,
+        'assignmentId': submission.assignmentId,
+        'gradeId': grade.id,
+    })
+
+def _notify_grade(submission, grade):
+    """학생에게 성적 알림 메일을 예약합니다. 학생마다 한 시간 단위로 묶어 보냅니다. (backend/notifications.py)"""
+    student = user_cache.get(submission.studentId)
+    if student:
+        notify_grade_released(submission, grade, student.email)
+
 def submission_with_grade_to_dict(submission):
     """성적 정보가 포함된 Submission 객체를 딕셔너리로 변환합니다."""
     grade_data = grade_to_dict(submission.grade) if submission.grade else None
@@ -52,6 +71,7 @@ def submission_with_grade_to_dict(submission):
 
 @grades_bp.route('/submissions/<submissionId>/grade', methods=['POST'])
 @authorize(allowed_roles=['PROFESSOR', 'ADMIN'])
+@idempotent
 def grade_submission(submissionId):
     data = request.json
     score = data.get('score')
@@ -73,25 +93,25 @@ def grade_submission(submissionId):
             grade.score = score
             grade.feedback = feedback
             grade.gradedAt = datetime.utcnow()
-            db.session.commit()
         else:
-            new_grade = Grade(
+            grade = Grade(
                 submissionId=submissionId,
                 score=score,
                 feedback=feedback,
                 gradedBy=g.user_id
             )
-            db.session.add(new_grade)
-            db.session.commit()
-            grade = new_grade
+            db.session.add(grade)
 
+        # 성적, 제출물 상태, 알림 메일을 한 트랜잭션으로 저장합니다.
         submission.status = SubmissionStatus.GRADED
+        _notify_grade(submission, grade)
         db.session.commit()
 
+        _publish_grade_event('grade.created', submission, grade)
         return jsonify(grade_to_dict(grade)), 200
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error grading submission: {e}")
+        current_app.logger.error("Error grading submission: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @grades_bp.route('/my-grades', methods=['GET'])
@@ -104,12 +124,15 @@ def get_my_grades():
             Submission.grade != None
         ).options(
             joinedload(Submission.assignment),
-            joinedload(Submission.grade).joinedload(Grade.grader)
+            joinedload(Submission.grade).options(joinedload(Grade.grader), undefer(Grade.feedback))
         ).order_by(Submission.submittedAt.desc()).all()
+        # 보관된 강의의 성적은 목록 뒤에 붙입니다. (backend/archive.py)
+        archived = sorted((s for s in archive_store.student_submissions(g.user_id) if s.grade),
+                          key=lambda s: s.submittedAt, reverse=True)
 
-        return jsonify([submission_with_grade_to_dict(s) for s in submissions])
+        return jsonify([submission_with_grade_to_dict(s) for s in submissions + archived])
     except Exception as e:
-        current_app.logger.error(f"Error fetching my grades: {e}")
+        current_app.logger.error("Error fetching my grades: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @grades_bp.route('/assignments/<assignmentId>/grades', methods=['GET'])
@@ -119,16 +142,21 @@ def get_assignment_grades(assignmentId):
         submissions = Submission.query.filter_by(assignmentId=assignmentId).options(
             joinedload(Submission.assignment),
             joinedload(Submission.student),
-            joinedload(Submission.grade)
+            joinedload(Submission.grade).undefer(Grade.feedback)
         ).order_by(Submission.submittedAt.desc()).all()
+        if not submissions:
+            archived = archive_store.find('assignment', assignmentId)
+            if archived is not None:
+                submissions = archived.submissions
 
         return jsonify([submission_with_grade_to_dict(s) for s in submissions])
     except Exception as e:
-        current_app.logger.error(f"Error fetching assignment grades: {e}")
+        current_app.logger.error("Error fetching assignment grades: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @grades_bp.route('/<gradeId>', methods=['PUT'])
 @authorize(allowed_roles=['PROFESSOR', 'ADMIN'])
+@idempotent
 def update_grade(gradeId):
     data = request.json
     score = data.get('score')
@@ -151,13 +179,17 @@ def update_grade(gradeId):
 
     if feedback is not None:
         grade.feedback = feedback
+    # 마감 처리 결과물(backend/closing.py)이 수정을 알아채도록 채점 시각을 갱신합니다.
+    grade.gradedAt = datetime.utcnow()
 
     try:
+        _notify_grade(submission, grade)
         db.session.commit()
+        _publish_grade_event('grade.updated', submission, grade)
         return jsonify(grade_to_dict(grade)), 200
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error updating grade: {e}")
+        current_app.logger.error("Error updating grade: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @grades_bp.route('/<gradeId>', methods=['DELETE'])
@@ -173,5 +205,5 @@ def delete_grade(gradeId):
         return jsonify(message="Grade deleted successfully"), 200
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error deleting grade: {e}")
+        current_app.logger.error("Error deleting grade: %s", e)
         return jsonify(error="Internal server error"), 500
\ No newline at end of file
@@ -0,0 +1,16 @@
+# backend/routes/jobs.py
+
+from flask import Blueprint, jsonify, g
+from backend.jobs import job_runner, job_to_dict
+from backend.routes.auth import authorize
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@authorize(allowed_roles=['PROFESSOR', 'ADMIN'])
+def get_job(job_id):
+    """백그라운드 작업의 상태(queued / running / succeeded / failed)와 결과를 반환합니다."""
+    job = job_runner.get(job_id)
+    if not job or (g.user_role != 'ADMIN' and job.createdBy != g.user_id):
+        return jsonify(error="Job not found"), 404
+    return jsonify(job_to_dict(job)), 200
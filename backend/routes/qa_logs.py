@@ -1,38 +1,53 @@
 # backend/routes/qa_logs.py
 
 from flask import Blueprint, request, jsonify, g, current_app
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, undefer_group
+from backend.archive import archive_store
 from backend.extensions import db
+from backend.events import event_broker
+from backend.intake import assignment_cache
 from backend.models import QALog, Assignment
 from backend.routes.auth import authenticate
 
 qa_logs_bp = Blueprint('qa_logs', __name__)
 
 def qa_log_to_dict(qa_log):
-    """QALog 객체를 딕셔너리로 변환합니다."""
+    """QALog 객체(또는 보관된 강의의 QALog)를 딕셔너리로 변환합니다."""
     return {
         'id': qa_log.id,
         'assignmentId': qa_log.assignmentId,
-        'userId': qa_log.userId,
+        'userId': qa_log.studentId,
         'question': qa_log.question,
         'answer': qa_log.answer,
+        'source': qa_log.source.value,
         'createdAt': qa_log.createdAt.isoformat(),
-        'updatedAt': qa_log.updatedAt.isoformat(),
         'user': {
-            'id': qa_log.user.id,
-            'full_name': qa_log.user.name
-        } if qa_log.user else None
+            'id': qa_log.student.id,
+            'full_name': qa_log.student.name
+        } if qa_log.student else None
     }
 
+def publish_qa_log_event(assignment, qa_log):
+    """담당 교수에게 새 질문을 알립니다."""
+    event_broker.publish(assignment.teacherId, 'qa_log.created', {
+        'qaLogId': qa_log.id,
+        'assignmentId': assignment.id,
+    })
+
 @qa_logs_bp.route('/assignments/<assignment_id>', methods=['GET'])
 @authenticate
 def get_qa_logs_for_assignment(assignment_id):
     """특정 과제의 모든 Q&A 로그를 조회합니다."""
     try:
-        logs = QALog.query.options(joinedload(QALog.user)).filter_by(assignmentId=assignment_id).order_by(QALog.createdAt).all()
+        logs = QALog.query.options(joinedload(QALog.student), undefer_group('qa_text')) \
+            .filter_by(assignmentId=assignment_id).order_by(QALog.createdAt).all()
+        if not logs and assignment_cache.get(assignment_id) is None:
+            # 보관된 강의의 Q&A 는 읽기 전용으로 보여 줍니다. (backend/archive.py)
+            archived = archive_store.find('assignment', assignment_id)
+            logs = archived.qa_logs if archived else []
         return jsonify([qa_log_to_dict(log) for log in logs])
     except Exception as e:
-        current_app.logger.error(f"Error fetching Q&A logs: {e}")
+        current_app.logger.error("Error fetching Q&A logs: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @qa_logs_bp.route('/', methods=['POST'])
@@ -58,6 +73,7 @@ def create_qa_log():
         )
         db.session.add(new_log)
         db.session.commit()
+        publish_qa_log_event(assignment, new_log)
 
         # user 정보를 포함하여 반환하기 위해 다시 조회
         log_with_user = QALog.query.options(joinedload(QALog.user)).filter_by(id=new_log.id).first()
@@ -65,5 +81,5 @@ def create_qa_log():
         return jsonify(qa_log_to_dict(log_with_user)), 201
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error creating Q&A log: {e}")
+        current_app.logger.error("Error creating Q&A log: %s", e)
         return jsonify(error="Internal server error"), 500
\ No newline at end of file
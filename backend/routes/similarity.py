@@ -0,0 +1,62 @@
+# backend/routes/similarity.py
+
+from flask import Blueprint, request, jsonify, g, current_app
+from sqlalchemy import select, func
+from backend.extensions import db
+from backend.models import Assignment, Submission, User
+from backend.routes.auth import authorize
+from backend.similarity import similarity_engine
+
+similarity_bp = Blueprint('similarity', __name__)
+
+@similarity_bp.route('/assignments/<assignmentId>', methods=['GET'])
+@authorize(allowed_roles=['PROFESSOR', 'ADMIN'])
+def get_similarity_report(assignmentId):
+    """
+    과제의 유사 제출물 쌍을 유사도 순으로 반환합니다.
+    - threshold : 최소 유사도 (0~1, 기본값은 SIMILARITY_THRESHOLD 이며 그보다 낮출 수는 없습니다)
+    - limit     : 반환할 최대 쌍 수 (기본 100)
+    """
+    assignment = db.session.get(Assignment, assignmentId)
+    if not assignment:
+        return jsonify(error="Assignment not found"), 404
+    if g.user_role == 'PROFESSOR' and assignment.teacherId != g.user_id:
+        return jsonify(error="You don't have permission to view this report"), 403
+
+    try:
+        threshold = request.args.get('threshold', type=float)
+        limit = request.args.get('limit', default=100, type=int)
+        analyzed, pairs = similarity_engine.report(assignmentId, threshold)
+        pairs = pairs[:limit]
+
+        submission_ids = {submission_id for pair in pairs for submission_id in pair[:2]}
+        students = {}
+        if submission_ids:
+            students = {
+                submission_id: (student_id, name)
+                for submission_id, student_id, name in db.session.execute(
+                    select(Submission.id, Submission.studentId, User.name)
+                    .join(User, User.id == Submission.studentId)
+                    .where(Submission.id.in_(submission_ids))
+                )
+            }
+        total = db.session.scalar(select(func.count(Submission.id)).where(Submission.assignmentId == assignmentId))
+
+        def side(submission_id):
+            student_id, name = students[submission_id]
+            return {'submissionId': submission_id, 'studentId': student_id, 'studentName': name}
+
+        return jsonify({
+            'assignmentId': assignmentId,
+            'threshold': max(threshold or similarity_engine.threshold, similarity_engine.threshold),
+            'submissions': total,
+            'analyzed': analyzed,
+            # 인덱스가 다른 워커의 삭제를 아직 모를 수 있으므로 삭제된 제출물은 건너뜁니다.
+            'pairs': [
+                {'a': side(a), 'b': side(b), 'similarity': round(similarity, 3)}
+                for a, b, similarity in pairs if a in students and b in students
+            ],
+        }), 200
+    except Exception as e:
+        current_app.logger.error("Error building similarity report: %s", e)
+        return jsonify(error="Internal server error"), 500
@@ -1,17 +1,22 @@
-import os
-import uuid
 from datetime import datetime
-from flask import Blueprint, request, jsonify, g, current_app, send_from_directory
-from werkzeug.utils import secure_filename
-from sqlalchemy.orm import joinedload
+from flask import Blueprint, request, jsonify, g, current_app
+from sqlalchemy.orm import joinedload, undefer
+from backend.archive import archive_store
+from backend.closing import build_submissions, cached
 from backend.extensions import db
-from backend.models import Assignment, Submission, SubmissionStatus, SubmissionFile, User
+from backend.events import event_broker
+from backend.idempotency import idempotent
+from backend.intake import assignment_cache, submission_intake, IntakeRejected, IntakeTimeout
+from backend.reclaim import file_reclaimer
+from backend.previews import preview_service, preview_response, thumbnail_response
+from backend.similarity import similarity_engine
+from backend.storage import HashingStream, storage, key_for, new_file_url
+from backend.versions import submission_versions, version_to_dict, diff_versions, blob_key
+from backend.models import Assignment, Grade, Submission, SubmissionStatus, SubmissionFile, User
 from backend.routes.auth import authenticate, authorize
 
 submissions_bp = Blueprint('submissions', __name__)
 
-UPLOAD_FOLDER = 'uploads/submissions'
-
 def submission_to_dict(submission):
     """Submission 객체를 JSON 응답을 위한 딕셔너리로 변환합니다."""
     assignment_data = None
@@ -66,104 +71,127 @@ def submission_file_to_dict(submission_file):
 
 @submissions_bp.route('/assignments/<assignmentId>/submit', methods=['POST'])
 @authorize(allowed_roles=['STUDENT'])
+@idempotent
 def submit_assignment(assignmentId):
+    # 제출 시각은 접수 시점에 기록합니다. (큐 대기 시간은 지각 여부에 영향을 주지 않습니다)
+    admitted_at = datetime.utcnow()
     data = request.json
     content = data.get('content')
 
     if not content:
         return jsonify(error="제출 내용을 입력해주세요."), 400
 
-    assignment = Assignment.query.get(assignmentId)
+    assignment = assignment_cache.get(assignmentId)
     if not assignment:
         return jsonify(error="유효한 과제 ID가 아닙니다."), 400
 
-    if assignment.dueDate < datetime.utcnow():
+    if assignment.dueDate < admitted_at:
         return jsonify(error="제출 마감일이 지났습니다."), 400
 
     try:
-        existing_submission = Submission.query.filter_by(assignmentId=assignmentId, studentId=g.user_id).first()
-
-        if existing_submission:
-            existing_submission.content = content
-            existing_submission.submittedAt = datetime.utcnow()
-            db.session.commit()
-            return jsonify(submission_to_dict(existing_submission)), 200
-        else:
-            new_submission = Submission(
-                assignmentId=assignmentId,
-                studentId=g.user_id,
-                content=content,
-            )
-            db.session.add(new_submission)
-            db.session.commit()
-            return jsonify(submission_to_dict(new_submission)), 201
-
+        result = submission_intake.submit(assignmentId, g.user_id, content, admitted_at)
+        submission_versions.record(result.submission_id)
+        publish_submission_event(assignment, result.submission_id, g.user_id, result.created)
+        similarity_engine.schedule(result.submission_id)
+        submission = _load_submission(result.submission_id)
+        return jsonify(submission_to_dict(submission)), 201 if result.created else 200
+    except IntakeRejected as e:
+        return _intake_busy_response(e)
+    except IntakeTimeout as e:
+        return _intake_busy_response(e, "제출 처리가 지연되고 있습니다. 잠시 후 다시 시도해주세요.")
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error submitting assignment: {e}")
+        current_app.logger.error("Error submitting assignment: %s", e)
         return jsonify(error="Internal server error"), 500
 
 
 @submissions_bp.route('/assignments/<assignmentId>/submit-with-files', methods=['POST'])
 @authorize(allowed_roles=['STUDENT'])
+@idempotent
 def submit_assignment_with_files(assignmentId):
+    admitted_at = datetime.utcnow()
     content = request.form.get('content', None)
     files = request.files.getlist('files[]')
 
     if not content and not files:
         return jsonify(error='제출 내용 또는 파일을 업로드해주세요.'), 400
 
-    assignment = Assignment.query.get(assignmentId)
+    assignment = assignment_cache.get(assignmentId)
     if not assignment:
         return jsonify(error="유효한 과제 ID가 아닙니다."), 400
 
-    if assignment.dueDate < datetime.utcnow():
+    if assignment.dueDate < admitted_at:
         return jsonify(error="제출 마감일이 지났습니다."), 400
 
+    saved_keys = []
+    new_files = []
     try:
-        existing_submission = Submission.query.filter_by(assignmentId=assignmentId, studentId=g.user_id).first()
-
-        if existing_submission:
-            submission = existing_submission
-            submission.content = content
-            submission.submittedAt = datetime.utcnow()
-        else:
-            submission = Submission(
-                assignmentId=assignmentId,
-                studentId=g.user_id,
-                content=content,
-            )
-            db.session.add(submission)
-
-        db.session.commit()
+        result = submission_intake.submit(assignmentId, g.user_id, content, admitted_at)
+        submission_id = result.submission_id
 
         if files:
             for file in files:
                 if file:
-                    filename = secure_filename(file.filename)
-                    unique_filename = f"{uuid.uuid4()}_{filename}"
-                    directory_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, submission.id)
-                    os.makedirs(directory_path, exist_ok=True)
-                    file_path = os.path.join(directory_path, unique_filename)
-                    file.save(file_path)
+                    filename, file_url = new_file_url(submission_id, file.filename)
+                    key = key_for(SubmissionFile, file_url)
+                    saved_keys.append(key)
+                    stream = HashingStream(file.stream)
+                    size = storage.save(key, stream, file.mimetype)
 
                     new_file = SubmissionFile(
-                        submissionId=submission.id,
+                        submissionId=submission_id,
                         fileName=filename,
-                        fileUrl=os.path.join(submission.id, unique_filename),
-                        fileSize=os.path.getsize(file_path),
+                        fileUrl=file_url,
+                        fileSize=size,
                         mimeType=file.mimetype,
                     )
                     db.session.add(new_file)
+                    new_files.append((new_file, stream.hexdigest()))
             db.session.commit()
 
-        return jsonify(submission_to_dict(submission)), 200
-
+        for new_file, _ in new_files:
+            preview_service.schedule(SubmissionFile, new_file.id, new_file.fileUrl, new_file.fileName,
+                                     new_file.mimeType, new_file.fileSize)
+        submission_versions.record(submission_id, {new_file.id: sha for new_file, sha in new_files})
+        publish_submission_event(assignment, submission_id, g.user_id, result.created)
+        similarity_engine.schedule(submission_id)
+        return jsonify(submission_to_dict(_load_submission(submission_id))), 200
+
+    except IntakeRejected as e:
+        return _intake_busy_response(e)
+    except IntakeTimeout as e:
+        return _intake_busy_response(e, "제출 처리가 지연되고 있습니다. 잠시 후 다시 시도해주세요.")
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error submitting assignment with files: {e}")
+        file_reclaimer.enqueue(saved_keys)
+        current_app.logger.error("Error submitting assignment with files: %s", e)
         return jsonify(error="Internal server error"), 500
 
+def _load_submission(submission_id):
+    return Submission.query.options(
+        joinedload(Submission.assignment),
+        joinedload(Submission.student),
+        joinedload(Submission.files),
+        joinedload(Submission.grade).undefer(Grade.feedback),
+        undefer(Submission.content)
+    ).filter_by(id=submission_id).first()
+
+def publish_submission_event(assignment, submission_id, student_id, created):
+    """담당 교수의 제출물 목록에 새 제출/재제출을 알립니다."""
+    event_broker.publish(assignment.teacherId, 'submission.updated', {
+        'submissionId': submission_id,
+        'assignmentId': assignment.id,
+        'studentId': student_id,
+        'created': created,
+    })
+
+def _intake_busy_response(error, message="제출 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."):
+    # 접수 큐가 가득 찼거나(IntakeRejected) 기록이 지연될 때(IntakeTimeout) 모두 503 으로 다시 시도하게 합니다.
+    response = jsonify(error=message)
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
 @submissions_bp.route('/my-submissions', methods=['GET'])
 @authorize(allowed_roles=['STUDENT'])
 def get_my_submissions():
@@ -171,25 +199,28 @@ def get_my_submissions():
         submissions = Submission.query.filter_by(studentId=g.user_id).options(
             joinedload(Submission.assignment),
             joinedload(Submission.files),
-            joinedload(Submission.grade)
+            joinedload(Submission.grade).undefer(Grade.feedback),
+            undefer(Submission.content)
         ).order_by(Submission.submittedAt.desc()).all()
-        return jsonify([submission_to_dict(s) for s in submissions])
+        # 보관된 강의의 제출물은 목록 뒤에 붙입니다. (backend/archive.py)
+        archived = sorted(archive_store.student_submissions(g.user_id), key=lambda s: s.submittedAt, reverse=True)
+        return jsonify([submission_to_dict(s) for s in submissions + archived])
     except Exception as e:
-        current_app.logger.error(f"Error fetching my submissions: {e}")
+        current_app.logger.error("Error fetching my submissions: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @submissions_bp.route('/assignments/<assignmentId>/submissions', methods=['GET'])
 @authorize(allowed_roles=['PROFESSOR', 'ADMIN'])
 def get_assignment_submissions(assignmentId):
     try:
-        submissions = Submission.query.filter_by(assignmentId=assignmentId).options(
-            joinedload(Submission.student),
-            joinedload(Submission.files),
-            joinedload(Submission.grade)
-        ).order_by(Submission.submittedAt.desc()).all()
-        return jsonify([submission_to_dict(s) for s in submissions])
+        if assignment_cache.get(assignmentId) is None:
+            archived = archive_store.find('assignment', assignmentId)
+            if archived is not None:
+                return jsonify([submission_to_dict(s) for s in archived.submissions])
+        # 마감된 과제는 마감 처리 때 만든 목록을 변경이 없는 동안 재사용합니다. (backend/closing.py)
+        return jsonify(cached(assignmentId, 'submissions.json', build_submissions))
     except Exception as e:
-        current_app.logger.error(f"Error fetching assignment submissions: {e}")
+        current_app.logger.error("Error fetching assignment submissions: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @submissions_bp.route('/<submissionId>/files/<fileId>', methods=['DELETE'])
@@ -204,17 +235,16 @@ def remove_file_from_submission(submissionId, fileId):
         if not file_to_delete:
             return jsonify(error="File not found"), 404
 
-        full_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, file_to_delete.fileUrl)
-        if os.path.exists(full_path):
-            os.remove(full_path)
-
+        # 파일은 커밋 후 백그라운드에서 삭제됩니다. (backend/reclaim.py)
         db.session.delete(file_to_delete)
         db.session.commit()
+        submission_versions.record(submissionId)
+        similarity_engine.schedule(submissionId)
 
         return jsonify(message="File deleted successfully"), 200
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error deleting file from submission: {e}")
+        current_app.logger.error("Error deleting file from submission: %s", e)
         return jsonify(error="Internal server error"), 500
 
 @submissions_bp.route('/assignments/<assignmentId>/my-submission', methods=['GET'])
@@ -227,22 +257,27 @@ def get_my_submission_for_assignment(assignmentId):
             studentId=g.user_id
         ).options(
             joinedload(Submission.files),
-            joinedload(Submission.grade)
+            joinedload(Submission.grade).undefer(Grade.feedback),
+            undefer(Submission.content)
         ).first()
 
+        if not submission and assignment_cache.get(assignmentId) is None:
+            archived = archive_store.find('assignment', assignmentId)
+            submission = next((s for s in archived.submissions if s.studentId == g.user_id), None) if archived else None
+
         if not submission:
             return jsonify(None), 200
 
         return jsonify(submission_to_dict(submission))
     except Exception as e:
-        current_app.logger.error(f"Error fetching submission for assignment {assignmentId}: {e}")
+        current_app.logger.error("Error fetching submission for assignment %s: %s", assignmentId, e)
         return jsonify(error="Internal server error"), 500
 
 @submissions_bp.route('/files/<fileId>/download', methods=['GET'])
 @authenticate
 def download_file(fileId):
     try:
-        submission_file = SubmissionFile.query.filter_by(id=fileId).first()
+        submission_file = SubmissionFile.query.filter_by(id=fileId).first() or archive_store.find('submissionfile', fileId)
         if not submission_file:
             return jsonify(error="File not found"), 404
 
@@ -253,12 +288,123 @@ def download_file(fileId):
         if not (is_teacher_or_admin or is_owner):
             return jsonify(error="You don't have permission to download this file."), 403
 
-        file_url = submission_file.fileUrl
-        directory = os.path.join(current_app.root_path, UPLOAD_FOLDER, os.path.dirname(file_url))
-        filename = os.path.basename(file_url)
+        # S3 저장소에서는 presigned URL 로 리다이렉트하므로 파일 내용이 Flask 를 거치지 않습니다.
+        return storage.download_response(key_for(SubmissionFile, submission_file.fileUrl),
+                                         submission_file.fileName, submission_file.mimeType)
+    except Exception as e:
+        current_app.logger.error("Error downloading file: %s", e)
+        return jsonify(error="Internal server error"), 500
+
+
+def _viewable_submission_file(fileId):
+    """(SubmissionFile, 오류 응답) 을 반환합니다. 다운로드와 같은 권한 규칙을 따릅니다."""
+    submission_file = SubmissionFile.query.options(joinedload(SubmissionFile.submission)).filter_by(id=fileId).first()
+    if not submission_file:
+        return None, (jsonify(error="File not found"), 404)
+    is_teacher_or_admin = g.user_role in ['PROFESSOR', 'ADMIN']
+    if not (is_teacher_or_admin or submission_file.submission.studentId == g.user_id):
+        return None, (jsonify(error="You don't have permission to view this file."), 403)
+    return submission_file, None
+
+@submissions_bp.route('/files/<fileId>/preview', methods=['GET'])
+@authenticate
+def preview_file(fileId):
+    """PDF/HWP 제출 파일의 추출된 텍스트를 반환합니다. 추출 중이면 202 를 반환합니다."""
+    submission_file, error = _viewable_submission_file(fileId)
+    if error:
+        return error
+    return preview_response(SubmissionFile, submission_file,
+                            thumbnail_url=f"/api/submissions/files/{fileId}/thumbnail")
+
+@submissions_bp.route('/files/<fileId>/thumbnail', methods=['GET'])
+@authenticate
+def file_thumbnail(fileId):
+    submission_file, error = _viewable_submission_file(fileId)
+    if error:
+        return error
+    return thumbnail_response(SubmissionFile, submission_file)
+
+def _viewable_submission(submissionId):
+    """(Submission, 오류 응답) 을 반환합니다. 제출한 학생과 교수/관리자만 볼 수 있습니다."""
+    submission = db.session.get(Submission, submissionId)
+    if not submission:
+        return None, (jsonify(error="Submission not found"), 404)
+    if g.user_role not in ['PROFESSOR', 'ADMIN'] and submission.studentId != g.user_id:
+        return None, (jsonify(error="You don't have permission to view this submission."), 403)
+    return submission, None
+
+@submissions_bp.route('/<submissionId>/versions', methods=['GET'])
+@authenticate
+def list_submission_versions(submissionId):
+    """재제출 기록을 오래된 순으로 반환합니다. (본문 제외)"""
+    submission, error = _viewable_submission(submissionId)
+    if error:
+        return error
+    try:
+        return jsonify([version_to_dict(version) for version in submission_versions.history(submissionId)]), 200
+    except Exception as e:
+        current_app.logger.error("Error fetching versions for submission %s: %s", submissionId, e)
+        return jsonify(error="Internal server error"), 500
+
+@submissions_bp.route('/<submissionId>/versions/<int:version>', methods=['GET'])
+@authenticate
+def get_submission_version(submissionId, version):
+    submission, error = _viewable_submission(submissionId)
+    if error:
+        return error
+    try:
+        submission_version = submission_versions.get(submissionId, version)
+        if not submission_version:
+            return jsonify(error="Version not found"), 404
+        result = version_to_dict(submission_version)
+        result['content'] = submission_versions.content(submissionId, version)
+        return jsonify(result), 200
+    except Exception as e:
+        current_app.logger.error("Error fetching version %s of submission %s: %s", version, submissionId, e)
+        return jsonify(error="Internal server error"), 500
 
-        return send_from_directory(directory, filename, as_attachment=True, download_name=submission_file.fileName)
+@submissions_bp.route('/<submissionId>/versions/diff', methods=['GET'])
+@authenticate
+def diff_submission_versions(submissionId):
+    """
+    두 버전의 본문 unified diff 와 파일 변경 목록을 반환합니다.
+    - from : 이전 버전 번호 (기본값: to - 1)
+    - to   : 이후 버전 번호 (기본값: 최신 버전)
+    """
+    submission, error = _viewable_submission(submissionId)
+    if error:
+        return error
+    try:
+        new = request.args.get('to', type=int)
+        if new is None:
+            history = submission_versions.history(submissionId)
+            if not history:
+                return jsonify(error="Version not found"), 404
+            new = history[-1].version
+        old = request.args.get('from', default=new - 1, type=int)
+        diff = diff_versions(submissionId, old, new)
+        if diff is None:
+            return jsonify(error="Version not found"), 404
+        return jsonify(diff), 200
+    except Exception as e:
+        current_app.logger.error("Error diffing versions of submission %s: %s", submissionId, e)
+        return jsonify(error="Internal server error"), 500
 
+@submissions_bp.route('/<submissionId>/versions/<int:version>/files/<fileId>/download', methods=['GET'])
+@authenticate
+def download_version_file(submissionId, version, fileId):
+    """지난 버전의 파일을 내려받습니다. 제출물에서 지운 파일도 버전에 남아 있으면 받을 수 있습니다."""
+    submission, error = _viewable_submission(submissionId)
+    if error:
+        return error
+    submission_version = submission_versions.get(submissionId, version)
+    if not submission_version:
+        return jsonify(error="Version not found"), 404
+    entry = next((entry for entry in version_to_dict(submission_version)['files'] if entry['id'] == fileId), None)
+    if not entry or entry.get('missing'):
+        return jsonify(error="File not found"), 404
+    try:
+        return storage.download_response(blob_key(entry['sha256']), entry['filename'], entry['content_type'])
     except Exception as e:
-        current_app.logger.error(f"Error downloading file: {e}")
-        return jsonify(error="Internal server error"), 500
\ No newline at end of file
+        current_app.logger.error("Error downloading version file: %s", e)
+        return jsonify(error="Internal server error"), 500
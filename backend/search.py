@@ -0,0 +1,265 @@
+"""
+사용자/강의 자동완성(typeahead) 검색 색인
+
+학생 목록과 강의 목록을 통째로 내려보내 화면에서 거르는 대신, 프로세스마다 정렬된 키 목록을 두고
+bisect 로 접두어 범위만 잘라 limit 개를 반환합니다.
+
+- 키 : 이름, 이름의 각 단어, 이메일, 이메일 ID, 강의 이름과 그 단어, 한글 이름의 초성(김철수 -> ㄱㅊㅅ)
+        모두 NFC 정규화 + casefold 하므로 macOS 의 NFD 입력이나 대소문자와 관계없이 찾습니다.
+- 한글 입력 중인 글자 : '김처' 는 '김철수' 를, '김ㅊ' 는 '김철수' / '김치' 를 찾도록 마지막 글자를 음절 범위로 넓힙니다.
+- 갱신 : 이 프로세스의 ORM 커밋(User/Course 추가/수정/삭제)은 바로 반영하고, 다른 워커나 bulk INSERT 로 바뀐 행은
+         SEARCH_SYNC_INTERVAL 초마다 User.updatedAt 기준 증분 동기화로 반영합니다. (강의는 수가 적어 통째로 다시 읽습니다)
+"""
+import bisect
+import heapq
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+from datetime import timedelta
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from backend.extensions import db
+from backend.models import Course, User
+
+SearchHit = namedtuple('SearchHit', ['kind', 'id', 'name', 'email', 'role', 'teacherId'])
+
+_SESSION_KEY = 'search_changes'
+_MAX_CHAR = '\U0010ffff'
+REBUILD_THRESHOLD = 256  # 이보다 많은 레코드를 한 번에 반영하면 정렬 목록을 다시 만듭니다.
+
+# 한글 음절 = 0xAC00 + (초성 * 21 + 중성) * 28 + 종성
+_HANGUL_BASE, _HANGUL_LAST = 0xAC00, 0xD7A3
+_CHOSUNG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+
+
+def normalize(text):
+    return unicodedata.normalize('NFC', text or '').casefold().strip()
+
+
+def chosung(text):
+    """한글 음절을 초성으로 바꿉니다. 한글 음절이 없으면 None 을 반환합니다."""
+    if not any(_HANGUL_BASE <= ord(ch) <= _HANGUL_LAST for ch in text):
+        return None
+    return ''.join(
+        _CHOSUNG[(ord(ch) - _HANGUL_BASE) // 588] if _HANGUL_BASE <= ord(ch) <= _HANGUL_LAST else ch
+        for ch in text
+    )
+
+
+def prefix_ranges(query):
+    """정규화된 검색어가 접두어인 키의 [lo, hi) 범위 목록. 마지막 한글 글자는 입력 중일 수 있으므로 넓혀 봅니다."""
+    ranges = [(query, query + _MAX_CHAR)]
+    head, last = query[:-1], ord(query[-1])
+    if _HANGUL_BASE <= last <= _HANGUL_LAST and (last - _HANGUL_BASE) % 28 == 0:
+        # 받침 없는 음절: '처' -> '처'~'청'
+        ranges.append((head + chr(last + 1), head + chr(last + 27) + _MAX_CHAR))
+    elif head and query[-1] in _CHOSUNG:
+        # 음절 뒤의 초성: '김ㅊ' -> '김차'~'김칳'
+        start = _HANGUL_BASE + _CHOSUNG.index(query[-1]) * 588
+        ranges.append((head + chr(start), head + chr(start + 587) + _MAX_CHAR))
+    return ranges
+
+
+def _user_item(user_id, name, email, role):
+    role = role.value if hasattr(role, 'value') else role
+    return SearchHit('user', user_id, name, email, role, None), _keys(name, email)
+
+
+def _course_item(course_id, name, teacher_id):
+    return SearchHit('course', course_id, name, None, None, teacher_id), _keys(name)
+
+
+def _keys(name, email=None):
+    name = normalize(name)
+    keys = {name, *name.split()}
+    initials = chosung(name.replace(' ', ''))
+    if initials:
+        keys.add(initials)
+    if email:
+        email = normalize(email)
+        keys.update((email, email.split('@')[0]))
+    keys.discard('')
+    return keys
+
+
+class SearchIndex:
+    def __init__(self, sync_interval=30, max_limit=50):
+        self.sync_interval = sync_interval
+        self.max_limit = max_limit
+        self._lock = threading.RLock()
+        self._entries = []          # 정렬된 (key, kind, id)
+        self._records = {}          # (kind, id) -> (SearchHit, keys)
+        self._loaded = False
+        self._synced_at = 0
+        self._user_watermark = None
+
+    def init_app(self, app):
+        self.sync_interval = app.config.get('SEARCH_SYNC_INTERVAL', self.sync_interval)
+        self.max_limit = app.config.get('SEARCH_MAX_LIMIT', self.max_limit)
+        app.extensions['search_index'] = self
+        with self._lock:
+            self._entries, self._records, self._loaded = [], {}, False
+        if not event.contains(Session, 'after_flush', _collect_changes):
+            event.listen(Session, 'after_flush', _collect_changes)
+            event.listen(Session, 'after_commit', _apply_after_commit)
+            event.listen(Session, 'after_soft_rollback', _discard_after_rollback)
+
+    # --- 색인 갱신 ---
+    def _put(self, hit, keys):
+        record_key = (hit.kind, hit.id)
+        old = self._records.get(record_key)
+        if old is not None:
+            if old == (hit, keys):
+                return
+            self._remove(hit.kind, hit.id)
+        self._records[record_key] = (hit, keys)
+        for key in keys:
+            bisect.insort(self._entries, (key, hit.kind, hit.id))
+
+    def _remove(self, kind, record_id):
+        old = self._records.pop((kind, record_id), None)
+        if old is None:
+            return
+        for key in old[1]:
+            entry = (key, kind, record_id)
+            index = bisect.bisect_left(self._entries, entry)
+            if index < len(self._entries) and self._entries[index] == entry:
+                del self._entries[index]
+
+    def _put_many(self, items):
+        """(SearchHit, keys) 목록을 반영합니다. 많으면 하나씩 insort 하지 않고 정렬 목록을 다시 만듭니다."""
+        with self._lock:
+            if len(items) < REBUILD_THRESHOLD:
+                for hit, keys in items:
+                    self._put(hit, keys)
+                return
+            for hit, keys in items:
+                self._records[(hit.kind, hit.id)] = (hit, keys)
+            self._entries = sorted(
+                (key, kind, record_id) for (kind, record_id), (_, keys) in self._records.items() for key in keys
+            )
+
+    def put_user(self, user_id, name, email, role):
+        self._put_many([_user_item(user_id, name, email, role)])
+
+    def put_course(self, course_id, name, teacher_id):
+        self._put_many([_course_item(course_id, name, teacher_id)])
+
+    def remove(self, kind, record_id):
+        with self._lock:
+            self._remove(kind, record_id)
+
+    def mark_stale(self):
+        """bulk INSERT/DELETE 처럼 ORM 이벤트가 없는 변경 뒤에 호출하면 다음 검색 때 동기화합니다."""
+        self._synced_at = 0
+
+    # --- DB 동기화 ---
+    def _reload_courses(self):
+        courses = db.session.execute(select(Course.id, Course.name, Course.teacherId)).all()
+        current = {course_id for course_id, _, _ in courses}
+        with self._lock:
+            for kind, record_id in [key for key in self._records if key[0] == 'course']:
+                if record_id not in current:
+                    self._remove(kind, record_id)
+            self._put_many([_course_item(*course) for course in courses])
+
+    def _sync_users(self, full):
+        query = select(User.id, User.name, User.email, User.role, User.updatedAt)
+        if not full and self._user_watermark is not None:
+            # 커밋 순서와 updatedAt 순서가 다를 수 있으므로 조금 겹쳐서 읽습니다.
+            query = query.where(User.updatedAt >= self._user_watermark - timedelta(minutes=1))
+        watermark, items = self._user_watermark, []
+        for user_id, name, email, role, updated_at in db.session.execute(query):
+            items.append(_user_item(user_id, name, email, role))
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+        self._put_many(items)
+        self._user_watermark = watermark
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._loaded and now - self._synced_at < self.sync_interval:
+            return
+        with self._lock:
+            if self._loaded and now - self._synced_at < self.sync_interval:
+                return
+            full = not self._loaded
+            self._sync_users(full)
+            # 사용자 삭제는 updatedAt 으로 알 수 없으므로 수가 다르면 다시 읽습니다.
+            user_count = db.session.scalar(select(func.count(User.id)))
+            if user_count != sum(1 for kind, _ in self._records if kind == 'user'):
+                self._records = {key: record for key, record in self._records.items() if key[0] != 'user'}
+                self._entries = [entry for entry in self._entries if entry[1] != 'user']
+                self._sync_users(full=True)
+            self._reload_courses()
+            self._loaded, self._synced_at = True, now
+
+    # --- 검색 ---
+    def search(self, query, kind, limit=10, role=None, teacher_id=None):
+        """
+        query 로 시작하는 키를 가진 kind('user'/'course') 레코드를 키 순서로 최대 limit 개 반환합니다.
+        role / teacher_id 로 사용자 역할과 강의 담당 교수를 거를 수 있습니다.
+        prefix_ranges() 의 범위들을 키 순서로 합쳐 읽고 limit 개를 찾으면 멈추므로,
+        짧은 검색어도 잠금을 오래 잡지 않습니다.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        limit = max(1, min(limit, self.max_limit))
+        self._ensure_fresh()
+
+        found, hits = set(), []
+        with self._lock:
+            entries = self._entries
+            spans = []
+            for lo, hi in prefix_ranges(query):
+                start = bisect.bisect_left(entries, (lo,))
+                end = bisect.bisect_left(entries, (hi,))
+                spans.append(entries[i] for i in range(start, end))
+            for _, entry_kind, record_id in heapq.merge(*spans):
+                if entry_kind != kind or record_id in found:
+                    continue
+                hit = self._records[(entry_kind, record_id)][0]
+                if (role and hit.role != role) or (teacher_id and hit.teacherId != teacher_id):
+                    continue
+                found.add(record_id)
+                hits.append(hit)
+                if len(hits) >= limit:
+                    break
+        return hits
+
+
+def _collect_changes(session, flush_context):
+    changes = session.info.setdefault(_SESSION_KEY, {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, User):
+            changes[('user', obj.id)] = (obj.name, obj.email, obj.role)
+        elif isinstance(obj, Course):
+            changes[('course', obj.id)] = (obj.name, obj.teacherId)
+    for obj in session.deleted:
+        if isinstance(obj, (User, Course)):
+            changes[('user' if isinstance(obj, User) else 'course', obj.id)] = None
+
+
+def _apply_after_commit(session):
+    changes = session.info.pop(_SESSION_KEY, None)
+    if not changes or not search_index._loaded:
+        return
+    for (kind, record_id), values in changes.items():
+        if values is None:
+            search_index.remove(kind, record_id)
+        elif kind == 'user':
+            search_index.put_user(record_id, *values)
+        else:
+            search_index.put_course(record_id, *values)
+
+
+def _discard_after_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop(_SESSION_KEY, None)
+
+
+search_index = SearchIndex()
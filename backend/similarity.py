@@ -0,0 +1,378 @@
+"""
+제출물 유사도(표절 의심) 검사 - MinHash + LSH
+
+1. 제출물이 저장되면 schedule() 로 서명 계산을 예약합니다.
+   본문(content)과 첨부 파일의 추출 텍스트(backend/previews.py)를 합쳐 문자 n-gram 으로 쪼개고
+   NUM_PERM 개의 해시 함수로 MinHash 서명(uint32 배열)을 만들어 SubmissionSignature 에 저장합니다.
+2. 과제별 LSH 인덱스는 서명을 밴드로 나눠 버킷에 넣고, 같은 버킷에 들어간 쌍만 후보로 비교합니다.
+   n 명 전체를 쌍으로 비교하지 않으므로 제출물 수에 거의 비례하는 시간이 걸립니다.
+3. 인덱스는 프로세스 메모리에 두고, 보고서 요청 시 그 이후에 바뀐 서명만 반영합니다.
+
+    python -m backend.similarity rebuild [--assignment ID]   # 기존 제출물 서명 일괄 계산
+"""
+import argparse
+import hashlib
+import heapq
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload, undefer
+
+from backend.dbutil import upsert_statement
+from backend.extensions import db
+from backend.models import Submission, SubmissionFile, SubmissionSignature
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = 0xFFFFFFFF
+_CHUNK = 8192
+
+_NON_TEXT = re.compile(r'[\W_]+', re.UNICODE)
+
+_numpy = None
+
+
+def _np():
+    """numpy 는 가져오는 데 시간이 꽤 걸리므로 (LAZY_STARTUP) 서명을 처음 계산할 때 가져옵니다."""
+    global _numpy
+    if _numpy is None:
+        import numpy
+        _numpy = numpy
+    return _numpy
+
+
+def normalize_text(text):
+    """전각/반각, 대소문자, 공백, 문장 부호 차이를 없앱니다."""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return _NON_TEXT.sub(' ', text).strip()
+
+
+def shingles(text, k):
+    """
+    문자 k-gram 집합의 32비트 해시를 반환합니다.
+    한국어는 조사/어미가 붙어 단어 단위 비교가 약하므로 공백을 제외한 문자 n-gram 을 씁니다.
+    """
+    np = _np()
+    compact = text.replace(' ', '')
+    if len(compact) < k:
+        return np.empty(0, dtype=np.uint64)
+    encoded = {compact[i:i + k] for i in range(len(compact) - k + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in encoded), dtype=np.uint64, count=len(encoded))
+
+
+class MinHasher:
+    def __init__(self, num_perm=128, seed=1):
+        np = _np()
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.prime = np.uint64(MERSENNE_PRIME)
+        self.max_hash = np.uint64(MAX_HASH)
+
+    def signature(self, hashes):
+        np = _np()
+        signature = np.full(self.num_perm, self.max_hash, dtype=np.uint64)
+        # 긴 문서도 메모리를 일정하게 쓰도록 shingle 을 나눠서 계산합니다.
+        for start in range(0, len(hashes), _CHUNK):
+            chunk = hashes[start:start + _CHUNK, None]
+            permuted = ((chunk * self.a + self.b) % self.prime) & self.max_hash
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+
+def estimate_similarity(a, b):
+    """두 MinHash 서명으로 추정한 Jaccard 유사도"""
+    return float((a == b).sum()) / len(a)
+
+
+class AssignmentIndex:
+    """한 과제의 LSH 인덱스와 유사 쌍 목록"""
+
+    def __init__(self, bands, rows, threshold):
+        self.bands = bands
+        self.rows = rows
+        self.threshold = threshold
+        self.buckets = [defaultdict(set) for _ in range(bands)]
+        self.signatures = {}                 # submissionId -> np.ndarray[uint32]
+        self.pairs = {}                      # (id_a, id_b) -> similarity  (id_a < id_b)
+        self.neighbors = defaultdict(set)    # submissionId -> {다른 submissionId}
+        self.synced_at = None
+        self.lock = threading.Lock()
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def remove(self, submission_id):
+        signature = self.signatures.pop(submission_id, None)
+        if signature is None:
+            return
+        for band, key in self._band_keys(signature):
+            bucket = self.buckets[band].get(key)
+            if bucket:
+                bucket.discard(submission_id)
+                if not bucket:
+                    del self.buckets[band][key]
+        for other in self.neighbors.pop(submission_id, ()):
+            self.neighbors[other].discard(submission_id)
+            self.pairs.pop(tuple(sorted((submission_id, other))), None)
+
+    def add(self, submission_id, signature):
+        """서명을 넣고, 같은 버킷에 있는 후보와만 비교해 유사 쌍을 갱신합니다."""
+        self.remove(submission_id)
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            bucket = self.buckets[band][key]
+            candidates.update(bucket)
+            bucket.add(submission_id)
+        self.signatures[submission_id] = signature
+        for other in candidates:
+            similarity = estimate_similarity(signature, self.signatures[other])
+            if similarity >= self.threshold:
+                self.pairs[tuple(sorted((submission_id, other)))] = similarity
+                self.neighbors[submission_id].add(other)
+                self.neighbors[other].add(submission_id)
+
+
+class SimilarityEngine:
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.num_perm = 128
+        self.bands = 32
+        self.shingle_size = 5
+        self.threshold = 0.5
+        self.min_shingles = 20
+        self.debounce = 2.0
+        self.max_indexes = 64
+        self.hasher = None
+        self._indexes = OrderedDict()    # assignmentId -> AssignmentIndex (LRU)
+        self._indexes_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._heap = []                  # (due, seq, submissionId)
+        self._scheduled = {}             # submissionId -> (due, attempt)
+        self._seq = itertools.count()
+        self._worker_pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('SIMILARITY_ENABLED', self.enabled)
+        self.num_perm = app.config.get('SIMILARITY_NUM_PERM', self.num_perm)
+        self.bands = app.config.get('SIMILARITY_BANDS', self.bands)
+        self.shingle_size = app.config.get('SIMILARITY_SHINGLE_SIZE', self.shingle_size)
+        self.threshold = app.config.get('SIMILARITY_THRESHOLD', self.threshold)
+        if self.num_perm % self.bands:
+            raise ValueError('SIMILARITY_NUM_PERM must be a multiple of SIMILARITY_BANDS')
+        app.extensions['similarity_engine'] = self
+
+    # --- 서명 계산 예약 ---
+    def schedule(self, submission_id, delay=None, attempt=0):
+        """
+        서명 계산을 예약합니다. 짧은 시간 안에 여러 번 호출되면 (예: 제출 직후 파일 저장) 한 번만 계산합니다.
+        커밋 이후에 호출해야 합니다.
+        """
+        if not self.enabled:
+            return
+        due = time.monotonic() + (self.debounce if delay is None else delay)
+        with self._cond:
+            current = self._scheduled.get(submission_id)
+            if current and current[0] <= due:
+                return
+            self._scheduled[submission_id] = (due, attempt)
+            heapq.heappush(self._heap, (due, next(self._seq), submission_id))
+            self._cond.notify()
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        # fork 된 워커에서는 부모의 스레드가 없으므로 프로세스마다 새로 띄웁니다.
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return
+        with self._cond:
+            if self._worker_pid != pid:
+                threading.Thread(target=self._run, name='similarity', daemon=True).start()
+                self._worker_pid = pid
+
+    def _next_due(self):
+        with self._cond:
+            while True:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, submission_id = self._heap[0]
+                entry = self._scheduled.get(submission_id)
+                if entry is None or entry[0] != due:
+                    heapq.heappop(self._heap)   # 더 늦게/빠르게 다시 예약된 항목
+                    continue
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                del self._scheduled[submission_id]
+                return submission_id, entry[1]
+
+    def _run(self):
+        while True:
+            submission_id, attempt = self._next_due()
+            with self.app.app_context():
+                try:
+                    if not self.update_signature(submission_id) and attempt < 10:
+                        # 첨부 파일 텍스트 추출이 아직 끝나지 않았습니다.
+                        self.schedule(submission_id, delay=min(2 ** attempt, 60), attempt=attempt + 1)
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error("Error computing similarity signature for %s: %s", submission_id, e)
+                finally:
+                    db.session.remove()
+
+    # --- 서명 계산 ---
+    def submission_text(self, submission, wait_for_files=True):
+        """본문과 첨부 파일의 추출 텍스트를 합칩니다. 추출 대기 중인 파일이 있으면 None 을 반환합니다."""
+        from backend.previews import preview_service
+
+        parts = [submission.content or '']
+        for submission_file in submission.files:
+            status, meta = preview_service.lookup(SubmissionFile, submission_file)
+            if status == 'pending' and wait_for_files:
+                return None
+            if status == 'ready':
+                parts.append(preview_service.text_for(meta))
+        return '\n'.join(parts)
+
+    def update_signature(self, submission_id, wait_for_files=True):
+        """서명을 계산해 저장합니다. 파일 추출을 기다려야 하면 False 를 반환합니다."""
+        submission = db.session.get(Submission, submission_id, options=[
+            selectinload(Submission.files), selectinload(Submission.signature), undefer(Submission.content)])
+        if submission is None:
+            return True
+        text = self.submission_text(submission, wait_for_files)
+        if text is None:
+            return False
+
+        normalized = normalize_text(text)
+        text_hash = hashlib.sha256(f"{self.num_perm}:{self.shingle_size}:{normalized}".encode('utf-8')).hexdigest()
+        if submission.signature and submission.signature.textHash == text_hash:
+            return True
+
+        hashes = shingles(normalized, self.shingle_size)
+        if self.hasher is None:
+            self.hasher = MinHasher(self.num_perm)
+        signature = self.hasher.signature(hashes)
+        now = datetime.utcnow()
+        db.session.execute(
+            upsert_statement(SubmissionSignature, ['submissionId'],
+                             ['signature', 'shingleCount', 'textHash', 'updatedAt']),
+            [{
+                'submissionId': submission.id,
+                'assignmentId': submission.assignmentId,
+                'signature': signature.tobytes(),
+                'shingleCount': len(hashes),
+                'textHash': text_hash,
+                'updatedAt': now,
+            }],
+        )
+        db.session.commit()
+        self._apply(submission.assignmentId, submission.id, signature, len(hashes))
+        return True
+
+    def _apply(self, assignment_id, submission_id, signature, shingle_count):
+        with self._indexes_lock:
+            index = self._indexes.get(assignment_id)
+        if index is None:
+            return
+        with index.lock:
+            if shingle_count < self.min_shingles:
+                index.remove(submission_id)
+            else:
+                index.add(submission_id, signature)
+
+    # --- 인덱스 / 보고서 ---
+    def _index_for(self, assignment_id):
+        with self._indexes_lock:
+            index = self._indexes.get(assignment_id)
+            if index is None:
+                index = AssignmentIndex(self.bands, self.num_perm // self.bands, self.threshold)
+                self._indexes[assignment_id] = index
+                while len(self._indexes) > self.max_indexes:
+                    self._indexes.popitem(last=False)
+            self._indexes.move_to_end(assignment_id)
+
+        np = _np()
+        # 마지막 동기화 이후 (다른 워커가 포함해) 바뀐 서명만 반영합니다.
+        # 커밋 순서와 updatedAt 순서가 다를 수 있으므로 (backend/search.py 의 _sync_users 처럼) 조금 겹쳐서 읽습니다.
+        with index.lock:
+            query = select(SubmissionSignature.submissionId, SubmissionSignature.signature,
+                           SubmissionSignature.shingleCount, SubmissionSignature.updatedAt) \
+                .where(SubmissionSignature.assignmentId == assignment_id)
+            if index.synced_at is not None:
+                query = query.where(SubmissionSignature.updatedAt >= index.synced_at - timedelta(minutes=1))
+            for submission_id, raw, shingle_count, updated_at in db.session.execute(query):
+                current = index.signatures.get(submission_id)
+                if current is not None and current.tobytes() == raw:
+                    pass    # 겹쳐 읽은 구간에서 이미 반영한 서명
+                elif shingle_count < self.min_shingles:
+                    index.remove(submission_id)
+                else:
+                    index.add(submission_id, np.frombuffer(raw, dtype=np.uint32))
+                if index.synced_at is None or updated_at > index.synced_at:
+                    index.synced_at = updated_at
+        return index
+
+    def forget(self, assignment_id):
+        """삭제된 과제의 인덱스를 메모리에서 내립니다."""
+        with self._indexes_lock:
+            self._indexes.pop(assignment_id, None)
+
+    def report(self, assignment_id, threshold=None):
+        """(분석된 제출물 수, [(submissionId, submissionId, 유사도)]) 를 유사도 내림차순으로 반환합니다."""
+        index = self._index_for(assignment_id)
+        threshold = max(threshold or self.threshold, self.threshold)
+        with index.lock:
+            pairs = [(a, b, s) for (a, b), s in index.pairs.items() if s >= threshold]
+            analyzed = len(index.signatures)
+        pairs.sort(key=lambda pair: -pair[2])
+        return analyzed, pairs
+
+
+similarity_engine = SimilarityEngine()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.similarity')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = subcommands.add_parser('rebuild', help='제출물의 MinHash 서명을 다시 계산합니다.')
+    rebuild_parser.add_argument('--assignment', help='이 과제의 제출물만 계산합니다.')
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+    # `python -m` 으로 실행하면 이 파일은 __main__ 이므로, 앱이 초기화한 backend.similarity 모듈을 사용합니다.
+    from backend import similarity
+    engine = similarity.similarity_engine
+    app = create_app()
+    with app.app_context():
+        query = select(Submission.id)
+        if args.assignment:
+            query = query.where(Submission.assignmentId == args.assignment)
+        submission_ids = db.session.scalars(query).all()
+        started = time.perf_counter()
+        for count, submission_id in enumerate(submission_ids, 1):
+            # 추출되지 않은 파일은 기다리지 않고 현재 텍스트로 계산합니다.
+            engine.update_signature(submission_id, wait_for_files=False)
+            if count % 1000 == 0:
+                print(f"  {count}/{len(submission_ids)}")
+        print(f"computed {len(submission_ids)} signatures in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,479 @@
+"""
+업로드 파일 저장소
+
+라우트는 디스크 경로 대신 저장소 키로 파일을 다룹니다.
+키는 '<prefix>/<fileUrl>' 형식이며 prefix 는 모델별로 정해집니다.
+fileUrl 은 과제/제출물 ID 의 해시로 두 단계 디렉토리를 나눈 'ab/cd/<ID>/<uuid>_<파일명>' 형식이므로
+한 디렉토리의 하위 항목이 256 개를 넘지 않습니다. (예: submissions/3f/a2/<submissionId>/<uuid>_a.pdf)
+
+- LocalStorage : app.root_path/uploads 아래에 저장합니다. (기존 디렉토리 구조와 동일)
+- S3Storage    : S3 호환 오브젝트 스토리지(AWS S3, MinIO 등)에 저장합니다.
+                 다운로드는 presigned URL 로 리다이렉트하므로 파일 내용이 Flask 를 거치지 않고,
+                 큰 파일은 멀티파트 업로드로 스트리밍합니다.
+
+    STORAGE_BACKEND=local                                     (기본값)
+    STORAGE_BACKEND=s3 S3_BUCKET=... S3_ENDPOINT_URL=http://localhost:9000 (MinIO)
+
+    python -m backend.storage migrate-layout    # 기존 '<ID>/...' 파일을 'ab/cd/<ID>/...' 로 옮깁니다.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from flask import Response, jsonify, redirect, send_file, stream_with_context
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 1024 * 1024
+
+# 모델(테이블 이름) → 저장소 키 prefix
+PREFIXES = {
+    'attachment': 'assignments',
+    'submissionfile': 'submissions',
+}
+PREVIEW_PREFIX = 'previews'
+
+
+def key_for(model, file_url):
+    """Attachment / SubmissionFile 행의 fileUrl 을 저장소 키로 바꿉니다."""
+    return f"{PREFIXES[model.__tablename__]}/{file_url}"
+
+
+def owner_dir(owner_id):
+    """과제/제출물 ID 의 디렉토리 'ab/cd/<ID>' (ab, cd 는 ID 의 sha1 앞 4자리)"""
+    digest = hashlib.sha1(owner_id.encode('utf-8')).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}/{owner_id}"
+
+
+def is_sharded(file_url):
+    parts = file_url.split('/')
+    return len(parts) > 3 and len(parts[0]) == 2 and len(parts[1]) == 2
+
+
+def sharded_file_url(file_url):
+    """이전 형식의 fileUrl('<ID>/<파일명>') 을 'ab/cd/<ID>/<파일명>' 으로 바꿉니다."""
+    if is_sharded(file_url):
+        return file_url
+    owner_id, _, rest = file_url.replace(os.sep, '/').partition('/')
+    return f"{owner_dir(owner_id)}/{rest}"
+
+
+def new_file_url(owner_id, original_filename):
+    """업로드 파일의 (저장할 파일명, fileUrl) 을 만듭니다. fileUrl 은 'ab/cd/<과제/제출물 ID>/<uuid>_<파일명>' 입니다."""
+    filename = secure_filename(original_filename)
+    return filename, f"{owner_dir(owner_id)}/{uuid.uuid4()}_{filename}"
+
+
+class HashingStream:
+    """읽는 동안 sha256 을 계산하는 스트림 래퍼 (저장하면서 내용 해시를 함께 얻습니다)"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.digest.update(data)
+        return data
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+
+def content_disposition(download_name):
+    # RFC 5987: 한글 파일명도 그대로 내려받을 수 있도록 filename* 을 함께 보냅니다.
+    fallback = download_name.encode('ascii', 'ignore').decode() or 'download'
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(download_name)}"
+
+
+class LocalStorage:
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = root
+
+    def config(self):
+        """다른 프로세스(미리보기 추출)에서 같은 저장소를 다시 만들기 위한 설정"""
+        return {'backend': 'local', 'root': self.root}
+
+    def path(self, key):
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"invalid storage key: {key}")
+        return path
+
+    def save(self, key, stream, content_type=None):
+        """스트림을 청크 단위로 저장하고 크기를 반환합니다. 다 쓴 뒤에 이름을 바꾸므로 반쯤 쓴 파일이 보이지 않습니다."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                shutil.copyfileobj(stream, out, CHUNK_SIZE)
+                size = out.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return size
+
+    def open(self, key):
+        try:
+            return open(self.path(key), 'rb')
+        except FileNotFoundError:
+            raise KeyError(key)
+
+    def read(self, key):
+        with self.open(key) as f:
+            return f.read()
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def copy(self, source_key, key):
+        """같은 파일 시스템이면 하드 링크로 복사하므로 파일 크기와 관계없이 즉시 끝납니다."""
+        source, target = self.path(source_key), self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not os.path.isfile(source):
+            raise KeyError(source_key)
+        try:
+            os.link(source, target)
+        except FileExistsError:
+            pass
+        except OSError:
+            with open(source, 'rb') as f:
+                self.save(key, f)
+
+    def delete(self, key):
+        path = self.path(key)
+        if os.path.exists(path):
+            os.remove(path)
+        # 비어 있는 상위 디렉토리도 정리합니다. (prefix 루트 폴더는 남겨 둡니다)
+        directory = os.path.dirname(path)
+        top = os.path.join(self.root, key.split('/', 1)[0])
+        while os.path.normpath(directory) != os.path.normpath(top) and directory.startswith(top):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+    def iter_keys(self, prefix):
+        """prefix 아래의 (키, 크기, 수정 시각) 을 스트리밍으로 돌려줍니다."""
+        stack = [self.path(prefix.rstrip('/'))]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and not entry.name.startswith('.tmp-'):
+                            stat = entry.stat(follow_symlinks=False)
+                            key = os.path.relpath(entry.path, self.root).replace(os.sep, '/')
+                            yield key, stat.st_size, stat.st_mtime
+            except FileNotFoundError:
+                continue
+
+    @contextmanager
+    def local_path(self, key):
+        """외부 도구에 넘길 로컬 파일 경로"""
+        if not self.exists(key):
+            raise KeyError(key)
+        yield self.path(key)
+
+    def presigned_url(self, key, download_name=None, expires=None):
+        return None
+
+    def download_response(self, key, download_name, mimetype=None, max_age=None, etag=None):
+        if not self.exists(key):
+            return jsonify(error="File not found on server"), 404
+        response = send_file(self.path(key), mimetype=mimetype, as_attachment=max_age is None,
+                             download_name=download_name, etag=etag if etag else True, max_age=max_age)
+        return response
+
+
+class S3Storage:
+    name = 's3'
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, access_key=None, secret_key=None,
+                 part_size=8 * 1024 * 1024, presign_expires=300, presigned_downloads=True):
+        import boto3
+        from botocore.config import Config as BotoConfig
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix else ''
+        self.part_size = part_size
+        self.presign_expires = presign_expires
+        self.presigned_downloads = presigned_downloads
+        self._settings = {'endpoint_url': endpoint_url, 'region': region,
+                          'access_key': access_key, 'secret_key': secret_key}
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=BotoConfig(signature_version='s3v4', retries={'max_attempts': 3, 'mode': 'standard'}),
+        )
+
+    def config(self):
+        return {'backend': 's3', 'bucket': self.bucket, 'prefix': self.prefix, 'part_size': self.part_size,
+                **self._settings}
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def save(self, key, stream, content_type=None):
+        """
+        part_size 보다 작으면 PUT 한 번으로, 크면 멀티파트 업로드로 스트리밍합니다.
+        요청 본문 전체를 메모리에 올리지 않습니다.
+        """
+        extra = {'ContentType': content_type} if content_type else {}
+        first = stream.read(self.part_size)
+        if len(first) < self.part_size:
+            self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=first, **extra)
+            return len(first)
+
+        upload_id = self.create_multipart_upload(key, content_type)
+        try:
+            parts, size, chunk, number = [], 0, first, 1
+            while chunk:
+                parts.append({'PartNumber': number, 'ETag': self.upload_part(key, upload_id, number, chunk)})
+                size += len(chunk)
+                number += 1
+                chunk = stream.read(self.part_size)
+            self.complete_multipart_upload(key, upload_id, parts)
+            return size
+        except BaseException:
+            self.abort_multipart_upload(key, upload_id)
+            raise
+
+    def open(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+        except self.client.exceptions.NoSuchKey:
+            raise KeyError(key)
+
+    def read(self, key):
+        with self.open(key) as body:
+            return body.read()
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def copy(self, source_key, key):
+        from botocore.exceptions import ClientError
+        # 5GB 가 넘는 객체는 boto3 가 멀티파트 복사로 처리합니다. (내용이 앱을 거치지 않습니다)
+        try:
+            self.client.copy({'Bucket': self.bucket, 'Key': self._key(source_key)}, self.bucket, self._key(key))
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                raise KeyError(source_key)
+            raise
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def iter_keys(self, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix.rstrip('/') + '/')):
+            for item in page.get('Contents', ()):
+                yield item['Key'][len(self.prefix):], item['Size'], item['LastModified'].timestamp()
+
+    @contextmanager
+    def local_path(self, key):
+        """외부 도구가 읽을 수 있도록 임시 파일로 내려받습니다."""
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(key)[1]) as tmp:
+            with self.open(key) as body:
+                shutil.copyfileobj(body, tmp, CHUNK_SIZE)
+            tmp.flush()
+            yield tmp.name
+
+    def presigned_url(self, key, download_name=None, expires=None):
+        params = {'Bucket': self.bucket, 'Key': self._key(key)}
+        if download_name:
+            params['ResponseContentDisposition'] = content_disposition(download_name)
+        return self.client.generate_presigned_url('get_object', Params=params,
+                                                  ExpiresIn=expires or self.presign_expires)
+
+    def download_response(self, key, download_name, mimetype=None, max_age=None, etag=None):
+        if self.presigned_downloads:
+            # 파일 내용은 클라이언트가 스토리지에서 직접 받습니다.
+            return redirect(self.presigned_url(key, download_name if max_age is None else None), code=302)
+        try:
+            body = self.open(key)
+        except KeyError:
+            return jsonify(error="File not found on server"), 404
+        response = Response(stream_with_context(body.iter_chunks(CHUNK_SIZE)),
+                            mimetype=mimetype or 'application/octet-stream')
+        if max_age is None:
+            response.headers['Content-Disposition'] = content_disposition(download_name)
+        else:
+            response.headers['Cache-Control'] = f'private, max-age={max_age}'
+        if etag:
+            response.set_etag(etag)
+        return response
+
+    # --- 멀티파트 업로드 ---
+    def create_multipart_upload(self, key, content_type=None):
+        extra = {'ContentType': content_type} if content_type else {}
+        return self.client.create_multipart_upload(Bucket=self.bucket, Key=self._key(key), **extra)['UploadId']
+
+    def upload_part(self, key, upload_id, part_number, data):
+        if hasattr(data, 'read'):
+            data = data.read()
+        return self.client.upload_part(Bucket=self.bucket, Key=self._key(key), UploadId=upload_id,
+                                       PartNumber=part_number, Body=data)['ETag']
+
+    def complete_multipart_upload(self, key, upload_id, parts):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self._key(key), UploadId=upload_id,
+            MultipartUpload={'Parts': sorted(parts, key=lambda part: part['PartNumber'])},
+        )
+
+    def abort_multipart_upload(self, key, upload_id):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=self._key(key), UploadId=upload_id)
+
+
+def create_driver(config):
+    """config() 로 얻은 설정으로 저장소를 만듭니다. (앱 컨텍스트가 없는 프로세스용)"""
+    if config['backend'] == 's3':
+        return S3Storage(config['bucket'], config.get('prefix', ''), config.get('endpoint_url'),
+                         config.get('region'), config.get('access_key'), config.get('secret_key'),
+                         part_size=config.get('part_size', 8 * 1024 * 1024))
+    return LocalStorage(config['root'])
+
+
+class Storage:
+    """설정된 저장소 드라이버로 호출을 넘기는 확장 객체"""
+
+    def __init__(self):
+        self.app = None
+        self.driver = None
+
+    def init_app(self, app):
+        self.app = app
+        backend = app.config.get('STORAGE_BACKEND', 'local')
+        if backend == 's3':
+            self.driver = S3Storage(
+                bucket=app.config['S3_BUCKET'],
+                prefix=app.config.get('S3_PREFIX') or '',
+                endpoint_url=app.config.get('S3_ENDPOINT_URL'),
+                region=app.config.get('S3_REGION'),
+                access_key=app.config.get('S3_ACCESS_KEY_ID'),
+                secret_key=app.config.get('S3_SECRET_ACCESS_KEY'),
+                part_size=app.config.get('S3_PART_SIZE', 8 * 1024 * 1024),
+                presign_expires=app.config.get('STORAGE_PRESIGN_EXPIRES', 300),
+                presigned_downloads=app.config.get('STORAGE_PRESIGNED_DOWNLOADS', True),
+            )
+        elif backend == 'local':
+            self.driver = LocalStorage(os.path.join(app.root_path, app.config.get('STORAGE_ROOT') or 'uploads'))
+        else:
+            raise ValueError(f"unknown STORAGE_BACKEND '{backend}'")
+        app.extensions['storage'] = self
+
+    def __getattr__(self, name):
+        # save / open / read / exists / delete / iter_keys / local_path / presigned_url / download_response / ...
+        if self.driver is None:
+            raise RuntimeError('storage is not initialised, call storage.init_app(app)')
+        return getattr(self.driver, name)
+
+
+storage = Storage()
+
+
+def migrate_layout(batch_size=500, pause=0.0, dry_run=False, log=print):
+    """
+    이전 형식('<ID>/...')의 업로드 파일을 'ab/cd/<ID>/...' 로 옮기고 fileUrl 을 갱신합니다.
+    서비스 중에 실행할 수 있도록 배치마다 '복사 → fileUrl 갱신 커밋 → 이전 파일 삭제' 순서로 진행하므로
+    어느 시점에 중단되어도 DB 가 가리키는 파일은 항상 존재하고, 다시 실행하면 이어서 진행합니다.
+    """
+    from sqlalchemy import select, update
+    from backend.extensions import db
+    from backend.reclaim import UPLOAD_MODELS
+
+    stats = {'moved': 0, 'missing': 0, 'skipped': 0}
+    for model in UPLOAD_MODELS:
+        last_id = ''
+        while True:
+            # 옮긴 행은 조건에서 빠지지만, 파일이 없는 행은 남으므로 ID 순으로 넘어갑니다.
+            rows = db.session.execute(
+                select(model.id, model.fileUrl)
+                .where(~model.fileUrl.like('__/__/%'), model.id > last_id)
+                .order_by(model.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            moved = []
+            for file_id, file_url in rows:
+                new_url = sharded_file_url(file_url)
+                old_key, new_key = key_for(model, file_url), key_for(model, new_url)
+                if storage.exists(old_key):
+                    if not dry_run:
+                        storage.copy(old_key, new_key)
+                elif not storage.exists(new_key):
+                    log(f"  missing {model.__tablename__} {file_id}: {file_url}")
+                    stats['missing'] += 1
+                    continue
+                moved.append((file_id, file_url, new_url))
+
+            if dry_run:
+                stats['moved'] += len(moved)
+                continue
+            for file_id, file_url, new_url in moved:
+                # 그 사이 다른 요청이 행을 바꿨다면 건너뜁니다. (새 복사본은 sweep 이 정리합니다)
+                result = db.session.execute(
+                    update(model).where(model.id == file_id, model.fileUrl == file_url).values(fileUrl=new_url)
+                )
+                if not result.rowcount:
+                    stats['skipped'] += 1
+            db.session.commit()
+            for file_id, file_url, new_url in moved:
+                storage.delete(key_for(model, file_url))
+            stats['moved'] += len(moved)
+            log(f"{model.__tablename__}: {stats['moved']} moved")
+            if pause:
+                time.sleep(pause)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.storage')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subcommands.add_parser('migrate-layout', help="업로드 파일을 'ab/cd/<ID>/' 디렉토리 구조로 옮깁니다.")
+    migrate_parser.add_argument('--batch-size', type=int, default=500, help='한 트랜잭션에서 옮길 파일 수')
+    migrate_parser.add_argument('--pause', type=float, default=0.0, help='배치 사이에 쉴 시간(초), 서비스 부하 조절용')
+    migrate_parser.add_argument('--dry-run', action='store_true', help='옮길 파일 수만 확인합니다.')
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+    # `python -m` 으로 실행하면 이 파일은 __main__ 이므로, 앱이 초기화한 backend.storage 모듈을 사용합니다.
+    from backend import storage as storage_module
+    app = create_app()
+    with app.app_context():
+        stats = storage_module.migrate_layout(args.batch_size, args.pause, args.dry_run)
+    print(f"moved   : {stats['moved']}{' [dry-run]' if args.dry_run else ''}")
+    print(f"missing : {stats['missing']}")
+    print(f"skipped : {stats['skipped']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
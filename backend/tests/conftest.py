@@ -0,0 +1,57 @@
+"""
+공용 픽스처: 임시 디렉토리의 SQLite 파일 DB 와 업로드 저장소를 쓰는 앱 (백그라운드 작업은 끕니다)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.app import create_app
+from backend.config import Config
+from backend.extensions import db
+from backend.models import Assignment, Course, Role, Submission, User, UserStatus
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        # intake 의 writer 스레드가 별도 연결을 쓰므로 메모리 DB 대신 파일 DB 를 씁니다.
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        STORAGE_BACKEND = 'local'
+        STORAGE_ROOT = str(tmp_path / 'uploads')
+        RATE_LIMIT_ENABLED = False
+        RATE_LIMIT_STORE_URL = None
+        IDEMPOTENCY_STORE_URL = None
+        JOBS_ENABLED = False
+        MAIL_ENABLED = False
+        MAIL_WORKER_ENABLED = False
+        PREVIEW_WORKERS = 0
+        SIMILARITY_ENABLED = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def submission_id(app):
+    """교수 한 명의 강의/과제에 학생 한 명이 낸 빈 제출물"""
+    professor = User(email='prof@office.kopo.ac.kr', password='x', name='교수', role=Role.PROFESSOR,
+                     status=UserStatus.APPROVED)
+    student = User(email='s0@office.kopo.ac.kr', password='x', name='학생', role=Role.STUDENT,
+                   status=UserStatus.APPROVED)
+    db.session.add_all([professor, student])
+    db.session.flush()
+    course = Course(name='강의', teacherId=professor.id)
+    db.session.add(course)
+    db.session.flush()
+    assignment = Assignment(title='과제', description='설명', dueDate=datetime.utcnow() + timedelta(days=1),
+                            maxScore=100, teacherId=professor.id, courseId=course.id)
+    db.session.add(assignment)
+    db.session.flush()
+    submission = Submission(assignmentId=assignment.id, studentId=student.id, content='')
+    db.session.add(submission)
+    db.session.commit()
+    return submission.id
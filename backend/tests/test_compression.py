@@ -0,0 +1,73 @@
+"""
+큰 Text 컬럼 압축(backend/compression.py) 테스트
+
+    python -m pytest backend/tests
+"""
+import pytest
+from sqlalchemy import select, text, type_coerce
+from sqlalchemy.types import NullType
+
+from backend.compression import MARKER, migrate, text_compression
+from backend.extensions import db
+from backend.models import Assignment, Submission
+
+LONG_TEXT = '반복되는 긴 제출 본문입니다. ' * 200
+
+
+def _stored(submission_id):
+    """컬럼 타입을 거치지 않은, DB 에 저장된 그대로의 값"""
+    return db.session.execute(
+        select(type_coerce(Submission.__table__.c.content, NullType())).where(Submission.id == submission_id)
+    ).scalar_one()
+
+
+def _content(submission_id):
+    return db.session.scalars(
+        select(Submission.content).where(Submission.id == submission_id).execution_options(populate_existing=True)
+    ).one()
+
+
+def test_only_values_over_the_threshold_are_compressed(app, monkeypatch):
+    assert text_compression.encode('짧은 글') == '짧은 글'.encode('utf-8')
+    packed = text_compression.encode(LONG_TEXT)
+    assert packed.startswith(MARKER) and len(packed) < len(LONG_TEXT.encode('utf-8'))
+    assert text_compression.decode(packed) == LONG_TEXT
+
+    # 코덱을 꺼도 이미 압축해 둔 값은 읽을 수 있습니다.
+    monkeypatch.setattr(text_compression, 'codec', 'none')
+    assert text_compression.encode(LONG_TEXT) == LONG_TEXT.encode('utf-8')
+    assert text_compression.decode(packed) == LONG_TEXT
+
+
+@pytest.mark.parametrize('legacy', [LONG_TEXT, LONG_TEXT.encode('utf-8')], ids=['text', 'utf8-bytes'])
+def test_legacy_values_are_read_and_migrated(app, submission_id, legacy):
+    # 컬럼 타입을 바꾸기 전 TEXT 값(str) 또는 타입만 바꾼 뒤의 UTF-8 바이트
+    db.session.execute(text('UPDATE submission SET content = :value WHERE id = :id'),
+                       {'value': legacy, 'id': submission_id})
+    db.session.commit()
+    assert _content(submission_id) == LONG_TEXT
+
+    stats = migrate(batch_size=1, dry_run=True, log=lambda message: None)
+    assert stats['submission.content']['compressed'] == 1
+    assert _stored(submission_id) == legacy
+
+    stats = migrate(batch_size=1, log=lambda message: None)
+    assert stats['submission.content']['compressed'] == 1
+    assert bytes(_stored(submission_id)).startswith(MARKER)
+    assert _content(submission_id) == LONG_TEXT
+
+    # 다시 실행하면 이미 압축한 행은 건너뜁니다.
+    assert migrate(log=lambda message: None)['submission.content']['compressed'] == 0
+
+
+def test_migrate_keeps_onupdate_columns(app, submission_id):
+    assignment = db.session.get(Submission, submission_id).assignment
+    updated_at = assignment.updatedAt
+    db.session.execute(text('UPDATE assignment SET description = :value WHERE id = :id'),
+                       {'value': LONG_TEXT, 'id': assignment.id})
+    db.session.commit()
+
+    stats = migrate(log=lambda message: None)
+
+    assert stats['assignment.description']['compressed'] == 1
+    assert db.session.scalars(select(Assignment.updatedAt).where(Assignment.id == assignment.id)).one() == updated_at
@@ -0,0 +1,93 @@
+"""
+Idempotency-Key 처리(backend/idempotency.py) 테스트
+
+    python -m pytest backend/tests
+"""
+import json
+
+import pytest
+from flask import g, jsonify, request
+
+from backend.idempotency import HEADER, fingerprint, idempotency_store, idempotent, scope_key
+
+USER_ID = 'user-1'
+
+
+@pytest.fixture
+def calls(app):
+    """@idempotent 가 붙은 테스트 라우트를 등록하고, 라우트가 실제로 실행된 요청 본문 목록을 돌려줍니다."""
+    calls = []
+
+    @idempotent
+    def echo():
+        calls.append(request.get_json())
+        if request.get_json().get('fail'):
+            return jsonify(error='boom'), 500
+        response = jsonify(count=len(calls))
+        response.status_code = 201
+        response.headers['Location'] = f"/items/{len(calls)}"
+        return response
+
+    def as_user():
+        g.user_id = USER_ID
+        return echo()
+
+    app.add_url_rule('/test/echo', 'test_echo', as_user, methods=['POST'])
+    return calls
+
+
+def _post(client, key, body):
+    return client.post('/test/echo', json=body, headers={HEADER: key})
+
+
+def test_retry_with_the_same_key_replays_the_first_response(app, calls):
+    client = app.test_client()
+    first = _post(client, 'k1', {'value': 1})
+    retry = _post(client, 'k1', {'value': 1})
+
+    assert len(calls) == 1
+    assert (retry.status_code, retry.get_json()) == (first.status_code, first.get_json()) == (201, {'count': 1})
+    assert retry.headers['Location'] == '/items/1'
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+
+    # 키가 다르면 새 요청입니다.
+    assert _post(client, 'k2', {'value': 1}).get_json() == {'count': 2}
+
+
+def test_same_key_with_a_different_body_is_rejected(app, calls):
+    client = app.test_client()
+    _post(client, 'k1', {'value': 1})
+    response = _post(client, 'k1', {'value': 2})
+
+    assert response.status_code == 422
+    assert len(calls) == 1
+
+
+def test_retry_while_the_first_request_is_in_flight_gets_409(app, calls, monkeypatch):
+    monkeypatch.setattr(idempotency_store, 'wait', 0)
+    body = {'value': 1}
+    # 처음 요청이 처리 중인 상태: 처리 중 표시만 있고 응답은 아직 없습니다.
+    key = scope_key(USER_ID, 'POST', '/test/echo', 'k1')
+    request_hash = fingerprint('POST', '/test/echo', '', body=json.dumps(body).encode('utf-8'))
+    assert idempotency_store.begin(key, request_hash) == ('proceed', None)
+
+    response = _post(app.test_client(), 'k1', body)
+
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    assert calls == []
+
+
+def test_server_errors_are_not_stored(app, calls):
+    client = app.test_client()
+    assert _post(client, 'k1', {'fail': True}).status_code == 500
+    assert _post(client, 'k1', {'fail': True}).status_code == 500
+    assert len(calls) == 2
+
+
+def test_requests_without_a_key_always_run(app, calls):
+    client = app.test_client()
+    client.post('/test/echo', json={'value': 1})
+    client.post('/test/echo', json={'value': 1})
+    assert len(calls) == 2
@@ -0,0 +1,131 @@
+"""
+제출 접수(backend/intake.py) 동시성 경로 테스트
+
+    python -m pytest backend/tests
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from backend.extensions import db
+from backend.intake import SubmissionIntake
+from backend.models import Assignment, Course, Role, Submission, User, UserStatus
+
+
+@pytest.fixture
+def assignment_and_students(app):
+    professor = User(email='prof@office.kopo.ac.kr', password='x', name='교수', role=Role.PROFESSOR,
+                     status=UserStatus.APPROVED)
+    students = [User(email=f"s{i}@office.kopo.ac.kr", password='x', name=f"학생{i}", role=Role.STUDENT,
+                     status=UserStatus.APPROVED) for i in range(3)]
+    db.session.add_all([professor, *students])
+    db.session.flush()
+    course = Course(name='강의', teacherId=professor.id)
+    db.session.add(course)
+    db.session.flush()
+    assignment = Assignment(title='과제', description='설명', dueDate=datetime.utcnow() + timedelta(days=1),
+                            maxScore=100, teacherId=professor.id, courseId=course.id)
+    db.session.add(assignment)
+    db.session.commit()
+    return assignment.id, [student.id for student in students]
+
+
+def _submissions(assignment_id):
+    # writer 스레드가 다른 세션에서 기록하므로 식별자 맵의 이전 값을 쓰지 않게 합니다.
+    return select(Submission).where(Submission.assignmentId == assignment_id).execution_options(populate_existing=True)
+
+
+def _intake(app, batch_size=50):
+    intake = SubmissionIntake()
+    intake.init_app(app)
+    intake.batch_size = batch_size
+    intake.wait_timeout = 5
+    return intake
+
+
+def _submit_in_thread(intake, results, assignment_id, student_id, content):
+    def run():
+        try:
+            results.append(intake.submit(assignment_id, student_id, content, datetime.utcnow()))
+        except Exception as e:
+            results.append(e)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.01)
+
+
+def test_pending_submissions_for_the_same_student_are_coalesced(app, assignment_and_students, monkeypatch):
+    assignment_id, (student_id, *_) = assignment_and_students
+    intake = _intake(app)
+    # writer 를 띄우지 않고 두 요청이 모두 대기열에 들어간 뒤 직접 한 번 기록합니다.
+    monkeypatch.setattr(intake, '_ensure_writer', lambda: None)
+
+    results = []
+    first = _submit_in_thread(intake, results, assignment_id, student_id, '첫 번째')
+    _wait_until(lambda: len(intake._pending) == 1)
+    second = _submit_in_thread(intake, results, assignment_id, student_id, '두 번째')
+    _wait_until(lambda: next(iter(intake._pending.values())).content == '두 번째')
+
+    batch = intake._take_batch()
+    assert len(batch) == 1
+    intake._write(batch)
+    first.join(5)
+    second.join(5)
+
+    assert len(results) == 2
+    assert results[0] == results[1]
+    assert results[0].created
+    rows = db.session.scalars(_submissions(assignment_id)).all()
+    assert [row.content for row in rows] == ['두 번째']
+
+
+def test_batch_failure_retries_rows_without_killing_the_writer(app, assignment_and_students, monkeypatch):
+    assignment_id, student_ids = assignment_and_students
+    intake = _intake(app)
+    write = SubmissionIntake._write
+    failing_student = student_ids[1]
+
+    def flaky_write(self, batch):
+        if len(batch) > 1:
+            # 일부 항목에 결과를 알린 뒤 실패: 다시 시도할 때 이 항목은 건너뛰어야 합니다.
+            write(self, batch[:1])
+            raise RuntimeError('batch failed')
+        if batch[0].student_id == failing_student:
+            raise RuntimeError('row failed')
+        write(self, batch)
+
+    monkeypatch.setattr(SubmissionIntake, '_write', flaky_write)
+
+    # writer 가 첫 항목만 꺼내 가지 않도록 세 건이 모두 대기열에 들어간 뒤 writer 를 띄웁니다.
+    ensure_writer = intake._ensure_writer
+    monkeypatch.setattr(intake, '_ensure_writer', lambda: None)
+    results = []
+    threads = [_submit_in_thread(intake, results, assignment_id, student_id, f"제출 {i}")
+               for i, student_id in enumerate(student_ids)]
+    _wait_until(lambda: len(intake._pending) == len(student_ids))
+    ensure_writer()
+    for thread in threads:
+        thread.join(5)
+
+    failures = [result for result in results if isinstance(result, Exception)]
+    assert len(results) == 3
+    assert [str(e) for e in failures] == ['row failed']
+    assert intake._writer.is_alive()
+
+    # writer 는 살아 있으므로 다음 제출도 기록됩니다.
+    assert intake.submit(assignment_id, student_ids[0], '재제출', datetime.utcnow()).created is False
+    saved = {row.studentId: row.content for row in db.session.scalars(_submissions(assignment_id))}
+    assert failing_student not in saved
+    assert saved[student_ids[0]] == '재제출'
+    assert saved[student_ids[2]] == '제출 2'
@@ -0,0 +1,82 @@
+"""
+요청 빈도 제한(backend/ratelimit.py) 테스트
+
+    python -m pytest backend/tests
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from backend import ratelimit
+from backend.ratelimit import Limit, RateLimiter, parse_limits
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """버킷이 읽는 시계를 테스트가 직접 움직입니다."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(ratelimit, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_parse_limits():
+    assert parse_limits('auth.login=10/minute, submissions=120/hours,') == {
+        'auth.login': Limit('auth.login', 10, 60),
+        'submissions': Limit('submissions', 120, 3600),
+    }
+    with pytest.raises(ValueError):
+        parse_limits('auth.login=10/fortnight')
+
+
+def test_endpoint_rule_wins_over_blueprint_and_default():
+    limiter = RateLimiter()
+    limiter.limits = parse_limits('auth.login=10/minute,auth=100/minute')
+    limiter.default = Limit('default', 600, 60)
+
+    assert limiter.limit_for('auth.login').name == 'auth.login'
+    assert limiter.limit_for('auth.register').name == 'auth'
+    assert limiter.limit_for('grades.get_my_grades').name == 'default'
+
+
+def test_bucket_refills_at_the_configured_rate(clock):
+    backend = ratelimit._MemoryBackend()
+    # 용량 2, 초당 0.5 개 (2/4초)
+    assert backend.take('k', 2, 0.5) == (True, 1)
+    assert backend.take('k', 2, 0.5) == (True, 0)
+    assert backend.take('k', 2, 0.5) == (False, 0)
+
+    clock.now += 1          # 0.5 개: 아직 부족합니다.
+    assert backend.take('k', 2, 0.5)[0] is False
+    clock.now += 1          # 1 개가 찼습니다.
+    assert backend.take('k', 2, 0.5)[0] is True
+
+    clock.now += 60         # 오래 쉬어도 용량 이상은 쌓이지 않습니다.
+    assert backend.take('k', 2, 0.5) == (True, 1)
+    # 버킷은 클라이언트별로 따로입니다.
+    assert backend.take('other', 2, 0.5) == (True, 1)
+
+
+def test_limited_requests_get_429_with_rate_limit_headers(app, clock):
+    app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMITS='test_limited=2/minute', RATE_LIMIT_DEFAULT='')
+    limiter = RateLimiter()
+    limiter.init_app(app)
+    app.add_url_rule('/test/limited', 'test_limited', lambda: 'ok')
+    client = app.test_client()
+
+    first = client.get('/test/limited')
+    assert first.status_code == 200
+    assert first.headers['RateLimit-Limit'] == '2'
+    assert first.headers['RateLimit-Remaining'] == '1'
+    assert first.headers['RateLimit-Policy'] == '2;w=60'
+    assert 'Retry-After' not in first.headers
+
+    assert client.get('/test/limited').status_code == 200
+    limited = client.get('/test/limited')
+    assert limited.status_code == 429
+    assert limited.headers['RateLimit-Remaining'] == '0'
+    # 초당 1/30 개씩 차므로 30초 뒤에 다음 요청이 허용됩니다.
+    assert limited.headers['Retry-After'] == '30'
+    assert limited.headers['RateLimit-Reset'] == '60'
+
+    clock.now += 30
+    assert client.get('/test/limited').status_code == 200
@@ -0,0 +1,108 @@
+"""
+업로드 저장소(backend/storage.py) 테스트. S3 드라이버는 moto 가 설치되어 있으면 moto 의 가짜 S3 로 확인합니다.
+
+    python -m pytest backend/tests
+"""
+import io
+import os
+
+import pytest
+
+from backend.extensions import db
+from backend.models import Submission, SubmissionFile
+from backend.storage import LocalStorage, key_for, migrate_layout, owner_dir, storage
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(str(tmp_path / 'root'))
+
+
+def _keys(driver, prefix):
+    return sorted(key for key, _, _ in driver.iter_keys(prefix))
+
+
+def test_local_round_trip_copy_and_delete(local):
+    assert local.save('submissions/ab/cd/s1/a.txt', io.BytesIO(b'hello')) == 5
+    assert local.read('submissions/ab/cd/s1/a.txt') == b'hello'
+
+    local.copy('submissions/ab/cd/s1/a.txt', 'versions/blobs/aa/bb/sha')
+    assert local.read('versions/blobs/aa/bb/sha') == b'hello'
+    assert _keys(local, 'submissions') == ['submissions/ab/cd/s1/a.txt']
+
+    local.delete('submissions/ab/cd/s1/a.txt')
+    assert not local.exists('submissions/ab/cd/s1/a.txt')
+    # 빈 상위 디렉토리는 지우고 prefix 루트 폴더는 남깁니다.
+    assert not os.path.exists(local.path('submissions/ab'))
+    assert os.path.isdir(os.path.join(local.root, 'submissions'))
+
+
+def test_local_missing_keys_and_invalid_paths(local):
+    with pytest.raises(KeyError):
+        local.open('submissions/nope')
+    with pytest.raises(KeyError):
+        local.copy('submissions/nope', 'submissions/other')
+    with pytest.raises(ValueError):
+        local.path('../outside')
+    assert _keys(local, 'previews') == []
+
+
+def test_migrate_layout_moves_old_files_and_is_resumable(app, submission_id):
+    old_url = f"{submission_id}/report.txt"
+    storage.save(key_for(SubmissionFile, old_url), io.BytesIO(b'report'))
+    moved = SubmissionFile(submissionId=submission_id, fileName='report.txt', fileUrl=old_url, fileSize=6,
+                           mimeType='text/plain')
+    missing = SubmissionFile(submissionId=submission_id, fileName='gone.txt', fileUrl=f"{submission_id}/gone.txt",
+                             fileSize=1, mimeType='text/plain')
+    db.session.add_all([moved, missing])
+    db.session.commit()
+    log = lambda message: None
+
+    assert migrate_layout(dry_run=True, log=log) == {'moved': 1, 'missing': 1, 'skipped': 0}
+    assert storage.exists(key_for(SubmissionFile, old_url))
+
+    assert migrate_layout(batch_size=1, log=log) == {'moved': 1, 'missing': 1, 'skipped': 0}
+    new_url = f"{owner_dir(submission_id)}/report.txt"
+    db.session.refresh(moved)
+    assert moved.fileUrl == new_url
+    assert storage.read(key_for(SubmissionFile, new_url)) == b'report'
+    assert not storage.exists(key_for(SubmissionFile, old_url))
+
+    # 다시 실행하면 옮길 파일이 없고, 파일이 없는 행은 그대로 둡니다.
+    assert migrate_layout(log=log) == {'moved': 0, 'missing': 1, 'skipped': 0}
+    assert db.session.get(Submission, submission_id) is not None
+
+
+@pytest.fixture
+def s3():
+    moto = pytest.importorskip('moto')
+    from backend.storage import S3Storage
+    with moto.mock_aws():
+        driver = S3Storage('bucket', prefix='app', region='us-east-1', access_key='test', secret_key='test',
+                           part_size=5 * 1024 * 1024)
+        driver.client.create_bucket(Bucket='bucket')
+        yield driver
+
+
+def test_s3_round_trip_multipart_copy_and_delete(s3):
+    assert s3.save('submissions/ab/cd/s1/a.txt', io.BytesIO(b'hello'), 'text/plain') == 5
+    assert s3.read('submissions/ab/cd/s1/a.txt') == b'hello'
+    # 객체는 prefix 아래에 저장됩니다.
+    assert s3.client.head_object(Bucket='bucket', Key='app/submissions/ab/cd/s1/a.txt')['ContentLength'] == 5
+
+    # part_size 이상이면 멀티파트 업로드로 나눠 올립니다.
+    large = b'x' * (s3.part_size + 10)
+    assert s3.save('submissions/ab/cd/s1/large.bin', io.BytesIO(large)) == len(large)
+    assert s3.read('submissions/ab/cd/s1/large.bin') == large
+
+    s3.copy('submissions/ab/cd/s1/a.txt', 'versions/blobs/aa/bb/sha')
+    assert _keys(s3, 'submissions') == ['submissions/ab/cd/s1/a.txt', 'submissions/ab/cd/s1/large.bin']
+    s3.delete('submissions/ab/cd/s1/a.txt')
+    assert not s3.exists('submissions/ab/cd/s1/a.txt')
+    with pytest.raises(KeyError):
+        s3.open('submissions/ab/cd/s1/a.txt')
+    with pytest.raises(KeyError):
+        s3.copy('submissions/ab/cd/s1/a.txt', 'submissions/other')
+
+    url = s3.presigned_url('versions/blobs/aa/bb/sha', '보고서.txt')
+    assert 'app/versions/blobs/aa/bb/sha' in url and 'response-content-disposition' in url
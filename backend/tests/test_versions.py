@@ -0,0 +1,90 @@
+"""
+제출물 버전 기록(backend/versions.py) 테스트
+
+    python -m pytest backend/tests
+"""
+import io
+import json
+
+from sqlalchemy import select
+
+from backend.extensions import db
+from backend.models import Submission, SubmissionFile, SubmissionVersion
+from backend.storage import key_for, new_file_url, storage
+from backend.versions import apply_delta, blob_key, diff_versions, encode_delta, submission_versions
+
+
+def _resubmit(submission_id, content):
+    db.session.get(Submission, submission_id).content = content
+    db.session.commit()
+    return submission_versions.record(submission_id)
+
+
+def _add_file(submission_id, filename, data):
+    filename, file_url = new_file_url(submission_id, filename)
+    size = storage.save(key_for(SubmissionFile, file_url), io.BytesIO(data))
+    submission_file = SubmissionFile(submissionId=submission_id, fileName=filename, fileUrl=file_url,
+                                     fileSize=size, mimeType='text/plain')
+    db.session.add(submission_file)
+    db.session.commit()
+    return submission_file
+
+
+def _encodings(submission_id):
+    return db.session.scalars(
+        select(SubmissionVersion.encoding).where(SubmissionVersion.submissionId == submission_id)
+        .order_by(SubmissionVersion.version)
+    ).all()
+
+
+def test_delta_round_trip():
+    source = '첫 줄\n둘째 줄\n셋째 줄\n'
+    target = '첫 줄\n바뀐 줄\n셋째 줄\n넷째 줄'
+    assert apply_delta(source, encode_delta(source, target)) == target
+    assert apply_delta(target, encode_delta(target, '')) == ''
+
+
+def test_older_versions_are_stored_as_reverse_deltas_and_restored(app, submission_id):
+    body = ''.join(f"{i}번째 문단입니다. 내용이 충분히 길어야 델타가 전체 내용보다 작습니다.\n" for i in range(40))
+    contents = [body, body + '추가 문단\n', body.replace('3번째', '세 번째') + '추가 문단\n', '']
+    for content in contents:
+        _resubmit(submission_id, content)
+
+    # 최신 버전만 전체 내용이고, 이전 버전은 다음 버전 기준 델타입니다. (빈 최신 본문에서의 델타는 더 크므로 전체 유지)
+    assert _encodings(submission_id) == ['delta', 'delta', 'full', 'full']
+    for number, content in enumerate(contents, start=1):
+        assert submission_versions.content(submission_id, number) == content
+    assert submission_versions.content(submission_id, len(contents) + 1) is None
+
+
+def test_snapshot_interval_bounds_the_delta_chain(app, submission_id, monkeypatch):
+    monkeypatch.setattr(submission_versions, 'snapshot_interval', 3)
+    body = ''.join(f"{i}번째 줄입니다. 델타가 전체 내용보다 작도록 충분히 길게 씁니다.\n" for i in range(40))
+    contents = [body + f"{n}회차 수정\n" for n in range(7)]
+    for content in contents:
+        _resubmit(submission_id, content)
+
+    # 3, 6 번째 버전은 전체 내용으로 남아 있어 복원할 때 그 이후의 델타를 읽지 않습니다.
+    assert _encodings(submission_id) == ['delta', 'delta', 'full', 'delta', 'delta', 'full', 'full']
+    for number, content in enumerate(contents, start=1):
+        assert submission_versions.content(submission_id, number) == content
+
+
+def test_unchanged_files_share_one_blob_and_missing_files_are_marked(app, submission_id):
+    report = _add_file(submission_id, 'report.txt', b'report v1')
+    first = _resubmit(submission_id, '본문')
+    (entry,) = json.loads(first.files)
+    assert storage.exists(blob_key(entry['sha256']))
+
+    notes = _add_file(submission_id, 'notes.txt', b'notes')
+    storage.delete(key_for(SubmissionFile, notes.fileUrl))
+    second = _resubmit(submission_id, '본문 수정')
+    files = {entry['filename']: entry for entry in json.loads(second.files)}
+    # 바뀌지 않은 파일은 다시 읽지 않고 이전 버전의 blob 을 그대로 씁니다.
+    assert files[report.fileName]['sha256'] == entry['sha256']
+    assert files[notes.fileName]['missing'] is True
+    assert files[notes.fileName]['sha256'] is None
+
+    diff = diff_versions(submission_id, 1, 2)
+    assert [f['filename'] for f in diff['files']['added']] == [notes.fileName]
+    assert '+본문 수정' in diff['content_diff']
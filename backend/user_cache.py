@@ -0,0 +1,73 @@
+"""
+현재 사용자 프로필의 프로세스 내 캐시
+
+인증이 필요한 모든 요청은 토큰의 사용자가 아직 승인(APPROVED) 상태인지 확인하는데,
+매번 User 를 조회하지 않도록 프로필(비밀번호 제외)을 USER_CACHE_TTL 초 동안 보관합니다.
+
+- 프로필/비밀번호 변경, 관리자의 승인/거부 라우트는 커밋 직후 invalidate() 를 호출하므로
+  같은 프로세스에서는 바로 반영됩니다.
+- 다른 워커 프로세스에는 최대 USER_CACHE_TTL 초 뒤에 반영됩니다.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import select
+
+from backend.extensions import db
+from backend.models import User, UserStatus
+
+UserProfile = namedtuple('UserProfile', 'id email name role status createdAt updatedAt')
+
+
+class UserCache:
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.clear()
+        app.extensions['user_cache'] = self
+
+    def peek(self, user_id):
+        """DB 를 조회하지 않고 캐시에 있는 프로필만 반환합니다."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def get(self, user_id):
+        """사용자 프로필을 반환합니다. 없는 사용자면 None 을 반환합니다. (앱 컨텍스트 필요)"""
+        profile = self.peek(user_id)
+        if profile is not None:
+            return profile
+
+        row = db.session.execute(
+            select(User.id, User.email, User.name, User.role, User.status, User.createdAt, User.updatedAt)
+            .where(User.id == user_id)
+        ).first()
+        if not row:
+            return None
+
+        profile = UserProfile(*row)
+        with self._lock:
+            self._entries[user_id] = (profile, time.monotonic() + self.ttl)
+        return profile
+
+    def is_approved(self, user_id):
+        profile = self.get(user_id)
+        return profile is not None and profile.status == UserStatus.APPROVED
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
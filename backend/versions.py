@@ -0,0 +1,289 @@
+"""
+제출물 버전 기록
+
+재제출할 때마다 본문과 파일 목록을 SubmissionVersion 으로 남깁니다.
+
+- 본문 : 최신 버전만 전체 내용을 zlib 으로 압축해 두고, 이전 버전은 바로 다음 버전에서 되돌아가는
+         줄 단위 역방향 델타로 바꿔 저장합니다. 저장 공간은 재제출 횟수가 아니라 수정한 양에 비례합니다.
+         SNAPSHOT_INTERVAL 번째 버전마다 전체 내용을 남겨 두므로 복원할 때 적용할 델타 수가 제한됩니다.
+- 파일 : 파일 목록(JSON)에는 sha256 만 기록하고, 내용은 'versions/blobs/ab/cd/<sha256>' 에 한 번만 저장합니다.
+         바뀌지 않은 파일은 이전 버전과 같은 blob 을 공유하며, 제출물에서 파일을 지워도 기록은 남습니다.
+         저장소에서 사라진 파일은 sha256 없이 'missing': true 로 기록하고, 다음 버전에서 다시 읽어 봅니다.
+
+    python -m backend.versions prune    # 어떤 버전도 참조하지 않는 파일 blob 정리
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import sys
+import time
+import zlib
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer, selectinload, undefer
+
+from backend.extensions import db
+from backend.models import ArchiveIndex, Submission, SubmissionFile, SubmissionVersion
+from backend.storage import key_for, storage
+
+BLOB_PREFIX = 'versions/blobs'
+
+
+def blob_key(sha):
+    return f"{BLOB_PREFIX}/{sha[:2]}/{sha[2:4]}/{sha}"
+
+
+def compress_text(text):
+    return zlib.compress(text.encode('utf-8'), 9)
+
+
+def decompress_text(data):
+    return zlib.decompress(data).decode('utf-8')
+
+
+def encode_delta(source, target):
+    """
+    source 로부터 target 을 만드는 줄 단위 델타를 압축해 반환합니다.
+    [시작, 끝] 은 source 의 줄 범위를 복사하고, 문자열은 그대로 삽입합니다.
+    """
+    source_lines = source.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, source_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j1 != j2:
+            ops.append(''.join(target_lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 9)
+
+
+def apply_delta(source, delta):
+    source_lines = source.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(delta)):
+        parts.append(op if isinstance(op, str) else ''.join(source_lines[op[0]:op[1]]))
+    return ''.join(parts)
+
+
+def version_to_dict(version):
+    return {
+        'version': version.version,
+        'submitted_at': version.submittedAt.isoformat(),
+        'content_length': version.contentLength,
+        'content_hash': version.contentHash,
+        'files': json.loads(version.files),
+    }
+
+
+class SubmissionVersions:
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.snapshot_interval = 32
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('SUBMISSION_VERSIONS_ENABLED', self.enabled)
+        self.snapshot_interval = app.config.get('SUBMISSION_VERSION_SNAPSHOT_INTERVAL', self.snapshot_interval)
+        app.extensions['submission_versions'] = self
+
+    def record(self, submission_id, file_hashes=None):
+        """
+        제출물의 현재 상태를 새 버전으로 기록합니다. 제출/파일 변경이 커밋된 뒤에 호출합니다.
+        file_hashes 에 업로드 중 계산한 {파일 ID: sha256} 을 넘기면 파일을 다시 읽지 않습니다.
+        기록에 실패해도 제출 요청은 실패시키지 않습니다.
+        """
+        if not self.enabled:
+            return None
+        for attempt in range(3):
+            try:
+                return self._record(submission_id, file_hashes or {})
+            except IntegrityError:
+                # 같은 제출물의 버전이 동시에 기록되었습니다. 새 최신 버전을 기준으로 다시 계산합니다.
+                db.session.rollback()
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error("Error recording version for submission %s: %s", submission_id, e)
+                return None
+        self.app.logger.error("Gave up recording version for submission %s", submission_id)
+        return None
+
+    def _record(self, submission_id, file_hashes):
+        submission = db.session.get(Submission, submission_id,
+                                    options=[selectinload(Submission.files), undefer(Submission.content)],
+                                    populate_existing=True)
+        if submission is None:
+            return None
+        head = db.session.scalars(
+            select(SubmissionVersion)
+            .where(SubmissionVersion.submissionId == submission_id)
+            .order_by(SubmissionVersion.version.desc())
+            .limit(1)
+            .with_for_update()
+        ).first()
+
+        content = submission.content or ''
+        previous_files = {entry['id']: entry for entry in json.loads(head.files)} if head else {}
+        files = [self._file_entry(file, previous_files.get(file.id), file_hashes.get(file.id))
+                 for file in sorted(submission.files, key=lambda file: file.uploadedAt)]
+
+        if head is not None and head.version % self.snapshot_interval:
+            # 이전 최신 버전을 새 내용 기준의 역방향 델타로 바꿉니다. (델타가 더 크면 전체 내용을 유지합니다)
+            delta = encode_delta(content, decompress_text(head.content))
+            if len(delta) < len(head.content):
+                head.encoding = 'delta'
+                head.content = delta
+
+        version = SubmissionVersion(
+            submissionId=submission_id,
+            version=head.version + 1 if head else 1,
+            submittedAt=submission.submittedAt,
+            encoding='full',
+            content=compress_text(content),
+            contentLength=len(content),
+            contentHash=hashlib.sha256(content.encode('utf-8')).hexdigest(),
+            files=json.dumps(files, ensure_ascii=False),
+        )
+        db.session.add(version)
+        db.session.commit()
+        return version
+
+    def _file_entry(self, submission_file, previous, sha):
+        """파일 목록 항목을 만들고, 처음 보는 내용이면 blob 으로 복사합니다."""
+        entry = {
+            'id': submission_file.id,
+            'filename': submission_file.fileName,
+            'sha256': None,
+            'file_size': submission_file.fileSize,
+            'content_type': submission_file.mimeType,
+        }
+        reused = previous is not None and not previous.get('missing')
+        if reused:
+            sha = previous['sha256']
+        key = key_for(SubmissionFile, submission_file.fileUrl)
+        try:
+            if sha is None:
+                digest = hashlib.sha256()
+                with storage.open(key) as f:
+                    while chunk := f.read(1024 * 1024):
+                        digest.update(chunk)
+                sha = digest.hexdigest()
+            if not reused and not storage.exists(blob_key(sha)):
+                storage.copy(key, blob_key(sha))
+        except KeyError:
+            # 업로드 정리(backend/reclaim.py)가 보고하는 누락 파일입니다. 파일 하나 때문에 버전 전체를 버리지 않습니다.
+            self.app.logger.warning("Missing file %s of submission %s", key, submission_file.submissionId)
+            return dict(entry, missing=True)
+        return dict(entry, sha256=sha)
+
+    def history(self, submission_id):
+        return db.session.scalars(
+            select(SubmissionVersion)
+            .options(defer(SubmissionVersion.content))
+            .where(SubmissionVersion.submissionId == submission_id)
+            .order_by(SubmissionVersion.version)
+        ).all()
+
+    def get(self, submission_id, number):
+        return db.session.scalars(
+            select(SubmissionVersion)
+            .where(SubmissionVersion.submissionId == submission_id, SubmissionVersion.version == number)
+        ).first()
+
+    def content(self, submission_id, number):
+        """버전의 본문을 복원합니다. 가장 가까운 전체 내용 버전에서 델타를 거꾸로 적용합니다."""
+        rows = db.session.execute(
+            select(SubmissionVersion.version, SubmissionVersion.encoding, SubmissionVersion.content)
+            .where(SubmissionVersion.submissionId == submission_id, SubmissionVersion.version >= number)
+            .order_by(SubmissionVersion.version)
+            .limit(self.snapshot_interval + 1)
+        ).all()
+        if not rows or rows[0].version != number:
+            return None
+        chain = []
+        for row in rows:
+            if row.encoding == 'full':
+                text = decompress_text(row.content)
+                break
+            chain.append(row.content)
+        else:
+            raise ValueError(f"version chain of submission {submission_id} has no full snapshot")
+        for delta in reversed(chain):
+            text = apply_delta(text, delta)
+        return text
+
+
+submission_versions = SubmissionVersions()
+
+
+def diff_versions(submission_id, old, new):
+    """두 버전의 본문 unified diff 와 파일 변경 목록을 반환합니다."""
+    old_version = submission_versions.get(submission_id, old)
+    new_version = submission_versions.get(submission_id, new)
+    if old_version is None or new_version is None:
+        return None
+    old_text = submission_versions.content(submission_id, old)
+    new_text = submission_versions.content(submission_id, new)
+    old_files = {entry['filename']: entry for entry in json.loads(old_version.files)}
+    new_files = {entry['filename']: entry for entry in json.loads(new_version.files)}
+    return {
+        'from': old,
+        'to': new,
+        'content_diff': ''.join(difflib.unified_diff(
+            old_text.splitlines(keepends=True), new_text.splitlines(keepends=True),
+            fromfile=f"v{old}", tofile=f"v{new}",
+        )),
+        'files': {
+            'added': [new_files[name] for name in new_files.keys() - old_files.keys()],
+            'removed': [old_files[name] for name in old_files.keys() - new_files.keys()],
+            'changed': [
+                new_files[name] for name in new_files.keys() & old_files.keys()
+                if new_files[name]['sha256'] != old_files[name]['sha256']
+            ],
+        },
+    }
+
+
+def prune(min_age=3600):
+    """
+    어떤 버전도 참조하지 않는 파일 blob 을 지웁니다.
+    기록 중인 버전이 방금 복사한 blob 을 지우지 않도록 min_age 초보다 최근 blob 은 남겨 둡니다.
+    """
+    referenced = set()
+    for files in db.session.scalars(select(SubmissionVersion.files).execution_options(yield_per=5000)):
+        referenced.update(entry['sha256'] for entry in json.loads(files) if entry['sha256'])
+    # 보관된 강의(backend/archive.py)의 버전이 참조하는 blob
+    referenced.update(db.session.scalars(select(ArchiveIndex.refId).where(ArchiveIndex.kind == 'versionblob')))
+
+    now, removed, removed_bytes = time.time(), 0, 0
+    for key, size, mtime in list(storage.iter_keys(BLOB_PREFIX)):
+        if key.rsplit('/', 1)[-1] in referenced or now - mtime < min_age:
+            continue
+        storage.delete(key)
+        removed += 1
+        removed_bytes += size
+    return removed, removed_bytes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.versions')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    prune_parser = subcommands.add_parser('prune', help='참조되지 않는 버전 파일 blob 을 정리합니다.')
+    prune_parser.add_argument('--min-age', type=int, default=3600, help='이 시간(초)보다 최근 blob 은 건너뜁니다.')
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+    # `python -m` 으로 실행하면 이 파일은 __main__ 이므로, 앱이 초기화한 backend.versions 모듈을 사용합니다.
+    from backend import versions
+    app = create_app()
+    with app.app_context():
+        removed, removed_bytes = versions.prune(args.min_age)
+    print(f"removed blobs : {removed} ({removed_bytes} bytes)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
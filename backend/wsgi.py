@@ -0,0 +1,12 @@
+"""
+운영 서버(gunicorn) 진입점
+
+    gunicorn -c backend/gunicorn.conf.py backend.wsgi:app
+"""
+from backend.app import create_app, warm_app
+
+app = create_app()
+
+# preload 모드에서는 이 모듈이 마스터 프로세스에서 import 됩니다.
+# 지연 로딩 대상까지 미리 불러 두어야 fork 된 워커들이 메모리를 공유합니다.
+warm_app(app)
@@ -5,6 +5,7 @@ import { Navbar } from './components/layout/Navbar';
 import Sidebar from './components/layout/Sidebar';
 import { LoginForm } from './components/auth/LoginForm';
 import { RegisterForm } from './components/auth/RegisterForm';
+import { ResetPasswordForm } from './components/auth/ResetPasswordForm';
 import { AssignmentList } from './components/assignments/AssignmentList';
 import { AssignmentDetails } from './components/assignments/AssignmentDetails';
 import { AssignmentForm } from './components/assignments/AssignmentForm';
@@ -86,6 +87,8 @@ const AppContent: React.FC = () => {
 
     return (
         <Routes>
+            {/* 비밀번호 재설정 메일의 링크는 로그인 여부와 관계없이 열 수 있어야 합니다. */}
+            <Route path="/reset-password" element={<ResetPasswordForm />} />
             {!user ? (
                 <>
                     <Route path="/login" element={<AuthPage />} />
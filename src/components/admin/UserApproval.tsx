@@ -15,12 +15,14 @@ export const UserApproval: React.FC = () => {
     const [pendingUsers, setPendingUsers] = useState<PendingUser[]>([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
+    const [totalCount, setTotalCount] = useState(0);
 
     const fetchPendingUsers = async () => {
         setLoading(true);
         try {
-            const { data } = await adminApi.getPendingUsers();
+            const { data, headers } = await adminApi.getPendingUsers();
             setPendingUsers(data || []);
+            setTotalCount(Number(headers['x-total-count'] ?? data?.length ?? 0));
         } catch (err) {
             setError('Failed to load pending users.');
             console.error(err);
@@ -53,6 +55,17 @@ export const UserApproval: React.FC = () => {
         }
     };
 
+    // 화면에 표시된 요청을 한 번에 승인합니다. (서버에서 UPDATE 한 번으로 처리)
+    const handleApproveAll = async () => {
+        if (!window.confirm(`Approve all ${pendingUsers.length} users shown?`)) return;
+        try {
+            await adminApi.bulkApprove({ ids: pendingUsers.map(user => user.id) });
+            fetchPendingUsers();
+        } catch (err) {
+            alert('Failed to approve users.');
+        }
+    };
+
     if (loading) return <p>사용자 로드 중...</p>;
     if (error) return <p className="text-red-500">{error}</p>;
 
@@ -61,6 +74,12 @@ export const UserApproval: React.FC = () => {
             <h3 className="text-xl font-bold text-gray-900 mb-4 flex items-center">
                 <Users className="w-6 h-6 mr-2" />
                 사용자 승인 요청
+                {totalCount > 0 && <span className="ml-2 text-sm font-normal text-gray-500">({totalCount})</span>}
+                {pendingUsers.length > 1 && (
+                    <Button size="sm" className="ml-auto" onClick={handleApproveAll}>
+                        <Check className="w-4 h-4 mr-1" /> 모두 승인
+                    </Button>
+                )}
             </h3>
             {pendingUsers.length === 0 ? (
                 <p className="text-gray-500">회원가입을 요청한 계정이 없습니다.</p>
@@ -1,8 +1,8 @@
 import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { assignmentApi, submissionApi } from '../../lib/api.ts';
+import { assignmentApi, dashboardApi } from '../../lib/api.ts';
 import { useAuth } from '../../contexts/AuthContext';
-import { Assignment, Submission } from '../../types';
+import { Assignment, DashboardAssignment } from '../../types';
 import { Card } from '../ui/Card';
 import { Badge } from '../ui/Badge';
 import { Button } from '../ui/Button';
@@ -20,8 +20,7 @@ export const AssignmentList: React.FC<AssignmentListProps> = ({
                                                               }) => {
     const { user } = useAuth();
     const navigate = useNavigate();
-    const [assignments, setAssignments] = useState<Assignment[]>([]);
-    const [submissions, setSubmissions] = useState<Submission[]>([]);
+    const [assignments, setAssignments] = useState<DashboardAssignment[]>([]);
     const [loading, setLoading] = useState(true);
     const [filter, setFilter] = useState<'모두' | '진행중' | '기한 경과' | '완료됨'>('모두');
 
@@ -30,18 +29,9 @@ export const AssignmentList: React.FC<AssignmentListProps> = ({
             if (!user) return;
             setLoading(true);
             try {
-                const assignmentPromise = assignmentApi.getAll();
-                const submissionPromise = user.role === 'STUDENT'
-                    ? submissionApi.getMySubmissions()
-                    : Promise.resolve({ data: [] });
-
-                const [assignmentResponse, submissionResponse] = await Promise.all([
-                    assignmentPromise,
-                    submissionPromise,
-                ]);
-
-                setAssignments(assignmentResponse.data || []);
-                setSubmissions(submissionResponse.data || []);
+                // 과제 목록과 제출 여부를 한 번의 요청으로 가져옵니다.
+                const response = await dashboardApi.get();
+                setAssignments(response.data.assignments || []);
             } catch (error) {
                 console.error('Error fetching data:', error);
             } finally {
@@ -69,7 +59,7 @@ export const AssignmentList: React.FC<AssignmentListProps> = ({
         navigate(`/assignments/${assignmentId}`);
     };
 
-    const completedAssignmentIds = new Set(submissions.map(sub => sub.assignment_id));
+    const completedAssignmentIds = new Set(assignments.filter(a => a.submission).map(a => a.id));
 
     const filteredAssignments = assignments.filter(assignment => {
         const isCompleted = completedAssignmentIds.has(assignment.id);
@@ -0,0 +1,91 @@
+import React, { useState } from 'react';
+import { Link, useSearchParams } from 'react-router-dom';
+import { authApi } from '../../lib/api';
+import { Button } from '../ui/Button';
+import { Card } from '../ui/Card';
+import { Input } from '../ui/Input';
+
+// 비밀번호 재설정 메일의 링크(/reset-password?token=...)로 들어오는 페이지
+export const ResetPasswordForm: React.FC = () => {
+  const [searchParams] = useSearchParams();
+  const token = searchParams.get('token') || '';
+  const [password, setPassword] = useState('');
+  const [confirmPassword, setConfirmPassword] = useState('');
+  const [isLoading, setIsLoading] = useState(false);
+  const [error, setError] = useState('');
+  const [done, setDone] = useState(false);
+
+  const handleSubmit = async (e: React.FormEvent) => {
+    e.preventDefault();
+    setError('');
+
+    if (password !== confirmPassword) {
+      setError('비밀번호가 일치하지 않습니다.');
+      return;
+    }
+
+    setIsLoading(true);
+    try {
+      await authApi.resetPassword(token, password);
+      setDone(true);
+    } catch (err: any) {
+      setError(err.response?.data?.error || '비밀번호를 재설정하지 못했습니다.');
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  return (
+      <div className="min-h-screen bg-gray-50 flex items-center justify-center p-8">
+        <Card className="w-full max-w-md">
+          <div className="text-center mb-8">
+            <h2 className="text-3xl font-bold text-gray-900">비밀번호 재설정</h2>
+            <p className="text-gray-600 mt-2">새로 사용할 비밀번호를 입력하세요.</p>
+          </div>
+
+          {!token ? (
+              <div className="bg-red-50 border border-red-200 text-red-700 px-4 py-3 rounded-md text-sm">
+                유효하지 않은 비밀번호 재설정 링크입니다. 메일의 링크를 다시 확인해 주세요.
+              </div>
+          ) : done ? (
+              <div className="space-y-6">
+                <div className="bg-green-50 border border-green-200 text-green-700 px-4 py-3 rounded-md text-sm">
+                  비밀번호가 재설정되었습니다. 새 비밀번호로 로그인하세요.
+                </div>
+                <Link to="/login" className="block text-center text-sm text-blue-600 hover:underline">
+                  로그인 화면으로
+                </Link>
+              </div>
+          ) : (
+              <form onSubmit={handleSubmit} className="space-y-6">
+                {error && (
+                    <div className="bg-red-50 border border-red-200 text-red-700 px-4 py-3 rounded-md text-sm">
+                      {error}
+                    </div>
+                )}
+
+                <Input
+                    label="새 비밀번호"
+                    type="password"
+                    value={password}
+                    onChange={(e) => setPassword(e.target.value)}
+                    placeholder="8자 이상, 대문자, 소문자, 숫자 포함"
+                    required
+                />
+                <Input
+                    label="새 비밀번호 확인"
+                    type="password"
+                    value={confirmPassword}
+                    onChange={(e) => setConfirmPassword(e.target.value)}
+                    required
+                />
+
+                <Button type="submit" className="w-full bg-black hover:bg-gray-800 text-white" isLoading={isLoading}>
+                  비밀번호 재설정
+                </Button>
+              </form>
+          )}
+        </Card>
+      </div>
+  );
+};
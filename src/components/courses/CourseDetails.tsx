@@ -2,24 +2,41 @@
 
 import { useEffect, useState } from 'react';
 import { useParams } from 'react-router-dom';
-import { getCourseDetails, enrollStudent, unenrollStudent, getAllStudents } from '../../lib/api';
+import { getCourseDetails, enrollStudent, unenrollStudent, searchStudents } from '../../lib/api';
 import { Course, User } from '../../types';
 import { Button } from '../ui/Button';
 import { Card } from '../ui/Card';
 
 const CourseDetails = () => {
     const [course, setCourse] = useState<Course | null>(null);
-    const [allStudents, setAllStudents] = useState<User[]>([]);
+    const [studentQuery, setStudentQuery] = useState('');
+    const [matchingStudents, setMatchingStudents] = useState<User[]>([]);
     const [selectedStudent, setSelectedStudent] = useState('');
     const { id } = useParams<{ id: string }>();
 
     useEffect(() => {
         if (id) {
             fetchCourseData();
-            fetchAllStudents();
         }
     }, [id]);
 
+    // 입력이 멈춘 뒤에만 검색합니다.
+    useEffect(() => {
+        if (!studentQuery.trim()) {
+            setMatchingStudents([]);
+            return;
+        }
+        const timer = setTimeout(async () => {
+            try {
+                const response = await searchStudents(studentQuery.trim(), 20);
+                setMatchingStudents(response.data);
+            } catch (error) {
+                console.error('Failed to search students', error);
+            }
+        }, 200);
+        return () => clearTimeout(timer);
+    }, [studentQuery]);
+
     const fetchCourseData = async () => {
         if (!id) return;
         try {
@@ -30,21 +47,13 @@ const CourseDetails = () => {
         }
     };
 
-    const fetchAllStudents = async () => {
-        try {
-            const response = await getAllStudents();
-            setAllStudents(response.data);
-        } catch (error) {
-            console.error('Failed to fetch students', error);
-        }
-    }
-
     const handleEnroll = async () => {
         if (!id || !selectedStudent) return;
         try {
             await enrollStudent(id, selectedStudent);
             fetchCourseData(); // 목록 새로고침
             setSelectedStudent('');
+            setStudentQuery('');
         } catch (error) {
             console.error('Failed to enroll student', error);
             alert('Failed to enroll student. They may already be enrolled.');
@@ -66,7 +75,7 @@ const CourseDetails = () => {
     if (!course) return <div>Loading...</div>;
 
     const enrolledStudentIds = course.students?.map(s => s.id) || [];
-    const availableStudents = allStudents.filter(s => !enrolledStudentIds.includes(s.id));
+    const availableStudents = matchingStudents.filter(s => !enrolledStudentIds.includes(s.id));
 
     return (
         <div className="space-y-6">
@@ -75,6 +84,13 @@ const CourseDetails = () => {
             <Card className="p-4">
                 <h2 className="text-xl font-semibold mb-4">Enroll New Student</h2>
                 <div className="flex items-center space-x-2">
+                    <input
+                        type="text"
+                        value={studentQuery}
+                        onChange={(e) => setStudentQuery(e.target.value)}
+                        placeholder="Search by name or email"
+                        className="block w-full p-2 border border-gray-300 rounded-md"
+                    />
                     <select
                         value={selectedStudent}
                         onChange={(e) => setSelectedStudent(e.target.value)}
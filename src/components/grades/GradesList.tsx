@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { gradeApi } from '../../lib/api';
+import { useServerEvents } from '../../lib/events';
 import { useAuth } from '../../contexts/AuthContext';
 import { Submission } from '../../types';
 import { Card } from '../ui/Card';
@@ -16,10 +17,13 @@ export const GradesList: React.FC = () => {
         fetchGradedSubmissions();
     }, [user]);
 
-    const fetchGradedSubmissions = async () => {
+    // 새 성적이 등록/수정되면 로딩 표시 없이 목록만 다시 가져옵니다. (폴링 대신)
+    useServerEvents(['grade.created', 'grade.updated'], () => fetchGradedSubmissions(true), user?.role === 'STUDENT');
+
+    const fetchGradedSubmissions = async (silent = false) => {
         if (!user) return;
 
-        setLoading(true);
+        if (!silent) setLoading(true);
         try {
             let response;
             if (user.role === 'STUDENT') {
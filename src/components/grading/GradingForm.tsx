@@ -1,7 +1,7 @@
 // src/components/grading/GradingForm.tsx
 
-import React, { useState } from 'react';
-import { gradeApi, fileApi } from '../../lib/api';
+import React, { useState, useRef } from 'react';
+import { gradeApi, fileApi, newIdempotencyKey } from '../../lib/api';
 import { Submission, Grade } from '../../types';
 import { Card } from '../ui/Card';
 import { Button } from '../ui/Button';
@@ -26,6 +26,8 @@ export const GradingForm: React.FC<GradingFormProps> = ({
     const [feedback, setFeedback] = useState(submission.grade?.feedback || '');
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState('');
+    // 응답을 받지 못해 다시 저장하면 같은 키를 보내 중복 채점을 막습니다. 응답을 받으면 새 키를 만듭니다.
+    const idempotencyKey = useRef(newIdempotencyKey());
 
     const maxPoints = submission.assignment?.max_points || 100;
 
@@ -42,9 +44,13 @@ export const GradingForm: React.FC<GradingFormProps> = ({
             const response = await gradeApi.gradeSubmission(submission.id, {
                 score: Number(score),
                 feedback,
-            });
+            }, idempotencyKey.current);
+            idempotencyKey.current = newIdempotencyKey();
             onGradingComplete(response.data);
         } catch (err: any) {
+            if (err.response && err.response.status !== 409) {
+                idempotencyKey.current = newIdempotencyKey();
+            }
             setError(err.response?.data?.error || 'Failed to submit grade.');
         } finally {
             setIsLoading(false);
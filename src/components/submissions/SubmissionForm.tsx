@@ -1,5 +1,5 @@
 import React, { useState, useRef, useEffect } from 'react';
-import { submissionApi } from '../../lib/api';
+import { submissionApi, newIdempotencyKey } from '../../lib/api';
 import { useAuth } from '../../contexts/AuthContext';
 import { Assignment, Submission } from '../../types';
 import { Button } from '../ui/Button';
@@ -25,6 +25,8 @@ export const SubmissionForm: React.FC<SubmissionFormProps> = ({
     const [isFetching, setIsFetching] = useState(true);
     const [error, setError] = useState('');
     const fileInputRef = useRef<HTMLInputElement>(null);
+    // 응답을 받지 못해 다시 제출하면 같은 키를 보내 중복 제출을 막습니다. 응답을 받으면 새 키를 만듭니다.
+    const idempotencyKey = useRef(newIdempotencyKey());
 
     const assignmentOverdue = isOverdue(assignment.due_date);
 
@@ -108,15 +110,19 @@ export const SubmissionForm: React.FC<SubmissionFormProps> = ({
                 // 기존 제출물 업데이트 (PUT 요청)
                 // 백엔드 API 명세에 따라 submissionApi.update(...) 등으로 변경 필요
                 // 여기서는 create를 사용하되, 백엔드에서 upsert 로직을 처리한다고 가정합니다.
-                response = await submissionApi.create(assignment.id, data);
+                response = await submissionApi.create(assignment.id, data, idempotencyKey.current);
             } else {
                 // 새 제출물 생성 (POST 요청)
-                response = await submissionApi.create(assignment.id, data);
+                response = await submissionApi.create(assignment.id, data, idempotencyKey.current);
             }
 
+            idempotencyKey.current = newIdempotencyKey();
             onSubmissionSaved(response.data);
             setSelectedFiles([]); // 성공 시 파일 목록 초기화
         } catch (err: any) {
+            if (err.response && err.response.status !== 409) {
+                idempotencyKey.current = newIdempotencyKey();
+            }
             const errorMessage = err.response?.data?.error || err.message || 'An error occurred';
             setError(errorMessage);
         } finally {
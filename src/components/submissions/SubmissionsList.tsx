@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { submissionApi, fileApi } from '../../lib/api';
+import { useServerEvents } from '../../lib/events';
 import { useAuth } from '../../contexts/AuthContext';
 import { Submission, Assignment } from '../../types';
 import { Card } from '../ui/Card';
@@ -26,9 +27,19 @@ export const SubmissionsList: React.FC<SubmissionsListProps> = ({
         fetchSubmissions();
     }, [user, assignment]);
 
-    const fetchSubmissions = async () => {
+    // 교수: 새 제출/재제출, 학생: 채점 결과가 들어오면 로딩 표시 없이 목록만 다시 가져옵니다.
+    useServerEvents(
+        user?.role === 'STUDENT' ? ['grade.created', 'grade.updated'] : ['submission.updated'],
+        (_, data) => {
+            if (assignment && data.assignmentId !== assignment.id) return;
+            fetchSubmissions(true);
+        },
+        !!user,
+    );
+
+    const fetchSubmissions = async (silent = false) => {
         if (!user) return;
-        setLoading(true);
+        if (!silent) setLoading(true);
 
         try {
             let response;
@@ -1,6 +1,6 @@
 // src/lib/api.ts
 import axios from 'axios';
-import { Assignment, Submission, Grade, User, AssignmentFile, QALog } from '../types';
+import { Assignment, Submission, Grade, User, AssignmentFile, QALog, Dashboard, DocumentPreview, SubmissionVersion, SubmissionVersionDiff } from '../types';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000/api';
 
@@ -29,10 +29,23 @@ api.interceptors.response.use(
     }
 );
 
+// 제출/채점처럼 재시도 시 중복되면 안 되는 요청에 붙이는 헤더
+// 같은 사용자 동작을 재시도할 때는 같은 키를, 새 동작에는 newIdempotencyKey() 로 새 키를 사용합니다.
+export const newIdempotencyKey = () => crypto.randomUUID();
+const idempotencyHeaders = (key?: string) => (key ? { 'Idempotency-Key': key } : {});
+
 export const authApi = {
   login: (data: any) => api.post('/auth/login', data),
   register: (data: any) => api.post('/auth/register', data),
   getCurrentUser: () => api.get<{ user: User }>('/auth/me'),
+  // 가입 여부와 관계없이 같은 응답이 옵니다. 메일의 링크에 token 이 있습니다.
+  forgotPassword: (email: string) => api.post('/auth/forgot-password', { email }),
+  resetPassword: (token: string, newPassword: string) => api.post('/auth/reset-password', { token, newPassword }),
+};
+
+// 첫 화면용 집계 API (사용자 정보, 과제 목록, 역할별 제출/채점 현황을 한 번에)
+export const dashboardApi = {
+  get: () => api.get<Dashboard>('/dashboard'),
 };
 
 export const assignmentApi = {
@@ -44,6 +57,13 @@ export const assignmentApi = {
   update: (id: string, data: Partial<Assignment>) => api.put<Assignment>(`/assignments/${id}`, data),
   delete: (id: string) => api.delete(`/assignments/${id}`),
   getFiles: (assignmentId: string) => api.get<AssignmentFile[]>(`/assignments/${assignmentId}/files`),
+  getAttachmentPreview: (attachmentId: string) =>
+      api.get<DocumentPreview>(`/assignments/attachments/${attachmentId}/preview`),
+  // 제출/채점 현황 요약 (교수/관리자용, 마감된 과제는 미리 계산된 결과)
+  getSummary: (id: string) => api.get(`/assignments/${id}/summary`),
+  // 모든 제출 파일 ZIP (학생별 폴더)
+  downloadSubmissionsZip: (id: string) =>
+      api.get<Blob>(`/assignments/${id}/submissions.zip`, { responseType: 'blob' }),
 };
 
 // 제출 관련 API
@@ -58,18 +78,28 @@ export const submissionApi = {
   // 특정 과제에 대한 학생 제출물 가져오기
   getStudentSubmissionForAssignment: (assignmentId: string) =>
       api.get<Submission>(`/assignments/${assignmentId}/my-submission`), // 예시 엔드포인트
-  create: (assignmentId: string, data: FormData) =>
+  create: (assignmentId: string, data: FormData, idempotencyKey?: string) =>
       api.post<Submission>(`/assignments/${assignmentId}/submit-with-files`, data, {
-        headers: { 'Content-Type': 'multipart/form-data' },
+        headers: { 'Content-Type': 'multipart/form-data', ...idempotencyHeaders(idempotencyKey) },
       }),
   getAllSubmissions: () => api.get<Submission[]>('/submissions/'),
+  // PDF/HWP 제출 파일 미리보기 (추출 중이면 202 응답)
+  getFilePreview: (fileId: string) => api.get<DocumentPreview>(`/submissions/files/${fileId}/preview`),
+  getFileThumbnail: (fileId: string) => api.get<Blob>(`/submissions/files/${fileId}/thumbnail`, { responseType: 'blob' }),
+  // 재제출 기록
+  getVersions: (submissionId: string) => api.get<SubmissionVersion[]>(`/submissions/${submissionId}/versions`),
+  getVersion: (submissionId: string, version: number) =>
+      api.get<SubmissionVersion>(`/submissions/${submissionId}/versions/${version}`),
+  diffVersions: (submissionId: string, from?: number, to?: number) =>
+      api.get<SubmissionVersionDiff>(`/submissions/${submissionId}/versions/diff`, { params: { from, to } }),
 };
 
 export const gradeApi = {
   // 학생의 모든 성적 가져오기
   getMyGrades: () => api.get<Submission[]>('/grades/my-grades'), // 제출물에 성적이 포함되어 반환
   // 특정 제출물 채점하기
-  gradeSubmission: (submissionId: string, data: { score: number, feedback: string }) => api.post<Grade>(`/submissions/${submissionId}/grade`, data),
+  gradeSubmission: (submissionId: string, data: { score: number, feedback: string }, idempotencyKey?: string) =>
+      api.post<Grade>(`/submissions/${submissionId}/grade`, data, { headers: idempotencyHeaders(idempotencyKey) }),
 };
 
 // Q&A 관련 API
@@ -82,15 +112,19 @@ export const qaLogApi = {
 
 // 파일 관련 API
 export const fileApi = {
-  download: async (type: string, filePath: string): Promise<Blob> => {
+  // 다운로드할 수 있는 URL 을 반환합니다.
+  // 오브젝트 스토리지를 쓰면 presigned URL 을, 로컬 저장소면 받은 파일의 object URL 을 반환합니다.
+  download: async (type: string, filePath: string): Promise<string> => {
     try {
-      // POST -> GET으로 변경, 요청 본문(body) -> URL 파라미터(params)로 변경
+      const { data } = await api.get('/files/download-url', { params: { type, filePath } });
+      if (data.url) {
+        return data.url;
+      }
       const response = await api.get('/files/download', {
         params: { type, filePath },
         responseType: 'blob',
       });
-      // URL.createObjectURL(response.data) 대신 받은 데이터 자체를 반환
-      return response.data;
+      return URL.createObjectURL(response.data);
     } catch (error) {
       console.error('File download failed:', error);
       throw error;
@@ -98,20 +132,59 @@ export const fileApi = {
   },
 };
 
+// 과제별 유사 제출물 보고서 (교수/관리자)
+export const similarityApi = {
+  getReport: (assignmentId: string, threshold?: number) =>
+      api.get(`/similarity/assignments/${assignmentId}`, { params: { threshold } }),
+};
+
+// 일괄 승인/거부 대상: ID 목록 또는 필터 (email 은 '*' 와일드카드, 예: '*@office.kopo.ac.kr')
+export interface UserBulkTarget {
+  ids?: string[];
+  filter?: { role?: string; email?: string; createdBefore?: string };
+  dryRun?: boolean;
+}
+
 export const adminApi = {
-  getPendingUsers: () => api.get<any[]>('/admin/pending-users'),
+  // 전체 개수는 X-Total-Count 응답 헤더로 옵니다.
+  getPendingUsers: (params?: { limit?: number; offset?: number; role?: string; email?: string; createdBefore?: string }) =>
+      api.get<any[]>('/admin/pending-users', { params }),
   approveUser: (userId: string) => api.post(`/admin/users/${userId}/approve`),
   rejectUser: (userId: string) => api.post(`/admin/users/${userId}/reject`),
+  bulkApprove: (target: UserBulkTarget) => api.post<{ updated: number }>('/admin/users/bulk-approve', target),
+  bulkReject: (target: UserBulkTarget) => api.post<{ updated: number }>('/admin/users/bulk-reject', target),
+  // 요청 프로파일: 관리자가 X-Profile: 1 헤더로 보낸 요청의 결과 (응답의 X-Profile-ID 가 id)
+  getProfiles: () => api.get<any[]>('/admin/profiles'),
+  getProfile: (profileId: string) => api.get(`/admin/profiles/${profileId}`),
+  downloadFlamegraph: (profileId: string) =>
+      api.get(`/admin/profiles/${profileId}/flamegraph`, { responseType: 'blob' }),
+  // 메일 대기열 상태 (상태별 수, 가장 오래 기다린 메일, 최근 실패)
+  getMailQueue: () => api.get('/admin/mail'),
+};
+
+// 백그라운드 작업 상태 (큰 과제/강의 삭제는 202 와 jobId 를 반환합니다)
+export const jobApi = {
+  get: (jobId: string) => api.get(`/jobs/${jobId}`),
 };
 
 // Course API
 export const getCourses = () => api.get('/api/courses');
+// 강의 이름 접두어 검색 (자동완성)
+export const searchCourses = (q: string, limit = 10) => api.get('/api/courses', { params: { q, limit } });
 export const getCourseDetails = (id: string) => api.get(`/api/courses/${id}`);
 export const createCourse = (data: { name: string }) => api.post('/courses', data);
 export const updateCourse = (id: string, data: { name: string }) => api.put(`/courses/${id}`, data);
 export const deleteCourse = (id: string) => api.delete(`/api/courses/${id}`);
 export const enrollStudent = (courseId: string, studentId: string) => api.post(`/api/courses/${courseId}/enroll`, { studentId });
+// CSV 명단(email, name[, password])으로 학생 계정 생성 및 일괄 등록. 행별 오류는 응답의 errors 에 담깁니다.
+export const importRoster = (courseId: string, file: File) => {
+  const data = new FormData();
+  data.append('file', file);
+  return api.post(`/api/courses/${courseId}/roster`, data, { headers: { 'Content-Type': 'multipart/form-data' } });
+};
 export const unenrollStudent = (courseId: string, studentId: string) => api.delete(`/api/courses/${courseId}/unenroll`, { data: { studentId } });
 export const getAllStudents = () => api.get('/api/users/students');
+// 학생 이름/이메일 접두어 검색 (자동완성, 한글 초성 지원)
+export const searchStudents = (q: string, limit = 10) => api.get('/api/users/students', { params: { q, limit } });
 
 export default api;
\ No newline at end of file
@@ -0,0 +1,46 @@
+// src/lib/events.ts
+import { useEffect, useRef } from 'react';
+
+const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000/api';
+
+export type ServerEventType = 'grade.created' | 'grade.updated' | 'submission.updated' | 'qa_log.created';
+
+export interface ServerEvent {
+  submissionId?: string;
+  assignmentId?: string;
+  gradeId?: string;
+  studentId?: string;
+  qaLogId?: string;
+  created?: boolean;
+}
+
+// 서버 이벤트(SSE)를 구독합니다. EventSource 는 헤더를 보낼 수 없으므로 토큰은 쿼리로 전달합니다.
+// 연결이 끊기면 브라우저가 자동으로 재연결합니다.
+export const useServerEvents = (
+    types: ServerEventType[],
+    onEvent: (type: ServerEventType, data: ServerEvent) => void,
+    enabled = true,
+) => {
+  const handlerRef = useRef(onEvent);
+  handlerRef.current = onEvent;
+  const typesKey = types.join(',');
+
+  useEffect(() => {
+    const token = localStorage.getItem('token');
+    if (!enabled || !token || typeof EventSource === 'undefined') return;
+
+    const source = new EventSource(`${API_URL}/events/stream?token=${encodeURIComponent(token)}`);
+    const listeners = typesKey.split(',').map((type) => {
+      const listener = (event: MessageEvent) => {
+        handlerRef.current(type as ServerEventType, JSON.parse(event.data));
+      };
+      source.addEventListener(type, listener);
+      return [type, listener] as const;
+    });
+
+    return () => {
+      listeners.forEach(([type, listener]) => source.removeEventListener(type, listener));
+      source.close();
+    };
+  }, [typesKey, enabled]);
+};
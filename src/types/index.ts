@@ -20,6 +20,25 @@ export interface Assignment {
   attachment_count?: number;
 }
 
+// /api/dashboard 응답의 과제 항목 (역할에 따라 일부 필드만 포함)
+export interface DashboardAssignment extends Assignment {
+  submission?: {
+    id: string;
+    submitted_at: string;
+    status: 'PENDING' | 'GRADED' | 'RETURNED';
+    grade: { id: string; points: number; graded_at: string } | null;
+  } | null;
+  submission_count?: number;
+  ungraded_count?: number;
+}
+
+export interface Dashboard {
+  user: User;
+  assignments: DashboardAssignment[];
+  ungraded_total?: number;
+  pending_user_count?: number;
+}
+
 export interface AssignmentFile {
   id: string;
   assignment_id: string;
@@ -43,6 +62,46 @@ export interface Submission {
   grade?: Grade;
 }
 
+export interface DocumentPreview {
+  status: 'ready' | 'pending' | 'failed' | 'unsupported';
+  kind?: 'pdf' | 'hwp' | 'hwpx';
+  pages?: number | null;
+  text?: string;
+  truncated?: boolean;
+  thumbnailUrl?: string | null;
+  error?: string;
+}
+
+export interface SubmissionVersionFile {
+  id: string;
+  filename: string;
+  sha256: string | null;
+  // 버전을 기록할 때 저장소에 파일이 없었습니다. (내려받을 수 없음)
+  missing?: boolean;
+  file_size: number;
+  content_type: string;
+}
+
+export interface SubmissionVersion {
+  version: number;
+  submitted_at: string;
+  content_length: number;
+  content_hash: string;
+  files: SubmissionVersionFile[];
+  content?: string;
+}
+
+export interface SubmissionVersionDiff {
+  from: number;
+  to: number;
+  content_diff: string;
+  files: {
+    added: SubmissionVersionFile[];
+    removed: SubmissionVersionFile[];
+    changed: SubmissionVersionFile[];
+  };
+}
+
 export interface SubmissionFile {
   id: string;
   submission_id: string;